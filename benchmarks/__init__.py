@@ -0,0 +1 @@
+"""Benchmark suite — synthetic inputs (synthetic.py), timing runner (run.py) and load test (load.py)."""
@@ -0,0 +1,444 @@
+"""
+Test de charge — quart de nuit complet + tableaux de bord du matin.
+
+Usage:
+    python -m benchmarks.load run --serve                       # Serveur local sur base synthétique temporaire
+    python -m benchmarks.load run --serve --auditors 4 --managers 8 --duration 120
+    python -m benchmarks.load run --url http://127.0.0.1:5000 --start-date 2025-06-16
+    python -m benchmarks.load seed chemin/charge.db [--years 2]  # Base synthétique pour un serveur externe
+
+Options de run:
+    --auditors N        Auditeurs simultanés (défaut 3)
+    --managers N        Gestionnaires simultanés (défaut 6)
+    --duration S        Durée en secondes (défaut 60)
+    --think S           Pause moyenne entre deux actions d'un utilisateur (défaut 0.2)
+    --years N           Historique synthétique pour --serve (défaut 2)
+    --auditor nom:mdp   Compte auditeur (défaut: compte par défaut de seed_db)
+    --manager nom:mdp   Compte gestionnaire (défaut: compte par défaut de seed_db)
+    --start-date AAAA-MM-JJ   Première nuit simulée (défaut: lendemain de l'historique)
+    --metrics-token T   Jeton METRICS_TOKEN du serveur, pour lire /metrics
+    --output res.json   Rapport JSON
+
+Flux simulés (un fil par utilisateur):
+- auditeur: import du RJ de la veille → sauvegarde de chaque onglet →
+  calcul → soumission → export PDF, puis la nuit suivante
+- gestionnaire: /api/manager/overview, /api/crm/*, /api/direction/* en boucle
+
+Rapport par route: requêtes, taux d'erreur, latence p50 / p95 / p99 côté
+client et attentes du verrou d'écriture SQLite côté serveur (différence de
+/metrics avant / après, METRICS_ENABLED requis).
+
+Le run échoue (code de sortie 1) si une route de ERROR_FREE_ROUTES renvoie
+la moindre erreur: les tableaux de bord ne font que lire et doivent tenir la
+charge sans 500.
+
+--serve démarre l'application dans ce processus (serveur werkzeug threadé):
+pratique, mais le client et le serveur partagent le GIL. Pour des chiffres
+représentatifs, lancer le serveur à part (gunicorn, plusieurs workers) sur une
+base créée par `seed` et utiliser --url.
+"""
+
+import io
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import requests
+
+from benchmarks import synthetic
+
+DEFAULT_AUDITOR = ('Auditeur', 'audit2026')
+DEFAULT_MANAGER = ('Manager', 'manager2026')
+
+# (route, query string)
+MANAGER_PAGES = [
+    ('/api/manager/overview', ''),
+    ('/api/crm/dashboard', ''),
+    ('/api/crm/kpis', ''),
+    ('/api/crm/revenue-trend', ''),
+    ('/api/direction/dashboard', f'?date={synthetic.END_DAY.isoformat()}'),
+    ('/api/direction/overview', ''),
+    ('/api/direction/trends', ''),
+    ('/api/direction/monthly-summary', ''),
+]
+
+# Read-only dashboards: any error under load is a bug
+ERROR_FREE_ROUTES = ('/api/crm/dashboard',)
+
+LOCK_METRICS = {
+    'audit_db_write_transactions_total': 'write_transactions',
+    'audit_db_lock_wait_seconds_total': 'lock_wait_s',
+    'audit_db_lock_errors_total': 'lock_errors',
+}
+_METRIC_RE = re.compile(r'^(\w+)\{endpoint="((?:[^"\\]|\\.)*)"\} (\S+)$')
+
+
+# ── Results ───────────────────────────────────────────────────────────
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class Recorder:
+    """Thread-safe latency / error store keyed by route pattern."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}   # route → [ms]
+        self.errors = {}    # route → {status or exception name: count}
+        self.shifts = 0
+
+    def add(self, route, ms, error=None):
+        with self._lock:
+            self.samples.setdefault(route, []).append(ms)
+            if error is not None:
+                bucket = self.errors.setdefault(route, {})
+                bucket[error] = bucket.get(error, 0) + 1
+
+    def shift_done(self):
+        with self._lock:
+            self.shifts += 1
+
+    def summary(self, elapsed, locks=None):
+        locks = locks or {}
+        routes = {}
+        for route in sorted(self.samples):
+            values = sorted(self.samples[route])
+            errors = sum(self.errors.get(route, {}).values())
+            entry = {
+                'requests': len(values),
+                'errors': errors,
+                'error_rate': round(errors / len(values), 4),
+                'error_kinds': self.errors.get(route, {}),
+                'p50_ms': round(percentile(values, 50), 1),
+                'p95_ms': round(percentile(values, 95), 1),
+                'p99_ms': round(percentile(values, 99), 1),
+                'max_ms': round(values[-1], 1),
+            }
+            lock = locks.get(route)
+            if lock:
+                n = lock.get('write_transactions', 0)
+                entry.update({
+                    'write_transactions': int(n),
+                    'lock_wait_ms_total': round(lock.get('lock_wait_s', 0) * 1000, 1),
+                    'lock_wait_ms_mean': round(lock.get('lock_wait_s', 0) * 1000 / n, 2) if n else None,
+                    'lock_errors': int(lock.get('lock_errors', 0)),
+                })
+            routes[route] = entry
+        total = sum(len(v) for v in self.samples.values())
+        return {
+            'elapsed_s': round(elapsed, 1),
+            'requests': total,
+            'throughput_rps': round(total / elapsed, 2) if elapsed else None,
+            'errors': sum(r['errors'] for r in routes.values()),
+            'shifts_submitted': self.shifts,
+            'routes': routes,
+        }
+
+
+def check(result):
+    """Failed load assertions (French messages); empty when the run passes."""
+    failures = []
+    for route in ERROR_FREE_ROUTES:
+        r = result['routes'].get(route)
+        if r is None:
+            failures.append(f"{route}: aucune requête")
+        elif r['errors']:
+            failures.append(f"{route}: {r['errors']} erreur(s) sur {r['requests']} "
+                            f"({', '.join(f'{k}×{n}' for k, n in r['error_kinds'].items())})")
+    return failures
+
+
+def parse_lock_metrics(text):
+    """/metrics body → {route: {write_transactions, lock_wait_s, lock_errors}}."""
+    result = {}
+    for line in text.splitlines():
+        match = _METRIC_RE.match(line)
+        if match and match.group(1) in LOCK_METRICS:
+            route = match.group(2).replace('\\"', '"').replace('\\\\', '\\')
+            result.setdefault(route, {})[LOCK_METRICS[match.group(1)]] = float(match.group(3))
+    return result
+
+
+def diff_lock_metrics(before, after):
+    return {route: {k: v - before.get(route, {}).get(k, 0) for k, v in values.items()}
+            for route, values in after.items()}
+
+
+# ── Virtual users ─────────────────────────────────────────────────────
+
+
+class VirtualUser:
+    """One logged-in browser session that times each request into a Recorder."""
+
+    def __init__(self, base_url, recorder, think=0.2, seed=0):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.think = think
+        self.http = requests.Session()
+        self.rng = random.Random(seed)
+
+    def login(self, username, password, role_type):
+        resp = self.http.post(f'{self.base_url}/auth/login', allow_redirects=False, timeout=60,
+                              data={'username': username, 'password': password, 'role_type': role_type})
+        if resp.status_code != 302 or '/auth/login' in resp.headers.get('Location', ''):
+            raise RuntimeError(f"Connexion refusée pour {username} ({role_type})")
+
+    def call(self, method, route, path=None, **kwargs):
+        """Timed request; `route` is the Flask rule it is reported under."""
+        t0 = time.perf_counter()
+        error = None
+        resp = None
+        try:
+            resp = self.http.request(method, self.base_url + (path or route),
+                                     allow_redirects=False, timeout=300, **kwargs)
+            if resp.status_code >= 300:
+                error = str(resp.status_code)
+        except requests.RequestException as e:
+            error = type(e).__name__
+        self.recorder.add(route, (time.perf_counter() - t0) * 1000, error)
+        return resp if error is None else None
+
+    def pause(self):
+        if self.think:
+            time.sleep(self.rng.uniform(0, 2 * self.think))
+
+
+class NightDates:
+    """Hands out consecutive audit dates to the auditor threads."""
+
+    def __init__(self, start):
+        self._next = start
+        self._lock = threading.Lock()
+
+    def take(self):
+        with self._lock:
+            d = self._next
+            self._next += timedelta(days=1)
+            return d
+
+
+def auditor_loop(user, dates, deadline):
+    """Full night audits until the deadline (stops between two steps)."""
+    while time.monotonic() < deadline:
+        d = dates.take()
+        iso = d.isoformat()
+        prev = d - timedelta(days=1)
+        rj = synthetic.rj_workbook(day=prev.day, month=prev.month, year=prev.year,
+                                   seed=d.toordinal())
+        steps = [('POST', '/api/rj/native/import/excel', None,
+                  {'files': {'rj_file': (f'Rj {prev:%d-%m-%Y}.xls', io.BytesIO(rj))}}),
+                 ('GET', '/api/rj/native/session/<audit_date>', f'/api/rj/native/session/{iso}', {})]
+        steps += [('POST', f'/api/rj/native/save/{section}', None, {'json': body})
+                  for section, body in synthetic.shift_payloads(d)]
+        steps += [('POST', '/api/rj/native/calculate', None, {'json': {'date': iso}}),
+                  ('POST', '/api/rj/native/submit/<audit_date>', f'/api/rj/native/submit/{iso}', {}),
+                  ('GET', '/api/rj/export/pdf/<audit_date>', f'/api/rj/export/pdf/{iso}', {})]
+        for method, route, path, kwargs in steps:
+            if time.monotonic() >= deadline:
+                return
+            user.call(method, route, path, **kwargs)
+            if route == '/api/rj/native/submit/<audit_date>':
+                user.recorder.shift_done()
+            user.pause()
+
+
+def manager_loop(user, deadline):
+    """Dashboard browsing in a random order until the deadline."""
+    while time.monotonic() < deadline:
+        for route, query in user.rng.sample(MANAGER_PAGES, len(MANAGER_PAGES)):
+            if time.monotonic() >= deadline:
+                return
+            user.call('GET', route, route + query)
+            user.pause()
+
+
+# ── Local server ──────────────────────────────────────────────────────
+
+
+def _configure_env(db_path):
+    """Env for an app on `db_path` (read by config.settings at import)."""
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    for flag in ('WEATHER_PREFETCH_ENABLED', 'FORECAST_REFIT_ENABLED', 'DOC_INDEX_WARM_ENABLED',
+                 'METRICS_SLOW_LOG_ENABLED'):
+        os.environ[flag] = 'false'
+    os.environ.setdefault('AUDIT_PIN', '9337')
+
+
+def seed(db_path, years=2):
+    """Create `db_path` with the default users + synthetic history; returns the app."""
+    from database.models import db
+    _configure_env(db_path)
+    from main import create_app
+    app = create_app()
+    with app.app_context():
+        with db.engine.begin() as conn:
+            synthetic.populate(conn, years=years)
+    return app
+
+
+def serve(app):
+    """Threaded werkzeug server on a free loopback port; returns (url, server)."""
+    from werkzeug.serving import make_server
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='load-server', daemon=True).start()
+    return f'http://127.0.0.1:{server.server_port}', server
+
+
+# ── Run ───────────────────────────────────────────────────────────────
+
+
+def scrape_locks(base_url, token=''):
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    try:
+        resp = requests.get(f'{base_url}/metrics', headers=headers, timeout=30)
+    except requests.RequestException:
+        return None
+    return parse_lock_metrics(resp.text) if resp.status_code == 200 else None
+
+
+def run(base_url, auditors=3, managers=6, duration=60, think=0.2, start=None,
+        auditor=DEFAULT_AUDITOR, manager=DEFAULT_MANAGER, metrics_token=''):
+    """Drive the flows against `base_url`; summary dict (JSON-ready)."""
+    recorder = Recorder()
+    dates = NightDates(start or synthetic.END_DAY + timedelta(days=1))
+    users = []
+    for i in range(auditors):
+        user = VirtualUser(base_url, recorder, think, seed=i)
+        user.login(*auditor, role_type='auditor')
+        users.append((auditor_loop, user, (dates,)))
+    for i in range(managers):
+        user = VirtualUser(base_url, recorder, think, seed=1000 + i)
+        user.login(*manager, role_type='manager')
+        users.append((manager_loop, user, ()))
+
+    before = scrape_locks(base_url, metrics_token)
+    t0 = time.monotonic()
+    deadline = t0 + duration
+    threads = [threading.Thread(target=loop, args=(user, *args, deadline), daemon=True)
+               for loop, user, args in users]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - t0
+    after = scrape_locks(base_url, metrics_token)
+
+    locks = diff_lock_metrics(before, after) if before is not None and after is not None else None
+    result = recorder.summary(elapsed, locks)
+    result.update({
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'params': {'url': base_url, 'auditors': auditors, 'managers': managers,
+                   'duration_s': duration, 'think_s': think},
+        'lock_metrics': locks is not None,
+    })
+    result['failures'] = check(result)
+    return result
+
+
+def print_report(result):
+    p = result['params']
+    print(f"\n{p['auditors']} auditeur(s), {p['managers']} gestionnaire(s), {result['elapsed_s']} s — "
+          f"{result['requests']} requêtes ({result['throughput_rps']} req/s), "
+          f"{result['errors']} erreur(s), {result['shifts_submitted']} nuit(s) soumise(s)\n")
+    print(f"  {'Route':<42} {'req':>5} {'err %':>6} {'p50':>8} {'p95':>8} {'p99':>8} "
+          f"{'verrou ms':>10} {'moy.':>6}")
+    for route, r in result['routes'].items():
+        wait = f"{r['lock_wait_ms_total']:>10.1f}" if 'lock_wait_ms_total' in r else f"{'—':>10}"
+        mean = f"{r['lock_wait_ms_mean']:>6.1f}" if r.get('lock_wait_ms_mean') is not None else f"{'—':>6}"
+        print(f"  {route:<42} {r['requests']:>5} {r['error_rate'] * 100:>6.1f} {r['p50_ms']:>8.1f} "
+              f"{r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {wait} {mean}")
+        for kind, n in r['error_kinds'].items():
+            print(f"      ✗ {kind}: {n}")
+    if not result['lock_metrics']:
+        print("\n  Attentes de verrou indisponibles (/metrics inaccessible ou METRICS_ENABLED=false)")
+    for failure in result['failures']:
+        print(f"\n  ÉCHEC {failure}")
+
+
+def _arg(name, default, cast=str):
+    return cast(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+
+
+def _account(value):
+    if value is None:
+        return None
+    username, _, password = value.partition(':')
+    return username, password
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command not in ('run', 'seed'):
+        print(__doc__)
+        sys.exit(1)
+    years = _arg('--years', 2, int)
+
+    if command == 'seed':
+        if len(sys.argv) < 3 or sys.argv[2].startswith('--'):
+            print(__doc__)
+            sys.exit(1)
+        path = os.path.abspath(sys.argv[2])
+        if os.path.exists(path):
+            print(f"{path} existe déjà — choisir un nouveau fichier")
+            sys.exit(1)
+        seed(path, years)
+        print(f"Base de charge: {path} ({years} an(s) d'historique)")
+        print(f"Lancer le serveur avec DATABASE_URL=sqlite:///{path}")
+        return
+
+    url = _arg('--url', None)
+    if not url and '--serve' not in sys.argv:
+        print(__doc__)
+        sys.exit(1)
+    start = _arg('--start-date', None)
+    options = {
+        'auditors': _arg('--auditors', 3, int),
+        'managers': _arg('--managers', 6, int),
+        'duration': _arg('--duration', 60, float),
+        'think': _arg('--think', 0.2, float),
+        'start': datetime.strptime(start, '%Y-%m-%d').date() if start else None,
+        'auditor': _account(_arg('--auditor', None)) or DEFAULT_AUDITOR,
+        'manager': _account(_arg('--manager', None)) or DEFAULT_MANAGER,
+        'metrics_token': _arg('--metrics-token', ''),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = None
+        if not url:
+            print(f"Base synthétique: {years} an(s) d'historique…")
+            url, server = serve(seed(os.path.join(tmp, 'charge.db'), years))
+            print(f"Serveur local: {url}")
+        print(f"Charge pendant {options['duration']:.0f} s…")
+        try:
+            result = run(url, **options)
+        finally:
+            if server is not None:
+                server.shutdown()
+
+    print_report(result)
+    output = _arg('--output', None)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False, default=str)
+        print(f"\nRapport: {output}")
+    if result['failures']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,372 @@
+"""
+Benchmarks — durée des chemins principaux sur des données synthétiques.
+
+Usage:
+    python -m benchmarks.run                          # Tout, JSON dans benchmarks/results/
+    python -m benchmarks.run --quick                  # 1 an d'historique, 3 répétitions
+    python -m benchmarks.run --only rj,parsers        # Groupes: rj, parsers, analytics, exports, sessions
+    python -m benchmarks.run --only sessions --years 3
+    python -m benchmarks.run --years 8 --repeat 10
+    python -m benchmarks.run --output avant.json
+    python -m benchmarks.run --compare avant.json     # Mesure puis compare à un run précédent
+    python -m benchmarks.run compare avant.json apres.json [--threshold 0.15]
+
+Les entrées sont générées (benchmarks/synthetic.py) avec une graine fixe:
+classeur RJ .xls avec macros, un fichier par parser, historique
+DailyJourMetrics / DailyCardMetrics / NightAuditSession de plusieurs années
+dans une base SQLite temporaire (jamais database/audit.db).
+
+Chaque mesure: un appel de chauffe, puis --repeat appels chronométrés
+(min / médiane / moyenne / max / écart-type en ms). La comparaison signale
+une régression quand la médiane dépasse l'ancienne de plus de --threshold
+(15 % par défaut) et d'au moins 1 ms; le code de sortie est alors 1.
+"""
+
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Ensure project root is in path
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+GROUPS = ('rj', 'parsers', 'analytics', 'exports', 'sessions')
+PACKAGES = ('xlrd', 'xlwt', 'xlutils', 'openpyxl', 'olefile', 'reportlab', 'pdfplumber',
+            'matplotlib', 'numpy', 'scikit-learn', 'SQLAlchemy', 'Flask')
+NOISE_FLOOR_MS = 1.0
+
+
+# ── Measurement ───────────────────────────────────────────────────────
+
+
+def measure(fn, repeat=5, warmup=1):
+    """Run `fn` warmup + repeat times; timings of the repeat runs in ms."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return {
+        'runs': repeat,
+        'min_ms': round(min(samples), 3),
+        'median_ms': round(statistics.median(samples), 3),
+        'mean_ms': round(statistics.fmean(samples), 3),
+        'max_ms': round(max(samples), 3),
+        'stdev_ms': round(statistics.stdev(samples), 3) if len(samples) > 1 else 0.0,
+    }
+
+
+def environment():
+    from importlib import metadata
+    versions = {}
+    for name in PACKAGES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'commit': commit,
+        'packages': versions,
+    }
+
+
+# ── Cases ─────────────────────────────────────────────────────────────
+# Each group returns [(name, fn)]; the setup work is done before timing.
+
+
+def rj_cases(ctx):
+    from utils.ole_builder import rebuild_xls_with_vba
+    from utils.pdf_report import generate_night_report
+    from utils.rj_filler import RJFiller
+    from utils.rj_reader import RJReader
+
+    from benchmarks import synthetic
+
+    original = synthetic.rj_workbook()
+    day = synthetic.END_DAY.day
+    reader = RJReader(io.BytesIO(original))
+    jour_values = reader.read_jour_day(day)
+    rj_data = reader.read_all()
+
+    def fill_and_save():
+        filler = RJFiller(io.BytesIO(original))
+        filler.update_controle(vjour=day, mois=synthetic.END_DAY.month, annee=synthetic.END_DAY.year)
+        filler.fill_sheet('Recap', rj_data['recap'])
+        filler.fill_sheet('transelect', rj_data['transelect'])
+        filler.fill_sheet('geac_ux', rj_data['geac_ux'])
+        filler.fill_jour_day(day, jour_values)
+        return filler.save_to_bytes().getvalue()
+
+    modified = fill_and_save()
+    return [
+        ('rj.reader.open', lambda: RJReader(io.BytesIO(original))),
+        ('rj.reader.read_all', lambda: RJReader(io.BytesIO(original)).read_all()),
+        ('rj.reader.jour_month', lambda: [reader.read_jour_day(d) for d in range(1, 32)]),
+        ('rj.filler.fill_and_save', fill_and_save),
+        ('rj.rebuild_xls_with_vba', lambda: rebuild_xls_with_vba(original, modified)),
+        ('rj.night_report_pdf', lambda: generate_night_report(rj_data)),
+    ]
+
+
+def parser_cases(ctx):
+    from utils.parsers import ParserFactory
+
+    from benchmarks import synthetic
+
+    cases = []
+    for doc_type, (data, filename) in synthetic.parser_inputs().items():
+        cases.append((f'parsers.{doc_type}',
+                      lambda t=doc_type, b=data, f=filename: ParserFactory.create(t, b, f).get_result()))
+    return cases
+
+
+def analytics_cases(ctx):
+    from database.models import DailyJourMetrics
+    from utils.analytics import HistoricalAnalytics
+    from utils.insights_engine import InsightsEngine
+
+    from benchmarks import synthetic
+
+    end = synthetic.END_DAY
+    first = end - timedelta(days=int(ctx['years'] * 365) - 1)
+    metrics = DailyJourMetrics.query.order_by(DailyJourMetrics.date).all()
+    return [
+        ('analytics.historical_dashboard_1y',
+         lambda: HistoricalAnalytics(end - timedelta(days=364), end).get_full_dashboard()),
+        ('analytics.historical_dashboard_all',
+         lambda: HistoricalAnalytics(first, end).get_full_dashboard()),
+        ('analytics.insights_all', lambda: InsightsEngine(metrics).get_all_insights()),
+    ]
+
+
+def export_cases(ctx):
+    from benchmarks import synthetic
+
+    client = ctx['client']
+    end = synthetic.END_DAY
+    month_start = end.replace(day=1)
+
+    def get(url):
+        def call():
+            response = client.get(url)
+            assert response.status_code == 200, f'{url} → {response.status_code}'
+            return response.data
+        return call
+
+    return [
+        ('exports.rj_pdf', get(f'/api/rj/export/pdf/{end.isoformat()}')),
+        ('exports.rj_excel', get(f'/api/rj/export/excel/{end.isoformat()}')),
+        ('exports.rj_excel_month',
+         get(f'/api/rj/export/excel/batch?start={month_start.isoformat()}&end={end.isoformat()}')),
+    ]
+
+
+def session_cases(ctx):
+    from database.models import NightAuditSession, db
+
+    from benchmarks import synthetic
+
+    client = ctx['client']
+    day = synthetic.END_DAY.isoformat()
+
+    def get(url):
+        def call():
+            response = client.get(url)
+            assert response.status_code == 200, f'{url} → {response.status_code}'
+            return response.data
+        return call
+
+    def section_read():
+        db.session.remove()
+        return NightAuditSession.query.filter_by(audit_date=synthetic.END_DAY).first().get_json('ej_entries')
+
+    return [
+        ('sessions.list_native', get('/api/rj/native/list')),
+        ('sessions.list_direction', get('/api/direction/rj-sessions')),
+        ('sessions.list_correction', get('/api/rj/correction/sessions')),
+        ('sessions.load', get(f'/api/rj/native/load/{day}')),
+        ('sessions.section_read', section_read),
+    ]
+
+
+CASES = {'rj': rj_cases, 'parsers': parser_cases, 'analytics': analytics_cases,
+         'exports': export_cases, 'sessions': session_cases}
+
+
+# ── Run ───────────────────────────────────────────────────────────────
+
+
+def _app(db_path):
+    """Test app on a temporary database (env read by config.settings at import)."""
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    for flag in ('WEATHER_PREFETCH_ENABLED', 'FORECAST_REFIT_ENABLED', 'DOC_INDEX_WARM_ENABLED',
+                 'OUTBOX_DISPATCHER_ENABLED', 'METRICS_ENABLED'):
+        os.environ[flag] = 'false'
+    os.environ.setdefault('AUDIT_PIN', '9337')
+    from main import create_app
+    app = create_app()
+    app.config['TESTING'] = True
+    return app
+
+
+def run(groups=GROUPS, years=5, repeat=5, log=print):
+    """Build the synthetic data, time every case of `groups`; result dict (JSON-ready)."""
+    from database.models import db
+
+    from benchmarks import synthetic
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        app = _app(os.path.join(tmp, 'bench.db'))
+        with app.app_context():
+            if {'analytics', 'exports', 'sessions'} & set(groups):
+                t0 = time.perf_counter()
+                with db.engine.begin() as conn:
+                    synthetic.populate(conn, years=years)
+                log(f"Historique synthétique: {years} an(s) en {time.perf_counter() - t0:.1f} s")
+
+            with app.test_client() as client:
+                with client.session_transaction() as sess:
+                    sess['authenticated'] = True
+                    sess['user_id'] = 1
+                    sess['user_role_type'] = 'admin'
+                ctx = {'app': app, 'client': client, 'years': years}
+                for group in groups:
+                    for name, fn in CASES[group](ctx):
+                        results[name] = {'group': group, **measure(fn, repeat=repeat)}
+                        log(f"  {name:<38} {results[name]['median_ms']:>10.2f} ms "
+                            f"(min {results[name]['min_ms']:.2f})")
+            db.session.remove()
+            app.extensions['db_layer'].dispose()
+            db.engine.dispose()
+
+    return {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': environment(),
+        'params': {'groups': list(groups), 'years': years, 'repeat': repeat,
+                   'end_day': synthetic.END_DAY.isoformat()},
+        'results': results,
+    }
+
+
+def compare(base, current, threshold=0.15):
+    """
+    Per-case comparison of two result dicts (medians).
+
+    Returns:
+        list of {name, base_ms, current_ms, ratio, status} with status
+        'régression', 'amélioration', 'stable', 'nouveau' or 'absent'
+    """
+    before, after = base.get('results', {}), current.get('results', {})
+    rows = []
+    for name in sorted(set(before) | set(after)):
+        if name not in before or name not in after:
+            rows.append({'name': name, 'base_ms': before.get(name, {}).get('median_ms'),
+                         'current_ms': after.get(name, {}).get('median_ms'), 'ratio': None,
+                         'status': 'nouveau' if name not in before else 'absent'})
+            continue
+        old, new = before[name]['median_ms'], after[name]['median_ms']
+        ratio = new / old if old else None
+        status = 'stable'
+        if abs(new - old) >= NOISE_FLOOR_MS and ratio is not None:
+            if ratio > 1 + threshold:
+                status = 'régression'
+            elif ratio < 1 - threshold:
+                status = 'amélioration'
+        rows.append({'name': name, 'base_ms': old, 'current_ms': new,
+                     'ratio': round(ratio, 3) if ratio else None, 'status': status})
+    return rows
+
+
+def print_comparison(rows, base, current):
+    for label, data in (('Référence', base), ('Courant', current)):
+        env = data.get('environment', {})
+        print(f"{label:<10} {data.get('created_at', '?')}  commit {env.get('commit') or '?'}  "
+              f"Python {env.get('python', '?')}")
+    print(f"\n  {'Mesure':<38} {'réf. ms':>10} {'actuel ms':>10} {'ratio':>7}  statut")
+    for row in rows:
+        fmt = lambda v: f'{v:>10.2f}' if v is not None else f"{'—':>10}"  # noqa: E731
+        ratio = f"{row['ratio']:>6.2f}x" if row['ratio'] else f"{'—':>7}"
+        print(f"  {row['name']:<38} {fmt(row['base_ms'])} {fmt(row['current_ms'])} {ratio}  "
+              f"{row['status']}")
+    regressions = [r for r in rows if r['status'] == 'régression']
+    print(f"\n{len(regressions)} régression(s) sur {len(rows)} mesure(s)")
+    return regressions
+
+
+def _load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _arg(name, default, cast=str):
+    return cast(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+
+
+def main():
+    args = sys.argv[1:]
+    if '--help' in args or '-h' in args:
+        print(__doc__)
+        sys.exit(0)
+    threshold = _arg('--threshold', 0.15, float)
+
+    if args and args[0] == 'compare':
+        if len(args) < 3:
+            print(__doc__)
+            sys.exit(1)
+        base, current = _load(args[1]), _load(args[2])
+        regressions = print_comparison(compare(base, current, threshold), base, current)
+        sys.exit(1 if regressions else 0)
+
+    quick = '--quick' in args
+    groups = tuple(_arg('--only', ','.join(GROUPS)).split(','))
+    unknown = [g for g in groups if g not in CASES]
+    if unknown:
+        print(f"Groupe(s) inconnu(s): {', '.join(unknown)} (choix: {', '.join(GROUPS)})")
+        sys.exit(1)
+    years = _arg('--years', 1 if quick else 5, int)
+    repeat = _arg('--repeat', 3 if quick else 5, int)
+
+    print(f"Groupes: {', '.join(groups)} — {repeat} répétition(s)\n")
+    result = run(groups, years=years, repeat=repeat)
+
+    output = _arg('--output', None)
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{result['environment']['commit'] or 'local'}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(f"\nRésultats: {output}")
+
+    base_path = _arg('--compare', None)
+    if base_path:
+        print()
+        regressions = print_comparison(compare(_load(base_path), result, threshold),
+                                       _load(base_path), result)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
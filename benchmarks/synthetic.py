@@ -0,0 +1,632 @@
+"""
+Synthetic inputs for the benchmark suite.
+
+Everything is generated from a seed, so two runs on the same commit time
+exactly the same work:
+- rj_workbook(): RJ .xls with the sheets and cells the app reads and
+  writes (utils/rj_mapper.py mappings, 117 jour columns), optionally
+  wrapped with VBA-like streams like the production macro workbook
+- parser_inputs(): one file per ParserFactory type, in the layout each
+  parser looks for (PDF, RTF, TXT, XLS, XLSX)
+- jour_metrics_rows() / card_metrics_rows() / audit_session_rows():
+  multi-year DailyJourMetrics / DailyCardMetrics / NightAuditSession
+  history for the analytics and export paths
+- shift_payloads(): the section saves an auditor sends during one night
+  (load-test harness, benchmarks/load.py)
+"""
+
+import io
+import json
+import random
+from datetime import date, timedelta
+
+from database.models import DailyCardMetrics, DailyJourMetrics, NightAuditSession, TOTAL_ROOMS
+from utils.analytics import JOUR_COLS
+from utils.rj_mapper import (
+    CONTROLE_MAPPING, DUEBACK_RECEPTIONIST_COLUMNS, GEAC_UX_MAPPING, JOUR_TOTAL_COLUMNS,
+    RECAP_MAPPING, SETD_PERSONNEL_COLUMNS, TRANSELECT_MAPPING, get_dueback_row_for_day,
+    get_jour_row_for_day,
+)
+from utils.rj_filler import excel_cell_to_indices, excel_col_to_index
+
+END_DAY = date(2025, 6, 15)
+
+# Text cells of the mapped sheets (everything else gets an amount)
+TEXT_FIELDS = {'prepare_par', 'condition', 'hotel_name', 'date'}
+
+VBA_STREAMS = {
+    '_VBA_PROJECT_CUR/VBA/Module1': b'Sub envoie_dans_jour()\nEnd Sub\n' * 600,
+    '_VBA_PROJECT_CUR/VBA/Module7': b'Sub efface_recap()\nEnd Sub\n' * 400,
+    '_VBA_PROJECT_CUR/VBA/dir': b'\x01' * 900,
+    '_VBA_PROJECT_CUR/PROJECT': b'ID="{00000000-0000-0000-0000-000000000000}"\r\n' * 40,
+    '\x05SummaryInformation': b'\x07' * 300,
+}
+
+CARD_TYPES = ['VISA', 'MC', 'AMEX', 'DEBIT', 'DISCOVER']
+SERVERS = ['SPIRO KATSENIS', 'MARIE TREMBLAY', 'JEAN GAGNON', 'SOPHIE ROY', 'LUC COTE',
+           'NADIA BOUCHARD', 'KARIM HADDAD', 'JULIE LAVOIE']
+
+
+# ── RJ workbook ───────────────────────────────────────────────────────
+
+
+def _amount(rng, low=0.0, high=5000.0):
+    return round(rng.uniform(low, high), 2)
+
+
+def _write_mapping(sheet, mapping, rng, values=None):
+    for field, cell in mapping.items():
+        row, col = excel_cell_to_indices(cell)
+        if values and field in values:
+            sheet.write(row, col, values[field])
+        elif field in TEXT_FIELDS:
+            sheet.write(row, col, 'Auditeur' if field == 'prepare_par' else field.upper())
+        else:
+            sheet.write(row, col, _amount(rng))
+
+
+def _xlwt_workbook(day, month, year, rng):
+    import xlwt
+    wb = xlwt.Workbook()
+
+    controle = wb.add_sheet('controle')
+    _write_mapping(controle, CONTROLE_MAPPING, rng, {
+        'jour': day, 'mois': month, 'annee': year, 'total_rooms': TOTAL_ROOMS,
+        'chambres_refaire': rng.randint(0, 20)})
+
+    dueback = wb.add_sheet('DUBACK#')
+    for name, letter in DUEBACK_RECEPTIONIST_COLUMNS.items():
+        col = excel_col_to_index(letter)
+        dueback.write(1, col, name)
+        dueback.write(2, col, name.title())
+    for d in range(1, 32):
+        balance_row, operations_row = get_dueback_row_for_day(d)
+        dueback.write(balance_row, 0, d)
+        for r in (balance_row, operations_row):
+            dueback.write(r, 1, _amount(rng, -500, 500))
+            if d <= day:
+                for letter in list(DUEBACK_RECEPTIONIST_COLUMNS.values())[:6]:
+                    dueback.write(r, excel_col_to_index(letter), _amount(rng, -200, 200))
+
+    recap = wb.add_sheet('Recap')
+    _write_mapping(recap, RECAP_MAPPING, rng, {'date': f'{day:02d}/{month:02d}/{year}'})
+
+    transelect = wb.add_sheet('transelect')
+    _write_mapping(transelect, TRANSELECT_MAPPING, rng, {'date': f'{day:02d}/{month:02d}/{year}'})
+
+    geac = wb.add_sheet('geac_ux')
+    _write_mapping(geac, GEAC_UX_MAPPING, rng)
+
+    setd = wb.add_sheet('SetD')
+    setd.write(0, 0, f'{month:02d}/{year}')
+    setd.write(3, 1, 'RJ')
+    for name, letter in SETD_PERSONNEL_COLUMNS.items():
+        setd.write(3, excel_col_to_index(letter), name)
+    for d in range(1, 32):
+        row = 4 + d
+        setd.write(row, 0, d)
+        if d <= day:
+            setd.write(row, 1, _amount(rng, -300, 300))
+            for letter in rng.sample(sorted(SETD_PERSONNEL_COLUMNS.values()), 4):
+                setd.write(row, excel_col_to_index(letter), _amount(rng, -100, 100))
+
+    depot = wb.add_sheet('depot')
+    for r in range(40):
+        depot.write(r, 0, f'{month:02d}/{min(31, r + 1):02d}/{year}')
+        for c in (1, 2, 4, 5):
+            depot.write(r, c, _amount(rng, 0, 3000))
+
+    jour = wb.add_sheet('jour', cell_overwrite_ok=True)
+    jour.write(2, 0, 'Jour')
+    for name, col in JOUR_COLS.items():
+        jour.write(3, col, name)
+    for d in range(1, 32):
+        row = get_jour_row_for_day(d)
+        jour.write(row, 0, d)
+        if d > day:
+            continue
+        for col in range(1, JOUR_TOTAL_COLUMNS):
+            jour.write(row, col, _amount(rng, 0, 8000))
+        jour.write(row, JOUR_COLS['chambres'], _amount(rng, 20000, 50000))
+        for key in ('rooms_simple', 'rooms_double', 'rooms_suite', 'rooms_comp', 'nb_clients'):
+            jour.write(row, JOUR_COLS[key], rng.randint(5, 120))
+
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def rj_workbook(day=END_DAY.day, month=END_DAY.month, year=END_DAY.year, seed=0, vba=True):
+    """
+    Synthetic RJ .xls (bytes) with data up to `day`.
+
+    With vba=True the Workbook stream is repackaged next to VBA-like
+    streams, so rebuild_xls_with_vba() has the same work to do as on the
+    macro workbook.
+    """
+    data = _xlwt_workbook(day, month, year, random.Random(seed))
+    if not vba:
+        return data
+
+    import olefile
+    from utils.ole_builder import OLEBuilder
+    ole = olefile.OleFileIO(io.BytesIO(data))
+    workbook = ole.openstream('Workbook').read()
+    ole.close()
+    return OLEBuilder().build({'Workbook': workbook, **VBA_STREAMS})
+
+
+# ── Parser inputs ─────────────────────────────────────────────────────
+
+
+def _pdf(pages):
+    """PDF with one monospace text line per entry, like the PMS report exports."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=letter)
+    for lines in pages:
+        c.setFont('Courier', 7)
+        y = 760
+        for line in lines:
+            c.drawString(24, y, line)
+            y -= 9
+        c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def _chunks(lines, size=80):
+    return [lines[i:i + size] for i in range(0, len(lines), size)] or [[]]
+
+
+def _money(value):
+    return f'{value:,.2f}'
+
+
+def _daily_revenue_pdf(rng, d):
+    lines = ['Sheraton Laval YULLS        Daily Revenue Report',
+             f'Auditeur Nuit {d.strftime("%d-%b-%Y").upper()}  03:12 AM',
+             f'Current Day {d.strftime("%A %B %d, %Y")}',
+             '**** Revenue Departments ****', 'Chambres']
+    for label in ('Room Charge + Allowa', 'Room Chrg - Premium', 'Room Chrg - Standard',
+                  'Room Chrg - eChannel', 'Room Chrg - Special', 'Room Chrg - Wholesal',
+                  'Room Chrg - Govt', 'Room Chrg - Weekend', 'Room Chrg - AAA',
+                  'Room Chrg - Packages', 'Room Chrg - Advance', 'Room Chrg - Senior',
+                  'Room Chrg - GRP - Co', 'Room Chrg - Contract', 'Guaranteed No Show',
+                  'Late Checkout Fee'):
+        lines.append(f'  {label:<28} {rng.uniform(0, 9000):>14.2f} {rng.uniform(0, 9e5):>16.2f}')
+    lines.append(f'  Total {rng.uniform(30000, 60000):.2f}')
+    for section in ('TELEPHONES', 'AUTRES REVENUS', 'INTERNET', 'COMPTABILITE', 'GIVEX',
+                    '**** Non-Revenue Departments ****', 'SETTLEMENTS', 'DEPOSITS', 'BALANCE'):
+        lines.append(section)
+        for i in range(12):
+            lines.append(f'  Ligne {section[:10]} {i:<10} {rng.uniform(0, 9000):>14.2f}-'
+                         f' {rng.uniform(0, 9e5):>16.2f}')
+    return _pdf(_chunks(lines))
+
+
+def _advance_deposit_pdf(rng, d):
+    lines = ['Sheraton Laval YULLS   Advance Deposit Balance',
+             f'For {d.strftime("%d-%b-%Y").upper()}']
+    for i in range(150):
+        lines.append(f'{100000 + i}  GUEST {i:<4} {d.isoformat()}  ${rng.uniform(50, 2000):>10,.2f}')
+    lines += [f'Balance Forward: ${rng.uniform(1e4, 9e4):,.2f}',
+              f'Deposits Received: ${rng.uniform(1e3, 9e3):,.2f}',
+              f'Deposits Applied: ${rng.uniform(1e3, 9e3):,.2f}',
+              f'Ending Balance: ${rng.uniform(1e4, 9e4):,.2f}']
+    return _pdf(_chunks(lines))
+
+
+def _ar_summary_pdf(rng, d):
+    def v():
+        return _money(rng.uniform(100, 90000))
+    lines = ['Sheraton Laval YULLS', f'{d.strftime("%A")}, {d.day} {d.strftime("%B")} {d.year}',
+             'Marie Tremblay (arsum)', f'{d.strftime("%d-%b-%Y").upper()} 03:20 AM',
+             f'{v()} Previous Day A/R Ledger Balance',
+             f'{v()} Guest Folios', f'{v()} Non-Guest Folios', f'{v()} Subtotal',
+             f'{v()} Advance Deposits DNA Cancel', f'{v()} Credit Cards', f'{v()} Total Transfers',
+             'Debits', f'{v()} {v()} {v()}', f'{v()} Credits', f'{v()} Total Adjustments',
+             f'{v()} Invoices', f'{v()} Payments', f'{v()} A/R Credit Card Charges',
+             f'{v()} Service Charges', f'{v()} End of Day A/R Ledger Balance']
+    return _pdf([lines])
+
+
+MARKET_SEGMENTS = [('T10', 'Premium Reta'), ('T11', 'Standard Reta'), ('T12', 'eChannel'),
+                   ('T13', 'Special Offer'), ('W10', 'Wholesale'), ('T20', 'Government'),
+                   ('T21', 'Weekend'), ('T22', 'AAA CAA'), ('T23', 'Packages'),
+                   ('GC', 'Corporate Gr'), ('GG', 'Government Gr'), ('GN', 'Association'),
+                   ('GO', 'SMERF'), ('GP', 'Tour Series'), ('GS', 'Sports'), ('GT', 'Tour Group')]
+
+
+def _market_segment_pdf(rng, d):
+    def seg_line(code, name):
+        return (f'{code} {name} {rng.randint(1, 90)} {rng.randint(1, 90)} '
+                f'{rng.uniform(500, 20000):.2f} {rng.uniform(120, 300):.2f} {rng.uniform(0, 30):.2f} '
+                f'{rng.randint(100, 2000)} {rng.randint(100, 2000)} {rng.uniform(1e4, 4e5):.2f} '
+                f'{rng.uniform(120, 300):.2f} {rng.uniform(0, 30):.2f}')
+    total = '* TOTAL 262 247 63280.73 256.20 98.02 6639 5077 1294861.38 255.04 83.95'
+    pages = []
+    for section in ('TODAY', 'YTD'):
+        lines = ['Sheraton Laval YULLS   Market Segment Production',
+                 'Auditeur Nuit Ordered by Market Segment',
+                 f'For {d.strftime("%d-%b-%Y").upper()}',
+                 f'----- {section} ----- MTD -----',
+                 'Market Segment Guests Rooms Revenue AvgRate %Occup Guests Rooms Revenue AvgRate %Occup']
+        lines += [seg_line(code, name) for code, name in MARKET_SEGMENTS]
+        lines.append(total)
+        pages.append(lines)
+    return _pdf(pages)
+
+
+def _cashier_lines(rng, d):
+    lines = ['Sheraton Laval  Daily Cashout', f'{d.strftime("%d-%b-%Y").upper()} 03:30 AM']
+    depts = [(1, 'Chambres'), (4, 'Club Lounge'), (10, 'Restaurant Piazza'), (11, 'Banquet'),
+             (28, 'La Spesa'), (35, 'Autres Revenus'), (36, 'Internet'), (90, 'Debourse')]
+    cards = [('AX', 'American Express'), ('VI', 'Visa'), ('MC', 'Master Card'),
+             ('IN', 'Interac'), ('DI', 'Discover'), ('DB', 'Direct Bill')]
+    for name in [f'C{i:02d}' for i in range(1, 9)] + ['All Cashiers']:
+        lines.append(f'For Cashier: {name}' if name != 'All Cashiers' else 'For All Cashiers')
+        lines.append('Hotel Dpt Description Charges Allowances Sundry Cash Dept Paidouts Cash Paidouts')
+        for code, desc in depts:
+            lines.append(f'200858 {code} {desc} {rng.uniform(0, 5000):,.2f} {rng.uniform(0, 80):.2f}- '
+                         f'0.00 0.00 0.00 0.00')
+        lines.append('Settlement Summary')
+        total = 0.0
+        for code, desc in cards:
+            amount = rng.uniform(100, 9000)
+            total += amount
+            lines.append(f'200858{code} {desc} {amount:,.2f} 0.00 0.00 0.00 {amount:,.2f}')
+        lines.append(f'Totals: {total:,.2f} 0.00 0.00 0.00 {total:,.2f}')
+        lines.append(f'Total Cash Drop: {rng.uniform(0, 900):,.2f}')
+    return lines
+
+
+def _sales_journal_rtf(rng, d):
+    depts = {'CAFE LINK': ['NOURRITURE', 'BOISSON', 'BIERES', 'MINERAUX', 'VINS'],
+             'PIAZZA': ['NOURRITURE', 'BOISSON', 'BIERES', 'MINERAUX', 'VINS'],
+             'BAR CUPOLA': ['BOISSON', 'BIERES', 'VINS'],
+             'CHAMBRES': ['NOURRITURE', 'BOISSON', 'VINS'],
+             'BANQUET': ['NOURRITURE', 'BOISSON', 'LOCATION SALLE'],
+             'SPESA': ['NOURRITURE', 'TABAGIE'],
+             'CLUB LOUNG': ['NOURRITURE', 'BOISSON']}
+    lines = ['SALES JOURNAL', f'REPORT DATE: {d.strftime("%m/%d/%Y")}', 'REPORT TIME: 3:05:12.44',
+             'PAGE: 1', 'Account Debits Credits']
+    for dept, items in depts.items():
+        lines.append(dept)
+        for item in items:
+            lines.append(f'   {item}            {rng.uniform(100, 6000):.2f}')
+    lines += [f'TPS {rng.uniform(500, 2000):.2f}', f'TVQ {rng.uniform(900, 4000):.2f}']
+    for pay in ('COMPTANT', 'VISA', 'MASTERCARD', 'AMEX', 'INTERAC', 'CHAMBRE', 'CORRECTION'):
+        lines.append(f'{pay} {rng.uniform(100, 9000):.2f}')
+    lines += ['PAGE: 2', 'REPORT DATE: ' + d.strftime('%m/%d/%Y')]
+    for adj in ('ADMINISTRATION', 'HOTEL PROMOTION', 'FORFAIT', 'EMPL 30%', 'POURBOIRE CHARGE'):
+        lines.append(f'{adj} {rng.uniform(10, 900):.2f}')
+    lines.append('31137.86 *   31137.86 *')
+    body = '\\par \n'.join(lines)
+    return ('{\\rtf1\\ansi{\\fonttbl{\\f0 Courier New;}}\\f0\\fs16 ' + body + '}').encode('latin-1')
+
+
+def _recap_text(rng, d):
+    lines = ['SERVER RECAP', f'REPORT DATE: {d.strftime("%m/%d/%Y")}', 'REPORT TIME: 3:07:41.10']
+    for i, name in enumerate(SERVERS * 3):
+        lines += ['', f'PAYMENT TOTALS for {300 + i}-{name}',
+                  f'EXPECTED DEPOSIT          {rng.uniform(0, 600):.2f}',
+                  f'TOTAL SALES+TAX:    {rng.uniform(300, 3000):,.2f}',
+                  f'NUMBER OF CHECKS PAID:   {rng.randint(5, 40)}']
+        for pay in ('VISA', 'MASTERCARD', 'AMEX', 'INTERAC', 'CASH', 'CHAMBRE', 'HOTEL PROM',
+                    'ADMIN', 'FORFAIT'):
+            lines.append(f'{pay:<14} {rng.randint(1, 12):<5} {" " * 40}{rng.uniform(10, 900):.2f}')
+    lines += ['', 'TOTAL OF SERVERS', f'TOTAL SALES+TAX:    {rng.uniform(1e4, 5e4):,.2f}']
+    return '\n'.join(lines).encode('utf-8')
+
+
+def _freedompay_xls(rng):
+    import xlwt
+    wb = xlwt.Workbook()
+    ws = wb.add_sheet('Settlement')
+    ws.write(0, 0, 'FreedomPay Settlement Report')
+    for i, card in enumerate(['Visa', 'Mastercard', 'Amex', 'Diners', 'Discover']):
+        ws.write(3 + i, 0, card)
+        ws.write(3 + i, 1, rng.randint(5, 200))
+        ws.write(3 + i, 2, _amount(rng, 500, 20000))
+    for r in range(10, 400):
+        ws.write(r, 0, f'TX{r:05d}')
+        ws.write(r, 1, 'Sale')
+        ws.write(r, 2, _amount(rng, 5, 900))
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def _hp_xlsx(rng):
+    from openpyxl import Workbook
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'mensuel'
+    ws['D1'] = 'Mars 2025'
+    for row in range(5, 13):
+        ws.cell(row=row, column=1, value=['Link', 'Cupola', 'Piazza', 'Banquet', 'Serv Ch.',
+                                          'Tabagie', 'Total', 'Contrôle'][row - 5])
+        for col in range(2, 10):
+            ws.cell(row=row, column=col, value=_amount(rng, 0, 4000))
+    for row in list(range(16, 21)) + list(range(34, 44)):
+        ws.cell(row=row, column=7, value=_amount(rng, 0, 4000))
+        ws.cell(row=row, column=9, value=_amount(rng, 0, 4000))
+
+    donnees = wb.create_sheet('données')
+    for col, header in enumerate(['Jour', 'Secteur', 'Nourriture', 'Boisson', 'Bière', 'Vin',
+                                  'Minéraux', 'Tabagie', 'Autres', 'Pourboire', 'Paiement',
+                                  'Total', 'Raison', 'Qui'], 1):
+        donnees.cell(row=12, column=col, value=header)
+    row = 13
+    for day in range(1, 32):
+        for _ in range(15):
+            values = [_amount(rng, 0, 200) for _ in range(8)]
+            donnees.append([day, rng.choice(['Piazza', 'Cupola', 'Link', 'Banquet', 'Tabagie']),
+                            *values, rng.choice(['14', '15', '17', '500']), round(sum(values), 2),
+                            'Promotion', 'Direction'])
+            row += 1
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def _sd_xls(rng, d):
+    import xlwt
+    wb = xlwt.Workbook()
+    names = list(SETD_PERSONNEL_COLUMNS)
+    for day in range(1, 32):
+        ws = wb.add_sheet(str(day))
+        ws.write(0, 0, 'SOMMAIRE JOURNALIER DES DÉPÔTS')
+        ws.write(3, 0, 'DATE')
+        ws.write(3, 1, f'{day:02d}/{d.month:02d}/{d.year}')
+        for col, header in enumerate(['DÉPARTEMENT', 'NOM LETTRES MOULÉES', 'CDN/US', 'MONTANT',
+                                      'MONTANT VÉRIFIÉ', 'REMBOURSEMENT', 'VARIANCE']):
+            ws.write(6, col, header)
+        row = 7
+        for _ in range(rng.randint(8, 20)):
+            amount = _amount(rng, 20, 2000)
+            verified = round(amount + rng.choice([0, 0, 0, -5, 5]), 2)
+            ws.write(row, 0, rng.choice(['RÉCEPTION', 'PIAZZA', 'BANQUET', 'SPESA']))
+            ws.write(row, 1, rng.choice(names))
+            ws.write(row, 2, 'CDN')
+            ws.write(row, 3, amount)
+            ws.write(row, 4, verified)
+            ws.write(row, 5, 0)
+            ws.write(row, 6, round(verified - amount, 2))
+            row += 1
+        ws.write(37, 0, 'TOTAL')
+        ws.write(40, 1, 'SIGNATURE')
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def _transaction_summary_xlsx(rng, d):
+    from openpyxl import Workbook
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'TransactionSummarybyCardType'
+    ws['A1'] = 'Transaction Summary by Card Type'
+    ws.append([])
+    ws.append([])
+    ws.append(['Store', 'Card Type', 'Business Date', 'Account Number', 'Card Holder Name', 'Rid',
+               'Invoice Number', 'Trans Type', 'Trans Amount', 'Currency Code'])
+    grand = 0.0
+    for card in ('Amex - Credit', 'Visa - Credit', 'Mastercard - Credit', 'Interac - Debit',
+                 'Discover - Credit'):
+        subtotal = 0.0
+        for i in range(rng.randint(40, 120)):
+            amount = _amount(rng, 20, 1500)
+            subtotal += amount
+            ws.append(['YULLS Reception', card, d.isoformat(), f'XXXX{rng.randint(1000, 9999)}',
+                       'GUEST', i, f'INV{i:06d}', 'Sale', amount, 'CAD'])
+        ws.append(['', f'Total:{card}', '', '', '', '', '', '', round(subtotal, 2), ''])
+        grand += subtotal
+    ws.append(['YULLS PMS', '', '', '', '', '', '', '', round(grand, 2), ''])
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def parser_inputs(d=END_DAY, seed=0):
+    """
+    One synthetic file per ParserFactory type.
+
+    Returns:
+        {doc_type: (file_bytes, filename)}
+    """
+    rng = random.Random(seed)
+    stamp = d.strftime('%Y%m%d')
+    return {
+        'daily_revenue': (_daily_revenue_pdf(rng, d), f'Daily_Rev_{stamp}.pdf'),
+        'advance_deposit': (_advance_deposit_pdf(rng, d), f'Advance_Deposit_{stamp}.pdf'),
+        'freedompay': (_freedompay_xls(rng), f'FreedomPay_{stamp}.xls'),
+        'hp_excel': (_hp_xlsx(rng), f'HP_{stamp}.xlsx'),
+        'ar_summary': (_ar_summary_pdf(rng, d), f'AR_Summary_{stamp}.pdf'),
+        'sales_journal': (_sales_journal_rtf(rng, d), f'Sales_Journal_{stamp}.rtf'),
+        'sd_deposit': (_sd_xls(rng, d), f'SD.{stamp}.xls'),
+        'market_segment': (_market_segment_pdf(rng, d), f'mktsegprd_{stamp}.pdf'),
+        'cashier_summary': (_pdf(_chunks(_cashier_lines(rng, d))), f'cshsum_{stamp}.pdf'),
+        'transaction_summary': (_transaction_summary_xlsx(rng, d),
+                                f'TransactionSummarybyCardType_{stamp}.xlsx'),
+        'recap_text': (_recap_text(rng, d), f'Recap_{stamp}.txt'),
+    }
+
+
+# ── Database history ──────────────────────────────────────────────────
+
+SEASONAL_OCC = {1: 52, 2: 55, 3: 60, 4: 65, 5: 72, 6: 82, 7: 88, 8: 90, 9: 78, 10: 72, 11: 62, 12: 55}
+
+
+def history_dates(years, end=END_DAY):
+    start = end - timedelta(days=int(years * 365) - 1)
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def jour_metrics_row(d, rng):
+    """One DailyJourMetrics row (dict) with consistent totals and KPIs."""
+    occ = max(25.0, min(99.0, SEASONAL_OCC[d.month] * (1.1 if d.weekday() in (4, 5) else 0.97)
+                        + rng.gauss(0, 4)))
+    hors_usage = rng.choice([0, 0, 1, 2, 4])
+    available = TOTAL_ROOMS - hors_usage
+    sold = int(available * occ / 100)
+    suite, comp = rng.randint(0, 5), rng.choice([0, 0, 1, 2])
+    double = int(sold * rng.uniform(0.35, 0.5))
+    simple = max(0, sold - double - suite - comp)
+    adr = rng.gauss(175 if d.month in (6, 7, 8) else 155, 10)
+    room = round(sold * adr, 2)
+
+    outlets = {k: round(rng.uniform(300, 6000), 2) for k in
+               ('cafe_link_total', 'piazza_total', 'spesa_total', 'room_svc_total', 'banquet_total')}
+    fb = round(sum(outlets.values()), 2)
+    other = round(rng.uniform(200, 2500), 2)
+    total = round(room + fb + other, 2)
+    cards = {k: round(total * share * rng.uniform(0.8, 1.2), 2) for k, share in
+             (('visa_total', 0.35), ('mastercard_total', 0.25), ('amex_elavon_total', 0.12),
+              ('amex_global_total', 0.05), ('debit_total', 0.1), ('discover_total', 0.02))}
+    food = round(fb * rng.uniform(0.55, 0.7), 2)
+    return {
+        'date': d, 'year': d.year, 'month': d.month, 'day_of_month': d.day,
+        'room_revenue': room, 'fb_revenue': fb, **outlets,
+        'tips_total': round(fb * 0.12, 2), 'tabagie_total': round(rng.uniform(0, 300), 2),
+        'other_revenue': other, 'total_revenue': total,
+        'total_nourriture': food, 'total_boisson': round((fb - food) * 0.4, 2),
+        'total_bieres': round((fb - food) * 0.25, 2), 'total_vins': round((fb - food) * 0.25, 2),
+        'total_mineraux': round((fb - food) * 0.1, 2),
+        'rooms_simple': simple, 'rooms_double': double, 'rooms_suite': suite, 'rooms_comp': comp,
+        'total_rooms_sold': sold, 'rooms_available': available,
+        'occupancy_rate': round(sold / available * 100, 2),
+        'nb_clients': int(simple + double * 1.8 + suite * 2.2), 'rooms_hors_usage': hors_usage,
+        'rooms_ch_refaire': rng.randint(0, 15),
+        **cards, 'total_cards': round(sum(cards.values()), 2),
+        'tps_total': round(total * 0.05, 2), 'tvq_total': round(total * 0.09975, 2),
+        'tvh_total': round(room * 0.035, 2),
+        'opening_balance': round(rng.uniform(-4e6, -3e6), 2),
+        'cash_difference': round(rng.gauss(0, 15), 2),
+        'closing_balance': round(rng.uniform(-4e6, -3e6), 2),
+        'adr': round(adr, 2), 'revpar': round(room / available, 2),
+        'trevpar': round(total / available, 2),
+        'food_pct': round(food / fb * 100, 2), 'beverage_pct': round(100 - food / fb * 100, 2),
+        'source': 'benchmark',
+    }
+
+
+def jour_metrics_rows(years=5, end=END_DAY, seed=0):
+    rng = random.Random(seed)
+    return [jour_metrics_row(d, rng) for d in history_dates(years, end)]
+
+
+def card_metrics_rows(years=5, end=END_DAY, seed=0):
+    rng = random.Random(seed + 1)
+    rows = []
+    for d in history_dates(years, end):
+        for card in CARD_TYPES:
+            pos = _amount(rng, 500, 20000)
+            rate = {'AMEX': 0.0265, 'DEBIT': 0.005}.get(card, 0.018)
+            rows.append({'date': d, 'year': d.year, 'month': d.month, 'card_type': card,
+                         'pos_total': pos, 'bank_total': round(pos - rng.choice([0, 0, 0.5]), 2),
+                         'discount_rate': rate, 'discount_amount': round(pos * rate, 2),
+                         'net_amount': round(pos * (1 - rate), 2),
+                         'transaction_count': rng.randint(10, 300), 'source': 'benchmark'})
+    return rows
+
+
+def _session_json(rng):
+    """JSON sections of a NightAuditSession, in the shapes the exports read."""
+    cards = ['debit', 'visa', 'mc', 'amex', 'discover']
+    names = list(DUEBACK_RECEPTIONIST_COLUMNS)[:8]
+    return {
+        'dueback_entries': [{'name': n, 'previous': _amount(rng, -200, 0),
+                             'nouveau': _amount(rng, 0, 200)} for n in names],
+        'transelect_restaurant': {f'Terminal {t}': {c: _amount(rng, 0, 3000) for c in cards}
+                                  for t in (701, 702, 703, 704, 705)},
+        'transelect_reception': {c: {'fusebox': _amount(rng), 'term8': _amount(rng),
+                                     'k053': _amount(rng), 'daily_rev': _amount(rng)} for c in cards},
+        'geac_cashout': {c: _amount(rng, 0, 20000) for c in cards},
+        'geac_daily_rev': {c: _amount(rng, 0, 20000) for c in cards},
+        'sd_entries': [{'department': 'RÉCEPTION', 'name': n, 'currency': 'CDN',
+                        'amount': _amount(rng), 'verified': _amount(rng), 'reimbursement': 0}
+                       for n in names],
+        'depot_data': {'client6': {'date': '', 'amounts': [_amount(rng) for _ in range(4)]},
+                       'client8': {'date': '', 'amounts': [_amount(rng) for _ in range(3)]}},
+        'setd_personnel': [{'name': n, 'column_letter': c, 'amount': _amount(rng, -100, 100)}
+                           for n, c in list(SETD_PERSONNEL_COLUMNS.items())[:10]],
+        'hp_admin_entries': [{'area': a, 'nourriture': _amount(rng, 0, 300),
+                              'boisson': _amount(rng, 0, 200), 'biere': 0, 'vin': 0,
+                              'mineraux': 0, 'autre': 0, 'pourboire': _amount(rng, 0, 50),
+                              'raison': 'Promotion', 'autorise_par': 'Direction'}
+                             for a in ('Piazza', 'Cupola', 'Banquet')],
+        'dbrs_market_segments': {'transient': _amount(rng, 1e4, 4e4),
+                                 'group': _amount(rng, 1e3, 2e4),
+                                 'contract': _amount(rng, 0, 5e3), 'other': _amount(rng, 0, 2e3)},
+    }
+
+
+def audit_session_rows(years=5, end=END_DAY, seed=0):
+    """NightAuditSession rows (dicts): every numeric column filled, JSON sections populated."""
+    from sqlalchemy import Boolean, Float, Integer
+    rng = random.Random(seed + 2)
+    table = NightAuditSession.__table__
+    skip = {'id', 'property_id', 'audit_date'}
+    numeric = [(c.name, c.type) for c in table.columns
+               if c.name not in skip and isinstance(c.type, (Float, Integer, Boolean))]
+    rows = []
+    for d in history_dates(years, end):
+        row = {'audit_date': d, 'auditor_name': 'Auditeur', 'status': 'locked', 'notes': ''}
+        for name, type_ in numeric:
+            if isinstance(type_, Boolean):
+                row[name] = rng.random() > 0.1
+            elif isinstance(type_, Integer):
+                row[name] = rng.randint(0, 120)
+            else:
+                row[name] = _amount(rng, 0, 8000)
+        row.update({k: json.dumps(v) for k, v in _session_json(rng).items()})
+        rows.append(row)
+    return rows
+
+
+RECAP_FIELDS = ['cash_ls_lecture', 'cash_pos_lecture', 'cheque_ar_lecture', 'cheque_dr_lecture',
+                'remb_gratuite_lecture', 'remb_client_lecture', 'deposit_us']
+JOUR_FIELDS = ['jour_cafe_nourriture', 'jour_cafe_boisson', 'jour_piazza_nourriture',
+               'jour_piazza_boisson', 'jour_banquet_nourriture', 'jour_banquet_boisson',
+               'jour_room_revenue', 'jour_tel_local', 'jour_internet', 'jour_tvq', 'jour_tps',
+               'jour_taxe_hebergement', 'jour_pourboires', 'jour_location_salle']
+
+
+def shift_payloads(d, seed=0):
+    """
+    Section saves of one night audit, in the order the RJ Natif tabs send them.
+
+    Returns:
+        list of (section, JSON body) for POST /api/rj/native/save/<section>
+    """
+    rng = random.Random(seed * 1000 + d.toordinal())
+    sections = _session_json(rng)
+    day = {'date': d.isoformat()}
+    return [
+        ('controle', {**day, 'auditor_name': 'Auditeur', 'temperature': '12',
+                      'weather_condition': 'Nuageux', 'chambres_refaire': rng.randint(0, 12)}),
+        ('dueback', {**day, 'entries': sections['dueback_entries']}),
+        ('recap', {**day, **{f: _amount(rng, 0, 3000) for f in RECAP_FIELDS}}),
+        ('transelect', {**day, 'restaurant': sections['transelect_restaurant'],
+                        'reception': sections['transelect_reception']}),
+        ('geac', {**day, 'cashout': sections['geac_cashout'], 'daily_rev': sections['geac_daily_rev'],
+                  'geac_ar_previous': _amount(rng, 1e4, 5e4), 'geac_ar_charges': _amount(rng),
+                  'geac_ar_payments': _amount(rng)}),
+        ('sd', {**day, 'entries': sections['sd_entries']}),
+        ('depot', {**day, **sections['depot_data']}),
+        ('setd', {**day, 'personnel': sections['setd_personnel']}),
+        ('hp_admin', {**day, 'entries': sections['hp_admin_entries']}),
+        ('jour', {**day, **{f: _amount(rng, 0, 20000) for f in JOUR_FIELDS}}),
+        ('dbrs', {**day, 'market_segments': sections['dbrs_market_segments'],
+                  'dbrs_noshow_count': rng.randint(0, 4), 'dbrs_noshow_revenue': _amount(rng, 0, 600)}),
+    ]
+
+
+def populate(conn, years=5, end=END_DAY, seed=0):
+    """Insert the multi-year history through a Core connection (caller commits)."""
+    conn.execute(DailyJourMetrics.__table__.insert(), jour_metrics_rows(years, end, seed))
+    conn.execute(DailyCardMetrics.__table__.insert(), card_metrics_rows(years, end, seed))
+    conn.execute(NightAuditSession.__table__.insert(), audit_session_rows(years, end, seed))
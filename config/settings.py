@@ -6,10 +6,21 @@ load_dotenv()
 
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///../database/audit.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     AUDIT_PIN = os.getenv('AUDIT_PIN', '1234')
 
+    # ─── Database Engine (database/engine.py) ─────────────────────────────
+    DATABASE_URL = os.getenv('DATABASE_URL', '')  # default: sqlite:///database/audit.db
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))  # per worker
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '3600'))
+    DB_READ_POOL_SIZE = int(os.getenv('DB_READ_POOL_SIZE', '5'))  # read-only analytic sessions
+    SQLITE_WAL_ENABLED = os.getenv('SQLITE_WAL_ENABLED', 'true').lower() == 'true'
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '15000'))  # wait for the write lock
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')  # NORMAL is durable enough with WAL
+    SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', '20000'))  # page cache per connection
+
     # ─── Email / SMTP Configuration ───────────────────────────────────────
     MAIL_SERVER = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
     MAIL_PORT = int(os.getenv('MAIL_PORT', '587'))
@@ -17,18 +28,92 @@ class Config:
     MAIL_USERNAME = os.getenv('MAIL_USERNAME', '')
     MAIL_PASSWORD = os.getenv('MAIL_PASSWORD', '')
     MAIL_DEFAULT_SENDER = os.getenv('MAIL_DEFAULT_SENDER', 'noreply@sheraton-laval-audit.com')
+    MAIL_TIMEOUT = int(os.getenv('MAIL_TIMEOUT', '30'))
+
+    # ─── Notification Outbox (background email delivery) ──────────────────
+    OUTBOX_DISPATCHER_ENABLED = os.getenv('OUTBOX_DISPATCHER_ENABLED', 'true').lower() == 'true'
+    OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '50'))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '5'))
+    OUTBOX_RETRY_BASE_SECONDS = int(os.getenv('OUTBOX_RETRY_BASE_SECONDS', '30'))
+    OUTBOX_RETRY_MAX_SECONDS = int(os.getenv('OUTBOX_RETRY_MAX_SECONDS', '3600'))
+    OUTBOX_POLL_SECONDS = int(os.getenv('OUTBOX_POLL_SECONDS', '15'))
+
+    # ─── Weather (Open-Meteo forecast, OpenWeather current conditions) ─────
+    OPENWEATHER_API_KEY = os.getenv('OPENWEATHER_API_KEY', '')
+    WEATHER_CACHE_TTL = int(os.getenv('WEATHER_CACHE_TTL', '1800'))
+    WEATHER_STALE_SECONDS = int(os.getenv('WEATHER_STALE_SECONDS', '21600'))  # serve-stale window
+    WEATHER_STALE_WAIT = float(os.getenv('WEATHER_STALE_WAIT', '3'))  # max wait before falling back
+    WEATHER_TIMEOUT = float(os.getenv('WEATHER_TIMEOUT', '10'))
+    WEATHER_PREFETCH_ENABLED = os.getenv('WEATHER_PREFETCH_ENABLED', 'true').lower() == 'true'
+    WEATHER_PREFETCH_HOUR = int(os.getenv('WEATHER_PREFETCH_HOUR', '22'))  # before the night shift
+
+    # ─── Demand Forecast Model (utils/forecast_store.py) ─────────────────
+    FORECAST_REFIT_ENABLED = os.getenv('FORECAST_REFIT_ENABLED', 'true').lower() == 'true'
+    FORECAST_REFIT_DELAY = int(os.getenv('FORECAST_REFIT_DELAY', '30'))  # debounce after new metrics
+    FORECAST_REFIT_HOUR = int(os.getenv('FORECAST_REFIT_HOUR', '3'))  # nightly refit
+    FORECAST_RECHECK_SECONDS = int(os.getenv('FORECAST_RECHECK_SECONDS', '300'))
+    FORECAST_TRAINING_DAYS = int(os.getenv('FORECAST_TRAINING_DAYS', '1095'))
+    FORECAST_BACKTEST_FOLDS = int(os.getenv('FORECAST_BACKTEST_FOLDS', '4'))
+
+    # ─── Operating-Regime Clustering (utils/regime_model.py) ─────────────
+    REGIME_DRIFT_THRESHOLD = float(os.getenv('REGIME_DRIFT_THRESHOLD', '2.0'))  # recent/baseline distortion
+    REGIME_DRIFT_MIN_DAYS = int(os.getenv('REGIME_DRIFT_MIN_DAYS', '30'))
+    REGIME_RECHECK_SECONDS = int(os.getenv('REGIME_RECHECK_SECONDS', '300'))
+    REGIME_REFIT_ENABLED = os.getenv('REGIME_REFIT_ENABLED', 'true').lower() == 'true'  # first fit / drift refits in the background
+    REGIME_REFIT_DELAY = int(os.getenv('REGIME_REFIT_DELAY', '30'))  # wait for the triggering write to commit
+
+    # ─── Documentation Search Index (utils/doc_index.py) ──────────────────
+    DOC_INDEX_PATH = os.getenv('DOC_INDEX_PATH', '')  # default: database/doc_index.db
+    DOC_INDEX_WARM_ENABLED = os.getenv('DOC_INDEX_WARM_ENABLED', 'true').lower() == 'true'
+    DOC_INDEX_RECHECK_SECONDS = int(os.getenv('DOC_INDEX_RECHECK_SECONDS', '60'))
+
+    # ─── Startup (utils/lazy_import.py) ───────────────────────────────────
+    STARTUP_PRELOAD_HEAVY = os.getenv('STARTUP_PRELOAD_HEAVY', 'false').lower() == 'true'  # import numpy/sklearn/matplotlib/... at boot
+
+    # ─── Request Metrics (utils/request_metrics.py) ───────────────────────
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_SAMPLE_RATE = float(os.getenv('METRICS_SAMPLE_RATE', '1.0'))  # share of requests with SQL/lib/RSS accounting
+    METRICS_SLOW_MS = int(os.getenv('METRICS_SLOW_MS', '1000'))
+    METRICS_SLOW_LOG_ENABLED = os.getenv('METRICS_SLOW_LOG_ENABLED', 'true').lower() == 'true'
+    METRICS_TOP_QUERIES = int(os.getenv('METRICS_TOP_QUERIES', '5'))  # in the slow-request log
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')  # bearer token for /metrics (empty: loopback only)
+
+    # ─── STR / OTB CSV Import (utils/compset_import.py) ───────────────────
+    COMPSET_IMPORT_CHUNK_SIZE = int(os.getenv('COMPSET_IMPORT_CHUNK_SIZE', '1000'))  # rows per read / write / commit
+    COMPSET_IMPORT_BACKGROUND_BYTES = int(os.getenv('COMPSET_IMPORT_BACKGROUND_BYTES', str(512 * 1024)))  # larger uploads run as a job
+    COMPSET_IMPORT_MAX_ERRORS = int(os.getenv('COMPSET_IMPORT_MAX_ERRORS', '200'))  # row messages kept per import
+
+    # ─── RJ Export (utils/rj_template_cache.py, utils/rj_batch_export.py) ─
+    RJ_TEMPLATE_PATH = os.getenv('RJ_TEMPLATE_PATH', os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        'RJ 2024-2025', 'RJ 2025-2026', '12-Février 2026', 'Rj Vierge.xls'))
+    RJ_TEMPLATE_CACHE_SIZE = int(os.getenv('RJ_TEMPLATE_CACHE_SIZE', '4'))  # base RJs kept parsed
+    RJ_BATCH_WORKERS = int(os.getenv('RJ_BATCH_WORKERS', str(min(4, os.cpu_count() or 1))))  # batch export processes
+    RJ_BATCH_MAX_DAYS = int(os.getenv('RJ_BATCH_MAX_DAYS', '366'))  # longest range one batch export accepts
 
     # ─── Alert Thresholds ─────────────────────────────────────────────────
     ALERT_VARIANCE_THRESHOLD = float(os.getenv('ALERT_VARIANCE_THRESHOLD', '5.00'))
     ALERT_OCCUPATION_MIN = float(os.getenv('ALERT_OCCUPATION_MIN', '60.0'))
     ALERT_SUBMISSION_DEADLINE = os.getenv('ALERT_SUBMISSION_DEADLINE', '06:00')
 
+    # ─── Anomaly Scoring (utils/anomaly_scorer.py) ────────────────────────
+    ANOMALY_Z_THRESHOLD = float(os.getenv('ANOMALY_Z_THRESHOLD', '2.0'))
+    ANOMALY_CRITICAL_Z = float(os.getenv('ANOMALY_CRITICAL_Z', '3.0'))
+    ANOMALY_MIN_SAMPLES = int(os.getenv('ANOMALY_MIN_SAMPLES', '10'))  # per scope bucket
+
     # ─── Lightspeed Galaxy PMS Integration ─────────────────────────────────
     LIGHTSPEED_CLIENT_ID = os.getenv('LIGHTSPEED_CLIENT_ID', '')
     LIGHTSPEED_CLIENT_SECRET = os.getenv('LIGHTSPEED_CLIENT_SECRET', '')
     LIGHTSPEED_PROPERTY_ID = os.getenv('LIGHTSPEED_PROPERTY_ID', '')
     LIGHTSPEED_BASE_URL = os.getenv('LIGHTSPEED_BASE_URL', 'https://api.lsk.lightspeed.app')
     LIGHTSPEED_ENABLED = os.getenv('LIGHTSPEED_ENABLED', 'false').lower() == 'true'
+    LIGHTSPEED_POOL_SIZE = int(os.getenv('LIGHTSPEED_POOL_SIZE', '10'))
+    LIGHTSPEED_CACHE_TTL = float(os.getenv('LIGHTSPEED_CACHE_TTL', '300'))
+    LIGHTSPEED_CACHE_SIZE = int(os.getenv('LIGHTSPEED_CACHE_SIZE', '512'))  # cached GET responses kept
+    LIGHTSPEED_RATE_LIMIT = float(os.getenv('LIGHTSPEED_RATE_LIMIT', '0'))  # requests/sec, 0 = unlimited
+    LIGHTSPEED_BACKFILL_CONCURRENCY = int(os.getenv('LIGHTSPEED_BACKFILL_CONCURRENCY', '4'))
+    LIGHTSPEED_BACKFILL_MAX_CONCURRENCY = int(os.getenv('LIGHTSPEED_BACKFILL_MAX_CONCURRENCY', '16'))  # cap on a job's requested concurrency
+    LIGHTSPEED_BACKFILL_MAX_DAYS = int(os.getenv('LIGHTSPEED_BACKFILL_MAX_DAYS', '400'))
 
     @staticmethod
     def validate():
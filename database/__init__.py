@@ -4,7 +4,9 @@ from .models import (
     DepartmentLabor, MonthlyExpense, DailyReconciliation, JournalEntry,
     DepositVariance, TipDistribution, HPDepartmentSales, DueBack,
     NightAuditSession, PODPeriod, PODEntry, HPPeriod, HPEntry,
-    RJArchive, RJSheetData, NotificationPreference, NotificationLog,
+    RJArchive, RJSheetData, NotificationPreference, NotificationLog, NotificationOutbox,
+    LightspeedBackfillJob, ForecastModel, RegimeModel,
+    AnomalyStat, DailyAnomalyScore,
     Property, MonthlyBudget, MonthlyBudgetLegacy, DailyLaborMetrics, DailyTipMetrics,
     DailyCashRecon, DailyCardMetrics, STRCompSet, OTBForecast
 )
@@ -0,0 +1,257 @@
+"""
+Database Engine — SQLite tuned for several workers, read/write session split.
+
+Features:
+- URI and pool settings from Config (DATABASE_URL, DB_POOL_*); default is
+  the SQLite file database/audit.db
+- Every SQLite connection gets WAL journaling (readers never block the
+  writer), a busy timeout (writers queue instead of failing with
+  "database is locked"), synchronous=NORMAL and a larger page cache
+- write_session(): short write transaction on db.session that takes the
+  write lock up front (BEGIN IMMEDIATE), commits or rolls back; wraps the
+  RJ section saves, submit and dashboard sync; on_commit() defers
+  side effects outside the database (in-memory files) until it commits
+- read_session(): separate read-only engine for long analytic reads, one
+  consistent WAL snapshot per session, never holds the write lock
+- Lock-wait / transaction statistics for the benchmark and monitoring
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from database.models import db
+
+logger = logging.getLogger(__name__)
+
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+
+def sqlite_settings(config):
+    """SQLITE_* config → pragma settings for apply_pragmas()."""
+    synchronous = str(config.get('SQLITE_SYNCHRONOUS', 'NORMAL')).upper()
+    if synchronous not in SYNCHRONOUS_MODES:
+        raise ValueError(f"SQLITE_SYNCHRONOUS invalide: {synchronous}")
+    return {
+        'wal': config.get('SQLITE_WAL_ENABLED', True),
+        'busy_timeout_ms': config.get('SQLITE_BUSY_TIMEOUT_MS', 15000),
+        'synchronous': synchronous,
+        'cache_size_kb': config.get('SQLITE_CACHE_SIZE_KB', 20000),
+    }
+
+
+def apply_pragmas(dbapi_conn, settings, read_only=False):
+    """Per-connection SQLite settings (journal_mode=WAL is stored in the file)."""
+    cursor = dbapi_conn.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout = {int(settings['busy_timeout_ms'])}")
+        if settings['wal'] and not read_only:
+            cursor.execute('PRAGMA journal_mode = WAL')
+        cursor.execute(f"PRAGMA synchronous = {settings['synchronous']}")
+        cursor.execute(f"PRAGMA cache_size = -{int(settings['cache_size_kb'])}")
+        cursor.execute('PRAGMA temp_store = MEMORY')
+        if read_only:
+            cursor.execute('PRAGMA query_only = ON')
+    finally:
+        cursor.close()
+
+
+def is_sqlite(uri):
+    return uri.startswith('sqlite')
+
+
+def engine_options(config, uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for `uri` from the DB_* / SQLITE_* config."""
+    options = {
+        'pool_size': config.get('DB_POOL_SIZE', 5),
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 3600),
+    }
+    if is_sqlite(uri):
+        if ':memory:' in uri or uri in ('sqlite://', 'sqlite:///'):
+            return {}  # single-connection pool, nothing to tune
+        options['connect_args'] = {
+            'timeout': config.get('SQLITE_BUSY_TIMEOUT_MS', 15000) / 1000,
+            'check_same_thread': False,
+        }
+    else:
+        options['pool_pre_ping'] = True
+    return options
+
+
+def create_tuned_engine(uri, settings, read_only=False, **options):
+    """Engine whose SQLite connections get apply_pragmas() on connect."""
+    engine = create_engine(uri, **options)
+    if is_sqlite(uri):
+        event.listen(engine, 'connect',
+                     lambda conn, _record: apply_pragmas(conn, settings, read_only=read_only))
+    return engine
+
+
+class DatabaseLayer:
+    """Engine configuration + write/read session factories for the app."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.uri = None
+        self.settings = None
+        self.read_pool_size = 5
+        self._reader = None
+        self._lock = threading.Lock()
+        self._local = threading.local()   # stack of on_commit() lists per open write_session()
+        self.stats = {'writes': 0, 'write_errors': 0, 'lock_wait_ms': 0.0,
+                      'max_lock_wait_ms': 0.0, 'reads': 0}
+
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Resolve the URI and engine options into app.config, then db.init_app().
+
+        DATABASE_URL overrides the default SQLite file under database/.
+        """
+        self.app = app
+        uri = app.config.get('DATABASE_URL') or \
+            f"sqlite:///{os.path.join(app.root_path, 'database', 'audit.db')}"
+        self.uri = uri
+        self.settings = sqlite_settings(app.config)
+        self.read_pool_size = app.config.get('DB_READ_POOL_SIZE', 5)
+        app.config['SQLALCHEMY_DATABASE_URI'] = uri
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            **engine_options(app.config, uri), **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})}
+
+        db.init_app(app)
+        if is_sqlite(uri):
+            with app.app_context():
+                event.listen(db.engine, 'connect',
+                             lambda conn, _record: apply_pragmas(conn, self.settings))
+        app.extensions['db_layer'] = self
+
+    @property
+    def sqlite(self):
+        return is_sqlite(self.uri)
+
+    # ── Engines ────────────────────────────────────────────────────────
+
+    @property
+    def reader(self):
+        """Read-only engine (SQLite: query_only connections in their own pool)."""
+        if not self.sqlite:
+            return db.engine
+        with self._lock:
+            if self._reader is None:
+                options = engine_options(self.app.config, self.uri)
+                options['pool_size'] = self.read_pool_size
+                self._reader = create_tuned_engine(self.uri, self.settings, read_only=True, **options)
+            return self._reader
+
+    def dispose(self):
+        """Close pooled connections (tests, forked workers)."""
+        if self._reader is not None:
+            self._reader.dispose()
+            self._reader = None
+
+    # ── Sessions ───────────────────────────────────────────────────────
+
+    @contextmanager
+    def write_session(self):
+        """
+        Short write transaction on db.session.
+
+        The SQLite write lock is taken before any work (waiting up to
+        busy_timeout), so the transaction cannot fail half-way on an
+        upgrade from reader to writer. Commits on success, rolls back and
+        re-raises on error. Callbacks registered with on_commit() in the
+        block run after the commit and are dropped on rollback.
+        """
+        session = db.session
+        wait_ms = 0.0
+        if self.sqlite:
+            conn = session.connection()
+            if not conn.connection.dbapi_connection.in_transaction:
+                t0 = time.perf_counter()
+                conn.exec_driver_sql('BEGIN IMMEDIATE')
+                wait_ms = (time.perf_counter() - t0) * 1000
+        stack = self._local.__dict__.setdefault('pending', [])
+        stack.append([])
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            with self._lock:
+                self.stats['write_errors'] += 1
+            raise
+        finally:
+            callbacks = stack.pop()
+        with self._lock:
+            self.stats['writes'] += 1
+            self.stats['lock_wait_ms'] += wait_ms
+            self.stats['max_lock_wait_ms'] = max(self.stats['max_lock_wait_ms'], wait_ms)
+        for fn in callbacks:
+            fn()
+
+    def on_commit(self, fn):
+        """Run `fn` once the innermost open write_session() commits (now if none is open)."""
+        stack = self._local.__dict__.get('pending')
+        if stack:
+            stack[-1].append(fn)
+        else:
+            fn()
+
+    @contextmanager
+    def read_session(self):
+        """
+        Read-only ORM session for analytics, separate from db.session.
+
+        All queries in the block see the same committed snapshot; the
+        connection goes back to the read pool at the end. Loaded objects
+        stay usable (detached) after the block.
+        """
+        session = Session(bind=self.reader, autoflush=False, expire_on_commit=False)
+        try:
+            if self.sqlite:
+                session.connection().exec_driver_sql('BEGIN')
+            yield session
+        finally:
+            session.close()
+            with self._lock:
+                self.stats['reads'] += 1
+
+    def info(self):
+        """Effective settings + counters (PRAGMA values read back from SQLite)."""
+        result = {'uri': self.uri.split('@')[-1], 'stats': dict(self.stats),
+                  'pool': db.engine.pool.status()}
+        if self.sqlite:
+            with db.engine.connect() as conn:
+                for pragma in ('journal_mode', 'busy_timeout', 'synchronous', 'cache_size'):
+                    result[pragma] = conn.exec_driver_sql(f'PRAGMA {pragma}').scalar()
+        return result
+
+
+def get_db_layer():
+    """The app's DatabaseLayer."""
+    return current_app.extensions['db_layer']
+
+
+def write_session():
+    """Shortcut for get_db_layer().write_session()."""
+    return get_db_layer().write_session()
+
+
+def on_commit(fn):
+    """Shortcut for get_db_layer().on_commit(fn)."""
+    return get_db_layer().on_commit(fn)
+
+
+def read_session():
+    """Shortcut for get_db_layer().read_session()."""
+    return get_db_layer().read_session()
@@ -1,11 +1,29 @@
+import hashlib
+import json
+import zlib
+
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, date as date_type
-from sqlalchemy import func
+from sqlalchemy import event, func, inspect, orm
+from sqlalchemy.dialects import postgresql, sqlite
 
 db = SQLAlchemy()
 
 TOTAL_ROOMS = 252  # Sheraton Laval property capacity
 
+UPSERT_DIALECTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+
+def upsert_insert(model):
+    """
+    INSERT on `model` for the bound database's dialect, with
+    on_conflict_do_nothing() / on_conflict_do_update() (SQLite, PostgreSQL).
+    """
+    name = db.engine.dialect.name
+    if name not in UPSERT_DIALECTS:
+        raise NotImplementedError(f"INSERT … ON CONFLICT non pris en charge pour {name}")
+    return UPSERT_DIALECTS[name](model)
+
 
 # ==============================================================================
 # PROPERTY MANAGEMENT — Multi-property support
@@ -250,6 +268,10 @@ class DailyJourMetrics(db.Model):
     ~45 key metrics covering revenue, occupancy, payments, taxes, KPIs.
     """
     __tablename__ = 'daily_jour_metrics'
+    __table_args__ = (
+        db.Index('ix_djm_property_date', 'property_id', 'date'),  # properties / portfolio
+        db.Index('ix_djm_year_month', 'year', 'month'),            # manager monthly views
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.Date, unique=True, nullable=False, index=True)
@@ -692,7 +714,7 @@ class Shift(db.Model):
     __tablename__ = 'shifts'
 
     id = db.Column(db.Integer, primary_key=True)
-    date = db.Column(db.Date, nullable=False)
+    date = db.Column(db.Date, nullable=False, index=True)
     started_at = db.Column(db.DateTime, default=datetime.utcnow)
     completed_at = db.Column(db.DateTime, nullable=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
@@ -712,6 +734,9 @@ class Shift(db.Model):
 
 class TaskCompletion(db.Model):
     __tablename__ = 'task_completions'
+    __table_args__ = (
+        db.Index('ix_task_completion_shift_task', 'shift_id', 'task_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     shift_id = db.Column(db.Integer, db.ForeignKey('shifts.id'), nullable=False)
@@ -1105,8 +1130,61 @@ class NightAuditSession(db.Model):
     Stores all audit data directly in the database. JSON fields are used
     for variable-structure data (terminal breakdowns, receptionist lists)
     that don't need individual column querying.
+
+    The JSON / notes columns are deferred in one group per RJ tab (the
+    group is the section name of /api/rj/native/save/<section>): a plain
+    query loads the header and numeric columns, and touching a JSON field
+    loads its section in one SELECT. Listings use header_query(), whose
+    columns are covered by ix_nas_header; load_sections() fetches every
+    deferred section at once before whole-row work (to_dict, calculate_all).
     """
     __tablename__ = 'night_audit_sessions'
+    __table_args__ = (
+        db.Index('ix_nas_property_date', 'property_id', 'audit_date'),
+        db.Index('ix_nas_header', 'audit_date', 'status', 'auditor_name', 'is_fully_balanced'),
+    )
+
+    HEADER_COLUMNS = ('audit_date', 'status', 'auditor_name', 'is_fully_balanced')
+
+    JSON_FIELDS = ('transelect_restaurant', 'transelect_reception', 'transelect_quasimodo',
+                   'geac_cashout', 'geac_daily_rev', 'geac_balance_sheet', 'dueback_entries',
+                   'sd_entries', 'depot_data', 'setd_personnel',
+                   'hp_admin_entries', 'dbrs_market_segments', 'dbrs_otb_data',
+                   'jour_adj_notes',
+                   'diff_caisse_entries', 'resonne_entries', 'vestiaire_entries',
+                   'admin_entries', 'massage_entries', 'ristourne_entries',
+                   'ristourne_by_dept', 'ej_entries', 'salaires_data', 'nettoyeur_entries',
+                   'somm_nettoyeur_data', 'somm_nettoyeur_distribution', 'auditeur_list',
+                   'rj_stats_data', 'rj_cards_summary', 'rapp_p1_data', 'rapp_p2_data',
+                   'rapp_p3_data', 'etat_rev_data', 'budget_data', 'analyse_101100_entries',
+                   'analyse_100401_entries', 'autre_gl_data')
+    LIST_JSON_FIELDS = ('dueback_entries', 'sd_entries', 'setd_personnel', 'hp_admin_entries', 'jour_adj_notes',
+                        'diff_caisse_entries', 'resonne_entries', 'vestiaire_entries',
+                        'admin_entries', 'massage_entries', 'ristourne_entries', 'ej_entries',
+                        'nettoyeur_entries', 'somm_nettoyeur_distribution', 'auditeur_list',
+                        'analyse_101100_entries', 'analyse_100401_entries')
+
+    # Section of the non-deferred columns, by longest name prefix (deferred
+    # columns belong to their group). Anything unmatched is session metadata.
+    SECTION_PREFIXES = {
+        'auditor_name': 'controle', 'notes': 'controle', 'temperature': 'controle',
+        'weather_condition': 'controle', 'chambres_refaire': 'controle',
+        'jours_dans_mois': 'controle',
+        'cash_': 'recap', 'cheque_': 'recap', 'remb_': 'recap', 'deposit_': 'recap',
+        'dueback_reception_': 'recap', 'dueback_nb_': 'recap', 'recap_': 'recap',
+        'is_recap_balanced': 'recap',
+        'transelect_': 'transelect', 'is_transelect_balanced': 'transelect',
+        'geac_': 'geac', 'is_ar_balanced': 'geac',
+        'dueback_': 'dueback', 'sd_': 'sd', 'depot_': 'depot', 'setd_': 'setd',
+        'jour_': 'jour', 'g4_': 'jour', 'hp_admin_': 'hp_admin',
+        'internet_': 'internet', 'sonifi_': 'sonifi', 'quasi_': 'quasimodo', 'dbrs_': 'dbrs',
+        'gl_101100_': 'analyse_gl_101100', 'gl_100401_': 'analyse_gl_100401',
+        'diff_caisse_': 'diff_caisse', 'socan_': 'socan', 'resonne_': 'resonne',
+        'vestiaire_': 'vestiaire', 'admin_': 'admin', 'massage_': 'massage',
+        'ristourne_': 'ristourne', 'ej_': 'ej', 'salaires_': 'salaires',
+        'nettoyeur_': 'nettoyeur', 'rj_': 'rj_rapport',
+    }
+    _sections = None
 
     id = db.Column(db.Integer, primary_key=True)
     audit_date = db.Column(db.Date, unique=True, nullable=False, index=True)
@@ -1151,15 +1229,15 @@ class NightAuditSession(db.Model):
     recap_balance = db.Column(db.Float, default=0)
 
     # ── Transelect (JSON: variable terminal structure) ──
-    transelect_restaurant = db.Column(db.Text, default='{}')
-    transelect_reception = db.Column(db.Text, default='{}')
-    transelect_quasimodo = db.Column(db.Text, default='{}')
+    transelect_restaurant = db.deferred(db.Column(db.Text, default='{}'), group='transelect')
+    transelect_reception = db.deferred(db.Column(db.Text, default='{}'), group='transelect')
+    transelect_quasimodo = db.deferred(db.Column(db.Text, default='{}'), group='transelect')
     transelect_variance = db.Column(db.Float, default=0)
 
     # ── GEAC/UX ──
-    geac_cashout = db.Column(db.Text, default='{}')
-    geac_daily_rev = db.Column(db.Text, default='{}')
-    geac_balance_sheet = db.Column(db.Text, default='{}')  # JSON: {prev_daily, prev_ledger, today_daily, today_ledger, ...}
+    geac_cashout = db.deferred(db.Column(db.Text, default='{}'), group='geac')
+    geac_daily_rev = db.deferred(db.Column(db.Text, default='{}'), group='geac')
+    geac_balance_sheet = db.deferred(db.Column(db.Text, default='{}'), group='geac')  # JSON: {prev_daily, prev_ledger, today_daily, today_ledger, ...}
     geac_ar_previous = db.Column(db.Float, default=0)
     geac_ar_charges = db.Column(db.Float, default=0)
     geac_ar_payments = db.Column(db.Float, default=0)
@@ -1167,20 +1245,20 @@ class NightAuditSession(db.Model):
     geac_ar_variance = db.Column(db.Float, default=0)
 
     # ── DueBack (JSON: variable receptionist list) ──
-    dueback_entries = db.Column(db.Text, default='[]')
+    dueback_entries = db.deferred(db.Column(db.Text, default='[]'), group='dueback')
     dueback_total = db.Column(db.Float, default=0)
 
     # ── SD — Sommaire Journalier des Dépôts ──
-    sd_entries = db.Column(db.Text, default='[]')  # [{department,name,currency,amount,verified,reimbursement}]
+    sd_entries = db.deferred(db.Column(db.Text, default='[]'), group='sd')  # [{department,name,currency,amount,verified,reimbursement}]
     sd_total_verified = db.Column(db.Float, default=0)
 
     # ── Depot ──
-    depot_data = db.Column(db.Text, default='{}')  # {client6:{date,amounts:[]},client8:{date,amounts:[]}}
+    depot_data = db.deferred(db.Column(db.Text, default='{}'), group='depot')  # {client6:{date,amounts:[]},client8:{date,amounts:[]}}
     depot_total = db.Column(db.Float, default=0)
 
     # ── SetD ──
     setd_rj_balance = db.Column(db.Float, default=0)  # auto = recap_balance
-    setd_personnel = db.Column(db.Text, default='[]')  # [{name,column_letter,amount}]
+    setd_personnel = db.deferred(db.Column(db.Text, default='[]'), group='setd')  # [{name,column_letter,amount}]
 
     # ── Jour — F&B Restauration (5 depts × 5 catégories) ──
     jour_cafe_nourriture = db.Column(db.Float, default=0)
@@ -1225,7 +1303,7 @@ class NightAuditSession(db.Model):
     jour_adj_chambres_svc = db.Column(db.Float, default=0)
     jour_adj_banquet = db.Column(db.Float, default=0)
     jour_adj_tabagie = db.Column(db.Float, default=0)
-    jour_adj_notes = db.Column(db.Text, default='[]')  # JSON: [{dept, montant, raison}]
+    jour_adj_notes = db.deferred(db.Column(db.Text, default='[]'), group='jour')  # JSON: [{dept, montant, raison}]
 
     # ── Jour — Hébergement ──
     jour_room_revenue = db.Column(db.Float, default=0)
@@ -1282,7 +1360,7 @@ class NightAuditSession(db.Model):
     is_fully_balanced = db.Column(db.Boolean, default=False)
 
     # ── HP/Admin ──
-    hp_admin_entries = db.Column(db.Text, default='[]')  # [{area,nourriture,boisson,biere,vin,mineraux,altro,pourboire,raison,autorise_par}]
+    hp_admin_entries = db.deferred(db.Column(db.Text, default='[]'), group='hp_admin')  # [{area,nourriture,boisson,biere,vin,mineraux,altro,pourboire,raison,autorise_par}]
     hp_admin_total = db.Column(db.Float, default=0)
 
     # ── Internet ──
@@ -1314,11 +1392,11 @@ class NightAuditSession(db.Model):
     quasi_variance = db.Column(db.Float, default=0)
 
     # ── DBRS ──
-    dbrs_market_segments = db.Column(db.Text, default='{}')  # {transient, group, contract, other}
+    dbrs_market_segments = db.deferred(db.Column(db.Text, default='{}'), group='dbrs')  # {transient, group, contract, other}
     dbrs_daily_rev_today = db.Column(db.Float, default=0)
     dbrs_adr = db.Column(db.Float, default=0)
     dbrs_house_count = db.Column(db.Integer, default=0)
-    dbrs_otb_data = db.Column(db.Text, default='{}')
+    dbrs_otb_data = db.deferred(db.Column(db.Text, default='{}'), group='dbrs')
     dbrs_noshow_count = db.Column(db.Integer, default=0)
     dbrs_noshow_revenue = db.Column(db.Float, default=0)
 
@@ -1328,7 +1406,7 @@ class NightAuditSession(db.Model):
     gl_101100_deductions = db.Column(db.Float, default=0)
     gl_101100_new_balance = db.Column(db.Float, default=0)
     gl_101100_variance = db.Column(db.Float, default=0)
-    gl_101100_notes = db.Column(db.Text, default='')
+    gl_101100_notes = db.deferred(db.Column(db.Text, default=''), group='analyse_gl_101100')
 
     # ── Analyse GL 100401 (Cash/Bank account reconciliation) ──
     gl_100401_previous = db.Column(db.Float, default=0)
@@ -1336,10 +1414,10 @@ class NightAuditSession(db.Model):
     gl_100401_deductions = db.Column(db.Float, default=0)
     gl_100401_new_balance = db.Column(db.Float, default=0)
     gl_100401_variance = db.Column(db.Float, default=0)
-    gl_100401_notes = db.Column(db.Text, default='')
+    gl_100401_notes = db.deferred(db.Column(db.Text, default=''), group='analyse_gl_100401')
 
     # ── Diff.Caisse# (Cash register variance by department/register) ──
-    diff_caisse_entries = db.Column(db.Text, default='[]')  # [{register, system, physical, difference, notes}]
+    diff_caisse_entries = db.deferred(db.Column(db.Text, default='[]'), group='diff_caisse')  # [{register, system, physical, difference, notes}]
     diff_caisse_total = db.Column(db.Float, default=0)
     diff_caisse_formula = db.Column(db.Float, default=0)  # Auto: -GEAC_UX + Transelect_Restaurant (Excel C column)
     diff_caisse_reconciled = db.Column(db.Boolean, default=False)
@@ -1349,77 +1427,130 @@ class NightAuditSession(db.Model):
     socan_allocation_resto = db.Column(db.Float, default=0)
     socan_allocation_bar = db.Column(db.Float, default=0)
     socan_allocation_banquet = db.Column(db.Float, default=0)
-    socan_notes = db.Column(db.Text, default='')
+    socan_notes = db.deferred(db.Column(db.Text, default=''), group='socan')
 
     # ── Résonne (Conference/AV system charges) ──
-    resonne_entries = db.Column(db.Text, default='[]')  # [{department, event, usage_hours, rate, charge}]
+    resonne_entries = db.deferred(db.Column(db.Text, default='[]'), group='resonne')  # [{department, event, usage_hours, rate, charge}]
     resonne_total = db.Column(db.Float, default=0)
 
     # ── Vestiaire# (Coat check revenue & variance) ──
-    vestiaire_entries = db.Column(db.Text, default='[]')  # [{station, expected, actual, variance}]
+    vestiaire_entries = db.deferred(db.Column(db.Text, default='[]'), group='vestiaire')  # [{station, expected, actual, variance}]
     vestiaire_total_revenue = db.Column(db.Float, default=0)
     vestiaire_total_variance = db.Column(db.Float, default=0)
 
     # ── AD — Administration (admin charges & cost allocations) ──
-    admin_entries = db.Column(db.Text, default='[]')  # [{description, amount, cost_center, department, gl_account}]
+    admin_entries = db.deferred(db.Column(db.Text, default='[]'), group='admin')  # [{description, amount, cost_center, department, gl_account}]
     admin_total = db.Column(db.Float, default=0)
 
     # ── Massage (detailed spa/massage breakdown — jour_massage = summary) ──
-    massage_entries = db.Column(db.Text, default='[]')  # [{therapist, service_type, revenue, tips}]
+    massage_entries = db.deferred(db.Column(db.Text, default='[]'), group='massage')  # [{therapist, service_type, revenue, tips}]
     massage_total_revenue = db.Column(db.Float, default=0)
     massage_total_tips = db.Column(db.Float, default=0)
 
     # ── Ristourne (Rebates/Discounts — guest rebate detail & analysis) ──
-    ristourne_entries = db.Column(db.Text, default='[]')  # [{guest, folio, department, original_amount, rebate_amount, reason, authorized_by}]
+    ristourne_entries = db.deferred(db.Column(db.Text, default='[]'), group='ristourne')  # [{guest, folio, department, original_amount, rebate_amount, reason, authorized_by}]
     ristourne_total = db.Column(db.Float, default=0)
-    ristourne_by_dept = db.Column(db.Text, default='{}')  # {ROOM: x, RESTAURANT: y, BAR: z, ...}
-    ristourne_analysis_notes = db.Column(db.Text, default='')
+    ristourne_by_dept = db.deferred(db.Column(db.Text, default='{}'), group='ristourne')  # {ROOM: x, RESTAURANT: y, BAR: z, ...}
+    ristourne_analysis_notes = db.deferred(db.Column(db.Text, default=''), group='ristourne')
 
     # ── EJ (État Journalier — GL entries) ──
-    ej_entries = db.Column(db.Text, default='[]')  # [{gl_code, cc1, cc2, description1, description2, source, montant}]
+    ej_entries = db.deferred(db.Column(db.Text, default='[]'), group='ej')  # [{gl_code, cc1, cc2, description1, description2, source, montant}]
     ej_total = db.Column(db.Float, default=0)
 
     # ── Salaires (Payroll hours by department) ──
-    salaires_data = db.Column(db.Text, default='{}')  # {dept: {position: {heures, heures_sup, taux, taux_sup, total}}}
+    salaires_data = db.deferred(db.Column(db.Text, default='{}'), group='salaires')  # {dept: {position: {heures, heures_sup, taux, taux_sup, total}}}
     salaires_total_heures = db.Column(db.Float, default=0)
     salaires_total_montant = db.Column(db.Float, default=0)
 
     # ── Nettoyeur (Housekeeping tips per employee per day) ──
-    nettoyeur_entries = db.Column(db.Text, default='[]')  # [{name, department, amounts: [day1..day31]}]
+    nettoyeur_entries = db.deferred(db.Column(db.Text, default='[]'), group='nettoyeur')  # [{name, department, amounts: [day1..day31]}]
     nettoyeur_total = db.Column(db.Float, default=0)
 
     # ── Somm_Nettoyeur (Housekeeping summary) ──
-    somm_nettoyeur_data = db.Column(db.Text, default='{}')  # {day: {facture, client, rj, sv, a_payer, var_client, var_facture, remarques}}
-    somm_nettoyeur_distribution = db.Column(db.Text, default='[]')  # [{dept, code, brut, escompte, net, tps, tvq, total}]
+    somm_nettoyeur_data = db.deferred(db.Column(db.Text, default='{}'), group='somm_nettoyeur')  # {day: {facture, client, rj, sv, a_payer, var_client, var_facture, remarques}}
+    somm_nettoyeur_distribution = db.deferred(db.Column(db.Text, default='[]'), group='somm_nettoyeur')  # [{dept, code, brut, escompte, net, tps, tvq, total}]
 
     # ── Auditeur (staff list) ──
-    auditeur_list = db.Column(db.Text, default='[]')  # ["name1", "name2", ...]
+    auditeur_list = db.deferred(db.Column(db.Text, default='[]'), group='auditeur')  # ["name1", "name2", ...]
 
     # ── RJ Rapport Principal (consolidated — mostly calculated) ──
     rj_balance_ouverture = db.Column(db.Float, default=0)
     rj_balance_fermeture = db.Column(db.Float, default=0)
     rj_total_revenus = db.Column(db.Float, default=0)
-    rj_stats_data = db.Column(db.Text, default='{}')  # {complimentaire, hors_usage, disponible, louees, occ_pct, ...}
-    rj_cards_summary = db.Column(db.Text, default='{}')  # {amex: {count, escompte_pct, net}, visa: {...}, ...}
+    rj_stats_data = db.deferred(db.Column(db.Text, default='{}'), group='rj_rapport')  # {complimentaire, hors_usage, disponible, louees, occ_pct, ...}
+    rj_cards_summary = db.deferred(db.Column(db.Text, default='{}'), group='rj_rapport')  # {amex: {count, escompte_pct, net}, visa: {...}, ...}
 
     # ── Rapp_p1/p2/p3 (Management reports — calculated) ──
-    rapp_p1_data = db.Column(db.Text, default='{}')  # Cached report data
-    rapp_p2_data = db.Column(db.Text, default='{}')
-    rapp_p3_data = db.Column(db.Text, default='{}')
+    rapp_p1_data = db.deferred(db.Column(db.Text, default='{}'), group='rapp_reports')  # Cached report data
+    rapp_p2_data = db.deferred(db.Column(db.Text, default='{}'), group='rapp_reports')
+    rapp_p3_data = db.deferred(db.Column(db.Text, default='{}'), group='rapp_reports')
 
     # ── Etat Rev (Revenue statement — calculated) ──
-    etat_rev_data = db.Column(db.Text, default='{}')
+    etat_rev_data = db.deferred(db.Column(db.Text, default='{}'), group='etat_rev')
 
     # ── Budget (reference data) ──
-    budget_data = db.Column(db.Text, default='{}')  # {chambre: amount, nour_piazza: amount, ...}
+    budget_data = db.deferred(db.Column(db.Text, default='{}'), group='budget_rj')  # {chambre: amount, nour_piazza: amount, ...}
 
     # ── Analyse GL accounts ──
-    analyse_101100_entries = db.Column(db.Text, default='[]')  # [{date, description, dt, ct, solde, correction}]
-    analyse_100401_entries = db.Column(db.Text, default='[]')  # [{date, description, dt, ct, solde, correction}]
-    autre_gl_data = db.Column(db.Text, default='{}')  # {gl_code: {name, entries: [{date, amount}]}}
+    analyse_101100_entries = db.deferred(db.Column(db.Text, default='[]'), group='analyse_gl')  # [{date, description, dt, ct, solde, correction}]
+    analyse_100401_entries = db.deferred(db.Column(db.Text, default='[]'), group='analyse_gl')  # [{date, description, dt, ct, solde, correction}]
+    autre_gl_data = db.deferred(db.Column(db.Text, default='{}'), group='analyse_gl')  # {gl_code: {name, entries: [{date, amount}]}}
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    @classmethod
+    def header_query(cls, *extra):
+        """Query loading only HEADER_COLUMNS (+ `extra` column names) — for listings."""
+        from sqlalchemy.orm import load_only
+        return cls.query.options(load_only(*(getattr(cls, c) for c in cls.HEADER_COLUMNS + extra)))
+
+    @classmethod
+    def section_columns(cls, section):
+        """Names of the deferred columns of a section group."""
+        return [p.key for p in cls.__mapper__.column_attrs if p.deferred and p.group == section]
+
+    @classmethod
+    def sections(cls):
+        """{section: [column names]} for every column, see SECTION_PREFIXES."""
+        if cls._sections is None:
+            sections = {}
+            for prop in cls.__mapper__.column_attrs:
+                sections.setdefault(cls.section_of(prop.key), []).append(prop.key)
+            cls._sections = sections
+        return cls._sections
+
+    @classmethod
+    def section_of(cls, column):
+        prop = cls.__mapper__.column_attrs[column]
+        if prop.deferred:
+            return prop.group
+        matches = [p for p in cls.SECTION_PREFIXES
+                   if column == p or (p.endswith('_') and column.startswith(p))]
+        return cls.SECTION_PREFIXES[max(matches, key=len)] if matches else 'session'
+
+    def section_dict(self, section):
+        """Like to_dict(), restricted to the columns of one section."""
+        d = {}
+        for name in self.sections()[section]:
+            val = getattr(self, name)
+            if name in self.JSON_FIELDS:
+                val = self._decode_json(name, val)
+            elif hasattr(val, 'isoformat'):
+                val = val.isoformat()
+            d[name] = val
+        return d
+
+    def load_sections(self):
+        """Load every still-deferred column in one SELECT (no-op when all are loaded)."""
+        from sqlalchemy import inspect as sa_inspect
+        state = sa_inspect(self)
+        unloaded = state.unloaded
+        if not unloaded or state.session is None or not state.has_identity:
+            return
+        columns = [p.key for p in self.__mapper__.column_attrs if p.key in unloaded]
+        if columns:
+            state.session.refresh(self, attribute_names=columns)
+
     def get_json(self, field):
         import json
         val = getattr(self, field, '{}')
@@ -1435,6 +1566,7 @@ class NightAuditSession(db.Model):
     def calculate_all(self):
         """Run all balance calculations and update flags."""
         import calendar as cal_mod
+        self.load_sections()
         # 0. Contrôle — auto-calculate jours_dans_mois from audit_date
         if self.audit_date:
             _, days = cal_mod.monthrange(self.audit_date.year, self.audit_date.month)
@@ -1751,7 +1883,7 @@ class NightAuditSession(db.Model):
                                   self.is_ar_balanced)
 
     def to_dict(self):
-        import json
+        self.load_sections()
         d = {}
         for c in self.__table__.columns:
             val = getattr(self, c.name)
@@ -1759,31 +1891,19 @@ class NightAuditSession(db.Model):
                 d[c.name] = val.isoformat() if val else None
             else:
                 d[c.name] = val
-        json_fields = ['transelect_restaurant', 'transelect_reception', 'transelect_quasimodo',
-                       'geac_cashout', 'geac_daily_rev', 'geac_balance_sheet', 'dueback_entries',
-                       'sd_entries', 'depot_data', 'setd_personnel',
-                       'hp_admin_entries', 'dbrs_market_segments', 'dbrs_otb_data',
-                       'jour_adj_notes',
-                       'diff_caisse_entries', 'resonne_entries', 'vestiaire_entries',
-                       'admin_entries', 'massage_entries', 'ristourne_entries',
-                       'ristourne_by_dept', 'ej_entries', 'salaires_data', 'nettoyeur_entries',
-                       'somm_nettoyeur_data', 'somm_nettoyeur_distribution', 'auditeur_list',
-                       'rj_stats_data', 'rj_cards_summary', 'rapp_p1_data', 'rapp_p2_data',
-                       'rapp_p3_data', 'etat_rev_data', 'budget_data', 'analyse_101100_entries',
-                       'analyse_100401_entries', 'autre_gl_data']
-        list_json_fields = ('dueback_entries', 'sd_entries', 'setd_personnel', 'hp_admin_entries', 'jour_adj_notes',
-                            'diff_caisse_entries', 'resonne_entries', 'vestiaire_entries',
-                            'admin_entries', 'massage_entries', 'ristourne_entries', 'ej_entries',
-                            'nettoyeur_entries', 'somm_nettoyeur_distribution', 'auditeur_list',
-                            'analyse_101100_entries', 'analyse_100401_entries')
-        for jf in json_fields:
-            try:
-                raw = d.get(jf) or ('[]' if jf in list_json_fields else '{}')
-                d[jf] = json.loads(raw)
-            except (json.JSONDecodeError, TypeError):
-                d[jf] = [] if jf in list_json_fields else {}
+        for jf in self.JSON_FIELDS:
+            d[jf] = self._decode_json(jf, d.get(jf))
         return d
 
+    @classmethod
+    def _decode_json(cls, field, raw):
+        import json
+        empty = '[]' if field in cls.LIST_JSON_FIELDS else '{}'
+        try:
+            return json.loads(raw or empty)
+        except (json.JSONDecodeError, TypeError):
+            return json.loads(empty)
+
 
 # ==============================================================================
 # POD (POURBOIRES) — Persistent tip distribution data
@@ -1958,6 +2078,9 @@ class RJSheetData(db.Model):
     """Individual sheet data from an RJ archive — one row per sheet.
     Allows querying specific sheets without loading the entire archive."""
     __tablename__ = 'rj_sheet_data'
+    __table_args__ = (
+        db.Index('ix_rj_sheet_archive_sheet', 'archive_id', 'sheet_name'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     archive_id = db.Column(db.Integer, db.ForeignKey('rj_archives.id'), nullable=False)
@@ -1992,7 +2115,8 @@ class NotificationPreference(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     event_type = db.Column(db.String(50), nullable=False)
-    # event_type: 'rj_submitted', 'rj_late', 'variance_alert', 'occupation_low', 'revenue_drop', 'daily_summary'
+    # event_type: 'rj_submitted', 'rj_late', 'variance_alert', 'occupation_low', 'revenue_drop',
+    #             'anomaly_detected', 'daily_summary'
     is_enabled = db.Column(db.Boolean, default=True)
     threshold_value = db.Column(db.Float, nullable=True)  # e.g., variance > 5.00
     delivery_method = db.Column(db.String(20), default='email')  # 'email', 'in_app', 'both'
@@ -2050,6 +2174,273 @@ class NotificationLog(db.Model):
         }
 
 
+class NotificationOutbox(db.Model):
+    """Persistent outbox of emails waiting for the background dispatcher."""
+    __tablename__ = 'notification_outbox'
+
+    id = db.Column(db.Integer, primary_key=True)
+    event_type = db.Column(db.String(50), nullable=False)
+    severity = db.Column(db.String(20), default='info')
+    recipient_email = db.Column(db.String(120), nullable=False)
+    recipient_user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    subject = db.Column(db.String(255))
+    html_body = db.Column(db.Text)
+    text_body = db.Column(db.Text, nullable=True)
+    data_json = db.Column(db.Text)  # JSON payload (copied to NotificationLog)
+    status = db.Column(db.String(20), default='pending')  # 'pending', 'sending', 'sent', 'logged', 'failed'
+    attempts = db.Column(db.Integer, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    claimed_by = db.Column(db.String(40), nullable=True)  # Dispatcher token holding the row
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_outbox_status_next', 'status', 'next_attempt_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'event_type': self.event_type,
+            'severity': self.severity,
+            'recipient_email': self.recipient_email,
+            'subject': self.subject,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None,
+        }
+
+
+# ==============================================================================
+# LIGHTSPEED BACKFILL JOBS
+# ==============================================================================
+
+class LightspeedBackfillJob(db.Model):
+    """Tracked range backfill of NightAuditSession data from the PMS."""
+    __tablename__ = 'lightspeed_backfill_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(30), default='queued')  # queued|running|completed|completed_with_errors|failed
+    concurrency = db.Column(db.Integer, default=4)
+    rate_limit = db.Column(db.Float, nullable=True)  # requests/sec (None = client default)
+
+    total_dates = db.Column(db.Integer, default=0)
+    completed_dates = db.Column(db.Integer, default=0)
+    failed_dates = db.Column(db.Integer, default=0)
+    results_json = db.Column(db.Text, default='{}')  # Checkpoint: {date: per-date result}
+
+    created_by = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    elapsed_seconds = db.Column(db.Float, default=0)
+    error_message = db.Column(db.Text, nullable=True)
+
+    def get_results(self):
+        import json as _json
+        try:
+            return _json.loads(self.results_json or '{}')
+        except (ValueError, TypeError):
+            return {}
+
+    def to_dict(self, include_results=False):
+        elapsed = self.elapsed_seconds or 0
+        done = (self.completed_dates or 0) + (self.failed_dates or 0)
+        result = {
+            'id': self.id,
+            'start_date': self.start_date.isoformat() if self.start_date else None,
+            'end_date': self.end_date.isoformat() if self.end_date else None,
+            'status': self.status,
+            'concurrency': self.concurrency,
+            'rate_limit': self.rate_limit,
+            'total_dates': self.total_dates,
+            'completed_dates': self.completed_dates,
+            'failed_dates': self.failed_dates,
+            'progress_pct': round(done / self.total_dates * 100, 1) if self.total_dates else 0,
+            'dates_per_minute': round(done / elapsed * 60, 2) if elapsed else None,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'elapsed_seconds': round(elapsed, 2),
+            'error_message': self.error_message,
+        }
+        if include_results:
+            result['results'] = self.get_results()
+        return result
+
+
+# ==============================================================================
+# FORECAST MODELS
+# ==============================================================================
+
+class ForecastModel(db.Model):
+    """Fitted demand forecast (coefficients + residual bands) for one data version."""
+    __tablename__ = 'forecast_models'
+
+    id = db.Column(db.Integer, primary_key=True)
+    data_version = db.Column(db.String(40), nullable=False, index=True)  # Hash of DailyJourMetrics state
+    method = db.Column(db.String(30), default='seasonal_dow_v1')
+    train_start = db.Column(db.Date)
+    train_end = db.Column(db.Date)
+    n_days = db.Column(db.Integer, default=0)
+    params_json = db.Column(db.Text, nullable=False)  # Coefficients, residual quantiles per metric
+    backtest_json = db.Column(db.Text, default='{}')   # MAPE per metric/horizon (rolling origin)
+    summary_json = db.Column(db.Text, default='{}')    # Historical averages at fit time
+    fit_seconds = db.Column(db.Float, default=0)
+    fitted_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def _load(self, field):
+        import json as _json
+        try:
+            return _json.loads(getattr(self, field) or '{}')
+        except (ValueError, TypeError):
+            return {}
+
+    def get_params(self):
+        return self._load('params_json')
+
+    def get_backtest(self):
+        return self._load('backtest_json')
+
+    def get_summary(self):
+        return self._load('summary_json')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'data_version': self.data_version,
+            'method': self.method,
+            'train_start': self.train_start.isoformat() if self.train_start else None,
+            'train_end': self.train_end.isoformat() if self.train_end else None,
+            'n_days': self.n_days,
+            'fit_seconds': round(self.fit_seconds or 0, 4),
+            'fitted_at': self.fitted_at.isoformat() if self.fitted_at else None,
+            'backtest': self.get_backtest(),
+        }
+
+
+class RegimeModel(db.Model):
+    """Operating-regime clustering state: scaler, centroids, counts, drift."""
+    __tablename__ = 'regime_models'
+
+    id = db.Column(db.Integer, primary_key=True)
+    state_json = db.Column(db.Text, nullable=False)  # mean/scale, centroids, counts, distortions
+    last_date = db.Column(db.Date)                   # Latest day folded into the centroids
+    n_days = db.Column(db.Integer, default=0)        # Days in the full fit
+    n_updates = db.Column(db.Integer, default=0)     # Days added incrementally since
+    drift_ratio = db.Column(db.Float, default=1.0)   # Recent / baseline distortion
+    refit_reason = db.Column(db.String(20))          # initial|manual|drift
+    fit_seconds = db.Column(db.Float, default=0)
+    fitted_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def get_state(self):
+        import json as _json
+        try:
+            return _json.loads(self.state_json or '{}')
+        except (ValueError, TypeError):
+            return {}
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'last_date': self.last_date.isoformat() if self.last_date else None,
+            'n_days': self.n_days,
+            'n_updates': self.n_updates,
+            'drift_ratio': round(self.drift_ratio or 0, 3),
+            'refit_reason': self.refit_reason,
+            'fit_seconds': round(self.fit_seconds or 0, 4),
+            'fitted_at': self.fitted_at.isoformat() if self.fitted_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+
+# ==============================================================================
+# ANOMALY SCORING — Running statistics + per-day scores
+# ==============================================================================
+
+class AnomalyStat(db.Model):
+    """Welford running statistics for one metric in one scope bucket."""
+    __tablename__ = 'anomaly_stats'
+
+    id = db.Column(db.Integer, primary_key=True)
+    metric = db.Column(db.String(20), nullable=False)   # revenue|occupancy|adr|fb|cards
+    scope = db.Column(db.String(10), nullable=False)    # global|month|dow
+    bucket = db.Column(db.Integer, nullable=False, default=0)  # 0 for global, 1-12 month, 0-6 dow
+    n = db.Column(db.Integer, default=0)
+    mean = db.Column(db.Float, default=0)
+    m2 = db.Column(db.Float, default=0)                 # Sum of squared deviations
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('metric', 'scope', 'bucket', name='uq_anomaly_stat'),
+    )
+
+    @property
+    def std(self):
+        return (self.m2 / self.n) ** 0.5 if self.n else 0.0
+
+    def to_dict(self):
+        return {
+            'metric': self.metric,
+            'scope': self.scope,
+            'bucket': self.bucket,
+            'n': self.n,
+            'mean': round(self.mean or 0, 2),
+            'std': round(self.std, 2),
+        }
+
+
+class DailyAnomalyScore(db.Model):
+    """Anomaly scores for one night, computed when it is synced."""
+    __tablename__ = 'daily_anomaly_scores'
+
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, unique=True, nullable=False, index=True)
+    values_json = db.Column(db.Text, default='{}')   # Metric values folded into anomaly_stats
+    scores_json = db.Column(db.Text, default='{}')   # metric → {value, expected, z: {scope: z}, score}
+    max_abs_score = db.Column(db.Float, default=0, index=True)
+    is_flagged = db.Column(db.Boolean, default=False, index=True)
+    severity = db.Column(db.String(10), default='info')  # info|warning|critical
+    scored_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def _load(self, field):
+        import json as _json
+        try:
+            return _json.loads(getattr(self, field) or '{}')
+        except (ValueError, TypeError):
+            return {}
+
+    def get_values(self):
+        return self._load('values_json')
+
+    def get_scores(self):
+        return self._load('scores_json')
+
+    def flagged_metrics(self, threshold):
+        """[(metric, detail)] whose score is beyond ±threshold, worst first."""
+        flagged = [(m, s) for m, s in self.get_scores().items()
+                   if s.get('score') is not None and abs(s['score']) > threshold]
+        return sorted(flagged, key=lambda item: abs(item[1]['score']), reverse=True)
+
+    def to_dict(self):
+        return {
+            'date': self.date.isoformat(),
+            'scores': self.get_scores(),
+            'max_abs_score': round(self.max_abs_score or 0, 2),
+            'is_flagged': self.is_flagged,
+            'severity': self.severity,
+            'scored_at': self.scored_at.isoformat() if self.scored_at else None,
+        }
+
+
 # ==============================================================================
 # STR COMPETITIVE SET & OTB MODELS
 # ==============================================================================
@@ -2121,6 +2512,7 @@ class OTBForecast(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint('snapshot_date', 'target_date', name='uq_otb_snapshot_target'),
+        db.Index('ix_otb_target_snapshot', 'target_date', 'snapshot_date'),  # pace per stay date
     )
 
     def to_dict(self):
@@ -2140,12 +2532,110 @@ class OTBForecast(db.Model):
         }
 
 
+class OTBPace(db.Model):
+    """OTB pace cube — one row per stay date and days before arrival.
+
+    Derived from otb_forecasts by utils/otb_pace.py as snapshots arrive:
+    pickup since the previous snapshot of the same stay date, and the
+    same-time-last-year (STLY) position of the stay date 364 days earlier
+    at the same lead time.
+    """
+    __tablename__ = 'otb_pace'
+
+    id = db.Column(db.Integer, primary_key=True)
+    target_date = db.Column(db.Date, nullable=False)
+    days_before = db.Column(db.Integer, nullable=False)  # target_date - snapshot_date
+    snapshot_date = db.Column(db.Date, nullable=False)
+
+    rooms_otb = db.Column(db.Integer, default=0)
+    revenue_otb = db.Column(db.Float, default=0)
+    pickup_rooms = db.Column(db.Integer)     # vs previous snapshot of the stay date (None: first)
+    pickup_revenue = db.Column(db.Float)
+    stly_rooms = db.Column(db.Integer)       # stay date - 364 days, same days_before
+    stly_revenue = db.Column(db.Float)
+    pace_rooms = db.Column(db.Integer)       # rooms_otb - stly_rooms
+
+    __table_args__ = (
+        db.UniqueConstraint('target_date', 'days_before', name='uq_otb_pace_target_dba'),
+    )
+
+    def to_dict(self):
+        return {
+            'target_date': self.target_date.isoformat() if self.target_date else None,
+            'days_before': self.days_before,
+            'snapshot_date': self.snapshot_date.isoformat() if self.snapshot_date else None,
+            'rooms_otb': self.rooms_otb,
+            'revenue_otb': round(self.revenue_otb, 2) if self.revenue_otb else 0,
+            'adr_otb': round(self.revenue_otb / self.rooms_otb, 2) if self.rooms_otb else 0,
+            'pickup_rooms': self.pickup_rooms,
+            'pickup_revenue': round(self.pickup_revenue, 2) if self.pickup_revenue is not None else None,
+            'stly_rooms': self.stly_rooms,
+            'stly_revenue': round(self.stly_revenue, 2) if self.stly_revenue is not None else None,
+            'pace_rooms': self.pace_rooms,
+        }
+
+
+class CompsetImportJob(db.Model):
+    """STR / OTB CSV import run in the background (utils/compset_import.py)."""
+    __tablename__ = 'compset_import_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(10), nullable=False)  # str|otb
+    filename = db.Column(db.String(200))
+    status = db.Column(db.String(30), default='queued')  # queued|running|completed|completed_with_errors|failed
+
+    total_rows = db.Column(db.Integer, default=0)
+    imported_rows = db.Column(db.Integer, default=0)
+    inserted_rows = db.Column(db.Integer, default=0)
+    updated_rows = db.Column(db.Integer, default=0)
+    error_rows = db.Column(db.Integer, default=0)
+    errors_json = db.Column(db.Text, default='[]')  # first COMPSET_IMPORT_MAX_ERRORS messages
+
+    created_by = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    elapsed_seconds = db.Column(db.Float, default=0)
+    error_message = db.Column(db.Text, nullable=True)
+
+    def to_dict(self):
+        import json as _json
+        try:
+            errors = _json.loads(self.errors_json or '[]')
+        except (ValueError, TypeError):
+            errors = []
+        elapsed = self.elapsed_seconds or 0
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'filename': self.filename,
+            'status': self.status,
+            'total_rows': self.total_rows,
+            'imported': self.imported_rows,
+            'inserted': self.inserted_rows,
+            'updated': self.updated_rows,
+            'error_count': self.error_rows,
+            'errors': errors,
+            'rows_per_second': round((self.total_rows or 0) / elapsed, 1) if elapsed else None,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'elapsed_seconds': round(elapsed, 2),
+            'error_message': self.error_message,
+        }
+
+
 # ==============================================================================
 # SESSION EDIT LOG — Correction audit trail
 # ==============================================================================
 
 class SessionEditLog(db.Model):
-    """Tracks every field change made during a correction session."""
+    """Tracks every field change made during a correction session.
+
+    Legacy: one row per field. Corrections are now logged as one
+    SessionChangeSet per save; these rows are still read by the history API.
+    """
     __tablename__ = 'session_edit_logs'
 
     id = db.Column(db.Integer, primary_key=True)
@@ -2172,3 +2662,370 @@ class SessionEditLog(db.Model):
             'correction_round': self.correction_round,
             'note': self.note,
         }
+
+
+class SessionChangeSet(db.Model):
+    """One correction save (or unlock / relock / pre-correction snapshot).
+
+    Every field the save changed is kept in one row as a zlib-compressed
+    JSON map {section: {field: [old, new]}} with typed values (JSON columns
+    as structures, untruncated). Rows are append-only; ids order the saves
+    of a date, so undoing the sets after id N on the current session
+    rebuilds version N.
+    """
+    __tablename__ = 'session_change_sets'
+    __table_args__ = (
+        db.Index('ix_change_sets_date_round', 'audit_date', 'correction_round', 'id'),
+    )
+
+    KINDS = ('save', 'unlock', 'relock', 'snapshot', 'rollback')
+
+    id = db.Column(db.Integer, primary_key=True)
+    audit_date = db.Column(db.Date, nullable=False)
+    correction_round = db.Column(db.Integer, default=1)
+    kind = db.Column(db.String(20), nullable=False, default='save')
+    sections = db.Column(db.String(200), nullable=True)       # comma-separated, for listings
+    field_count = db.Column(db.Integer, nullable=False, default=0)
+    payload = db.Column(db.LargeBinary, nullable=True)         # zlib(JSON {section: {field: [old, new]}})
+    edited_by = db.Column(db.String(100), nullable=True)
+    edited_at = db.Column(db.DateTime, default=datetime.utcnow)
+    note = db.Column(db.Text, nullable=True)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._changes = {}
+
+    @orm.reconstructor
+    def _init_on_load(self):
+        self._changes = None
+
+    @property
+    def changes(self):
+        """{section: {field: [old, new]}}, decoded on first access."""
+        if self._changes is None:
+            self._changes = json.loads(zlib.decompress(self.payload)) if self.payload else {}
+        return self._changes
+
+    def add(self, section, field, old, new):
+        """Record one change; a field changed twice in the same save keeps its first old value."""
+        fields = self.changes.setdefault(section, {})
+        fields[field] = [fields[field][0] if field in fields else old, new]
+        self.field_count = sum(len(f) for f in self._changes.values())
+        self.sections = ','.join(self._changes)
+
+    def encode(self):
+        if self._changes is not None:
+            self.payload = zlib.compress(json.dumps(
+                self._changes, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8'))
+
+    def to_dict(self, changes=False):
+        d = {
+            'id': self.id,
+            'audit_date': self.audit_date.isoformat() if self.audit_date else None,
+            'correction_round': self.correction_round,
+            'kind': self.kind,
+            'sections': self.sections.split(',') if self.sections else [],
+            'field_count': self.field_count,
+            'edited_by': self.edited_by,
+            'edited_at': self.edited_at.isoformat() if self.edited_at else None,
+            'note': self.note,
+        }
+        if changes:
+            d['changes'] = self.changes
+        return d
+
+    def history_rows(self):
+        """
+        One SessionEditLog.to_dict()-shaped row per changed field; ids are
+        "<change-set id>:<n>" so they stay unique next to the legacy rows.
+        """
+        edited_at = self.edited_at.isoformat() if self.edited_at else None
+        fields = [(section, field, old, new) for section, changes in self.changes.items()
+                  for field, (old, new) in changes.items()]
+        return [{
+            'id': f'{self.id}:{n}',
+            'change_set': self.id,
+            'audit_date': self.audit_date.isoformat() if self.audit_date else None,
+            'section': section,
+            'field_name': field,
+            'old_value': _edit_text(old),
+            'new_value': _edit_text(new),
+            'edited_by': self.edited_by,
+            'edited_at': edited_at,
+            'correction_round': self.correction_round,
+            'note': self.note,
+        } for n, (section, field, old, new) in enumerate(fields)]
+
+
+def _edit_text(value):
+    """A change-set value as the text SessionEditLog stored (floats to 2 decimals, JSON ≤ 2000 chars)."""
+    if value is None:
+        return None
+    if isinstance(value, float):
+        return str(round(value, 2))
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)[:2000]
+    return str(value)
+
+
+@event.listens_for(SessionChangeSet, 'before_insert')
+@event.listens_for(SessionChangeSet, 'before_update')
+def _encode_change_set(mapper, connection, target):
+    target.encode()
+
+
+# ==============================================================================
+# SESSION SNAPSHOTS — Content-addressed states for diff / rollback
+# ==============================================================================
+
+class SnapshotSection(db.Model):
+    """One section of a session snapshot, stored once per distinct content.
+
+    The key is the sha256 of the section's canonical JSON, so every snapshot
+    in which a section did not change points to the same row.
+    """
+    __tablename__ = 'snapshot_sections'
+
+    hash = db.Column(db.String(64), primary_key=True)
+    section = db.Column(db.String(30), nullable=False)
+    payload = db.Column(db.LargeBinary, nullable=False)       # zlib(canonical JSON of section_dict)
+
+    @property
+    def data(self):
+        return json.loads(zlib.decompress(self.payload))
+
+    @classmethod
+    def prune(cls):
+        """Delete the sections no snapshot points to any more; returns how many."""
+        used = set()
+        for (manifest,) in db.session.query(SessionSnapshot.manifest):
+            used.update(json.loads(manifest).values())
+        orphans = [h for (h,) in db.session.query(cls.hash) if h not in used]
+        for i in range(0, len(orphans), 500):
+            cls.query.filter(cls.hash.in_(orphans[i:i + 500])).delete(synchronize_session=False)
+        return len(orphans)
+
+
+class SessionSnapshot(db.Model):
+    """Immutable, content-addressed state of a NightAuditSession.
+
+    A snapshot is a manifest {section: SnapshotSection hash} of the audit
+    sections (not the 'session' metadata: status, timestamps, correction
+    counters), and its hash is the sha256 of that manifest. Equal data gives
+    an equal hash whatever the kind or time of capture, so the hash doubles
+    as a version key, and diffing two snapshots only decodes the sections
+    whose hashes differ.
+    """
+    __tablename__ = 'session_snapshots'
+    __table_args__ = (
+        db.Index('ix_snapshots_date_kind', 'audit_date', 'kind', 'id'),
+    )
+
+    KINDS = ('submit', 'unlock', 'relock', 'sync', 'rollback')
+    SKIP_SECTIONS = ('session',)
+    _floats = None
+
+    id = db.Column(db.Integer, primary_key=True)
+    audit_date = db.Column(db.Date, nullable=False)
+    kind = db.Column(db.String(20), nullable=False)
+    hash = db.Column(db.String(64), nullable=False, index=True)
+    manifest = db.Column(db.Text, nullable=False)             # JSON {section: section hash}
+    correction_round = db.Column(db.Integer, default=0)
+    created_by = db.Column(db.String(100), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    note = db.Column(db.Text, nullable=True)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._blobs = {}
+
+    @orm.reconstructor
+    def _init_on_load(self):
+        self._blobs = {}
+
+    @classmethod
+    def of(cls, nas, kind=None, created_by=None, note=None):
+        """Snapshot of the current state of `nas`, not added to the session."""
+        nas.load_sections()
+        manifest, blobs = {}, {}
+        for section in nas.sections():
+            if section in cls.SKIP_SECTIONS:
+                continue
+            data = nas.section_dict(section)
+            for field in cls._float_columns().intersection(data):
+                if data[field] is not None:
+                    data[field] = float(data[field])   # an int set in memory reads back as a float
+            raw = _canonical_json(data)
+            digest = hashlib.sha256(raw).hexdigest()
+            manifest[section] = digest
+            blobs[digest] = (section, raw)
+        raw_manifest = _canonical_json(manifest)
+        snapshot = cls(audit_date=nas.audit_date, kind=kind, hash=hashlib.sha256(raw_manifest).hexdigest(),
+                       manifest=raw_manifest.decode('utf-8'), correction_round=nas.correction_count or 0,
+                       created_by=created_by, note=note)
+        snapshot._blobs = blobs
+        return snapshot
+
+    @classmethod
+    def _float_columns(cls):
+        if cls._floats is None:
+            cls._floats = frozenset(p.key for p in NightAuditSession.__mapper__.column_attrs
+                                    if isinstance(p.columns[0].type, db.Float))
+        return cls._floats
+
+    @classmethod
+    def content_hash(cls, nas):
+        """Version key of the current data of `nas` (equal to its snapshot's hash)."""
+        return cls.of(nas).hash
+
+    @classmethod
+    def take(cls, nas, kind, created_by=None, note=None):
+        """
+        Snapshot `nas` and add it to the session. Its sections are inserted
+        with ON CONFLICT DO NOTHING: identical sections are shared across
+        dates, and a concurrent submit may store the same hash first.
+        """
+        snapshot = cls.of(nas, kind, created_by, note)
+        db.session.execute(
+            upsert_insert(SnapshotSection)
+            .values([{'hash': h, 'section': section, 'payload': zlib.compress(raw)}
+                     for h, (section, raw) in snapshot._blobs.items()])
+            .on_conflict_do_nothing(index_elements=['hash'])
+        )
+        db.session.add(snapshot)
+        return snapshot
+
+    @classmethod
+    def latest(cls, audit_date, *kinds):
+        query = cls.query.filter_by(audit_date=audit_date)
+        if kinds:
+            query = query.filter(cls.kind.in_(kinds))
+        return query.order_by(cls.id.desc()).first()
+
+    @property
+    def sections_map(self):
+        return json.loads(self.manifest)
+
+    def load(self, sections=None):
+        """{section: data} of `sections` (all by default), decoded from the shared rows in one query."""
+        manifest = self.sections_map
+        wanted = {manifest[s]: s for s in (manifest if sections is None else sections) if s in manifest}
+        data = {wanted[h]: json.loads(raw) for h, (_s, raw) in self._blobs.items() if h in wanted}
+        missing = [h for h in wanted if wanted[h] not in data]
+        if missing:
+            for row in SnapshotSection.query.filter(SnapshotSection.hash.in_(missing)):
+                data[wanted[row.hash]] = row.data
+        return data
+
+    def state(self):
+        """Every snapshotted column, as one flat dict like NightAuditSession.to_dict()."""
+        return {field: value for data in self.load().values() for field, value in data.items()}
+
+    def diff(self, other):
+        """{section: {field: [self value, other value]}} of the fields that differ."""
+        mine, theirs = self.sections_map, other.sections_map
+        sections = sorted(s for s in set(mine) | set(theirs) if mine.get(s) != theirs.get(s))
+        old, new = self.load(sections), other.load(sections)
+        changes = {}
+        for section in sections:
+            before, after = old.get(section, {}), new.get(section, {})
+            fields = {f: [before.get(f), after.get(f)] for f in sorted(set(before) | set(after))
+                      if before.get(f) != after.get(f)}
+            if fields:
+                changes[section] = fields
+        return changes
+
+    def restore(self, nas):
+        """Write this snapshot's values back on `nas`; returns {section: {field: [current, restored]}}."""
+        changes = SessionSnapshot.of(nas).diff(self)
+        for fields in changes.values():
+            for field, (_current, value) in fields.items():
+                if field in nas.JSON_FIELDS:
+                    nas.set_json(field, value)
+                else:
+                    setattr(nas, field, value)
+        return changes
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'audit_date': self.audit_date.isoformat() if self.audit_date else None,
+            'kind': self.kind,
+            'hash': self.hash,
+            'correction_round': self.correction_round,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'note': self.note,
+        }
+
+
+def _canonical_json(data):
+    return json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+
+# ==============================================================================
+# SESSION SECTION VERSIONS — Revalidation of /api/rj/native/session/<date>/<section>
+# ==============================================================================
+
+class SessionSectionVersion(db.Model):
+    """Version of one section of a NightAuditSession.
+
+    Every ORM flush that changes a session stamps the sections it touched
+    with the next version of that date (max + 1), so versions only grow and
+    "changed since N" is a range scan. Creating a session stamps all of its
+    sections, which also invalidates anything cached for a deleted session
+    of the same date.
+    """
+    __tablename__ = 'session_section_versions'
+    __table_args__ = (
+        db.UniqueConstraint('audit_date', 'section', name='uq_section_version'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    audit_date = db.Column(db.Date, nullable=False)
+    section = db.Column(db.String(30), nullable=False)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @classmethod
+    def for_date(cls, audit_date, since=0):
+        """{section: version} of a date, only versions > since."""
+        rows = db.session.query(cls.section, cls.version).filter(
+            cls.audit_date == audit_date, cls.version > since)
+        return dict(rows.all())
+
+    @classmethod
+    def bump(cls, connection, audit_date, sections):
+        """Stamp `sections` with the next version of the date; returns it.
+
+        Runs on the flush connection, after the session row was written, so
+        the write lock is already held and max + 1 cannot race.
+        """
+        table = cls.__table__
+        version = connection.scalar(
+            db.select(func.coalesce(func.max(table.c.version), 0))
+            .where(table.c.audit_date == audit_date)) + 1
+        now = datetime.utcnow()
+        for section in sorted(sections):
+            updated = connection.execute(
+                table.update()
+                .where(table.c.audit_date == audit_date, table.c.section == section)
+                .values(version=version, updated_at=now)).rowcount
+            if not updated:
+                connection.execute(table.insert().values(
+                    audit_date=audit_date, section=section, version=version, updated_at=now))
+        return version
+
+
+@event.listens_for(NightAuditSession, 'after_insert')
+def _stamp_new_session(mapper, connection, target):
+    SessionSectionVersion.bump(connection, target.audit_date, NightAuditSession.sections())
+
+
+@event.listens_for(NightAuditSession, 'after_update')
+def _stamp_changed_sections(mapper, connection, target):
+    state = inspect(target)
+    changed = {NightAuditSession.section_of(prop.key) for prop in mapper.column_attrs
+               if state.attrs[prop.key].history.has_changes()}
+    if changed:
+        SessionSectionVersion.bump(connection, target.audit_date, changed)
@@ -44,6 +44,12 @@ DEFAULT_PREFERENCES = {
         'threshold_value': None,
         'delivery_method': 'email',
     },
+    'anomaly_detected': {
+        'roles': ['gm', 'gsm', 'admin'],
+        'is_enabled': True,
+        'threshold_value': 2.0,
+        'delivery_method': 'email',
+    },
     'daily_summary': {
         'roles': ['gm', 'gsm', 'admin'],
         'is_enabled': True,
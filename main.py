@@ -1,34 +1,20 @@
+import importlib
 import os
 from flask import Flask, redirect, url_for, session
 from config.settings import Config
 from database import db
-from routes import auth_bp, auth_v2, checklist_bp
-from routes.generators import generators_bp
-from routes.audit import audit_bp
-from routes.reports import reports_bp
-from routes.balances import balances_bp
-from routes.crm import crm_bp
-from routes.crm_tabs import crm_tabs_bp
-from routes.dashboard import dashboard_bp
-from routes.manager import manager_bp
-from routes.balance_checker import balance_checker_bp
-from routes.audit.rj_native import rj_native_bp
-from routes.audit.rj_export_pdf import rj_export_bp
-from routes.audit.rj_export_excel import rj_excel_bp
-from routes.audit.rj_correction import rj_correction_bp
-from routes.pod import pod_bp
-from routes.hp import hp_bp
-from routes.direction import direction_bp
-from routes.budget import budget_bp
-from routes.notifications import notifications_bp
-from routes.forecasting import forecasting_bp
-from routes.lightspeed import lightspeed_bp
-from routes.properties import properties_bp
-from routes.portfolio import portfolio_bp
-from routes.compset import compset_bp
+from database.engine import DatabaseLayer
+from routes.manifest import BLUEPRINTS
 from utils.auth_decorators import get_current_user, ROLE_LABELS_FR
 from utils.csrf import get_csrf_token
 from utils.email_service import EmailService
+from utils.notification_outbox import OutboxDispatcher
+from utils.weather_service import WeatherService
+from utils.forecast_store import ForecastStore
+from utils.regime_model import RegimeStore
+from utils.anomaly_scorer import AnomalyScorer
+from utils.doc_index import DocIndex
+from utils.request_metrics import RequestMetrics
 
 
 def create_app():
@@ -36,42 +22,27 @@ def create_app():
     app.config.from_object(Config)
     Config.validate()
 
-    # Fix database path for absolute reference
-    basedir = os.path.abspath(os.path.dirname(__file__))
-    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(basedir, "database", "audit.db")}'
+    # Database: URI / pool from Config, SQLite tuned for several workers
+    DatabaseLayer(app)
 
-    db.init_app(app)
+    # Initialize email service + background outbox
+    app.extensions['email_service'] = EmailService(app)
+    OutboxDispatcher(app)
+    WeatherService(app)
+    ForecastStore(app)
+    RegimeStore(app)
+    AnomalyScorer(app)
+    DocIndex(app)
+    RequestMetrics(app)
 
-    # Initialize email service
-    email_service = EmailService(app)
+    # Register blueprints (imported here from the manifest, not at module load)
+    for module_name, attr in BLUEPRINTS:
+        app.register_blueprint(getattr(importlib.import_module(module_name), attr))
 
-    # Register blueprints
-    app.register_blueprint(auth_bp)
-    app.register_blueprint(auth_v2)
-    app.register_blueprint(checklist_bp)
-    app.register_blueprint(generators_bp)
-    app.register_blueprint(audit_bp)
-    app.register_blueprint(reports_bp)
-    app.register_blueprint(balances_bp)
-    app.register_blueprint(crm_bp)
-    app.register_blueprint(crm_tabs_bp)
-    app.register_blueprint(dashboard_bp)
-    app.register_blueprint(manager_bp)
-    app.register_blueprint(balance_checker_bp)
-    app.register_blueprint(rj_native_bp)
-    app.register_blueprint(rj_export_bp)
-    app.register_blueprint(rj_excel_bp)
-    app.register_blueprint(rj_correction_bp)
-    app.register_blueprint(pod_bp)
-    app.register_blueprint(hp_bp)
-    app.register_blueprint(direction_bp)
-    app.register_blueprint(budget_bp)
-    app.register_blueprint(notifications_bp)
-    app.register_blueprint(forecasting_bp)
-    app.register_blueprint(lightspeed_bp)
-    app.register_blueprint(properties_bp)
-    app.register_blueprint(portfolio_bp)
-    app.register_blueprint(compset_bp)
+    # Pre-fork servers: pay for the heavy libraries once in the master process
+    if app.config.get('STARTUP_PRELOAD_HEAVY'):
+        from utils.lazy_import import preload
+        preload()
 
     # Create tables + auto-seed if empty
     with app.app_context():
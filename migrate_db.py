@@ -12,6 +12,19 @@ import os
 
 DB_PATH = os.path.join(os.path.dirname(__file__), 'database', 'audit.db')
 
+# Composite / missing indexes on hot query paths (see python -m scripts.query_plans).
+# db.create_all() only creates them for new tables; existing databases get them here.
+INDEXES = [
+    ('ix_djm_property_date', 'daily_jour_metrics', 'property_id, date'),
+    ('ix_djm_year_month', 'daily_jour_metrics', 'year, month'),
+    ('ix_rj_sheet_archive_sheet', 'rj_sheet_data', 'archive_id, sheet_name'),
+    ('ix_otb_target_snapshot', 'otb_forecasts', 'target_date, snapshot_date'),
+    ('ix_task_completion_shift_task', 'task_completions', 'shift_id, task_id'),
+    ('ix_shifts_date', 'shifts', 'date'),
+    ('ix_nas_property_date', 'night_audit_sessions', 'property_id, audit_date'),
+    ('ix_nas_header', 'night_audit_sessions', 'audit_date, status, auditor_name, is_fully_balanced'),
+]
+
 
 def migrate():
     if not os.path.exists(DB_PATH):
@@ -46,6 +59,11 @@ def migrate():
 
     conn.commit()
 
+    # ── Indexes for the hot query paths ──────────────────────────────────
+    print("\n=== Index ===\n")
+    create_indexes(cursor)
+    conn.commit()
+
     # ── Verify new tables exist (created by db.create_all in main.py) ────
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
     tables = [row[0] for row in cursor.fetchall()]
@@ -63,5 +81,21 @@ def migrate():
     print("\nMigration terminée. Lancez 'python main.py' pour démarrer.")
 
 
+def create_indexes(cursor):
+    """CREATE INDEX IF NOT EXISTS for INDEXES (tables not created yet are skipped)."""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+    tables = {row[0] for row in cursor.fetchall()}
+    for name, table, columns in INDEXES:
+        if table not in tables:
+            print(f"  · Table absente: {table} (index créé au démarrage de l'app)")
+            continue
+        try:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+            cursor.execute(f"ANALYZE {table}")
+            print(f"  ✓ Index: {name} ON {table} ({columns})")
+        except Exception as e:
+            print(f"  ✗ Erreur index {name}: {e}")
+
+
 if __name__ == '__main__':
     migrate()
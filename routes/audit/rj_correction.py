@@ -4,14 +4,19 @@ RJ Correction Module — Unlock, diagnose & correct locked audit sessions.
 Provides:
 - Correction page with variance diagnostic
 - Unlock/relock endpoints with audit trail
-- Field-level change logging
+- Field-level change logging: one compressed SessionChangeSet per save
+- History API: change list, and any past version of a session rebuilt by
+  undoing the later change-sets on the current state
+- Snapshots: content-addressed state taken at submit, unlock and relock,
+  with a diff API and one-call rollback
 - Diagnostic engine that explains each variance
 """
 
-from flask import Blueprint, request, jsonify, render_template, session
+from contextlib import contextmanager
+from flask import Blueprint, g, request, jsonify, render_template, session
 from functools import wraps
 from datetime import datetime, date
-from database.models import db, NightAuditSession, SessionEditLog
+from database.models import db, NightAuditSession, SessionChangeSet, SessionEditLog, SessionSnapshot
 import json
 import logging
 
@@ -49,7 +54,10 @@ def correction_page():
 @auth_required
 def list_correction_sessions():
     """List all sessions that have been locked or are being corrected."""
-    sessions = NightAuditSession.query.filter(
+    sessions = NightAuditSession.header_query(
+        'completed_at', 'correction_count', 'last_corrected_by', 'last_corrected_at',
+        'recap_balance', 'transelect_variance', 'quasi_variance', 'diff_caisse_formula',
+    ).filter(
         NightAuditSession.status.in_(['locked', 'correcting', 'submitted'])
     ).order_by(NightAuditSession.audit_date.desc()).limit(60).all()
 
@@ -327,27 +335,28 @@ def unlock_session(audit_date):
     # Snapshot current state before unlock
     _snapshot_before_correction(nas)
 
+    old_status = nas.status
     nas.status = 'correcting'
     nas.correction_count = (nas.correction_count or 0) + 1
     nas.correction_reason = reason
     nas.last_corrected_by = data.get('corrected_by', session.get('username', 'unknown'))
     nas.last_corrected_at = datetime.utcnow()
+    snapshot = SessionSnapshot.take(nas, 'unlock', created_by=nas.last_corrected_by, note=reason)
 
     # Log the unlock event
-    log = SessionEditLog(
+    log = SessionChangeSet(
         audit_date=d,
-        section='system',
-        field_name='status',
-        old_value='locked',
-        new_value='correcting',
+        kind='unlock',
         edited_by=nas.last_corrected_by,
         correction_round=nas.correction_count,
         note=f'Déverrouillée pour correction: {reason}'
     )
+    log.add('system', 'status', old_status, 'correcting')
     db.session.add(log)
     db.session.commit()
 
-    return jsonify({'success': True, 'status': 'correcting', 'correction_count': nas.correction_count})
+    return jsonify({'success': True, 'status': 'correcting', 'correction_count': nas.correction_count,
+                    'snapshot': snapshot.hash})
 
 
 @rj_correction_bp.route('/api/rj/correction/relock/<audit_date>', methods=['POST'])
@@ -371,22 +380,22 @@ def relock_session(audit_date):
     nas.completed_at = datetime.utcnow()
 
     # Log the relock event
-    log = SessionEditLog(
+    log = SessionChangeSet(
         audit_date=d,
-        section='system',
-        field_name='status',
-        old_value='correcting',
-        new_value='locked',
+        kind='relock',
         edited_by=session.get('username', 'unknown'),
         correction_round=nas.correction_count or 1,
         note='Reverrouillée après correction'
     )
+    log.add('system', 'status', 'correcting', 'locked')
     db.session.add(log)
+    snapshot = SessionSnapshot.take(nas, 'relock', created_by=log.edited_by)
     db.session.commit()
 
     return jsonify({
         'success': True,
         'status': 'locked',
+        'snapshot': snapshot.hash,
         'recap_balance': nas.recap_balance or 0,
         'transelect_variance': nas.transelect_variance or 0,
         'quasi_variance': nas.quasi_variance or 0,
@@ -400,15 +409,220 @@ def relock_session(audit_date):
 @rj_correction_bp.route('/api/rj/correction/history/<audit_date>')
 @auth_required
 def get_history(audit_date):
-    """Get the correction history (edit log) for a session."""
+    """Get the correction history (edit log) for a session: one row per changed field."""
     try:
         d = datetime.strptime(audit_date, '%Y-%m-%d').date()
     except ValueError:
         return jsonify({'error': 'Format de date invalide'}), 400
 
-    logs = SessionEditLog.query.filter_by(audit_date=d)\
-        .order_by(SessionEditLog.edited_at.desc()).all()
-    return jsonify({'history': [l.to_dict() for l in logs]})
+    # String ids throughout: "log:<id>" legacy rows, "<change-set id>:<n>" change-set rows
+    history = [{**l.to_dict(), 'id': f'log:{l.id}'} for l in SessionEditLog.query.filter_by(audit_date=d)]
+    for change_set in SessionChangeSet.query.filter_by(audit_date=d).order_by(SessionChangeSet.id):
+        history.extend(change_set.history_rows())
+    history.sort(key=lambda row: row['edited_at'] or '', reverse=True)
+    return jsonify({'history': history})
+
+
+@rj_correction_bp.route('/api/rj/correction/history/<audit_date>/versions')
+@auth_required
+def list_versions(audit_date):
+    """Change-sets of a session, oldest first (?changes=1 adds the field maps)."""
+    try:
+        d = datetime.strptime(audit_date, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Format de date invalide'}), 400
+
+    changes = request.args.get('changes') in ('1', 'true')
+    sets = SessionChangeSet.query.filter_by(audit_date=d).order_by(SessionChangeSet.id).all()
+    return jsonify({'date': d.isoformat(), 'versions': [cs.to_dict(changes=changes) for cs in sets]})
+
+
+@rj_correction_bp.route('/api/rj/correction/history/<audit_date>/version/<int:version>')
+@auth_required
+def get_version(audit_date, version):
+    """The session as it was right after change-set `version` (0: before any logged change)."""
+    return _version_response(audit_date, SessionChangeSet.id > version, version=version)
+
+
+@rj_correction_bp.route('/api/rj/correction/history/<audit_date>/round/<int:round_num>')
+@auth_required
+def get_round_version(audit_date, round_num):
+    """The session as it was at the end of correction round `round_num` (0: before the first unlock)."""
+    return _version_response(audit_date, SessionChangeSet.correction_round > round_num, round=round_num)
+
+
+def _version_response(audit_date, later, **key):
+    try:
+        d = datetime.strptime(audit_date, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Format de date invalide'}), 400
+
+    nas = NightAuditSession.query.filter_by(audit_date=d).first()
+    if not nas:
+        return jsonify({'error': 'Session non trouvée'}), 404
+    state, undone = rebuild_version(nas, later)
+    current = nas.to_dict()
+    return jsonify({
+        'date': d.isoformat(),
+        **key,
+        'undone': undone,
+        'changed_fields': sorted(f for f in state if state[f] != current[f]),
+        'session': state,
+    })
+
+
+def rebuild_version(nas, later):
+    """
+    Undo the change-sets matching `later` (a SessionChangeSet filter) on the
+    current session, newest first.
+
+    Returns (session dict as of that version, number of change-sets undone).
+    Fields a save changed without logging them (recomputed balances,
+    sections not tracked by log_field_changes) keep their current value.
+    """
+    state = nas.to_dict()
+    sets = SessionChangeSet.query.filter(
+        SessionChangeSet.audit_date == nas.audit_date,
+        SessionChangeSet.kind != 'snapshot',
+        later,
+    ).order_by(SessionChangeSet.id.desc()).all()
+    for change_set in sets:
+        for fields in change_set.changes.values():
+            for field, (old, _new) in fields.items():
+                if field in state:
+                    state[field] = old
+    return state, len(sets)
+
+
+# ═══════════════════════════════════════
+# API — SNAPSHOTS (diff / rollback)
+# ═══════════════════════════════════════
+
+@rj_correction_bp.route('/api/rj/correction/snapshots/<audit_date>')
+@auth_required
+def list_snapshots(audit_date):
+    """Snapshots of a session, oldest first, with the hash of its current data."""
+    try:
+        d = datetime.strptime(audit_date, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Format de date invalide'}), 400
+
+    nas = NightAuditSession.query.filter_by(audit_date=d).first()
+    if not nas:
+        return jsonify({'error': 'Session non trouvée'}), 404
+    snapshots = SessionSnapshot.query.filter_by(audit_date=d).order_by(SessionSnapshot.id).all()
+    return jsonify({
+        'date': d.isoformat(),
+        'current': SessionSnapshot.content_hash(nas),
+        'snapshots': [s.to_dict() for s in snapshots],
+    })
+
+
+@rj_correction_bp.route('/api/rj/correction/snapshots/<audit_date>/diff')
+@auth_required
+def diff_snapshots(audit_date):
+    """Field changes between ?from= and ?to= (snapshot id, hash or prefix, or "current").
+
+    Defaults: from the first snapshot of the date to the current data.
+    """
+    try:
+        d = datetime.strptime(audit_date, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Format de date invalide'}), 400
+
+    nas = NightAuditSession.query.filter_by(audit_date=d).first()
+    if not nas:
+        return jsonify({'error': 'Session non trouvée'}), 404
+    first = SessionSnapshot.query.filter_by(audit_date=d).order_by(SessionSnapshot.id).first()
+    old = _find_snapshot(nas, request.args.get('from')) if request.args.get('from') else first
+    new = _find_snapshot(nas, request.args.get('to', 'current'))
+    if old is None or new is None:
+        return jsonify({'error': 'Snapshot introuvable'}), 404
+
+    changes = old.diff(new)
+    return jsonify({
+        'date': d.isoformat(),
+        'from': old.hash,
+        'to': new.hash,
+        'identical': old.hash == new.hash,
+        'field_count': sum(len(f) for f in changes.values()),
+        'changes': changes,
+    })
+
+
+@rj_correction_bp.route('/api/rj/correction/snapshots/<audit_date>/<ref>')
+@auth_required
+def get_snapshot(audit_date, ref):
+    """One snapshot with its full state (every snapshotted column)."""
+    try:
+        d = datetime.strptime(audit_date, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Format de date invalide'}), 400
+
+    nas = NightAuditSession.query.filter_by(audit_date=d).first()
+    if not nas:
+        return jsonify({'error': 'Session non trouvée'}), 404
+    snapshot = _find_snapshot(nas, ref)
+    if snapshot is None:
+        return jsonify({'error': 'Snapshot introuvable'}), 404
+    return jsonify({**snapshot.to_dict(), 'session': snapshot.state()})
+
+
+@rj_correction_bp.route('/api/rj/correction/snapshots/<audit_date>/rollback/<ref>', methods=['POST'])
+@auth_required
+def rollback_snapshot(audit_date, ref):
+    """Restore a session in correction to a snapshot, in one call.
+
+    The restored fields are logged as a 'rollback' change-set (so the
+    version history can still rebuild the state before it) and the result
+    is snapshotted.
+    """
+    try:
+        d = datetime.strptime(audit_date, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Format de date invalide'}), 400
+
+    nas = NightAuditSession.query.filter_by(audit_date=d).first()
+    if not nas:
+        return jsonify({'error': 'Session non trouvée'}), 404
+    if nas.status != 'correcting':
+        return jsonify({'error': 'Déverrouiller la session avant de restaurer un snapshot'}), 403
+    target = _find_snapshot(nas, ref)
+    if target is None or target.id is None:
+        return jsonify({'error': 'Snapshot introuvable'}), 404
+
+    username = session.get('username', 'unknown')
+    note = f'Restauration du snapshot {target.hash[:12]} ({target.kind})'
+    changes = target.restore(nas)
+    log = SessionChangeSet(audit_date=d, kind='rollback', edited_by=username,
+                           correction_round=nas.correction_count or 1, note=note)
+    for section, fields in changes.items():
+        for field, (old, new) in fields.items():
+            log.add(section, field, old, new)
+    if log.field_count:
+        db.session.add(log)
+    snapshot = SessionSnapshot.take(nas, 'rollback', created_by=username, note=note)
+    db.session.commit()
+
+    return jsonify({
+        'success': True,
+        'snapshot': snapshot.hash,
+        'restored': target.hash,
+        'field_count': log.field_count,
+        'changes': changes,
+    })
+
+
+def _find_snapshot(nas, ref):
+    """Snapshot of the session by id, hash or hash prefix (8+ chars); "current" is the live data."""
+    if ref == 'current':
+        return SessionSnapshot.of(nas)
+    query = SessionSnapshot.query.filter_by(audit_date=nas.audit_date)
+    if ref.isdigit() and len(ref) < 8:
+        return query.filter_by(id=int(ref)).first()
+    if len(ref) < 8:
+        return None
+    return query.filter(SessionSnapshot.hash.startswith(ref.lower())).order_by(SessionSnapshot.id.desc()).first()
 
 
 # ═══════════════════════════════════════
@@ -422,9 +636,6 @@ def log_field_changes(nas, section, new_data, fields):
     if nas.status != 'correcting':
         return
 
-    editor = session.get('username', 'unknown')
-    round_num = nas.correction_count or 1
-
     for field in fields:
         old_val = getattr(nas, field, None)
         new_val = new_data.get(field)
@@ -439,16 +650,7 @@ def log_field_changes(nas, section, new_data, fields):
             new_str = str(new_val or '')
 
         if old_str != new_str:
-            log = SessionEditLog(
-                audit_date=nas.audit_date,
-                section=section,
-                field_name=field,
-                old_value=old_str,
-                new_value=new_str,
-                edited_by=editor,
-                correction_round=round_num,
-            )
-            db.session.add(log)
+            _add_edit_log(nas, section, field, old_val, new_val)
 
 
 def log_json_changes(nas, section, field_name, old_json, new_json):
@@ -460,16 +662,40 @@ def log_json_changes(nas, section, field_name, old_json, new_json):
     new_str = json.dumps(new_json, ensure_ascii=False) if new_json else '[]'
 
     if old_str != new_str:
-        log = SessionEditLog(
+        _add_edit_log(nas, section, field_name, old_json, new_json)
+
+
+@contextmanager
+def collect_edit_logs():
+    """Collect the changes of the enclosed saves into one SessionChangeSet
+    per session instead of adding them as they come; yields the list of
+    change-sets, which the caller adds to the transaction it commits."""
+    g.edit_change_sets = change_sets = []
+    try:
+        yield change_sets
+    finally:
+        g.pop('edit_change_sets', None)
+
+
+def _add_edit_log(nas, section, field, old, new):
+    """Log one changed field. Outside collect_edit_logs() the request still
+    gets one change-set per session, added to db.session when created."""
+    change_sets = g.get('edit_change_sets')
+    collected = change_sets is not None
+    if not collected:
+        change_sets = g.setdefault('request_change_sets', [])
+    change_set = next((cs for cs in change_sets if cs.audit_date == nas.audit_date), None)
+    if change_set is None:
+        change_set = SessionChangeSet(
             audit_date=nas.audit_date,
-            section=section,
-            field_name=field_name,
-            old_value=old_str[:2000],  # Truncate for DB
-            new_value=new_str[:2000],
+            kind='save',
             edited_by=session.get('username', 'unknown'),
             correction_round=nas.correction_count or 1,
         )
-        db.session.add(log)
+        change_sets.append(change_set)
+        if not collected:
+            db.session.add(change_set)
+    change_set.add(section, field, old, new)
 
 
 def _snapshot_before_correction(nas):
@@ -479,18 +705,16 @@ def _snapshot_before_correction(nas):
         'quasi_variance', 'diff_caisse_formula',
         'jour_total_fb', 'jour_total_revenue', 'jour_adr',
     ]
-    editor = session.get('username', 'unknown')
+    snapshot = SessionChangeSet(
+        audit_date=nas.audit_date,
+        kind='snapshot',
+        edited_by=session.get('username', 'unknown'),
+        correction_round=(nas.correction_count or 0) + 1,
+        note='Valeur avant correction'
+    )
     for field in snapshot_fields:
         val = getattr(nas, field, None)
         if val is not None:
-            log = SessionEditLog(
-                audit_date=nas.audit_date,
-                section='snapshot',
-                field_name=field,
-                old_value=str(round(val, 2) if isinstance(val, float) else val),
-                new_value=None,
-                edited_by=editor,
-                correction_round=(nas.correction_count or 0) + 1,
-                note='Valeur avant correction'
-            )
-            db.session.add(log)
+            snapshot.add('snapshot', field, val, None)
+    if snapshot.field_count:
+        db.session.add(snapshot)
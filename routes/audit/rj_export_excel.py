@@ -20,11 +20,16 @@ from dateutil.parser import parse as parse_date
 
 from flask import Blueprint, jsonify, send_file, request
 from database.models import db, NightAuditSession
+from sqlalchemy.orm import undefer
 
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
-from openpyxl.worksheet.table import Table, TableStyleInfo
+from utils.lazy_import import lazy_attrs
+
+# openpyxl loads on the first export, not at startup
+Workbook, = lazy_attrs('openpyxl', 'Workbook')
+Font, PatternFill, Alignment, Border, Side = lazy_attrs(
+    'openpyxl.styles', 'Font', 'PatternFill', 'Alignment', 'Border', 'Side')
+get_column_letter, = lazy_attrs('openpyxl.utils', 'get_column_letter')
+Table, TableStyleInfo = lazy_attrs('openpyxl.worksheet.table', 'Table', 'TableStyleInfo')
 
 rj_excel_bp = Blueprint('rj_excel', __name__, url_prefix='/api/rj/export')
 
@@ -1072,7 +1077,7 @@ def export_batch():
     if start_date > end_date:
         return jsonify({'error': 'start_date must be before end_date'}), 400
 
-    sessions = NightAuditSession.query.filter(
+    sessions = NightAuditSession.query.options(undefer('*')).filter(
         NightAuditSession.audit_date >= start_date,
         NightAuditSession.audit_date <= end_date
     ).order_by(NightAuditSession.audit_date).all()
@@ -27,7 +27,7 @@ from flask import Blueprint, jsonify, send_file
 from database.models import (
     db, NightAuditSession, DailyJourMetrics,
     DailyCardMetrics, DailyLaborMetrics, DailyCashRecon,
-    DailyTipMetrics, MonthlyBudget
+    DailyTipMetrics
 )
 
 from reportlab.lib.pagesizes import letter
@@ -41,11 +41,19 @@ from reportlab.platypus import (
 )
 from reportlab.pdfgen import canvas
 
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from matplotlib.ticker import FuncFormatter
+from utils import budget_variance
+from utils.lazy_import import lazy_module, lazy_attrs
+
+
+def _matplotlib_backend():
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+# matplotlib (~0.5 s to import) loads on the first chart, not at startup
+plt = lazy_module('matplotlib.pyplot', on_load=_matplotlib_backend)
+mdates = lazy_module('matplotlib.dates')
+FuncFormatter, = lazy_attrs('matplotlib.ticker', 'FuncFormatter')
 
 rj_export_bp = Blueprint('rj_export', __name__)
 
@@ -130,8 +138,7 @@ def _load_tips(dt):
 
 def _load_budget(dt):
     d = _to_date(dt)
-    b = MonthlyBudget.query.filter_by(year=d.year, month=d.month).first()
-    return {c.name: getattr(b, c.name) for c in b.__table__.columns} if b else {}
+    return budget_variance.VarianceFrame(d.replace(day=1), d).budget_targets(d.year, d.month)
 
 def _load_mtd(dt):
     d = _to_date(dt)
@@ -313,12 +320,12 @@ def _generate_recommendations(s, jour, cards, labor, cash, tips, budget, mtd, ly
     m_fb = mtd.get('fb_revenue', 0)
     m_days = mtd.get('days', 1) or 1
 
-    bd_total = float(budget.get('total_revenue_budget', 0) or 0) / 28 if budget else 0
-    bd_room = float(budget.get('room_revenue_budget', 0) or 0) / 28 if budget else 0
-    bd_fb = float(budget.get('fb_revenue_budget', 0) or 0) / 28 if budget else 0
+    bd_total = float(budget.get('total_revenue_budget', 0) or 0) / budget.get('days_in_month', 28) if budget else 0
+    bd_room = float(budget.get('room_revenue_budget', 0) or 0) / budget.get('days_in_month', 28) if budget else 0
+    bd_fb = float(budget.get('fb_revenue_budget', 0) or 0) / budget.get('days_in_month', 28) if budget else 0
     bd_occ = float(budget.get('occupancy_budget', 0) or 0)
     bd_adr = float(budget.get('adr_budget', 0) or 0)
-    bd_labor = float(budget.get('labor_cost_budget', 0) or 0) / 28 if budget else 0
+    bd_labor = float(budget.get('labor_cost_budget', 0) or 0) / budget.get('days_in_month', 28) if budget else 0
 
     bd_mtd_total = bd_total * m_days
 
@@ -631,9 +638,9 @@ def generate_rj_pdf(s, jour, cards, labor, cash, tips, budget, mtd, ly_jour, ly_
 
     rows = [hdr]; secs=set(); tots=set(); subs=set()
     bd_days = md.get('days',1) or 1
-    bd_room_day = float(bd.get('room_revenue_budget',0) or 0) / 28  # approximate
-    bd_fb_day = float(bd.get('fb_revenue_budget',0) or 0) / 28
-    bd_total_day = float(bd.get('total_revenue_budget',0) or 0) / 28
+    bd_room_day = float(bd.get('room_revenue_budget',0) or 0) / bd.get('days_in_month', 28)
+    bd_fb_day = float(bd.get('fb_revenue_budget',0) or 0) / bd.get('days_in_month', 28)
+    bd_total_day = float(bd.get('total_revenue_budget',0) or 0) / bd.get('days_in_month', 28)
     bd_room_mtd = bd_room_day * bd_days
     bd_fb_mtd = bd_fb_day * bd_days
     bd_total_mtd = bd_total_day * bd_days
@@ -784,7 +791,7 @@ def generate_rj_pdf(s, jour, cards, labor, cash, tips, budget, mtd, ly_jour, ly_
 
         # Labor cost ratio
         labor_pct = (t_cost / tot_rev * 100) if tot_rev > 0 else 0
-        bud_labor = float(bd.get('labor_cost_budget',0) or 0) / 28 if bd else 0
+        bud_labor = float(bd.get('labor_cost_budget',0) or 0) / bd.get('days_in_month', 28) if bd else 0
         i2=len(lr)
         lr.append(['RATIO MAIN-D\'OEUVRE', '', '', _fp(labor_pct), '', '', 'BUDGET/JOUR', '', _f(bud_labor)])
 
@@ -7,6 +7,7 @@ from functools import wraps
 from datetime import datetime, date
 from database.models import db, MonthlyBudget
 from utils.budget_analyzer import BudgetAnalyzer
+from utils import budget_variance
 import logging
 
 logger = logging.getLogger(__name__)
@@ -269,14 +270,26 @@ def get_variance(year, month):
 def get_ytd_summary(year):
     """Get year-to-date variance summary."""
     try:
-        analyzer = BudgetAnalyzer(year, 1)  # Month doesn't matter for YTD
-        summary = analyzer.get_ytd_summary()
-        return jsonify(summary)
+        return jsonify(budget_variance.ytd(year).summary())
     except Exception as e:
         logger.error(f'YTD summary error: {str(e)}')
         return jsonify({'error': f'Erreur: {str(e)}'}), 500
 
 
+@budget_bp.route('/api/budget/rolling/<int:year>/<int:month>')
+@budget_required
+def get_rolling_summary(year, month):
+    """Get rolling 12-month variance summary ending with year/month."""
+    if month < 1 or month > 12:
+        return jsonify({'error': 'Mois invalide'}), 400
+
+    try:
+        return jsonify(budget_variance.rolling12(year, month).summary())
+    except Exception as e:
+        logger.error(f'Rolling summary error: {str(e)}')
+        return jsonify({'error': f'Erreur: {str(e)}'}), 500
+
+
 @budget_bp.route('/api/budget/<int:year>/<int:month>', methods=['DELETE'])
 @budget_required
 def delete_budget(year, month):
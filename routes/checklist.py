@@ -1,4 +1,5 @@
 import os
+import time
 from pathlib import Path
 from flask import (
     Blueprint,
@@ -27,6 +28,7 @@ def _audit_date():
     return now.date()
 from markupsafe import escape
 from database import db, Task, Shift, TaskCompletion
+from utils.doc_index import get_doc_index
 
 checklist_bp = Blueprint('checklist', __name__)
 
@@ -126,26 +128,14 @@ def documentation_view(filename):
     content_html = None
     parsed = True
 
-    try:
-        if ext == '.md':
-            text = full_path.read_text(encoding='utf-8', errors='ignore')
+    # PDFs are embedded as-is; other formats come from the text cache
+    if ext in ('.md', '.docx', '.txt'):
+        try:
+            text = "\n\n".join(get_doc_index().get_pages(full_path))
             content_html = f"<pre>{escape(text)}</pre>"
-        elif ext == '.docx':
-            from docx import Document
-            doc = Document(str(full_path))
-            text = "\n\n".join([p.text for p in doc.paragraphs])
-            content_html = f"<pre>{escape(text)}</pre>"
-        elif ext == '.pdf':
-            try:
-                from PyPDF2 import PdfReader
-                reader = PdfReader(str(full_path))
-                text = "\n".join([page.extract_text() or '' for page in reader.pages])
-                content_html = f"<pre>{escape(text)}</pre>"
-            except Exception:
-                parsed = False
-        else:
+        except Exception:
             parsed = False
-    except Exception:
+    elif not is_pdf:
         parsed = False
 
     return render_template(
@@ -154,10 +144,32 @@ def documentation_view(filename):
         parsed=parsed,
         content_html=content_html,
         is_pdf=is_pdf,
-        download_url=url_for('checklist.documentation_file', filename=filename)
+        download_url=url_for('checklist.documentation_file', filename=filename),
+        page=request.args.get('page', type=int),
     )
 
 
+@checklist_bp.route('/documentation/search')
+@login_required
+def documentation_search():
+    """Full-text search across all manuals, one hit per page."""
+    query = request.args.get('q', '').strip()
+    if len(query) < 2:
+        return jsonify({'success': False, 'error': 'Requête trop courte (2 caractères minimum)'}), 400
+    limit = min(request.args.get('limit', 20, type=int), 100)
+
+    t0 = time.perf_counter()
+    hits = get_doc_index().search(query, limit=limit, path_prefix=request.args.get('dir'))
+    for hit in hits:
+        hit['url'] = url_for('checklist.documentation_view', filename=hit['path'], page=hit['page'])
+    return jsonify({
+        'success': True,
+        'query': query,
+        'results': hits,
+        'took_ms': round((time.perf_counter() - t0) * 1000, 1),
+    })
+
+
 @checklist_bp.route('/faq')
 @login_required
 def faq():
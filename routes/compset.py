@@ -7,13 +7,12 @@ Provides:
 - Data import (CSV), seed, and visualization
 """
 
-from flask import Blueprint, request, jsonify, render_template, session
+from flask import Blueprint, current_app, request, jsonify, render_template, session
 from functools import wraps
 from datetime import datetime, date as date_type, timedelta
-from database.models import db, STRCompSet, OTBForecast
+from database.models import db, CompsetImportJob, STRCompSet, OTBForecast
 from utils.auth_decorators import login_required, role_required
-import csv
-import io
+from utils import compset_import, otb_pace
 import logging
 import json
 
@@ -35,6 +34,60 @@ def compset_page():
     return render_template('compset.html')
 
 
+# ═══════════════════════════════════════════════════════════════════════════════
+# CSV IMPORT (shared by STR and OTB)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _import_csv(kind):
+    """Validate the upload, then import it inline or as a background job.
+
+    Uploads larger than COMPSET_IMPORT_BACKGROUND_BYTES (or ?background=1)
+    return 202 with the job; poll /compset/api/import/<id> for progress.
+    """
+    if 'file' not in request.files:
+        return jsonify({'error': 'Aucun fichier fourni.'}), 400
+
+    file = request.files['file']
+    if not file or file.filename == '':
+        return jsonify({'error': 'Fichier vide.'}), 400
+
+    if not file.filename.endswith('.csv'):
+        return jsonify({'error': 'Seuls les fichiers CSV sont acceptés.'}), 400
+
+    config = current_app.config
+    background = request.args.get('background') == '1' or \
+        (request.content_length or 0) > config.get('COMPSET_IMPORT_BACKGROUND_BYTES', 512 * 1024)
+    try:
+        if background:
+            job, path = compset_import.create_job(kind, file, created_by=session.get('user_name'))
+            compset_import.start_job_thread(current_app._get_current_object(), job.id, path)
+            return jsonify({'success': True, 'background': True, 'job': job.to_dict(),
+                            'message': 'Import lancé en arrière-plan.'}), 202
+
+        result = compset_import.import_csv(
+            kind, compset_import.open_text(file.stream),
+            chunk_size=config.get('COMPSET_IMPORT_CHUNK_SIZE', 1000),
+            max_errors=config.get('COMPSET_IMPORT_MAX_ERRORS', 200))
+        return jsonify({
+            'success': True,
+            **result,
+            'message': f"{result['imported']} enregistrements importés."
+        })
+    except Exception as e:
+        logger.error(f'{kind.upper()} import error: {e}')
+        return jsonify({'error': f'Erreur lors de l\'import: {str(e)}'}), 500
+
+
+@compset_bp.route('/api/import/<int:job_id>', methods=['GET'])
+@login_required
+def get_import_job(job_id):
+    """Progress and row errors of a background CSV import."""
+    job = db.session.get(CompsetImportJob, job_id)
+    if not job:
+        return jsonify({'error': 'Import introuvable.'}), 404
+    return jsonify(job.to_dict())
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # STR COMPETITIVE SET API
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -85,80 +138,7 @@ def import_str_data():
     report_date, period_type, my_occ, my_adr, my_revpar,
     comp_occ, comp_adr, comp_revpar, occ_rank, adr_rank, revpar_rank, comp_set_size
     """
-    if 'file' not in request.files:
-        return jsonify({'error': 'Aucun fichier fourni.'}), 400
-
-    file = request.files['file']
-    if not file or file.filename == '':
-        return jsonify({'error': 'Fichier vide.'}), 400
-
-    if not file.filename.endswith('.csv'):
-        return jsonify({'error': 'Seuls les fichiers CSV sont acceptés.'}), 400
-
-    try:
-        stream = io.TextIOWrapper(file.stream, encoding='utf-8-sig')
-        reader = csv.DictReader(stream)
-
-        imported_count = 0
-        errors = []
-
-        for row_num, row in enumerate(reader, start=2):
-            try:
-                report_date = datetime.strptime(row['report_date'], '%Y-%m-%d').date()
-
-                # Check if record exists
-                existing = STRCompSet.query.filter_by(
-                    report_date=report_date,
-                    period_type=row.get('period_type', 'daily')
-                ).first()
-
-                if existing:
-                    # Update
-                    existing.my_occ = float(row.get('my_occ', 0))
-                    existing.my_adr = float(row.get('my_adr', 0))
-                    existing.my_revpar = float(row.get('my_revpar', 0))
-                    existing.comp_occ = float(row.get('comp_occ', 0))
-                    existing.comp_adr = float(row.get('comp_adr', 0))
-                    existing.comp_revpar = float(row.get('comp_revpar', 0))
-                    existing.occ_rank = int(row.get('occ_rank', 0)) or None
-                    existing.adr_rank = int(row.get('adr_rank', 0)) or None
-                    existing.revpar_rank = int(row.get('revpar_rank', 0)) or None
-                    existing.comp_set_size = int(row.get('comp_set_size', 5))
-                    existing.source = 'import'
-                else:
-                    # Create new
-                    record = STRCompSet(
-                        report_date=report_date,
-                        period_type=row.get('period_type', 'daily'),
-                        my_occ=float(row.get('my_occ', 0)),
-                        my_adr=float(row.get('my_adr', 0)),
-                        my_revpar=float(row.get('my_revpar', 0)),
-                        comp_occ=float(row.get('comp_occ', 0)),
-                        comp_adr=float(row.get('comp_adr', 0)),
-                        comp_revpar=float(row.get('comp_revpar', 0)),
-                        occ_rank=int(row.get('occ_rank', 0)) or None,
-                        adr_rank=int(row.get('adr_rank', 0)) or None,
-                        revpar_rank=int(row.get('revpar_rank', 0)) or None,
-                        comp_set_size=int(row.get('comp_set_size', 5)),
-                        source='import',
-                    )
-                    db.session.add(record)
-
-                imported_count += 1
-            except (ValueError, KeyError) as e:
-                errors.append(f'Ligne {row_num}: {str(e)}')
-
-        db.session.commit()
-
-        return jsonify({
-            'success': True,
-            'imported': imported_count,
-            'errors': errors,
-            'message': f'{imported_count} enregistrements importés.'
-        })
-    except Exception as e:
-        logger.error(f'STR import error: {e}')
-        return jsonify({'error': f'Erreur lors de l\'import: {str(e)}'}), 500
+    return _import_csv('str')
 
 
 @compset_bp.route('/api/str/seed', methods=['GET'])
@@ -266,6 +246,42 @@ def get_otb_data():
     })
 
 
+@compset_bp.route('/api/otb/pace', methods=['GET'])
+@login_required
+def get_otb_pace():
+    """
+    OTB pace curves from the pace cube, by days before arrival.
+
+    Query params:
+    - target_date: YYYY-MM-DD — booking curve of one stay date
+    - start_date / end_date: YYYY-MM-DD — pace of a stay window
+      (default: today → today + horizon)
+    - horizon: max days before arrival (default: 90)
+    """
+    horizon = request.args.get('horizon', 90, type=int)
+    try:
+        if request.args.get('target_date'):
+            target_date = datetime.strptime(request.args['target_date'], '%Y-%m-%d').date()
+            curve = otb_pace.target_curve(target_date, horizon)
+            return jsonify({'target_date': target_date.isoformat(), 'horizon': horizon,
+                            'count': len(curve), 'curve': curve})
+
+        start_str, end_str = request.args.get('start_date'), request.args.get('end_date')
+        start = datetime.strptime(start_str, '%Y-%m-%d').date() if start_str else date_type.today()
+        end = datetime.strptime(end_str, '%Y-%m-%d').date() if end_str else start + timedelta(days=horizon)
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD.'}), 400
+
+    curve = otb_pace.pace_curve(start, end, horizon)
+    return jsonify({
+        'start_date': start.isoformat(),
+        'end_date': end.isoformat(),
+        'horizon': horizon,
+        'count': len(curve),
+        'curve': curve,
+    })
+
+
 @compset_bp.route('/api/otb/import', methods=['POST'])
 @login_required
 def import_otb_data():
@@ -276,81 +292,7 @@ def import_otb_data():
     snapshot_date, target_date, rooms_otb, occ_otb, adr_otb, revenue_otb,
     group_rooms, transient_rooms, ly_rooms, ly_occ, ly_adr, ly_revenue
     """
-    if 'file' not in request.files:
-        return jsonify({'error': 'Aucun fichier fourni.'}), 400
-
-    file = request.files['file']
-    if not file or file.filename == '':
-        return jsonify({'error': 'Fichier vide.'}), 400
-
-    if not file.filename.endswith('.csv'):
-        return jsonify({'error': 'Seuls les fichiers CSV sont acceptés.'}), 400
-
-    try:
-        stream = io.TextIOWrapper(file.stream, encoding='utf-8-sig')
-        reader = csv.DictReader(stream)
-
-        imported_count = 0
-        errors = []
-
-        for row_num, row in enumerate(reader, start=2):
-            try:
-                snapshot_date = datetime.strptime(row['snapshot_date'], '%Y-%m-%d').date()
-                target_date = datetime.strptime(row['target_date'], '%Y-%m-%d').date()
-
-                # Check if record exists
-                existing = OTBForecast.query.filter_by(
-                    snapshot_date=snapshot_date,
-                    target_date=target_date
-                ).first()
-
-                if existing:
-                    # Update
-                    existing.rooms_otb = int(row.get('rooms_otb', 0))
-                    existing.occ_otb = float(row.get('occ_otb', 0))
-                    existing.adr_otb = float(row.get('adr_otb', 0))
-                    existing.revenue_otb = float(row.get('revenue_otb', 0))
-                    existing.group_rooms = int(row.get('group_rooms', 0))
-                    existing.transient_rooms = int(row.get('transient_rooms', 0))
-                    existing.ly_rooms = int(row.get('ly_rooms', 0)) or None
-                    existing.ly_occ = float(row.get('ly_occ', 0)) or None
-                    existing.ly_adr = float(row.get('ly_adr', 0)) or None
-                    existing.ly_revenue = float(row.get('ly_revenue', 0)) or None
-                    existing.source = 'import'
-                else:
-                    # Create new
-                    record = OTBForecast(
-                        snapshot_date=snapshot_date,
-                        target_date=target_date,
-                        rooms_otb=int(row.get('rooms_otb', 0)),
-                        occ_otb=float(row.get('occ_otb', 0)),
-                        adr_otb=float(row.get('adr_otb', 0)),
-                        revenue_otb=float(row.get('revenue_otb', 0)),
-                        group_rooms=int(row.get('group_rooms', 0)),
-                        transient_rooms=int(row.get('transient_rooms', 0)),
-                        ly_rooms=int(row.get('ly_rooms', 0)) or None,
-                        ly_occ=float(row.get('ly_occ', 0)) or None,
-                        ly_adr=float(row.get('ly_adr', 0)) or None,
-                        ly_revenue=float(row.get('ly_revenue', 0)) or None,
-                        source='import',
-                    )
-                    db.session.add(record)
-
-                imported_count += 1
-            except (ValueError, KeyError) as e:
-                errors.append(f'Ligne {row_num}: {str(e)}')
-
-        db.session.commit()
-
-        return jsonify({
-            'success': True,
-            'imported': imported_count,
-            'errors': errors,
-            'message': f'{imported_count} enregistrements importés.'
-        })
-    except Exception as e:
-        logger.error(f'OTB import error: {e}')
-        return jsonify({'error': f'Erreur lors de l\'import: {str(e)}'}), 500
+    return _import_csv('otb')
 
 
 @compset_bp.route('/api/otb/manual', methods=['POST'])
@@ -399,6 +341,7 @@ def save_otb_manual():
             )
             db.session.add(record)
 
+        otb_pace.refresh([target_date])
         db.session.commit()
 
         return jsonify({
@@ -421,41 +364,8 @@ def create_otb_snapshot():
     today = date_type.today()
 
     try:
-        # Get yesterday's snapshot
-        yesterday = today - timedelta(days=1)
-        yesterday_records = OTBForecast.query.filter_by(snapshot_date=yesterday).all()
-
-        created_count = 0
-
-        if yesterday_records:
-            for rec in yesterday_records:
-                # Shift target_date forward by 1 day
-                new_target = rec.target_date + timedelta(days=1)
-
-                # Check if today's record for this target exists
-                existing = OTBForecast.query.filter_by(
-                    snapshot_date=today,
-                    target_date=new_target
-                ).first()
-
-                if not existing:
-                    new_record = OTBForecast(
-                        snapshot_date=today,
-                        target_date=new_target,
-                        rooms_otb=rec.rooms_otb,
-                        occ_otb=rec.occ_otb,
-                        adr_otb=rec.adr_otb,
-                        revenue_otb=rec.revenue_otb,
-                        group_rooms=rec.group_rooms,
-                        transient_rooms=rec.transient_rooms,
-                        ly_rooms=rec.ly_rooms,
-                        ly_occ=rec.ly_occ,
-                        ly_adr=rec.ly_adr,
-                        ly_revenue=rec.ly_revenue,
-                        source='snapshot',
-                    )
-                    db.session.add(new_record)
-                    created_count += 1
+        # Yesterday's snapshot, shifted one day forward, in one INSERT … SELECT
+        created_count = otb_pace.roll_forward(today)
 
         # Also add one new day 90 days out
         far_future = today + timedelta(days=90)
@@ -480,6 +390,7 @@ def create_otb_snapshot():
             db.session.add(far_record)
             created_count += 1
 
+        otb_pace.refresh(otb_pace.snapshot_targets(today))
         db.session.commit()
 
         return jsonify({
@@ -502,6 +413,8 @@ def seed_otb_data():
     today = date_type.today()
 
     # Delete existing seed data
+    targets = set(db.session.scalars(
+        db.select(OTBForecast.target_date).where(OTBForecast.source == 'seed')))
     OTBForecast.query.filter(OTBForecast.source == 'seed').delete()
 
     created_count = 0
@@ -546,8 +459,10 @@ def seed_otb_data():
             source='seed',
         )
         db.session.add(record)
+        targets.add(target_date)
         created_count += 1
 
+    otb_pace.refresh(targets)
     db.session.commit()
 
     return jsonify({
@@ -21,6 +21,7 @@ from database.models import (
     MonthlyBudget, DailyCashRecon, DailyCardMetrics, MonthlyExpense, DepartmentLabor
 )
 from sqlalchemy import func, desc
+from utils import budget_variance
 import json
 
 crm_tabs_bp = Blueprint('crm_tabs', __name__)
@@ -976,16 +977,8 @@ def pnl_budget():
     """
     start, end = _get_date_range()
 
-    # Query all needed models
-    budgets = MonthlyBudget.query.filter(
-        db.and_(
-            MonthlyBudget.year >= start.year,
-            db.or_(
-                MonthlyBudget.year < end.year,
-                db.and_(MonthlyBudget.year == end.year, MonthlyBudget.month <= end.month)
-            )
-        )
-    ).all()
+    # Budget vs actual per month: one budget query + one grouped actuals query
+    frame = budget_variance.VarianceFrame(start, end)
 
     expenses = MonthlyExpense.query.filter(
         db.and_(
@@ -997,10 +990,6 @@ def pnl_budget():
         )
     ).all()
 
-    metrics = DailyJourMetrics.query.filter(
-        DailyJourMetrics.date.between(start, end)
-    ).all()
-
     dept_labor = DepartmentLabor.query.filter(
         db.and_(
             DepartmentLabor.year >= start.year,
@@ -1011,37 +1000,20 @@ def pnl_budget():
         )
     ).all()
 
-    if not budgets and not expenses and not metrics:
+    if not frame.budgets and not expenses and not frame.actuals:
         return jsonify({'success': True, 'has_data': False})
 
     # 1. Budget variance monthly
-    budget_map = {(b.year, b.month): b for b in budgets}
+    revenue_by_period = {key: a['total_revenue'] for key, a in frame.actuals.items()}
 
-    revenue_by_period = {}
-    for m in metrics:
-        key = (m.year, m.month)
-        if key not in revenue_by_period:
-            revenue_by_period[key] = 0
-        revenue_by_period[key] += m.total_revenue or 0
-
-    budget_variance = []
-    for key in sorted(set(list(budget_map.keys()) + list(revenue_by_period.keys()))):
-        year, month = key
-        budget = budget_map.get(key)
-        actual_rev = revenue_by_period.get(key, 0)
-        budget_rev = budget.total_revenue_budget if budget else 0
-
-        variance = actual_rev - budget_rev
-        variance_pct = _round2((variance / budget_rev * 100) if budget_rev > 0 else 0)
-
-        budget_variance.append({
-            'year': year,
-            'month': month,
-            'revenue_actual': _round2(actual_rev),
-            'revenue_budget': _round2(budget_rev),
-            'variance': _round2(variance),
-            'variance_pct': variance_pct,
-        })
+    budget_variance_monthly = [{
+        'year': row['year'],
+        'month': row['month'],
+        'revenue_actual': row['actual'],
+        'revenue_budget': row['budget'],
+        'variance': row['variance'],
+        'variance_pct': row['variance_pct'],
+    } for row in frame.monthly('total_revenue', complete_only=False)]
 
     # 2. Expense breakdown monthly
     expense_breakdown = []
@@ -1123,11 +1095,10 @@ def pnl_budget():
 
     # 7. Annual P&L summary
     annual_pnl = {}
-    for m in metrics:
-        year = m.year
+    for (year, _month), revenue in revenue_by_period.items():
         if year not in annual_pnl:
             annual_pnl[year] = {'revenue': 0, 'expenses': 0, 'labor': 0}
-        annual_pnl[year]['revenue'] += m.total_revenue or 0
+        annual_pnl[year]['revenue'] += revenue
 
     for exp in expenses:
         year = exp.year
@@ -1161,7 +1132,7 @@ def pnl_budget():
     return jsonify({
         'success': True,
         'has_data': True,
-        'budget_variance_monthly': budget_variance,
+        'budget_variance_monthly': budget_variance_monthly,
         'expense_breakdown_monthly': expense_breakdown,
         'profit_margin_monthly': profit_margin_monthly,
         'labor_ratio_monthly': labor_ratio_monthly,
@@ -502,6 +502,21 @@ def smart_dashboard():
     except Exception:
         pass
 
+    # Tomorrow's forecast from the weather cache (never blocks on upstream)
+    try:
+        from utils.weather_service import get_weather_service
+        forecast = get_weather_service().peek_forecast()
+        if forecast:
+            weather_data = weather_data or {}
+            weather_data['forecast'] = {
+                'date': forecast['date'],
+                'temp_max': forecast['temp_max'],
+                'temp_min': forecast['temp_min'],
+                'description': forecast['description'],
+            }
+    except Exception:
+        pass
+
     # =========================================================================
     # 11. QUICK STATS (for context)
     # =========================================================================
@@ -16,6 +16,7 @@ from database.models import (db, DailyJourMetrics, NightAuditSession,
                               DepartmentLabor, MonthlyExpense, MonthlyBudget,
                               JournalEntry, DailyLaborMetrics)
 from sqlalchemy import func, text
+from sqlalchemy.orm import undefer
 import logging
 
 logger = logging.getLogger(__name__)
@@ -160,7 +161,7 @@ def dashboard_kpis():
     # Build lookup of NightAuditSession by date for auditor names
     rj_dates = [m.date for m in recent_metrics]
     rj_sessions = {
-        s.audit_date: s for s in NightAuditSession.query.filter(
+        s.audit_date: s for s in NightAuditSession.header_query().filter(
             NightAuditSession.audit_date.in_(rj_dates)
         ).all()
     } if rj_dates else {}
@@ -205,7 +206,7 @@ def rj_summary(report_date):
     except (ValueError, TypeError):
         return jsonify({'error': 'Date invalide'}), 400
 
-    nas = NightAuditSession.query.filter_by(audit_date=target).first()
+    nas = NightAuditSession.query.options(undefer('*')).filter_by(audit_date=target).first()
     if not nas:
         return jsonify({'error': 'Aucun RJ pour cette date'}), 404
 
@@ -402,7 +403,7 @@ def all_dates():
 @direction_required
 def rj_sessions():
     """List all NightAuditSession records for the RJ viewer."""
-    sessions = NightAuditSession.query.order_by(
+    sessions = NightAuditSession.header_query().order_by(
         NightAuditSession.audit_date.desc()
     ).all()
 
@@ -1327,7 +1328,7 @@ def cross_analysis():
     gl_map = {r.audit_date: {'total': r.gl_total or 0, 'count': r.gl_count} for r in gl_q}
 
     # NAS data
-    nas_q = NightAuditSession.query.filter(
+    nas_q = NightAuditSession.header_query('quasi_variance', 'recap_balance').filter(
         NightAuditSession.audit_date.between(start, end)
     ).all()
     nas_map = {n.audit_date: n for n in nas_q}
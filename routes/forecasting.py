@@ -2,9 +2,10 @@
 Forecasting Blueprint — InsightsEngine-powered demand, pricing, and revenue forecasts.
 
 Exposes InsightsEngine ML capabilities to a user-facing dashboard with:
-- Demand forecasting (30/60/90 day occupancy, ADR, RevPAR)
+- Demand forecasting (30/60/90 day occupancy, ADR, RevPAR) from the persisted
+  ForecastStore model (utils/forecast_store.py)
 - Seasonal pattern analysis (by month, day of week)
-- Anomaly detection
+- Anomaly detection from scores stored at sync time (utils/anomaly_scorer.py)
 - Pricing power analysis
 - Trend analysis (moving averages)
 - Revenue concentration insights
@@ -13,8 +14,10 @@ Exposes InsightsEngine ML capabilities to a user-facing dashboard with:
 from flask import Blueprint, request, jsonify, render_template, session
 from functools import wraps
 from datetime import datetime, timedelta, date
-from database.models import db, DailyJourMetrics
+from database.models import db, DailyJourMetrics, DailyAnomalyScore
 from utils.insights_engine import InsightsEngine, HAS_NUMPY
+from utils.forecast_store import get_forecast_store, InsufficientData
+from utils.anomaly_scorer import get_anomaly_scorer
 import logging
 
 logger = logging.getLogger(__name__)
@@ -62,57 +65,39 @@ def forecasting_page():
 def api_forecast():
     """
     30/60/90 day demand forecast: occupancy, ADR, RevPAR.
+
+    Served from the persisted ForecastStore model (refitted when
+    DailyJourMetrics change), not recomputed per request.
     Returns:
         {
             'success': bool,
             'has_insights': bool,
             'reason': str (if not has_insights),
-            'forecast_30': {'occupancy_pct': float, 'adr': float, 'revpar': float, 'confidence': float},
+            'forecast_30': {'occupancy_pct': float, 'adr': float, 'revpar': float,
+                            'total_revenue': float, 'revpar_low': float,
+                            'revpar_high': float, 'confidence': float},
             'forecast_60': {...},
             'forecast_90': {...},
-            'historical_avg': {...}
+            'daily': [{'date': str, 'revpar': float, 'revpar_low': float, ...}],
+            'historical_avg': {...},
+            'model': {'id', 'data_version', 'fitted_at', 'fit_seconds', 'backtest', ...}
         }
     """
-    metrics = _load_metrics(days_back=365)
-
-    if len(metrics) < 30:
+    if not HAS_NUMPY:
         return jsonify({
             'success': False,
             'has_insights': False,
-            'reason': 'Minimum 30 jours de données requis'
+            'reason': 'Installez numpy pour activer les prévisions'
         }), 400
 
     try:
-        engine = InsightsEngine(metrics)
-        if not HAS_NUMPY:
-            return jsonify({
-                'success': False,
-                'has_insights': False,
-                'reason': 'Installez numpy pour activer les prévisions'
-            }), 400
-
-        # Get demand forecast from InsightsEngine
-        forecast = engine._demand_forecast()
-
-        # Historical average for comparison
-        if metrics:
-            hist_avg = {
-                'occupancy_pct': round(sum(m.occupancy_rate for m in metrics) / len(metrics), 1),
-                'adr': round(sum(m.adr for m in metrics) / len(metrics), 2),
-                'revpar': round(sum(m.revpar for m in metrics) / len(metrics), 2),
-            }
-        else:
-            hist_avg = {'occupancy_pct': 0, 'adr': 0, 'revpar': 0}
-
+        forecast = get_forecast_store().forecast()
+    except InsufficientData:
         return jsonify({
-            'success': True,
-            'has_insights': True,
-            'forecast_30': forecast.get('forecast_30', {}),
-            'forecast_60': forecast.get('forecast_60', {}),
-            'forecast_90': forecast.get('forecast_90', {}),
-            'historical_avg': hist_avg,
-            'raw_forecast': forecast
-        })
+            'success': False,
+            'has_insights': False,
+            'reason': 'Minimum 30 jours de données requis'
+        }), 400
     except Exception as e:
         logger.error(f"Forecast error: {e}")
         return jsonify({
@@ -121,6 +106,19 @@ def api_forecast():
             'reason': f'Erreur: {str(e)}'
         }), 500
 
+    return jsonify({'success': True, 'has_insights': True, **forecast})
+
+
+@forecasting_bp.route('/api/previsions/forecast/model', methods=['GET'])
+@login_required
+def api_forecast_model():
+    """Metadata of the active forecast model (fit time, data version, backtest MAPE)."""
+    try:
+        model_id, _, meta = get_forecast_store()._current()
+    except InsufficientData:
+        return jsonify({'success': False, 'reason': 'Minimum 30 jours de données requis'}), 400
+    return jsonify({'success': True, 'model': meta})
+
 
 @forecasting_bp.route('/api/previsions/seasonality', methods=['GET'])
 @login_required
@@ -174,7 +172,7 @@ def api_seasonality():
 @login_required
 def api_anomalies():
     """
-    Detected anomalies in revenue, occupancy, etc.
+    Nights flagged by the anomaly scorer (scores stored at sync time).
     Returns:
         {
             'success': bool,
@@ -185,35 +183,30 @@ def api_anomalies():
                     'value': float,
                     'expected': float,
                     'deviation_pct': float,
-                    'severity': 'info'|'warning'|'critical'
+                    'severity': 'warning'|'critical'
                 }
-            ]
+            ],
+            'flagged_days': int,
+            'scored_days': int
         }
     """
-    metrics = _load_metrics(days_back=365)
-
-    if len(metrics) < 30:
-        return jsonify({
-            'success': False,
-            'anomalies': [],
-            'reason': 'Minimum 30 jours de données requis'
-        }), 400
-
+    cutoff = date.today() - timedelta(days=request.args.get('days', 365, type=int))
     try:
-        engine = InsightsEngine(metrics)
-        if not HAS_NUMPY:
+        scorer = get_anomaly_scorer()
+        scored_days = DailyAnomalyScore.query.filter(DailyAnomalyScore.date >= cutoff).count()
+        if scored_days < 30:
             return jsonify({
                 'success': False,
                 'anomalies': [],
-                'reason': 'Installez numpy pour activer les prévisions'
+                'reason': 'Minimum 30 jours de données requis'
             }), 400
 
-        anomalies = engine._anomalies()
-
+        anomalies = scorer.anomalies(start=cutoff)
         return jsonify({
             'success': True,
-            'anomalies': anomalies.get('anomalies', []),
-            'raw': anomalies
+            'anomalies': anomalies,
+            'flagged_days': len({a['date'] for a in anomalies}),
+            'scored_days': scored_days,
         })
     except Exception as e:
         logger.error(f"Anomalies error: {e}")
@@ -224,6 +217,20 @@ def api_anomalies():
         }), 500
 
 
+@forecasting_bp.route('/api/previsions/anomalies/<audit_date>', methods=['GET'])
+@login_required
+def api_anomaly_day(audit_date):
+    """Stored anomaly score of one night (z per metric and scope)."""
+    try:
+        d = datetime.strptime(audit_date, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'success': False, 'reason': 'Format de date invalide'}), 400
+    row = DailyAnomalyScore.query.filter_by(date=d).first()
+    if row is None:
+        return jsonify({'success': False, 'reason': 'Aucun score pour cette date'}), 404
+    return jsonify({'success': True, 'score': row.to_dict()})
+
+
 @forecasting_bp.route('/api/previsions/pricing', methods=['GET'])
 @login_required
 def api_pricing():
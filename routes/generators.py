@@ -9,16 +9,18 @@ fonts, margins, and page orientation.
 from flask import Blueprint, request, jsonify, send_file, render_template
 from functools import wraps
 from datetime import datetime
-from docx import Document
-from docx.shared import Pt, Inches, RGBColor
-from openpyxl import load_workbook
 from lxml import etree
 import copy
 import re
 import io
 import os
 from routes.checklist import login_required
-from utils.weather_capture import get_weather_screenshot, fetch_tomorrow_weather
+from utils.weather_capture import get_weather_card_png, fetch_tomorrow_weather
+from utils.lazy_import import lazy_attrs
+
+Document, = lazy_attrs('docx', 'Document')
+Pt, Inches, RGBColor = lazy_attrs('docx.shared', 'Pt', 'Inches', 'RGBColor')
+load_workbook, = lazy_attrs('openpyxl', 'load_workbook')
 
 generators_bp = Blueprint('generators', __name__)
 
@@ -448,12 +450,10 @@ def generate_entretien_hiver():
 
         # Generate and insert new weather card for the selected date
         print(f"Capturing weather forecast for {date_str}...")
-        weather_image = get_weather_screenshot(date_str)
+        weather_png = get_weather_card_png(date_str)
 
-        if weather_image:
-            img_buffer = io.BytesIO()
-            weather_image.save(img_buffer, format='PNG')
-            img_buffer.seek(0)
+        if weather_png:
+            img_buffer = io.BytesIO(weather_png)
             wp = doc.add_paragraph()
             wp.add_run().add_picture(img_buffer, width=Inches(10.0))
         else:
@@ -7,13 +7,15 @@ Dual storage: Excel file (for compatibility) + SQLite DB (for persistence/ETL).
 from flask import Blueprint, request, jsonify, send_file, render_template
 from routes.checklist import login_required
 from database import db, HPPeriod, HPEntry
-from openpyxl import load_workbook
+from utils.lazy_import import lazy_attrs
 from datetime import datetime
 from io import BytesIO
 import json, os, re
 
 hp_bp = Blueprint('hp', __name__)
 
+load_workbook, = lazy_attrs('openpyxl', 'load_workbook')
+
 # ── Storage dir for uploaded HP files ──────────────────────────
 HP_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'hp_files')
 os.makedirs(HP_DIR, exist_ok=True)
@@ -11,9 +11,13 @@ Routes:
 - POST /api/lightspeed/sync/<date> - Sync data for a specific date
 - GET /api/lightspeed/sync/status/<date> - Get sync status for a date
 - POST /api/lightspeed/disconnect - Clear stored credentials
+- POST /api/lightspeed/backfill - Start a date-range backfill job
+- GET /api/lightspeed/backfill - Recent backfill jobs
+- GET /api/lightspeed/backfill/<job_id> - Job progress + per-date results
+- POST /api/lightspeed/backfill/<job_id>/resume - Resume from checkpoint
 """
 
-from flask import Blueprint, render_template, request, jsonify, session, flash, redirect, url_for
+from flask import Blueprint, render_template, request, jsonify, session, flash, redirect, url_for, current_app
 from datetime import datetime, timedelta
 import logging
 from functools import wraps
@@ -21,6 +25,7 @@ from functools import wraps
 from routes.checklist import login_required
 from utils.lightspeed_client import LightspeedClient, LightspeedAPIError, LightspeedConfigError
 from utils.lightspeed_sync import LightspeedSync
+from utils.lightspeed_backfill import create_job, start_job_thread, is_job_running
 from utils.csrf import csrf_protect
 
 logger = logging.getLogger(__name__)
@@ -83,7 +88,7 @@ def configuration_page():
 
     # Get recent sessions with sync info
     from database.models import NightAuditSession
-    recent_sessions = NightAuditSession.query.order_by(
+    recent_sessions = NightAuditSession.header_query().order_by(
         NightAuditSession.audit_date.desc()
     ).limit(30).all()
 
@@ -331,3 +336,96 @@ def api_disconnect():
             'success': False,
             'message': f"Erreur: {str(e)}",
         }), 500
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# HISTORICAL BACKFILL
+# ─────────────────────────────────────────────────────────────────────────────
+
+@lightspeed_bp.route('/api/backfill', methods=['POST'])
+@login_required
+@require_gm_or_admin
+@csrf_protect
+def api_backfill_start():
+    """
+    Start a backfill job over a date range (runs in the background).
+
+    Expects JSON:
+    {
+        "start_date": "YYYY-MM-DD",
+        "end_date": "YYYY-MM-DD",
+        "concurrency": int (optional),
+        "rate_limit": float requests/sec (optional)
+    }
+
+    Returns 202 with the job dict; poll GET /api/backfill/<job_id>.
+    """
+    data = request.get_json() or {}
+    try:
+        start = datetime.strptime(data.get('start_date', ''), '%Y-%m-%d').date()
+        end = datetime.strptime(data.get('end_date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'Format de date invalide. Utilisez YYYY-MM-DD.',
+        }), 400
+
+    client = get_lightspeed_client()
+    if not client.is_configured():
+        return jsonify({
+            'success': False,
+            'message': 'Lightspeed non configuré. Entrez les identifiants d\'abord.',
+        }), 400
+
+    try:
+        job = create_job(
+            start, end,
+            concurrency=data.get('concurrency'),
+            rate_limit=data.get('rate_limit'),
+            created_by=session.get('user_name'),
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    start_job_thread(current_app._get_current_object(), job.id, client)
+    return jsonify({'success': True, 'job': job.to_dict()}), 202
+
+
+@lightspeed_bp.route('/api/backfill', methods=['GET'])
+@login_required
+def api_backfill_list():
+    """List the 20 most recent backfill jobs."""
+    from database.models import LightspeedBackfillJob
+    jobs = LightspeedBackfillJob.query.order_by(
+        LightspeedBackfillJob.id.desc()
+    ).limit(20).all()
+    return jsonify({'jobs': [j.to_dict() for j in jobs]})
+
+
+@lightspeed_bp.route('/api/backfill/<int:job_id>', methods=['GET'])
+@login_required
+def api_backfill_status(job_id):
+    """Progress, throughput and per-date results of one backfill job."""
+    from database.models import db, LightspeedBackfillJob
+    job = db.session.get(LightspeedBackfillJob, job_id)
+    if not job:
+        return jsonify({'success': False, 'message': 'Tâche introuvable'}), 404
+    result = job.to_dict(include_results=True)
+    result['running'] = is_job_running(job_id)
+    return jsonify(result)
+
+
+@lightspeed_bp.route('/api/backfill/<int:job_id>/resume', methods=['POST'])
+@login_required
+@require_gm_or_admin
+@csrf_protect
+def api_backfill_resume(job_id):
+    """Re-run the dates of a job that have not succeeded yet."""
+    from database.models import db, LightspeedBackfillJob
+    job = db.session.get(LightspeedBackfillJob, job_id)
+    if not job:
+        return jsonify({'success': False, 'message': 'Tâche introuvable'}), 404
+
+    if not start_job_thread(current_app._get_current_object(), job_id, get_lightspeed_client()):
+        return jsonify({'success': False, 'message': 'Tâche déjà en cours'}), 409
+    return jsonify({'success': True, 'job': job.to_dict()}), 202
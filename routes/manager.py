@@ -227,6 +227,30 @@ def save_expense():
     return jsonify({'success': True, 'expense': exp.to_dict()})
 
 
+@manager_bp.route('/api/manager/regimes', methods=['GET'])
+@manager_required
+def regime_model_status():
+    """State of the persisted operating-regime clustering (drift, last update)."""
+    from database.models import RegimeModel
+    row = RegimeModel.query.order_by(RegimeModel.id.desc()).first()
+    return jsonify({'model': row.to_dict() if row else None})
+
+
+@manager_bp.route('/api/manager/regimes/refit', methods=['POST'])
+@manager_required
+def refit_regime_model():
+    """Full regime refit on all history (cold start with ?cold=1)."""
+    from utils.regime_model import get_regime_store, HAS_SKLEARN
+    if not HAS_SKLEARN:
+        return jsonify({'error': 'Installez numpy/scikit-learn'}), 400
+    store = get_regime_store()
+    try:
+        store.refit(cold=request.args.get('cold') == '1', reason='manual')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'success': True, 'model': store.info()})
+
+
 @manager_bp.route('/api/manager/goppar')
 @manager_required
 def goppar():
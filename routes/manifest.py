@@ -0,0 +1,39 @@
+"""
+Blueprint manifest — every blueprint the app serves, in registration order.
+
+create_app() imports each module from this list instead of importing all
+blueprints at the top of main.py, so importing `main` (scripts, tests,
+workers) stays cheap. Heavy libraries used by the blueprints are loaded on
+first use through utils/lazy_import.py.
+
+Entries are (module path, blueprint attribute).
+"""
+
+BLUEPRINTS = [
+    ('routes.auth', 'auth_bp'),
+    ('routes.auth_v2', 'auth_v2'),
+    ('routes.checklist', 'checklist_bp'),
+    ('routes.generators', 'generators_bp'),
+    ('routes.audit', 'audit_bp'),
+    ('routes.reports', 'reports_bp'),
+    ('routes.balances', 'balances_bp'),
+    ('routes.crm', 'crm_bp'),
+    ('routes.crm_tabs', 'crm_tabs_bp'),
+    ('routes.dashboard', 'dashboard_bp'),
+    ('routes.manager', 'manager_bp'),
+    ('routes.balance_checker', 'balance_checker_bp'),
+    ('routes.audit.rj_native', 'rj_native_bp'),
+    ('routes.audit.rj_export_pdf', 'rj_export_bp'),
+    ('routes.audit.rj_export_excel', 'rj_excel_bp'),
+    ('routes.audit.rj_correction', 'rj_correction_bp'),
+    ('routes.pod', 'pod_bp'),
+    ('routes.hp', 'hp_bp'),
+    ('routes.direction', 'direction_bp'),
+    ('routes.budget', 'budget_bp'),
+    ('routes.notifications', 'notifications_bp'),
+    ('routes.forecasting', 'forecasting_bp'),
+    ('routes.lightspeed', 'lightspeed_bp'),
+    ('routes.properties', 'properties_bp'),
+    ('routes.portfolio', 'portfolio_bp'),
+    ('routes.compset', 'compset_bp'),
+]
@@ -7,17 +7,19 @@ Routes:
 - POST /api/notifications/preferences — Save user preferences (JSON)
 - GET /api/notifications/history — Recent notification log
 - POST /api/notifications/test — Send test email
-- POST /api/notifications/trigger/<event_type> — Manually trigger alert
+- POST /api/notifications/trigger/<event_type> — Manually trigger alert (queued)
+- GET /api/notifications/outbox — Outbox status counts (admin/GM)
 """
 
 from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for
 from functools import wraps
 from datetime import datetime, timedelta
 from database.models import (
-    db, User, NotificationPreference, NotificationLog, NightAuditSession
+    db, User, NotificationPreference, NotificationLog, NotificationOutbox, NightAuditSession
 )
 from utils.email_service import EmailService
 from utils.alert_engine import AlertEngine
+from utils.notification_outbox import get_outbox
 import logging
 
 logger = logging.getLogger(__name__)
@@ -264,15 +266,40 @@ def trigger_alert(event_type):
                 'alert_sent': 0
             })
 
-        # Send alerts
-        results = email_service.send_alert(event_type, alert.get('data', {}), recipients)
+        # Queue alerts — the outbox dispatcher delivers them in the background
+        queued = get_outbox().enqueue(event_type, alert.get('data', {}), recipients)
 
         return jsonify({
             'success': True,
-            'message': f"Alerte envoyée à {len(results)} destinataire(s)",
-            'alert_sent': len([r for r in results if r.get('success')])
+            'message': f"Alerte mise en file pour {len(queued)} destinataire(s)",
+            'alert_sent': len(queued)
         })
 
     except Exception as e:
         logger.error(f"Error triggering alert: {str(e)}")
         return jsonify({'error': str(e)}), 500
+
+
+@notifications_bp.route('/api/outbox', methods=['GET'])
+@login_required
+@admin_or_gm_required
+def outbox_status():
+    """Counts of queued/sent/failed outbox messages plus the latest failures."""
+    try:
+        counts = dict(
+            db.session.query(NotificationOutbox.status, db.func.count(NotificationOutbox.id))
+            .group_by(NotificationOutbox.status).all()
+        )
+        failures = NotificationOutbox.query.filter(
+            NotificationOutbox.status.in_(('failed', 'pending')),
+            NotificationOutbox.last_error.isnot(None),
+        ).order_by(NotificationOutbox.id.desc()).limit(20).all()
+
+        return jsonify({
+            'success': True,
+            'counts': counts,
+            'recent_errors': [m.to_dict() for m in failures]
+        })
+    except Exception as e:
+        logger.error(f"Error fetching outbox status: {str(e)}")
+        return jsonify({'error': str(e)}), 500
@@ -7,14 +7,16 @@ Dual storage: Excel file (for compatibility) + SQLite DB (for persistence/ETL).
 from flask import Blueprint, request, jsonify, send_file, render_template
 from routes.checklist import login_required
 from database import db, PODPeriod, PODEntry
-from openpyxl import load_workbook
-from openpyxl.utils import get_column_letter
+from utils.lazy_import import lazy_attrs
 from datetime import datetime, timedelta, date as date_type
 from copy import copy as copy_style
 import json, io, os, re, ast, operator
 
 pod_bp = Blueprint('pod', __name__)
 
+load_workbook, = lazy_attrs('openpyxl', 'load_workbook')
+get_column_letter, = lazy_attrs('openpyxl.utils', 'get_column_letter')
+
 # ── Safe arithmetic evaluator (replaces eval) ────────────────
 _SAFE_OPS = {
     ast.Add: operator.add, ast.Sub: operator.sub,
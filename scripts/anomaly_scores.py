@@ -0,0 +1,100 @@
+"""
+Scores d'anomalie — reconstruction et mesure de performance.
+
+Usage:
+    python -m scripts.anomaly_scores sync               # Scorer l'historique sans score (première mise en route)
+    python -m scripts.anomaly_scores rebuild            # Tout recalculer (statistiques + scores)
+    python -m scripts.anomaly_scores benchmark          # Ancien balayage complet vs mise à jour O(1)
+    python -m scripts.anomaly_scores benchmark --years 10
+
+Le benchmark compare l'ancien chemin (moyenne / écart-type recalculés sur
+tout l'historique à chaque affichage) au score d'une nouvelle nuit contre
+les statistiques de Welford stockées.
+"""
+
+import os
+import sys
+import time
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def benchmark(years=5):
+    from database.models import AnomalyStat
+    from scripts.regime_model import synthetic_days, _time
+    from utils.anomaly_scorer import AnomalyScorer, SCOPES, _buckets, welford_add
+
+    days = synthetic_days(years)
+    for m in days:
+        m.total_cards = m.total_revenue * 0.8
+    history, today = days[:-1], days[-1]
+    print(f"{len(days)} jours synthétiques ({years} ans)\n")
+
+    def values(m):
+        return {'revenue': m.total_revenue, 'occupancy': m.occupancy_rate, 'adr': m.adr,
+                'fb': m.fb_revenue, 'cards': m.total_cards}
+
+    def old_path():
+        # Full rescan per metric and scope, as the page views used to do
+        for metric in ('revenue', 'occupancy', 'adr', 'fb', 'cards'):
+            for scope, match in (('global', lambda m: True),
+                                 ('month', lambda m: m.date.month == today.date.month),
+                                 ('dow', lambda m: m.date.weekday() == today.date.weekday())):
+                xs = [values(m)[metric] for m in history if match(m)]
+                avg = sum(xs) / len(xs)
+                std = (sum((x - avg) ** 2 for x in xs) / len(xs)) ** 0.5
+                (values(today)[metric] - avg) / std if std else 0
+
+    stats = {}
+    for m in history:
+        buckets = _buckets(m.date)
+        for metric, x in values(m).items():
+            for scope in SCOPES:
+                key = (metric, scope, buckets[scope])
+                s = stats.setdefault(key, AnomalyStat(metric=metric, scope=scope,
+                                                      bucket=buckets[scope], n=0, mean=0.0, m2=0.0))
+                s.n, s.mean, s.m2 = welford_add(s.n, s.mean, s.m2, x)
+
+    scorer = AnomalyScorer()
+
+    def new_path():
+        scorer.score_values(values(today), today.date, stats)
+
+    results = [
+        ('Ancien: balayage complet par affichage', _time(old_path, 3)),
+        ('Nouvelle nuit: score Welford O(1)', _time(new_path)),
+    ]
+    baseline = results[0][1]
+    for label, seconds in results:
+        print(f"  {label:<40} {seconds * 1000:>9.3f} ms   x{baseline / seconds:>7.1f}")
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == 'benchmark':
+        years = 5
+        if '--years' in sys.argv:
+            years = float(sys.argv[sys.argv.index('--years') + 1])
+        benchmark(years)
+        return
+    if command not in ('sync', 'rebuild'):
+        print(__doc__)
+        sys.exit(1)
+
+    from main import create_app
+    from database.models import DailyAnomalyScore
+    from utils.anomaly_scorer import get_anomaly_scorer
+
+    app = create_app()
+    with app.app_context():
+        scorer = get_anomaly_scorer()
+        t0 = time.perf_counter()
+        count = scorer.rebuild() if command == 'rebuild' else scorer.sync()
+        flagged = DailyAnomalyScore.query.filter_by(is_flagged=True).count()
+        print(f"{count} journée(s) scorée(s) en {time.perf_counter() - t0:.2f}s — "
+              f"{flagged} nuit(s) atypique(s) au total")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""
+Concurrence SQLite — plusieurs processus écrivains et lecteurs sur une même base.
+
+Usage:
+    python -m scripts.db_concurrency                          # 4 écrivains, 2 lecteurs, 10 s par mode
+    python -m scripts.db_concurrency --writers 8 --readers 4 --seconds 20
+
+Simule des workers gunicorn sur une base temporaire (jamais database/audit.db):
+les écrivains enregistrent des onglets (transactions courtes), les lecteurs
+calculent des agrégats sur l'historique (tableaux de bord). Deux modes:
+
+    défaut      journal DELETE, synchronous FULL, timeout pysqlite de 5 s
+    configuré   database/engine.py: WAL, busy_timeout, synchronous NORMAL,
+                cache, BEGIN IMMEDIATE pour les écritures, lecteurs query_only
+
+Rapporte le débit, les erreurs « database is locked » et l'attente du verrou
+d'écriture (p50 / p95 / max).
+"""
+
+import multiprocessing
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import create_engine, text
+
+from database.engine import create_tuned_engine, sqlite_settings
+
+HISTORY_ROWS = 50000
+SESSIONS = 30
+
+CONFIGURED = sqlite_settings({})
+
+
+def seed(path):
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE metrics (id INTEGER PRIMARY KEY, day INTEGER, revenue REAL, occupancy REAL);
+        CREATE TABLE sessions (id INTEGER PRIMARY KEY, section TEXT, payload TEXT, updated REAL);
+    """)
+    rng = random.Random(1)
+    conn.executemany('INSERT INTO metrics (day, revenue, occupancy) VALUES (?, ?, ?)',
+                     [(i, rng.gauss(10000, 800), rng.gauss(75, 5)) for i in range(HISTORY_ROWS)])
+    conn.executemany('INSERT INTO sessions (id, section, payload, updated) VALUES (?, ?, ?, ?)',
+                     [(i, 'recap', '{}', 0) for i in range(SESSIONS)])
+    conn.commit()
+    conn.close()
+
+
+def _engine(path, mode, read_only=False):
+    uri = f'sqlite:///{path}'
+    if mode == 'configured':
+        return create_tuned_engine(uri, CONFIGURED, read_only=read_only,
+                                   connect_args={'timeout': CONFIGURED['busy_timeout_ms'] / 1000})
+    return create_engine(uri)
+
+
+def writer(path, mode, start_at, seconds, seed_value):
+    engine = _engine(path, mode)
+    rng = random.Random(seed_value)
+    waits, latencies, errors = [], [], 0
+    payload = 'x' * 2000  # one tab of form fields as JSON
+    while time.time() < start_at:
+        time.sleep(0.001)
+    end = start_at + seconds
+    while time.time() < end:
+        t0 = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                if mode == 'configured':
+                    conn.exec_driver_sql('BEGIN IMMEDIATE')
+                    waits.append((time.perf_counter() - t0) * 1000)
+                conn.execute(text('UPDATE sessions SET payload = :p, updated = :u WHERE id = :id'),
+                             {'p': payload, 'u': time.time(), 'id': rng.randrange(SESSIONS)})
+                if mode == 'default':
+                    waits.append((time.perf_counter() - t0) * 1000)  # lock taken by the UPDATE
+                conn.commit()
+            latencies.append((time.perf_counter() - t0) * 1000)
+        except Exception as e:
+            if 'locked' not in str(e):
+                raise
+            errors += 1
+        time.sleep(rng.uniform(0, 0.005))  # think time between saves
+    engine.dispose()
+    return {'role': 'writer', 'ops': len(latencies), 'errors': errors, 'waits': waits,
+            'latencies': latencies}
+
+
+def reader(path, mode, start_at, seconds, _seed):
+    engine = _engine(path, mode, read_only=True)
+    latencies, errors = [], 0
+    while time.time() < start_at:
+        time.sleep(0.001)
+    end = start_at + seconds
+    while time.time() < end:
+        t0 = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                conn.execute(text('SELECT day % 7, AVG(revenue), AVG(occupancy), COUNT(*) '
+                                  'FROM metrics GROUP BY day % 7')).all()
+                conn.execute(text('SELECT COUNT(*) FROM sessions WHERE updated > 0')).scalar()
+            latencies.append((time.perf_counter() - t0) * 1000)
+        except Exception as e:
+            if 'locked' not in str(e):
+                raise
+            errors += 1
+    engine.dispose()
+    return {'role': 'reader', 'ops': len(latencies), 'errors': errors, 'waits': [],
+            'latencies': latencies}
+
+
+def _pct(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def run_mode(mode, writers, readers, seconds):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        seed(path)
+        start_at = time.time() + 1.0
+        jobs = [(writer, i) for i in range(writers)] + [(reader, i) for i in range(readers)]
+        with multiprocessing.Pool(len(jobs)) as pool:
+            results = pool.starmap(_run, [(fn, path, mode, start_at, seconds, i) for fn, i in jobs])
+
+    w = [r for r in results if r['role'] == 'writer']
+    r = [r for r in results if r['role'] == 'reader']
+    waits = [x for res in w for x in res['waits']]
+    write_lat = [x for res in w for x in res['latencies']]
+    read_lat = [x for res in r for x in res['latencies']]
+    return {
+        'writes_per_s': sum(res['ops'] for res in w) / seconds,
+        'reads_per_s': sum(res['ops'] for res in r) / seconds,
+        'write_errors': sum(res['errors'] for res in w),
+        'read_errors': sum(res['errors'] for res in r),
+        'write_p50': statistics.median(write_lat) if write_lat else 0.0,
+        'write_p95': _pct(write_lat, 0.95),
+        'write_max': max(write_lat, default=0.0),
+        'wait_p95': _pct(waits, 0.95),
+        'read_p50': statistics.median(read_lat) if read_lat else 0.0,
+    }
+
+
+def _run(fn, *args):
+    return fn(*args)
+
+
+def _arg(name, default):
+    return int(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+
+
+def main():
+    if any(a.startswith('-') and a not in ('--writers', '--readers', '--seconds') for a in sys.argv[1:]):
+        print(__doc__)
+        sys.exit(1)
+    writers, readers, seconds = _arg('--writers', 4), _arg('--readers', 2), _arg('--seconds', 10)
+    print(f"{writers} écrivains, {readers} lecteurs, {seconds} s par mode, "
+          f"{HISTORY_ROWS} lignes d'historique\n")
+
+    results = {}
+    for mode in ('default', 'configured'):
+        results[mode] = run_mode(mode, writers, readers, seconds)
+
+    rows = [
+        ('Écritures / s', 'writes_per_s', '{:.0f}'),
+        ('Lectures / s', 'reads_per_s', '{:.1f}'),
+        ('Erreurs verrou (écriture)', 'write_errors', '{}'),
+        ('Erreurs verrou (lecture)', 'read_errors', '{}'),
+        ('Écriture p50 (ms)', 'write_p50', '{:.1f}'),
+        ('Écriture p95 (ms)', 'write_p95', '{:.1f}'),
+        ('Écriture max (ms)', 'write_max', '{:.0f}'),
+        ('Attente verrou p95 (ms)', 'wait_p95', '{:.1f}'),
+        ('Lecture p50 (ms)', 'read_p50', '{:.1f}'),
+    ]
+    print(f"  {'':<28} {'défaut':>12} {'configuré':>12}")
+    for label, key, fmt in rows:
+        print(f"  {label:<28} {fmt.format(results['default'][key]):>12} "
+              f"{fmt.format(results['configured'][key]):>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Index de la documentation — construction, recherche et mesure de performance.
+
+Usage:
+    python -m scripts.doc_index build                 # Indexer les fichiers nouveaux / modifiés
+    python -m scripts.doc_index build --force         # Ré-extraire tout le texte
+    python -m scripts.doc_index search "no show"      # Rechercher dans tous les manuels
+    python -m scripts.doc_index benchmark             # Extraction à chaque vue vs cache
+
+Le benchmark compare l'ancien chemin de documentation_view (PyPDF2 /
+python-docx sur tout le fichier à chaque affichage) à la lecture du cache
+et à une recherche plein texte.
+"""
+
+import os
+import sys
+import time
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from main import create_app
+from utils.doc_index import extract_pages, get_doc_index
+
+
+def cmd_build(index):
+    stats = index.refresh(force='--force' in sys.argv)
+    info = index.info()
+    print(f"{stats['indexed']} fichier(s) indexé(s), {stats['unchanged']} inchangé(s), "
+          f"{stats['removed']} retiré(s), {stats['errors']} erreur(s) en {stats['seconds']}s")
+    print(f"Index: {info['files']} fichiers, {info['pages']} pages, "
+          f"{info['index_bytes'] / 1024:.0f} Ko (FTS5: {'oui' if info['fts5'] else 'non'})")
+
+
+def cmd_search(index, query):
+    t0 = time.perf_counter()
+    hits = index.search(query)
+    print(f"{len(hits)} résultat(s) en {(time.perf_counter() - t0) * 1000:.1f} ms\n")
+    for hit in hits:
+        snippet = hit['snippet'].replace('<mark>', '[').replace('</mark>', ']').replace('\n', ' ')
+        print(f"  {hit['path']} p.{hit['page']}  {snippet}")
+
+
+def cmd_benchmark(index):
+    index.refresh()
+    files = sorted(p for p in index.docs_base.rglob('*') if p.suffix.lower() in ('.pdf', '.docx'))
+
+    t0 = time.perf_counter()
+    for path in files:
+        extract_pages(path)
+    extract = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for path in files:
+        index.get_pages(path)
+    cached = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for query in ('quasimodo', 'no show', 'dueback', 'transelect', 'folio'):
+        index.search(query)
+    search = (time.perf_counter() - t0) / 5
+
+    n = len(files) or 1
+    print(f"{len(files)} fichiers PDF/DOCX")
+    print(f"  Ancien: extraction par vue         {extract / n * 1000:>9.1f} ms / fichier")
+    print(f"  Cache: lecture du texte extrait    {cached / n * 1000:>9.1f} ms / fichier"
+          f"   x{extract / cached:.0f}")
+    print(f"  Recherche plein texte (tous)       {search * 1000:>9.1f} ms / requête")
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command not in ('build', 'search', 'benchmark') or (command == 'search' and len(sys.argv) < 3):
+        print(__doc__)
+        sys.exit(1)
+
+    app = create_app()
+    with app.app_context():
+        index = get_doc_index()
+        if command == 'build':
+            cmd_build(index)
+        elif command == 'search':
+            cmd_search(index, ' '.join(sys.argv[2:]))
+        else:
+            cmd_benchmark(index)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Modèle de prévision de la demande — ajustement et backtest.
+
+Usage:
+    python -m scripts.forecast_model fit               # Ajuster si les données ont changé (cron nocturne)
+    python -m scripts.forecast_model fit --force       # Ré-ajuster même si la version est identique
+    python -m scripts.forecast_model backtest          # Backtest à origine glissante
+    python -m scripts.forecast_model backtest --folds 8 --step 14
+
+Le backtest ré-ajuste le modèle à plusieurs origines successives et mesure
+l'erreur absolue moyenne en % (MAPE) sur les 30/60/90 jours suivants, ainsi
+que le temps d'ajustement.
+"""
+
+import os
+import sys
+import time
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from main import create_app
+from utils.forecast_store import (
+    METRICS, HORIZONS, ForecastStore, InsufficientData, load_rows, rolling_origin_backtest,
+)
+
+
+def _arg(name, default):
+    for i, arg in enumerate(sys.argv):
+        if arg == name and i + 1 < len(sys.argv):
+            return int(sys.argv[i + 1])
+    return default
+
+
+def cmd_fit(store):
+    t0 = time.perf_counter()
+    record = store.fit(force='--force' in sys.argv)
+    print(f"Modèle #{record.id} ({record.method}) — version {record.data_version}")
+    print(f"  Période:     {record.train_start} → {record.train_end} ({record.n_days} jours)")
+    print(f"  Ajustement:  {record.fit_seconds * 1000:.1f} ms "
+          f"(total avec backtest: {time.perf_counter() - t0:.2f}s)")
+    _print_mape(record.get_backtest())
+
+
+def cmd_backtest(store):
+    rows = load_rows(store.training_days)
+    folds = _arg('--folds', store.backtest_folds)
+    step = _arg('--step', 30)
+    print(f"Backtest sur {len(rows)} jours — {folds} origines, pas de {step} jours")
+    t0 = time.perf_counter()
+    result = rolling_origin_backtest(rows, folds=folds, step=step)
+    print(f"  Durée totale: {time.perf_counter() - t0:.2f}s")
+    _print_mape(result)
+
+
+def _print_mape(result):
+    if not result or not result.get('folds'):
+        print("  (pas assez d'historique pour un backtest)")
+        return
+    print(f"  Origines:    {result['folds']}, ajustement moyen "
+          f"{result['fit_seconds_avg'] * 1000:.1f} ms")
+    print(f"\n  {'MAPE %':<15}" + ''.join(f"{h:>8}j" for h in HORIZONS))
+    for name in METRICS:
+        by_h = result['mape'].get(name, {})
+        cells = ''.join(f"{by_h.get(str(h)) if by_h.get(str(h)) is not None else '—':>9}"
+                        for h in HORIZONS)
+        print(f"  {name:<15}{cells}")
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command not in ('fit', 'backtest'):
+        print(__doc__)
+        sys.exit(1)
+
+    app = create_app()
+    with app.app_context():
+        store = app.extensions.get('forecast_store') or ForecastStore(app)
+        try:
+            if command == 'fit':
+                cmd_fit(store)
+            else:
+                cmd_backtest(store)
+        except InsufficientData as e:
+            print(f"⚠ {e}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
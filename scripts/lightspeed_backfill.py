@@ -0,0 +1,89 @@
+"""
+Synchronisation historique Lightspeed sur une plage de dates.
+
+Usage:
+    python -m scripts.lightspeed_backfill --start 2025-01-01 --end 2025-03-31
+    python -m scripts.lightspeed_backfill --start 2025-01-01 --end 2025-03-31 --concurrency 6 --rate 10
+    python -m scripts.lightspeed_backfill --resume 12       # Reprendre une tâche interrompue
+
+Chaque date est synchronisée dans sa propre transaction; la progression est
+enregistrée dans lightspeed_backfill_jobs après chaque date, donc une tâche
+interrompue (Ctrl+C, coupure) reprend seulement les dates non réussies.
+"""
+
+import os
+import sys
+from datetime import datetime
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from main import create_app
+from utils.lightspeed_client import LightspeedClient
+from utils.lightspeed_backfill import LightspeedBackfill, create_job
+
+
+def _arg(name):
+    for i, arg in enumerate(sys.argv):
+        if arg == name and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+    return None
+
+
+def _print_progress(result, job):
+    done = job.completed_dates + job.failed_dates
+    mark = '✓' if result['status'] == 'ok' else '✗'
+    line = f"  {mark} {result['date']}  {result['seconds']:.2f}s  [{done}/{job.total_dates}]"
+    if result['errors']:
+        line += f"  {result['errors'][0]}"
+    print(line, flush=True)
+
+
+def main():
+    resume_id = _arg('--resume')
+    start = _arg('--start')
+    end = _arg('--end')
+
+    if not resume_id and not (start and end):
+        print(__doc__)
+        sys.exit(1)
+
+    app = create_app()
+    with app.app_context():
+        client = LightspeedClient()
+        if not client.is_configured():
+            print("⚠ Lightspeed non configuré (LIGHTSPEED_CLIENT_ID / LIGHTSPEED_CLIENT_SECRET)")
+            sys.exit(1)
+
+        if resume_id:
+            job_id = int(resume_id)
+        else:
+            try:
+                job = create_job(
+                    datetime.strptime(start, '%Y-%m-%d').date(),
+                    datetime.strptime(end, '%Y-%m-%d').date(),
+                    concurrency=int(_arg('--concurrency')) if _arg('--concurrency') else None,
+                    rate_limit=float(_arg('--rate')) if _arg('--rate') else None,
+                    created_by='cli',
+                )
+            except ValueError as e:
+                print(f"⚠ {e}")
+                sys.exit(1)
+            job_id = job.id
+
+        print(f"Backfill #{job_id} — démarrage")
+        summary = LightspeedBackfill(app, client, progress=_print_progress).run(job_id)
+        client.disconnect()
+
+        print(f"\n{'=' * 60}")
+        print(f"Statut:     {summary['status']}")
+        print(f"Réussies:   {summary['completed_dates']}/{summary['total_dates']}")
+        print(f"En erreur:  {summary['failed_dates']}")
+        print(f"Durée:      {summary['elapsed_seconds']:.1f}s "
+              f"({summary['dates_per_minute']} dates/min)")
+        if summary['failed_dates']:
+            print(f"Reprendre:  python -m scripts.lightspeed_backfill --resume {job_id}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Cube de pace OTB — reconstruction et mesure (utils/otb_pace.py).
+
+Usage:
+    python -m scripts.otb_pace rebuild                # Reconstruit otb_pace depuis otb_forecasts
+    python -m scripts.otb_pace benchmark              # Base temporaire: 1 an de snapshots × 90 jours
+    python -m scripts.otb_pace benchmark --days 730
+
+Le cube est maintenu à chaque import, saisie, snapshot ou seed OTB; la
+reconstruction ne sert qu'après un chargement direct en base ou une mise
+à jour depuis une version sans cube.
+
+Le benchmark compare, sur une base SQLite temporaire:
+- le snapshot quotidien ligne par ligne (une requête d'existence par date
+  de séjour) et roll_forward() en un seul INSERT … SELECT
+- la courbe de pace d'une fenêtre de 90 jours reconstruite en Python depuis
+  otb_forecasts et pace_curve() lue dans le cube
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+HORIZON = 90
+
+
+def cmd_rebuild():
+    from main import create_app
+    from utils import otb_pace
+    app = create_app()
+    with app.app_context():
+        t0 = time.perf_counter()
+        written = otb_pace.rebuild()
+        print(f"✓ otb_pace reconstruit: {written} lignes en {time.perf_counter() - t0:.2f}s")
+
+
+def populate(db, OTBForecast, days):
+    """`days` daily snapshots, each covering the next HORIZON stay dates."""
+    rng = random.Random(7)
+    first = date.today() - timedelta(days=days)
+    db.session.execute(OTBForecast.__table__.insert(), [
+        {'snapshot_date': first + timedelta(days=s), 'target_date': first + timedelta(days=s + k),
+         'rooms_otb': min(252, 40 + 2 * (HORIZON - k) + rng.randint(0, 20)),
+         'revenue_otb': rng.uniform(5000, 40000)}
+        for s in range(days) for k in range(HORIZON + 1)])
+    db.session.commit()
+    return first + timedelta(days=days - 1)
+
+
+def roll_forward_per_row(db, OTBForecast, today):
+    """The former snapshot endpoint: one existence query and one ORM insert per stay date."""
+    for rec in OTBForecast.query.filter_by(snapshot_date=today - timedelta(days=1)).all():
+        target = rec.target_date + timedelta(days=1)
+        if not OTBForecast.query.filter_by(snapshot_date=today, target_date=target).first():
+            db.session.add(OTBForecast(snapshot_date=today, target_date=target, rooms_otb=rec.rooms_otb,
+                                       revenue_otb=rec.revenue_otb, source='snapshot'))
+    db.session.commit()
+
+
+def pace_from_raw(OTBForecast, start, end):
+    """The front-end reshaping: every snapshot row of the window, grouped in Python."""
+    curve = defaultdict(int)
+    for rec in OTBForecast.query.filter(OTBForecast.target_date.between(start, end)).all():
+        days_before = (rec.target_date - rec.snapshot_date).days
+        if 0 <= days_before <= HORIZON:
+            curve[days_before] += rec.rooms_otb or 0
+    return curve
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return (time.perf_counter() - t0) * 1000, result
+
+
+def cmd_benchmark(days):
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'pace.db')}"
+        from main import create_app
+        from database.models import db, OTBForecast, OTBPace
+        from utils import otb_pace
+
+        app = create_app()
+        with app.app_context():
+            last = populate(db, OTBForecast, days)
+            print(f"Base temporaire: {days} snapshots × {HORIZON + 1} jours "
+                  f"= {OTBForecast.query.count()} lignes OTB\n")
+
+            rebuild_ms, written = timed(otb_pace.rebuild)
+            print(f"  Reconstruction du cube      {rebuild_ms:>9.1f} ms  ({written} lignes)")
+
+            per_row_ms, _ = timed(roll_forward_per_row, db, OTBForecast, last + timedelta(days=1))
+
+            def set_based(today):
+                created = otb_pace.roll_forward(today)
+                otb_pace.refresh(otb_pace.snapshot_targets(today))
+                db.session.commit()
+                return created
+            set_ms, created = timed(set_based, last + timedelta(days=2))
+            print(f"  Snapshot ligne par ligne    {per_row_ms:>9.1f} ms")
+            print(f"  roll_forward + refresh      {set_ms:>9.1f} ms  ({created} lignes)")
+
+            start, end = last - timedelta(days=HORIZON), last
+            raw_ms, raw = timed(pace_from_raw, OTBForecast, start, end)
+            cube_ms, curve = timed(otb_pace.pace_curve, start, end, HORIZON)
+            assert {p['days_before']: p['rooms_otb'] for p in curve} == dict(raw)
+            print(f"  Pace 90 j depuis les lignes {raw_ms:>9.1f} ms")
+            print(f"  pace_curve() depuis le cube {cube_ms:>9.1f} ms  ({len(curve)} points)")
+            print(f"\n  Lignes du cube: {OTBPace.query.count()}")
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command not in ('rebuild', 'benchmark'):
+        print(__doc__)
+        sys.exit(1)
+    if command == 'rebuild':
+        cmd_rebuild()
+    else:
+        days = int(sys.argv[sys.argv.index('--days') + 1]) if '--days' in sys.argv else 365
+        cmd_benchmark(days)
+
+
+if __name__ == '__main__':
+    main()
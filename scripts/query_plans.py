@@ -0,0 +1,150 @@
+"""
+Plans de requêtes — audit EXPLAIN QUERY PLAN et mesure des index.
+
+Usage:
+    python -m scripts.query_plans audit                  # Plans des requêtes chaudes sur database/audit.db
+    python -m scripts.query_plans audit --verbose        # Avec le SQL de chaque requête
+    python -m scripts.query_plans benchmark              # Latence avant / après les index composites
+    python -m scripts.query_plans benchmark --days 2920
+
+L'audit rejoue les requêtes ORM des pages et API principales
+(utils/query_audit.py) et signale les balayages complets de table (SCAN)
+et les tris temporaires. Les index manquants s'ajoutent à une base
+existante avec `python migrate_db.py`.
+
+Le benchmark construit une base temporaire synthétique (4 ans par défaut),
+mesure chaque requête sans les index de migrate_db.INDEXES, puis avec.
+"""
+
+import os
+import random
+import sys
+import tempfile
+from datetime import date, timedelta
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import create_engine, text
+
+from database.models import (
+    db, DailyCardMetrics, DailyJourMetrics, JournalEntry, NightAuditSession, OTBForecast,
+    RJArchive, RJSheetData, Shift, Task, TaskCompletion,
+)
+from migrate_db import INDEXES
+from utils.query_audit import HOT_QUERIES, SAMPLE, SAMPLE_DAY, audit, compile_sql, time_query
+
+TABLES = [DailyJourMetrics, RJArchive, RJSheetData, JournalEntry, OTBForecast, Shift, Task,
+          TaskCompletion, DailyCardMetrics, NightAuditSession]
+
+
+def print_audit(report, verbose=False, conn=None):
+    flagged = 0
+    for entry in report:
+        marks = {kind for kind, _ in entry['findings']}
+        status = '✗ SCAN' if 'full_scan' in marks else ('~ tri' if marks else '✓')
+        flagged += 'full_scan' in marks
+        print(f"{status:<7} {entry['name']:<26} {entry['endpoint']}")
+        if verbose and conn is not None:
+            build = next(b for n, _, b in HOT_QUERIES if n == entry['name'])
+            print(f"          {compile_sql(conn, build(SAMPLE))}")
+        for line in entry['plan']:
+            print(f"          {line}")
+    print(f"\n{flagged} requête(s) avec balayage complet sur {len(report)}")
+    return flagged
+
+
+def cmd_audit():
+    from main import create_app
+    app = create_app()
+    with app.app_context():
+        with db.engine.connect() as conn:
+            print_audit(audit(conn), verbose='--verbose' in sys.argv, conn=conn)
+
+
+def populate(conn, days):
+    """Synthetic history ending at SAMPLE_DAY, sized like a multi-year property."""
+    rng = random.Random(7)
+    start = SAMPLE_DAY - timedelta(days=days - 1)
+    dates = [start + timedelta(days=i) for i in range(days)]
+    sheets = ['Recap', 'Transelect', 'GEAC', 'Jour', 'EJ', 'DueBack', 'SetD', 'HP', 'Controle',
+              'Somm', 'Rapp_p1', 'Rapp_p2', 'Rapp_p3', 'Diff.Caisse', 'Depot', 'Daily Rev',
+              'Sales Journal', 'AR', 'Cashout', 'Notes']
+    payload = '[' + ','.join(['[1.5, "texte", 2.25, null]'] * 40) + ']'
+
+    conn.execute(DailyJourMetrics.__table__.insert(), [
+        {'date': d, 'property_id': 1 + i % 4, 'year': d.year, 'month': d.month,
+         'day_of_month': d.day, 'total_revenue': rng.gauss(40000, 5000),
+         'occupancy_rate': rng.gauss(75, 8)} for i, d in enumerate(dates)])
+    conn.execute(RJArchive.__table__.insert(), [
+        {'id': i + 1, 'audit_date': d, 'total_sheets': len(sheets)} for i, d in enumerate(dates)])
+    conn.execute(RJSheetData.__table__.insert(), [
+        {'archive_id': i + 1, 'audit_date': d, 'sheet_name': name, 'sheet_index': j,
+         'data_json': payload} for i, d in enumerate(dates) for j, name in enumerate(sheets)])
+    conn.execute(JournalEntry.__table__.insert(), [
+        {'audit_date': d, 'gl_code': str(100000 + g), 'amount': rng.uniform(-5000, 5000)}
+        for d in dates for g in range(0, 600, 10)])
+    snapshots = dates[-365:]
+    conn.execute(OTBForecast.__table__.insert(), [
+        {'snapshot_date': s, 'target_date': s + timedelta(days=k), 'rooms_otb': rng.randint(50, 252)}
+        for s in snapshots for k in range(0, 365, 2)])
+    conn.execute(Task.__table__.insert(), [
+        {'id': t, 'order': t, 'title_fr': f'Tâche {t}', 'category': 'part1'} for t in range(1, 41)])
+    conn.execute(Shift.__table__.insert(), [{'id': i + 1, 'date': d} for i, d in enumerate(dates)])
+    conn.execute(TaskCompletion.__table__.insert(), [
+        {'shift_id': i + 1, 'task_id': t} for i in range(days) for t in range(1, 41)])
+    conn.execute(DailyCardMetrics.__table__.insert(), [
+        {'date': d, 'year': d.year, 'month': d.month, 'card_type': ct, 'pos_total': rng.uniform(0, 9000)}
+        for d in dates for ct in ('VISA', 'MC', 'AMEX', 'DEBIT', 'DISCOVER')])
+    conn.execute(NightAuditSession.__table__.insert(), [
+        {'audit_date': d, 'property_id': 1 + i % 4, 'status': 'locked'} for i, d in enumerate(dates)])
+    conn.commit()
+
+
+def cmd_benchmark(days):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'plans.db')}")
+        db.metadata.create_all(engine, tables=[m.__table__ for m in TABLES])
+        with engine.connect() as conn:
+            populate(conn, days)
+            for name, _table, _columns in INDEXES:
+                conn.execute(text(f'DROP INDEX IF EXISTS {name}'))
+            conn.execute(text('ANALYZE'))
+            conn.commit()
+            print(f"Base synthétique: {days} jours\n")
+
+            print("── Avant (sans les index composites) ──")
+            before_report = audit(conn)
+            print_audit(before_report)
+            before = {n: time_query(conn, b(SAMPLE)) for n, _, b in HOT_QUERIES}
+
+            for name, table, columns in INDEXES:
+                conn.execute(text(f'CREATE INDEX {name} ON {table} ({columns})'))
+            conn.execute(text('ANALYZE'))
+            conn.commit()
+
+            print("\n── Après ──")
+            print_audit(audit(conn))
+            after = {n: time_query(conn, b(SAMPLE)) for n, _, b in HOT_QUERIES}
+        engine.dispose()
+
+    print(f"\n  {'Requête':<26} {'avant ms':>10} {'après ms':>10} {'gain':>8}")
+    for name, _, _ in HOT_QUERIES:
+        gain = before[name] / after[name] if after[name] else 0
+        print(f"  {name:<26} {before[name]:>10.3f} {after[name]:>10.3f} {gain:>7.1f}x")
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command not in ('audit', 'benchmark'):
+        print(__doc__)
+        sys.exit(1)
+    if command == 'audit':
+        cmd_audit()
+    else:
+        days = int(sys.argv[sys.argv.index('--days') + 1]) if '--days' in sys.argv else 1461
+        cmd_benchmark(days)
+
+
+if __name__ == '__main__':
+    main()
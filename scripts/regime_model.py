@@ -0,0 +1,119 @@
+"""
+Régimes d'exploitation — ré-ajustement et mesure de performance.
+
+Usage:
+    python -m scripts.regime_model refit            # Ré-ajustement complet (départ à chaud)
+    python -m scripts.regime_model refit --cold     # Ré-ajustement complet à froid (n_init=10)
+    python -m scripts.regime_model benchmark        # Comparaison sur 5 ans de données synthétiques
+    python -m scripts.regime_model benchmark --years 10
+
+Le benchmark compare l'ancien chemin (KMeans n_init=10 à chaque requête)
+au modèle persisté: étiquetage par centroïde le plus proche, mise à jour
+incrémentale d'une journée et ré-ajustement à chaud.
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def synthetic_days(years=5, seed=42):
+    """Daily metrics drawn from three operating regimes (low / mid / high)."""
+    rng = random.Random(seed)
+    regimes = [(55, 135, 4000), (75, 150, 6500), (92, 175, 9500)]  # occ, adr, f&b
+    start = date(2020, 1, 1)
+    days = []
+    for i in range(int(years * 365)):
+        occ, adr, fb = regimes[rng.choices([0, 1, 2], weights=[3, 5, 2])[0]]
+        occ = min(100, max(5, rng.gauss(occ, 5)))
+        adr = rng.gauss(adr, 8)
+        fb_revenue = max(0, rng.gauss(fb, 600))
+        room_revenue = occ / 100 * 252 * adr
+        days.append(SimpleNamespace(
+            date=start + timedelta(days=i), occupancy_rate=occ, adr=adr,
+            fb_revenue=fb_revenue, total_revenue=room_revenue + fb_revenue,
+            total_rooms_sold=int(occ / 100 * 252),
+        ))
+    return days
+
+
+def _time(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def benchmark(years=5):
+    import numpy as np
+    from sklearn.cluster import KMeans
+    from utils.regime_model import RegimeClusterer, feature_matrix
+
+    days = synthetic_days(years)
+    history, today = days[:-1], days[-1:]
+    print(f"{len(days)} jours synthétiques ({years} ans)\n")
+
+    def old_path():
+        X = np.array([[m.occupancy_rate, m.adr, m.total_revenue, m.fb_revenue] for m in days])
+        KMeans(n_clusters=3, random_state=42, n_init=10).fit_predict(X)
+
+    model = RegimeClusterer.fit(feature_matrix(history), history[-1].date)
+
+    def label_only():
+        model.nearest(feature_matrix(days))
+
+    def one_day_update():
+        m = RegimeClusterer(model.to_state())
+        m.partial_fit(feature_matrix(today), today[0].date)
+
+    results = [
+        ('Ancien: KMeans n_init=10 par requête', _time(old_path, 3)),
+        ('Ré-ajustement à froid (n_init=10)',
+         _time(lambda: RegimeClusterer.fit(feature_matrix(days), days[-1].date), 3)),
+        ('Ré-ajustement à chaud (n_init=1)',
+         _time(lambda: RegimeClusterer.fit(feature_matrix(days), days[-1].date, init=model), 3)),
+        ('Requête: étiquetage centroïde', _time(label_only)),
+        ('Nouvelle journée: mise à jour incr.', _time(one_day_update)),
+    ]
+    baseline = results[0][1]
+    for label, seconds in results:
+        print(f"  {label:<40} {seconds * 1000:>9.2f} ms   x{baseline / seconds:>7.1f}")
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == 'benchmark':
+        years = 5
+        if '--years' in sys.argv:
+            years = float(sys.argv[sys.argv.index('--years') + 1])
+        benchmark(years)
+        return
+    if command != 'refit':
+        print(__doc__)
+        sys.exit(1)
+
+    from main import create_app
+    from utils.regime_model import get_regime_store
+
+    app = create_app()
+    with app.app_context():
+        store = get_regime_store()
+        try:
+            store.refit(cold='--cold' in sys.argv, reason='manual')
+        except ValueError as e:
+            print(f"⚠ {e}")
+            sys.exit(1)
+        info = store.info()
+        print(f"Modèle #{info['id']}: {info['n_days']} jours jusqu'au {info['last_date']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Export-lot des RJ — un zip avec le RJ .xls de chaque session d'un mois ou d'une période.
+
+Usage:
+    python -m scripts.rj_batch_export 2026-01                          # → "RJ 2026-01-01 2026-01-31.zip"
+    python -m scripts.rj_batch_export 2026-01-05 2026-01-20 --out lot.zip
+    python -m scripts.rj_batch_export 2026-01 --workers 2
+    python -m scripts.rj_batch_export benchmark                        # Base temporaire, 31 sessions
+    python -m scripts.rj_batch_export benchmark --days 28 --template "Rj Vierge.xls" --workers 4
+
+Les fichiers sont construits par --workers processus (RJ_BATCH_WORKERS par
+défaut) sur le gabarit RJ_TEMPLATE_PATH analysé une seule fois, et écrits
+dans le zip dans l'ordre où ils se terminent; la durée de chaque fichier
+s'affiche au fil de l'eau et export_timings.json (dernière entrée du zip)
+la conserve.
+
+Le benchmark (base SQLite temporaire, jamais database/audit.db) compare:
+- un export unitaire à froid (gabarit analysé, l'ancien coût par fichier)
+- les exports unitaires enchaînés, gabarit en cache
+- l'export-lot avec --workers processus
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def option(name, default=None):
+    return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+
+def print_file(item):
+    status = f"ERREUR {item['error']}" if 'error' in item else f"{item['size'] / 1024:>7.0f} Ko"
+    print(f"  {item['filename']:<20} {item['ms']:>8.1f} ms   pid {item['worker']:<7} "
+          f"t+{item['done_ms']:>8.1f} ms   {status}")
+
+
+def run_batch(sessions, template_path, workers, out_path, progress=print_file):
+    from routes.audit.rj_native import build_rj_excel
+    from utils import rj_batch_export
+    t0 = time.perf_counter()
+    with open(out_path, 'wb') as out:
+        for chunk in rj_batch_export.export_zip(build_rj_excel, sessions, template_path, workers, progress):
+            out.write(chunk)
+    return (time.perf_counter() - t0) * 1000
+
+
+def cmd_export(args, workers, out_path):
+    from main import create_app
+    from utils import rj_batch_export
+    app = create_app()
+    with app.app_context():
+        try:
+            max_days = app.config.get('RJ_BATCH_MAX_DAYS', 366)
+            start, end = (rj_batch_export.parse_range(month=args[0]) if len(args) == 1
+                          else rj_batch_export.parse_range(start=args[0], end=args[1], max_days=max_days))
+        except ValueError as e:
+            print(f"✗ {e}")
+            sys.exit(1)
+        sessions = rj_batch_export.load_sessions(start, end)
+    if not sessions:
+        print(f"✗ Aucune session entre {start} et {end}")
+        sys.exit(1)
+
+    workers = workers or app.config['RJ_BATCH_WORKERS']
+    out_path = out_path or f"RJ {start.isoformat()} {end.isoformat()}.zip"
+    print(f"{len(sessions)} sessions, {workers} processus → {out_path}\n")
+    elapsed = run_batch(sessions, app.config['RJ_TEMPLATE_PATH'], workers, out_path)
+    print(f"\n✓ {out_path} en {elapsed / 1000:.2f}s")
+
+
+def cmd_benchmark(days, template_path, workers):
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'batch.db')}"
+        from main import create_app
+        from database.models import db, NightAuditSession
+        from routes.audit.rj_native import build_rj_excel
+        from utils import rj_batch_export, rj_template_cache
+
+        app = create_app()
+        template_path = template_path or app.config['RJ_TEMPLATE_PATH']
+        if not os.path.exists(template_path):
+            from benchmarks.synthetic import rj_workbook
+            template_path = os.path.join(tmp, 'Rj Vierge.xls')
+            with open(template_path, 'wb') as f:
+                f.write(rj_workbook(vba=False))
+        workers = workers or app.config['RJ_BATCH_WORKERS']
+
+        first = date(2026, 1, 1)
+        with app.app_context():
+            db.session.add_all(NightAuditSession(audit_date=first + timedelta(days=i), auditor_name='Benchmark',
+                                                 status='draft', cash_ls_lecture=100.0 + i)
+                               for i in range(days))
+            db.session.commit()
+            sessions = rj_batch_export.load_sessions(first, first + timedelta(days=days - 1))
+
+        print(f"Gabarit: {template_path} ({os.path.getsize(template_path) / 1024:.0f} Ko), "
+              f"{days} sessions, {os.cpu_count()} CPU\n")
+
+        rj_template_cache.clear()
+        t0 = time.perf_counter()
+        rj_batch_export.build_one(build_rj_excel, template_path, sessions[0])
+        cold_ms = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        for values in sessions:
+            rj_batch_export.build_one(build_rj_excel, template_path, values)
+        serial_ms = (time.perf_counter() - t0) * 1000
+
+        rj_template_cache.clear()
+        print(f"Export-lot, {workers} processus:")
+        batch_ms = run_batch(sessions, template_path, workers, os.path.join(tmp, 'lot.zip'))
+
+        print(f"\n  1 export unitaire à froid         {cold_ms:>9.1f} ms")
+        print(f"  {days} exports unitaires à froid      {cold_ms * days:>9.1f} ms  (estimé: {days} × froid)")
+        print(f"  {days} exports enchaînés, en cache    {serial_ms:>9.1f} ms")
+        print(f"  Export-lot ({workers} processus, zip)   {batch_ms:>9.1f} ms  "
+              f"= {batch_ms / cold_ms:.1f} exports unitaires à froid")
+
+
+def main():
+    args = [a for i, a in enumerate(sys.argv[1:], start=1)
+            if not a.startswith('--') and not sys.argv[i - 1].startswith('--')]
+    workers = int(option('--workers', 0))
+    if args[:1] == ['benchmark']:
+        cmd_benchmark(int(option('--days', 31)), option('--template'), workers)
+    elif len(args) in (1, 2):
+        cmd_export(args, workers, option('--out'))
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
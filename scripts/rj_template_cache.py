@@ -0,0 +1,119 @@
+"""
+Cache des gabarits RJ — mesure de la latence d'export (utils/rj_template_cache.py).
+
+Usage:
+    python -m scripts.rj_template_cache benchmark                      # Un mois de sessions, gabarit synthétique
+    python -m scripts.rj_template_cache benchmark --template "Rj Vierge.xls"
+    python -m scripts.rj_template_cache benchmark --days 28
+
+Sur une base SQLite temporaire (jamais database/audit.db), une session par
+jour du mois est exportée par GET /api/rj/native/export/rj/<date>:
+- à froid: cache vidé avant chaque export (l'ancien chemin: xlrd avec
+  formatting_info + copie xlutils à chaque fois)
+- à chaud: gabarit analysé une fois, un clone par export
+
+Puis RJFiller sur le même RJ de base: RJFiller(bytes) contre
+RJFiller.from_template() (ré-exports du même jour, export-lot).
+Par défaut le gabarit est RJ_TEMPLATE_PATH s'il existe, sinon un RJ
+synthétique (benchmarks/synthetic.py).
+"""
+
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return (time.perf_counter() - t0) * 1000, result
+
+
+def report(label, samples):
+    print(f"  {label:<28} total {sum(samples):>9.1f} ms   "
+          f"médiane {statistics.median(samples):>8.1f} ms   max {max(samples):>8.1f} ms")
+
+
+def fill(filler, d):
+    filler.update_controle(vjour=d.day, mois=d.month, annee=d.year)
+    filler.fill_sheet('Recap', {'date': d.strftime('%d/%m/%Y')})
+    return filler.save_to_bytes()
+
+
+def cmd_benchmark(days, template_path):
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'export.db')}"
+        from main import create_app
+        from database.models import db, NightAuditSession
+        from utils import rj_template_cache
+        from utils.rj_filler import RJFiller
+
+        app = create_app()
+        template_path = template_path or app.config['RJ_TEMPLATE_PATH']
+        if not os.path.exists(template_path):
+            from benchmarks.synthetic import rj_workbook
+            template_path = os.path.join(tmp, 'Rj Vierge.xls')
+            with open(template_path, 'wb') as f:
+                f.write(rj_workbook(vba=False))
+        app.config['RJ_TEMPLATE_PATH'] = template_path
+        with open(template_path, 'rb') as f:
+            data = f.read()
+
+        first = date(2026, 1, 1)
+        dates = [first + timedelta(days=i) for i in range(days)]
+        with app.app_context():
+            db.session.add_all(NightAuditSession(audit_date=d, auditor_name='Benchmark', status='draft')
+                               for d in dates)
+            db.session.commit()
+
+        print(f"Gabarit: {template_path} ({len(data) / 1024:.0f} Ko), {days} sessions\n")
+        with app.test_client() as client:
+            with client.session_transaction() as sess:
+                sess['authenticated'] = True
+
+            def export(d):
+                resp = client.get(f'/api/rj/native/export/rj/{d.isoformat()}')
+                assert resp.status_code == 200, resp.get_json()
+                return len(resp.data)
+
+            cold = []
+            for d in dates:
+                rj_template_cache.clear()
+                cold.append(timed(export, d)[0])
+            rj_template_cache.clear()
+            warm = [timed(export, d)[0] for d in dates]
+
+        report('Export à froid (par export)', cold)
+        report('Export à chaud (clone)', warm)
+        print(f"  → gain {sum(cold) / sum(warm):.1f}× sur le mois "
+              f"(1er export à chaud {warm[0]:.1f} ms, analyse comprise)\n")
+
+        with app.app_context():
+            direct = [timed(lambda d: fill(RJFiller(io.BytesIO(data)), d), d)[0] for d in dates]
+            rj_template_cache.clear()
+            cloned = [timed(lambda d: fill(RJFiller.from_template(rj_template_cache.base(data)), d), d)[0]
+                      for d in dates]
+        report('RJFiller(bytes)', direct)
+        report('RJFiller.from_template', cloned)
+        print(f"  → gain {sum(direct) / sum(cloned):.1f}×")
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command != 'benchmark':
+        print(__doc__)
+        sys.exit(1)
+    days = int(sys.argv[sys.argv.index('--days') + 1]) if '--days' in sys.argv else 31
+    template_path = sys.argv[sys.argv.index('--template') + 1] if '--template' in sys.argv else None
+    cmd_benchmark(days, template_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Profil de démarrage — temps d'import par module et démarrage à froid.
+
+Usage:
+    python -m scripts.startup_profile                 # Avant (tout importé au boot) vs après (chargement différé)
+    python -m scripts.startup_profile --top 30        # Plus de modules dans le profil
+    python -m scripts.startup_profile --runs 5        # Médiane sur 5 démarrages
+
+Chaque mesure lance un interpréteur neuf avec `python -X importtime` qui
+importe main et appelle create_app() (threads d'arrière-plan désactivés).
+« Avant » force STARTUP_PRELOAD_HEAVY=true, ce qui importe numpy, sklearn,
+matplotlib, openpyxl, python-docx... au boot comme le faisait l'ancien
+main.py ; « Après » est le mode par défaut, où ils se chargent au premier
+usage (utils/lazy_import.py).
+"""
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+PROBE = (
+    "import time; t0 = time.perf_counter()\n"
+    "from main import create_app; create_app()\n"
+    "print('STARTUP_MS', (time.perf_counter() - t0) * 1000)\n"
+)
+
+QUIET_ENV = {
+    'WEATHER_PREFETCH_ENABLED': 'false',
+    'FORECAST_REFIT_ENABLED': 'false',
+    'DOC_INDEX_WARM_ENABLED': 'false',
+    'OUTBOX_DISPATCHER_ENABLED': 'false',
+}
+
+LINE_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)')
+
+
+def parse_importtime(stderr):
+    """
+    `-X importtime` output → list of (module, self_us, cumulative_us, depth).
+
+    Depth 0 entries are imported directly by the probe; their cumulative
+    times add up to the whole import cost.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        m = LINE_RE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return rows
+
+
+def by_package(rows):
+    """Cumulative ms per top-level package, charged to whoever imported it first."""
+    totals = {}
+    for name, _self, cumulative, depth in rows:
+        if depth == 0:
+            root = name.split('.')[0]
+            totals[root] = totals.get(root, 0) + cumulative / 1000
+    return totals
+
+
+def measure(preload, runs=3):
+    """Median startup ms and the import rows of the median run."""
+    env = dict(os.environ, **QUIET_ENV, STARTUP_PRELOAD_HEAVY='true' if preload else 'false')
+    samples = []
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROBE], cwd=PROJECT_ROOT,
+                              env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(proc.stderr[-2000:])
+            sys.exit(proc.returncode)
+        ms = float(re.search(r'STARTUP_MS ([\d.]+)', proc.stdout).group(1))
+        samples.append((ms, parse_importtime(proc.stderr)))
+    samples.sort(key=lambda s: s[0])
+    return statistics.median(s[0] for s in samples), samples[len(samples) // 2][1]
+
+
+def print_profile(title, ms, rows, top):
+    print(f"── {title}: démarrage {ms:.0f} ms ──")
+    print(f"  {'Module':<44} {'cumulé ms':>10} {'propre ms':>10}")
+    for name, self_us, cumulative, depth in sorted(rows, key=lambda r: -r[2])[:top]:
+        print(f"  {'  ' * min(depth, 4)}{name:<{44 - 2 * min(depth, 4)}} "
+              f"{cumulative / 1000:>10.1f} {self_us / 1000:>10.1f}")
+    print()
+
+
+def main():
+    args = sys.argv[1:]
+    if any(a not in ('--top', '--runs') and not a.isdigit() for a in args):
+        print(__doc__)
+        sys.exit(1)
+    top = int(args[args.index('--top') + 1]) if '--top' in args else 20
+    runs = int(args[args.index('--runs') + 1]) if '--runs' in args else 3
+
+    before_ms, before_rows = measure(preload=True, runs=runs)
+    after_ms, after_rows = measure(preload=False, runs=runs)
+
+    print_profile('Avant (STARTUP_PRELOAD_HEAVY=true)', before_ms, before_rows, top)
+    print_profile('Après (chargement différé)', after_ms, after_rows, top)
+
+    before_pkg, after_pkg = by_package(before_rows), by_package(after_rows)
+    print("── Par paquet (ms cumulées, premier import) ──")
+    print(f"  {'Paquet':<24} {'avant':>9} {'après':>9}")
+    for pkg in sorted(before_pkg, key=lambda p: -before_pkg[p])[:top]:
+        print(f"  {pkg:<24} {before_pkg[pkg]:>9.1f} {after_pkg.get(pkg, 0):>9.1f}")
+    print()
+    print(f"Démarrage à froid (médiane sur {runs}): {before_ms:.0f} ms → {after_ms:.0f} ms "
+          f"({(1 - after_ms / before_ms) * 100:.0f} % plus rapide)")
+
+
+if __name__ == '__main__':
+    main()
@@ -13,6 +13,12 @@ PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, PROJECT_ROOT)
 os.chdir(PROJECT_ROOT)
 
+# No background weather prefetch (network), forecast / regime refit or doc indexing threads from test apps
+os.environ.setdefault('WEATHER_PREFETCH_ENABLED', 'false')
+os.environ.setdefault('FORECAST_REFIT_ENABLED', 'false')
+os.environ.setdefault('REGIME_REFIT_ENABLED', 'false')
+os.environ.setdefault('DOC_INDEX_WARM_ENABLED', 'false')
+
 # ── Test RJ file paths ──────────────────────────────────────────
 RJ_DIR = os.path.join(PROJECT_ROOT, 'RJ 2024-2025', 'RJ 2025-2026', '12-Février 2026')
 RJ_07_PATH = os.path.join(RJ_DIR, 'Rj 07-02-2026.xls')
@@ -0,0 +1,195 @@
+"""Tests for the streaming anomaly scores (utils/anomaly_scorer.py)."""
+
+import random
+import statistics
+from datetime import date, timedelta
+
+import pytest
+
+from utils.anomaly_scorer import AnomalyScorer, welford_add, welford_remove
+
+START = date(2046, 1, 1)
+DAYS = 120
+OUTLIER = START + timedelta(days=DAYS)  # 2046-05-01
+
+
+def _djm(d, revenue=10000, occ=75, adr=150, fb=3000):
+    from database.models import DailyJourMetrics
+    return DailyJourMetrics(
+        date=d, year=d.year, month=d.month, day_of_month=d.day,
+        total_revenue=revenue, occupancy_rate=occ, adr=adr, fb_revenue=fb,
+        total_cards=revenue * 0.8, total_rooms_sold=int(occ / 100 * 252), source='test',
+    )
+
+
+@pytest.fixture
+def anomaly_db(app):
+    from database.models import db, DailyJourMetrics, AnomalyStat, DailyAnomalyScore, NightAuditSession
+
+    def cleanup():
+        NightAuditSession.query.filter(NightAuditSession.audit_date >= START).delete()
+        DailyJourMetrics.query.filter(DailyJourMetrics.date >= START).delete()
+        DailyAnomalyScore.query.delete()
+        AnomalyStat.query.delete()
+        db.session.commit()
+
+    with app.app_context():
+        cleanup()
+        rng = random.Random(3)
+        for i in range(DAYS):
+            db.session.add(_djm(START + timedelta(days=i), revenue=rng.gauss(10000, 500),
+                                occ=rng.gauss(75, 3), adr=rng.gauss(150, 5),
+                                fb=rng.gauss(3000, 200)))
+        db.session.commit()
+        yield db
+        cleanup()
+
+
+class TestWelford:
+
+    def test_add_and_remove_match_batch_statistics(self):
+        xs = [random.Random(1).gauss(100, 15) for _ in range(50)]
+        state = (0, 0.0, 0.0)
+        for x in xs:
+            state = welford_add(*state, x)
+        n, mean, m2 = state
+        assert mean == pytest.approx(statistics.mean(xs))
+        assert (m2 / n) ** 0.5 == pytest.approx(statistics.pstdev(xs))
+
+        n, mean, m2 = welford_remove(n, mean, m2, xs[-1])
+        assert n == 49
+        assert (m2 / n) ** 0.5 == pytest.approx(statistics.pstdev(xs[:-1]))
+
+
+class TestAnomalyScorer:
+
+    def test_sync_scores_history_once(self, anomaly_db):
+        from database.models import AnomalyStat, DailyAnomalyScore
+        scorer = AnomalyScorer()
+        assert scorer.sync() == DAYS
+        assert scorer.sync() == 0
+        assert DailyAnomalyScore.query.count() == DAYS
+        stat = AnomalyStat.query.filter_by(metric='revenue', scope='global').one()
+        assert stat.n == DAYS
+        assert stat.mean == pytest.approx(10000, rel=0.02)
+
+    def test_abnormal_night_flagged_on_record(self, anomaly_db):
+        scorer = AnomalyScorer()
+        scorer.sync()
+        row = scorer.record_day(_djm(OUTLIER, revenue=30000))
+
+        assert row.is_flagged
+        assert row.severity == 'critical'
+        metric, detail = row.flagged_metrics(scorer.threshold)[0]
+        assert metric in ('revenue', 'cards')
+        assert detail['score'] > 3
+        assert 'month' not in detail['z']  # May has no history yet
+
+    def test_resync_replaces_previous_contribution(self, anomaly_db):
+        from database.models import db, AnomalyStat
+        scorer = AnomalyScorer()
+        scorer.sync()
+        djm = _djm(OUTLIER, revenue=30000)
+        db.session.add(djm)
+        scorer.record_day(djm)
+        djm.total_revenue, djm.total_cards = 10000, 8000
+        row = scorer.record_day(djm)
+        db.session.commit()
+
+        assert not row.is_flagged
+        stat = AnomalyStat.query.filter_by(metric='revenue', scope='global').one()
+        assert stat.n == DAYS + 1
+        assert stat.mean == pytest.approx(10000, rel=0.02)
+
+    def test_alert_engine_reads_stored_flag(self, anomaly_db):
+        from utils.alert_engine import AlertEngine
+        scorer = AnomalyScorer()
+        scorer.sync()
+        scorer.record_day(_djm(OUTLIER, revenue=30000))
+
+        alert = AlertEngine().check_anomaly({'audit_date': OUTLIER})
+        assert alert['triggered']
+        assert alert['alert_type'] == 'anomaly_detected'
+        assert 'Revenu total' in alert['message']
+        # First night: nothing to compare against
+        assert not AlertEngine().check_anomaly({'audit_date': START})['triggered']
+
+    def test_submit_scores_night_and_raises_alert(self, anomaly_db, client):
+        from database.models import db, NightAuditSession, DailyAnomalyScore, NotificationOutbox
+        from utils.alert_engine import AlertEngine
+
+        client.application.extensions['notification_outbox'].enabled = False
+        AnomalyScorer().sync()
+        db.session.commit()
+        # Recomputed on submit: 27 000 rooms + 3 000 F&B, 189 rooms sold (75 %)
+        nas = NightAuditSession(audit_date=OUTLIER, auditor_name='Test', status='draft',
+                                jour_room_revenue=27000, jour_cafe_nourriture=3000,
+                                jour_rooms_double=189)
+        db.session.add(nas)
+        db.session.commit()
+
+        resp = client.post(f'/api/rj/native/submit/{OUTLIER.isoformat()}')
+
+        assert resp.status_code == 200
+        row = DailyAnomalyScore.query.filter_by(date=OUTLIER).one()
+        assert row.is_flagged
+        alerts = AlertEngine().check_all_alerts(nas)
+        assert 'anomaly_detected' in {a['alert_type'] for a in alerts}
+        NotificationOutbox.query.delete()
+        db.session.commit()
+
+    def test_anomalies_endpoint_serves_stored_flags(self, anomaly_db, client):
+        scorer = AnomalyScorer()
+        scorer.sync()
+        scorer.record_day(_djm(OUTLIER, revenue=30000))
+        anomaly_db.session.commit()
+
+        data = client.get('/api/previsions/anomalies').get_json()
+
+        assert data['success']
+        assert data['anomalies'][0]['date'] == OUTLIER.isoformat()
+        assert data['anomalies'][0]['severity'] == 'critical'
+        day = client.get(f'/api/previsions/anomalies/{OUTLIER.isoformat()}').get_json()
+        assert day['score']['is_flagged']
+
+    def test_anomalies_endpoint_does_not_score(self, anomaly_db, client):
+        from database.models import DailyAnomalyScore, AnomalyStat
+        client.get('/api/previsions/anomalies?days=100000')
+        assert DailyAnomalyScore.query.count() == 0
+        assert AnomalyStat.query.count() == 0
+
+    def test_import_scores_days(self, anomaly_db):
+        from database.models import DailyAnomalyScore
+        from utils.jour_importer import JourImporter
+
+        AnomalyScorer().sync()
+
+        JourImporter.persist_batch([_djm(OUTLIER, revenue=30000), _djm(START, revenue=10000)])
+
+        assert DailyAnomalyScore.query.filter_by(date=OUTLIER).one().is_flagged
+        assert DailyAnomalyScore.query.count() == DAYS + 1
+        assert AnomalyScorer().sync() == 0
+
+
+class TestUpsertDialect:
+
+    def test_follows_bound_database(self, app, monkeypatch):
+        from types import SimpleNamespace
+        from flask_sqlalchemy import SQLAlchemy
+        from sqlalchemy.dialects import postgresql, sqlite
+        from database.models import AnomalyStat, upsert_insert
+
+        def bound(name):
+            monkeypatch.setattr(SQLAlchemy, 'engine',
+                                property(lambda self: SimpleNamespace(dialect=SimpleNamespace(name=name))))
+
+        with app.app_context():
+            assert isinstance(upsert_insert(AnomalyStat), sqlite.Insert)
+            bound('postgresql')
+            stmt = upsert_insert(AnomalyStat).on_conflict_do_nothing(
+                index_elements=['metric', 'scope', 'bucket'])
+            assert 'ON CONFLICT (metric, scope, bucket) DO NOTHING' in str(
+                stmt.compile(dialect=postgresql.dialect()))
+            bound('mysql')
+            with pytest.raises(NotImplementedError):
+                upsert_insert(AnomalyStat)
@@ -0,0 +1,118 @@
+"""Tests for the multi-section batch save (/api/rj/native/save/batch)."""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from database.models import NightAuditSession, SessionChangeSet, SessionEditLog
+
+AUDIT_DATE = date(2026, 2, 10)  # cleaned up by the fresh_db fixture
+URL = '/api/rj/native/save/batch'
+
+
+@pytest.fixture
+def nas(fresh_db):
+    SessionEditLog.query.filter_by(audit_date=AUDIT_DATE).delete()
+    SessionChangeSet.query.filter_by(audit_date=AUDIT_DATE).delete()
+    fresh_db.session.add(NightAuditSession(audit_date=AUDIT_DATE, auditor_name='Test', status='draft'))
+    fresh_db.session.commit()
+    fresh_db.session.expunge_all()
+    yield fresh_db
+    SessionEditLog.query.filter_by(audit_date=AUDIT_DATE).delete()
+    SessionChangeSet.query.filter_by(audit_date=AUDIT_DATE).delete()
+    fresh_db.session.commit()
+
+
+def _batch(client, sections):
+    return client.post(URL, json={'date': AUDIT_DATE.isoformat(), 'sections': sections})
+
+
+def _session():
+    return NightAuditSession.query.filter_by(audit_date=AUDIT_DATE).first()
+
+
+class TestBatchSave:
+
+    def test_sections_applied_and_recomputed_once(self, nas, client):
+        resp = _batch(client, {
+            'recap': {'cash_ls_lecture': 500},
+            'dueback': {'entries': [{'name': 'Marie', 'previous': 0, 'nouveau': 120}]},
+            'depot': {'client6': {'amounts': [300]}},
+            'auditeur': {'auditeur_list': ['Marie']},
+        })
+        body = resp.get_json()
+        assert resp.status_code == 200 and body['success']
+        assert body['sections']['dueback'] == {'success': True, 'entry_count': 1, 'dueback_total': 120.0}
+        assert body['sections']['recap']['recap_balance'] == 80.0   # 500 - 120 dueback - 300 depot
+
+        nas.session.expunge_all()
+        session = _session()
+        assert (session.status, session.recap_balance, session.get_json('auditeur_list')) == ('in_progress', 80.0, ['Marie'])
+
+    def test_one_commit(self, nas, client):
+        commits = []
+
+        def record(conn):
+            commits.append(conn)
+        event.listen(nas.engine, 'commit', record)
+        try:
+            _batch(client, {'internet': {'internet_ls_361': 5}, 'sonifi': {'sonifi_cd_352': 7},
+                            'auditeur': {'auditeur_list': ['A']}})
+        finally:
+            event.remove(nas.engine, 'commit', record)
+        assert len(commits) == 1
+
+    def test_failing_section_rolls_back_everything(self, nas, client):
+        resp = _batch(client, {'internet': {'internet_ls_361': 5},
+                               'dueback': {'entries': [{'name': 'X', 'nouveau': 'abc'}]}})
+        body = resp.get_json()
+        assert resp.status_code == 400
+        assert body['sections']['internet'] == {'success': False, 'error': 'Annulé'}
+        assert 'invalides' in body['sections']['dueback']['error']
+        nas.session.expunge_all()
+        assert (_session().internet_ls_361, _session().status) == (0, 'draft')
+
+    def test_unknown_section_rejected_before_any_write(self, nas, client):
+        resp = _batch(client, {'internet': {'internet_ls_361': 5}, 'nope': {}})
+        assert resp.status_code == 400
+        assert resp.get_json()['sections'] == {'nope': {'success': False, 'error': 'Section inconnue'}}
+
+    def test_correction_logs_one_change_set(self, nas, client):
+        session = _session()
+        session.status = 'correcting'
+        session.correction_count = 1
+        nas.session.commit()
+
+        resp = _batch(client, {'recap': {'cash_ls_lecture': 10, 'cash_pos_lecture': 20},
+                               'jour': {'jour_tabagie': 3}})
+        assert resp.get_json()['edit_logs'] == 3
+        change_set = SessionChangeSet.query.filter_by(audit_date=AUDIT_DATE).one()
+        assert change_set.changes == {
+            'recap': {'cash_ls_lecture': [0.0, 10.0], 'cash_pos_lecture': [0.0, 20.0]},
+            'jour': {'jour_tabagie': [0.0, 3.0]}}
+
+    def test_single_section_endpoint_unchanged(self, nas, client):
+        resp = client.post('/api/rj/native/save/internet',
+                           json={'date': AUDIT_DATE.isoformat(), 'internet_ls_361': 5, 'internet_ls_365': 5})
+        assert resp.get_json() == {'success': True, 'section': 'internet', 'variance': 0.0}
+
+    def test_sd_file_written_only_after_commit(self, nas, client, monkeypatch):
+        from routes.audit.rj_core import SD_FILES
+        from utils.sd_writer import SDWriter
+        writes = []
+        monkeypatch.setattr(SDWriter, 'write_entries',
+                            staticmethod(lambda buf, day, entries: writes.append((day, entries)) or b'written'))
+        monkeypatch.setitem(SD_FILES, 'sd-test', b'original')
+        with client.session_transaction() as sess:
+            sess['user_session_id'] = 'sd-test'
+        sd = {'entries': [{'name': 'Marie', 'amount': 100, 'verified': 100}]}
+
+        resp = _batch(client, {'sd': sd, 'dueback': {'entries': [{'name': 'X', 'nouveau': 'abc'}]}})
+        assert resp.status_code == 400
+        assert (writes, SD_FILES['sd-test']) == ([], b'original')
+
+        resp = _batch(client, {'sd': sd})
+        assert resp.status_code == 200
+        assert [day for day, _ in writes] == [AUDIT_DATE.day]
+        assert SD_FILES['sd-test'] == b'written'
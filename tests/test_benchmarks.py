@@ -0,0 +1,126 @@
+"""Tests for the benchmark inputs (benchmarks/synthetic.py), run comparison (run.py) and load report (load.py)."""
+
+import io
+
+import olefile
+from sqlalchemy import create_engine, func, select
+
+from benchmarks import synthetic
+from benchmarks.load import Recorder, check, diff_lock_metrics, parse_lock_metrics, percentile
+from benchmarks.run import compare, measure
+from database.models import DailyJourMetrics, NightAuditSession, db
+from utils.analytics import JOUR_COLS
+from utils.ole_builder import rebuild_xls_with_vba
+from utils.parsers import ParserFactory
+from utils.rj_filler import RJFiller
+from utils.rj_reader import RJReader
+
+
+def _result(**medians):
+    return {'results': {name: {'median_ms': ms} for name, ms in medians.items()}}
+
+
+class TestSyntheticRJ:
+
+    def test_reader_sees_controle_and_jour(self):
+        reader = RJReader(io.BytesIO(synthetic.rj_workbook(day=15, month=6, year=2025)))
+        controle = reader.read_controle()
+        assert controle['jour'] == 15 and controle['mois'] == 6
+        jour = reader.read_jour_day(15)
+        assert len(jour) == 117
+        assert 20000 <= jour[JOUR_COLS['chambres']] <= 50000
+
+    def test_filler_round_trip_keeps_vba(self):
+        original = synthetic.rj_workbook()
+        filler = RJFiller(io.BytesIO(original))
+        filler.update_controle(vjour=16)
+        rebuilt = rebuild_xls_with_vba(original, filler.save_to_bytes().getvalue())
+
+        ole = olefile.OleFileIO(io.BytesIO(rebuilt))
+        assert ole.exists('_VBA_PROJECT_CUR/VBA/Module1')
+        assert ole.openstream('_VBA_PROJECT_CUR/VBA/Module1').read() == \
+            synthetic.VBA_STREAMS['_VBA_PROJECT_CUR/VBA/Module1']
+        assert RJReader(io.BytesIO(rebuilt)).read_controle()['jour'] == 16
+
+    def test_same_seed_same_workbook(self):
+        assert synthetic.rj_workbook(seed=3) == synthetic.rj_workbook(seed=3)
+
+
+class TestSyntheticInputs:
+
+    def test_every_parser_accepts_its_input(self):
+        inputs = synthetic.parser_inputs()
+        assert set(inputs) == set(ParserFactory.PARSERS)
+        for doc_type, (data, filename) in inputs.items():
+            result = ParserFactory.create(doc_type, data, filename).get_result()
+            assert result['success'], (doc_type, result['errors'])
+            assert result['confidence'] > 0, doc_type
+
+    def test_populate_history(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'bench.db'}")
+        db.metadata.create_all(engine)
+        with engine.begin() as conn:
+            synthetic.populate(conn, years=1)
+        with engine.connect() as conn:
+            days = conn.scalar(select(func.count(DailyJourMetrics.id)))
+            last = conn.scalar(select(func.max(NightAuditSession.audit_date)))
+        engine.dispose()
+        assert days == 365
+        assert str(last) == synthetic.END_DAY.isoformat()
+
+
+class TestCompare:
+
+    def test_statuses(self):
+        base = _result(a=100.0, b=100.0, c=100.0, d=0.2, gone=5.0)
+        current = _result(a=130.0, b=60.0, c=105.0, d=0.5, new=1.0)
+        status = {row['name']: row['status'] for row in compare(base, current, threshold=0.15)}
+        assert status == {'a': 'régression', 'b': 'amélioration', 'c': 'stable',
+                          'd': 'stable', 'gone': 'absent', 'new': 'nouveau'}
+
+    def test_measure_shape(self):
+        stats = measure(lambda: sum(range(100)), repeat=3)
+        assert stats['runs'] == 3
+        assert stats['min_ms'] <= stats['median_ms'] <= stats['max_ms']
+
+
+class TestLoadReport:
+
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        assert (percentile(values, 50), percentile(values, 95), percentile(values, 99)) == (50, 95, 99)
+        assert percentile([7.0], 99) == 7.0 and percentile([], 50) is None
+
+    def test_lock_metrics_diff_joined_by_route(self):
+        body = ('audit_db_write_transactions_total{endpoint="/api/rj/native/save/recap"} 12\n'
+                'audit_db_lock_wait_seconds_total{endpoint="/api/rj/native/save/recap"} 0.750000\n'
+                'audit_db_lock_errors_total{endpoint="/api/rj/native/save/recap"} 1\n'
+                'audit_sql_statements_total{endpoint="/api/rj/native/save/recap"} 99\n')
+        before = {'/api/rj/native/save/recap': {'write_transactions': 2, 'lock_wait_s': 0.25}}
+        locks = diff_lock_metrics(before, parse_lock_metrics(body))
+
+        recorder = Recorder()
+        for ms in (10, 20, 30, 40):
+            recorder.add('/api/rj/native/save/recap', ms)
+        recorder.add('/api/rj/native/save/recap', 900, error='500')
+        route = recorder.summary(10.0, locks)['routes']['/api/rj/native/save/recap']
+
+        assert route['requests'] == 5 and route['error_rate'] == 0.2
+        assert route['p50_ms'] == 30 and route['p99_ms'] == 900
+        assert route['write_transactions'] == 10
+        assert route['lock_wait_ms_total'] == 500.0 and route['lock_wait_ms_mean'] == 50.0
+        assert route['lock_errors'] == 1
+
+    def test_dashboard_must_not_fail(self):
+        recorder = Recorder()
+        recorder.add('/api/crm/dashboard', 12)
+        assert check(recorder.summary(1.0)) == []
+        recorder.add('/api/crm/dashboard', 40, error='500')
+        assert check(recorder.summary(1.0)) == ['/api/crm/dashboard: 1 erreur(s) sur 2 (500×1)']
+        assert check(Recorder().summary(1.0)) == ['/api/crm/dashboard: aucune requête']
+
+    def test_shift_payloads_cover_sections(self):
+        sections = [name for name, _ in synthetic.shift_payloads(synthetic.END_DAY)]
+        assert sections[0] == 'controle' and {'recap', 'transelect', 'geac', 'jour'} <= set(sections)
+        assert all(body['date'] == synthetic.END_DAY.isoformat()
+                   for _, body in synthetic.shift_payloads(synthetic.END_DAY))
@@ -0,0 +1,118 @@
+"""Tests for the single-pass budget variance engine (utils/budget_variance.py)."""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from database.models import DailyJourMetrics, MonthlyBudget
+from utils import budget_variance
+from utils.budget_analyzer import BudgetAnalyzer
+
+YEAR = 1998  # far outside real data, removed by the fixture
+
+
+@pytest.fixture
+def budget_db(app):
+    from database.models import db
+    with app.app_context():
+        def clean():
+            MonthlyBudget.query.filter(MonthlyBudget.year.in_([YEAR, YEAR + 1])).delete()
+            DailyJourMetrics.query.filter(DailyJourMetrics.year.in_([YEAR, YEAR + 1])).delete()
+            db.session.commit()
+        clean()
+        for month in (1, 2, 3):
+            db.session.add(MonthlyBudget(year=YEAR, month=month, rooms_target=3000, adr_target=150,
+                                         room_revenue=450000, piazza=20000 * month, banquet=0,
+                                         total_revenue=500000, labor_reception=1000, labor_cuisine=500))
+        for month, days in ((1, 31), (2, 10), (4, 5)):
+            for day in range(1, days + 1):
+                db.session.add(DailyJourMetrics(
+                    date=date(YEAR, month, day), year=YEAR, month=month, day_of_month=day,
+                    total_rooms_sold=100, room_revenue=16000, piazza_total=700 + day, banquet_total=50,
+                    total_revenue=17000, occupancy_rate=40 + day % 3, rooms_available=250))
+        db.session.commit()
+        yield db
+        clean()
+
+
+def _per_month_reference(year):
+    """The former get_ytd_summary: one BudgetAnalyzer per month."""
+    rows = []
+    for m in range(1, 13):
+        report = BudgetAnalyzer(year, m).get_variance_report()
+        if report['has_budget'] and report['has_actuals']:
+            rows.append((m, report['variance_items']))
+    return rows
+
+
+class TestVarianceFrame:
+
+    def test_ytd_matches_per_month_reports(self, budget_db):
+        frame = budget_variance.ytd(YEAR)
+        reference = _per_month_reference(YEAR)
+        assert [p[1] for p in frame.complete] == [m for m, _ in reference] == [1, 2]
+
+        for month, items in reference:
+            assert frame.line_items([(YEAR, month)]) == items
+
+        summary = frame.summary()
+        assert [m['actual'] for m in summary['monthly']] == [527000.0, 170000.0]
+        assert (summary['ytd_budget'], summary['ytd_variance']) == (1000000.0, -303000.0)
+
+    def test_two_queries_for_a_year(self, budget_db):
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+        event.listen(budget_db.engine, 'before_cursor_execute', count)
+        try:
+            budget_variance.ytd(YEAR).summary()
+        finally:
+            event.remove(budget_db.engine, 'before_cursor_execute', count)
+        assert len(statements) == 2
+
+    def test_ytd_line_items_weight_adr(self, budget_db):
+        items = {i['category']: i for i in budget_variance.ytd(YEAR).line_items()}
+        assert items['Tarif Moyen (ADR)']['actual'] == 160.0
+        assert items['Chambres Vendues'] == {'category': 'Chambres Vendues', 'budget': 6000.0, 'actual': 4100.0,
+                                             'variance': -1900.0, 'variance_pct': -31.67, 'favorable': False}
+        assert 'Banquet' in items and 'Giotto' not in items
+        assert items['Banquet']['variance_pct'] == 100.0   # no budget, actual > 0
+
+    def test_pure_python_fallback_matches_numpy(self, budget_db, monkeypatch):
+        with_numpy = budget_variance.ytd(YEAR).summary()
+        monkeypatch.setattr(budget_variance, 'HAS_NUMPY', False)
+        assert budget_variance.ytd(YEAR).summary() == with_numpy
+
+    def test_rolling12_crosses_years(self, budget_db):
+        frame = budget_variance.rolling12(YEAR + 1, 2)
+        assert frame.periods[0] == (YEAR, 3) and frame.periods[-1] == (YEAR + 1, 2)
+        assert [r['month'] for r in frame.monthly(complete_only=False)] == [3, 4]
+
+    def test_budget_targets(self, budget_db):
+        targets = budget_variance.VarianceFrame(date(YEAR, 2, 1), date(YEAR, 2, 10)).budget_targets(YEAR, 2)
+        assert targets['days_in_month'] == 28
+        assert targets['fb_revenue_budget'] == 40000.0 and targets['labor_cost_budget'] == 1500.0
+        assert targets['occupancy_budget'] == round(3000 / (250 * 28) * 100, 2)
+        assert budget_variance.ytd(YEAR).budget_targets(YEAR, 5) == {}
+
+
+class TestBudgetEndpoints:
+
+    def test_ytd_and_rolling(self, budget_db, client):
+        with client.session_transaction() as sess:
+            sess['user_role_type'] = 'gm'
+        ytd = client.get(f'/budget/api/budget/ytd/{YEAR}').get_json()
+        assert ytd['ytd_actual'] == 697000.0 and len(ytd['line_items']) == 6
+        rolling = client.get(f'/budget/api/budget/rolling/{YEAR}/3').get_json()
+        assert rolling['start'] == f'{YEAR - 1}-04-01' and rolling['ytd_budget'] == 1000000.0
+        assert client.get(f'/budget/api/budget/rolling/{YEAR}/13').status_code == 400
+
+    def test_crm_pnl_budget_variance(self, budget_db, client):
+        body = client.get(f'/api/crm/tabs/pnl-budget?start_date={YEAR}-01-01&end_date={YEAR}-04-30').get_json()
+        months = {(r['month']): r for r in body['budget_variance_monthly']}
+        assert sorted(months) == [1, 2, 3, 4]
+        assert months[3] == {'year': YEAR, 'month': 3, 'revenue_actual': 0.0, 'revenue_budget': 500000.0,
+                             'variance': -500000.0, 'variance_pct': -100.0}
+        assert body['annual_pnl'][0]['total_revenue'] == 782000.0
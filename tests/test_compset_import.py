@@ -0,0 +1,114 @@
+"""Tests for the chunked STR / OTB CSV import (utils/compset_import.py)."""
+
+import io
+import time
+from datetime import date
+
+import pytest
+
+from database.models import CompsetImportJob, OTBForecast, OTBPace, STRCompSet
+from utils.compset_import import import_csv
+
+STR_HEADER = 'report_date,period_type,my_occ,my_adr,my_revpar,comp_occ,comp_adr,comp_revpar,occ_rank\n'
+OTB_HEADER = 'snapshot_date,target_date,rooms_otb,occ_otb,adr_otb,revenue_otb,ly_rooms\n'
+SNAPSHOT = date(1999, 1, 1)  # far outside real data, removed by the fixture
+
+
+@pytest.fixture
+def compset_db(app):
+    from database.models import db
+    with app.app_context():
+        def clean():
+            STRCompSet.query.filter(STRCompSet.report_date < date(2000, 1, 1)).delete()
+            OTBForecast.query.filter(OTBForecast.snapshot_date == SNAPSHOT).delete()
+            OTBPace.query.filter(OTBPace.target_date < date(2001, 1, 1)).delete()
+            db.session.commit()
+        clean()
+        yield db
+        clean()
+
+
+def _str_csv(rows):
+    return io.StringIO(STR_HEADER + ''.join(rows))
+
+
+class TestImportCSV:
+
+    def test_chunks_insert_then_update(self, compset_db):
+        rows = [f'1999-01-{d:02d},daily,80,150,120,75,140,105,2\n' for d in range(1, 8)]
+        first = import_csv('str', _str_csv(rows), chunk_size=3)
+        assert (first['inserted'], first['updated'], first['error_count']) == (7, 0, 0)
+
+        again = import_csv('str', _str_csv(rows[:2] + ['1999-01-03,wtd,1,1,1,1,1,1,0\n']), chunk_size=3)
+        assert (again['inserted'], again['updated']) == (1, 2)
+        assert STRCompSet.query.filter(STRCompSet.report_date < date(2000, 1, 1)).count() == 8
+
+    def test_bad_rows_reported_import_continues(self, compset_db):
+        rows = ['1999-01-01,daily,80,150,120,75,140,105,2\n',
+                'pas-une-date,daily,1,1,1,1,1,1,1\n',
+                '1999-01-02,daily,abc,150,120,75,140,105,2\n',
+                '1999-01-03,daily,81,150,120,75,140,105,0\n']
+        result = import_csv('str', _str_csv(rows), chunk_size=2)
+        assert (result['imported'], result['error_count'], result['total_rows']) == (2, 2, 4)
+        assert result['errors'][0].startswith('Ligne 3:') and result['errors'][1].startswith('Ligne 4:')
+        row = STRCompSet.query.filter_by(report_date=date(1999, 1, 3)).one()
+        assert row.occ_rank is None and row.source == 'import'
+
+    def test_last_duplicate_in_file_wins(self, compset_db):
+        csv_text = io.StringIO(OTB_HEADER +
+                               '1999-01-01,1999-02-01,100,40,150,15000,0\n'
+                               '1999-01-01,1999-02-01,120,48,150,18000,90\n')
+        result = import_csv('otb', csv_text)
+        assert (result['imported'], result['inserted']) == (2, 1)
+        row = OTBForecast.query.filter_by(snapshot_date=SNAPSHOT).one()
+        assert (row.rooms_otb, row.ly_rooms) == (120, 90)
+
+    def test_otb_upsert_on_unique_key(self, compset_db):
+        rows = [f'1999-01-01,1999-02-{d:02d},100,40,150,15000,0\n' for d in range(1, 6)]
+        first = import_csv('otb', io.StringIO(OTB_HEADER + ''.join(rows)), chunk_size=2)
+        created = {r.target_date: r.created_at for r in OTBForecast.query.filter_by(snapshot_date=SNAPSHOT)}
+
+        again = import_csv('otb', io.StringIO(OTB_HEADER + rows[0].replace(',100,', ',130,') +
+                                              '1999-01-01,1999-02-06,10,4,150,1500,0\n'))
+        assert (first['inserted'], first['updated']) == (5, 0)
+        assert (again['inserted'], again['updated']) == (1, 1)
+        row = OTBForecast.query.filter_by(snapshot_date=SNAPSHOT, target_date=date(1999, 2, 1)).one()
+        assert row.rooms_otb == 130 and row.created_at == created[row.target_date]
+        assert OTBForecast.query.filter_by(snapshot_date=SNAPSHOT).count() == 6
+
+
+class TestImportEndpoints:
+
+    def _post(self, client, kind, text, query=''):
+        return client.post(f'/compset/api/{kind}/import{query}',
+                           data={'file': (io.BytesIO(text.encode()), f'{kind}.csv')},
+                           content_type='multipart/form-data')
+
+    def test_inline_import(self, compset_db, client):
+        resp = self._post(client, 'otb', OTB_HEADER + '1999-01-01,1999-02-02,100,40,150,15000,0\n')
+        body = resp.get_json()
+        assert resp.status_code == 200
+        assert (body['imported'], body['inserted'], body['errors']) == (1, 1, [])
+        pace = OTBPace.query.filter_by(target_date=date(1999, 2, 2)).one()
+        assert (pace.days_before, pace.rooms_otb) == (32, 100)
+
+    def test_background_job(self, compset_db, client):
+        rows = ''.join(f'1999-01-01,1999-03-{d:02d},100,40,150,15000,0\n' for d in range(1, 29))
+        resp = self._post(client, 'otb', OTB_HEADER + rows + '1999-01-01,x,1,1,1,1,1\n', '?background=1')
+        assert resp.status_code == 202
+        job_id = resp.get_json()['job']['id']
+
+        for _ in range(100):
+            job = client.get(f'/compset/api/import/{job_id}').get_json()
+            if job['status'] not in ('queued', 'running'):
+                break
+            time.sleep(0.05)
+        assert job['status'] == 'completed_with_errors'
+        assert (job['inserted'], job['error_count'], job['total_rows']) == (28, 1, 29)
+        compset_db.session.delete(compset_db.session.get(CompsetImportJob, job_id))
+        compset_db.session.commit()
+
+    def test_rejects_non_csv(self, client):
+        resp = client.post('/compset/api/str/import',
+                           data={'file': (io.BytesIO(b'x'), 'str.txt')}, content_type='multipart/form-data')
+        assert resp.status_code == 400
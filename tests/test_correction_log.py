@@ -0,0 +1,145 @@
+"""Tests for the compressed correction change-sets and the version history API (rj_correction.py)."""
+
+from datetime import date, datetime
+
+import pytest
+
+from database.models import NightAuditSession, SessionChangeSet, SessionEditLog
+
+AUDIT_DATE = date(1999, 4, 10)  # far outside real data, removed by the fixture
+HISTORY = f'/api/rj/correction/history/{AUDIT_DATE.isoformat()}'
+
+
+@pytest.fixture
+def locked(app, client):
+    from database.models import db
+
+    def clean():
+        for model in (SessionChangeSet, SessionEditLog, NightAuditSession):
+            model.query.filter_by(audit_date=AUDIT_DATE).delete()
+        db.session.commit()
+    clean()
+    db.session.add(NightAuditSession(audit_date=AUDIT_DATE, auditor_name='Test', status='locked',
+                                     cash_ls_lecture=5.0, recap_balance=12.5))
+    db.session.commit()
+    yield db
+    clean()
+
+
+def _unlock(client):
+    return client.post(f'/api/rj/correction/unlock/{AUDIT_DATE.isoformat()}', json={'reason': 'Erreur caisse'})
+
+
+def _save_recap(client, **fields):
+    return client.post('/api/rj/native/save/recap', json={'date': AUDIT_DATE.isoformat(), **fields})
+
+
+def _versions(client):
+    return client.get(f'{HISTORY}/versions?changes=1').get_json()['versions']
+
+
+class TestChangeSets:
+
+    def test_one_row_per_save(self, locked, client):
+        _unlock(client)
+        _save_recap(client, cash_ls_lecture=10, cash_pos_lecture=20, cheque_ar_lecture=0)
+        versions = _versions(client)
+        assert [v['kind'] for v in versions] == ['snapshot', 'unlock', 'save']
+
+        save = versions[-1]
+        assert (save['correction_round'], save['field_count'], save['sections']) == (1, 2, ['recap'])
+        assert save['changes'] == {'recap': {'cash_ls_lecture': [5.0, 10.0], 'cash_pos_lecture': [0.0, 20.0]}}
+        assert versions[1]['changes'] == {'system': {'status': ['locked', 'correcting']}}
+
+    def test_payload_compressed(self, locked):
+        change_set = SessionChangeSet(audit_date=AUDIT_DATE)
+        for i in range(50):
+            change_set.add('jour', f'field_{i}', 0.0, float(i))
+        locked.session.add(change_set)
+        locked.session.commit()
+        locked.session.expire_all()
+
+        loaded = SessionChangeSet.query.filter_by(audit_date=AUDIT_DATE).one()
+        assert loaded.field_count == 50
+        assert len(loaded.payload) < len(str(loaded.changes))
+        assert loaded.changes['jour']['field_49'] == [0.0, 49.0]
+
+    def test_uncollected_fields_share_one_change_set(self, locked, app):
+        from routes.audit.rj_correction import log_field_changes
+        nas = NightAuditSession.query.filter_by(audit_date=AUDIT_DATE).one()
+        nas.status = 'correcting'
+        with app.test_request_context():
+            log_field_changes(nas, 'recap', {'cash_ls_lecture': 10.0, 'recap_balance': 1.0},
+                              ['cash_ls_lecture', 'recap_balance'])
+            log_field_changes(nas, 'jour', {'jour_tabagie': 3.0}, ['jour_tabagie'])
+            locked.session.commit()
+
+        change_set = SessionChangeSet.query.filter_by(audit_date=AUDIT_DATE).one()
+        assert change_set.field_count == 3
+        assert set(change_set.changes) == {'recap', 'jour'}
+
+    def test_same_field_twice_keeps_first_old(self):
+        change_set = SessionChangeSet(audit_date=AUDIT_DATE)
+        change_set.add('recap', 'cash_ls_lecture', 1.0, 2.0)
+        change_set.add('recap', 'cash_ls_lecture', 2.0, 3.0)
+        assert (change_set.changes, change_set.field_count) == ({'recap': {'cash_ls_lecture': [1.0, 3.0]}}, 1)
+
+
+class TestHistory:
+
+    def test_rows_keep_legacy_shape(self, locked, client):
+        locked.session.add(SessionEditLog(audit_date=AUDIT_DATE, section='recap', field_name='deposit_cdn',
+                                          old_value='1', new_value='2', edited_at=datetime(1999, 4, 11)))
+        locked.session.commit()
+        _unlock(client)
+        _save_recap(client, cash_ls_lecture=10.456)
+
+        history = client.get(HISTORY).get_json()['history']
+        fields = [(h['section'], h['field_name']) for h in history]
+        assert fields[0] == ('recap', 'cash_ls_lecture') and fields[-1] == ('recap', 'deposit_cdn')
+        assert ('system', 'status') in fields and ('snapshot', 'recap_balance') in fields
+        assert len({h['id'] for h in history}) == len(history)
+        assert all(isinstance(h['id'], str) for h in history)
+        assert history[-1]['id'].startswith('log:')
+
+        edit = history[0]
+        assert (edit['old_value'], edit['new_value'], edit['correction_round']) == ('5.0', '10.46', 1)
+        snapshot = next(h for h in history if h['field_name'] == 'recap_balance')
+        assert (snapshot['old_value'], snapshot['new_value'], snapshot['note']) == \
+            ('12.5', None, 'Valeur avant correction')
+
+
+class TestVersions:
+
+    def test_rebuild_each_version(self, locked, client):
+        _unlock(client)
+        _save_recap(client, cash_ls_lecture=10)
+        _save_recap(client, cash_ls_lecture=15, deposit_cdn=7)
+        client.post(f'/api/rj/correction/relock/{AUDIT_DATE.isoformat()}', json={})
+        ids = [v['id'] for v in _versions(client)]
+
+        first_save = client.get(f'{HISTORY}/version/{ids[2]}').get_json()
+        assert first_save['undone'] == 2
+        assert (first_save['session']['cash_ls_lecture'], first_save['session']['deposit_cdn'],
+                first_save['session']['status']) == (10.0, 0.0, 'correcting')
+        assert first_save['changed_fields'] == ['cash_ls_lecture', 'deposit_cdn', 'status']
+
+        original = client.get(f'{HISTORY}/version/0').get_json()['session']
+        assert (original['cash_ls_lecture'], original['status']) == (5.0, 'locked')
+        assert client.get(f'{HISTORY}/round/0').get_json()['session'] == original
+
+        latest = client.get(f'{HISTORY}/version/{ids[-1]}').get_json()
+        assert (latest['undone'], latest['changed_fields']) == (0, [])
+
+    def test_json_field_restored(self, locked, client):
+        _unlock(client)
+        client.post('/api/rj/native/save/transelect',
+                    json={'date': AUDIT_DATE.isoformat(), 'restaurant': {'VISA': {'t1': 100.0}}})
+        assert _versions(client)[-1]['changes']['transelect']['transelect_restaurant'] == \
+            [{}, {'VISA': {'t1': 100.0}}]
+        before = client.get(f'{HISTORY}/round/0').get_json()['session']
+        assert before['transelect_restaurant'] == {}
+
+    def test_unknown_session(self, client):
+        assert client.get('/api/rj/correction/history/1999-04-11/version/0').status_code == 404
+        assert client.get('/api/rj/correction/history/bad/round/0').status_code == 400
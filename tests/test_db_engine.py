@@ -0,0 +1,97 @@
+"""Tests for the database engine layer (database/engine.py)."""
+
+from datetime import date
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from database.engine import engine_options, get_db_layer, sqlite_settings
+
+DAY = date(2047, 3, 1)
+
+
+@pytest.fixture
+def layer(app):
+    from database.models import db, DailyJourMetrics
+    with app.app_context():
+        DailyJourMetrics.query.filter_by(date=DAY).delete()
+        db.session.commit()
+        yield get_db_layer()
+        DailyJourMetrics.query.filter_by(date=DAY).delete()
+        db.session.commit()
+
+
+def _djm(revenue=1000):
+    from database.models import DailyJourMetrics
+    return DailyJourMetrics(date=DAY, year=DAY.year, month=DAY.month, day_of_month=DAY.day,
+                            total_revenue=revenue, source='test')
+
+
+class TestConfiguration:
+
+    def test_sqlite_connections_tuned(self, layer):
+        info = layer.info()
+        assert info['journal_mode'] == 'wal'
+        assert info['busy_timeout'] == 15000
+        assert info['synchronous'] == 1  # NORMAL
+
+    def test_options_from_config(self):
+        opts = engine_options({'DB_POOL_SIZE': 9, 'SQLITE_BUSY_TIMEOUT_MS': 2000}, 'sqlite:////tmp/x.db')
+        assert opts['pool_size'] == 9
+        assert opts['connect_args']['timeout'] == 2
+        assert 'connect_args' not in engine_options({}, 'postgresql://u@h/audit')
+        assert engine_options({}, 'sqlite://') == {}
+        with pytest.raises(ValueError):
+            sqlite_settings({'SQLITE_SYNCHRONOUS': 'SOMETIMES'})
+
+
+class TestSessions:
+
+    def test_write_session_commits_or_rolls_back(self, layer):
+        from database.models import DailyJourMetrics
+        with pytest.raises(RuntimeError):
+            with layer.write_session() as s:
+                s.add(_djm())
+                raise RuntimeError('échec')
+        assert DailyJourMetrics.query.filter_by(date=DAY).count() == 0
+
+        with layer.write_session() as s:
+            s.add(_djm())
+        assert layer.stats['writes'] >= 1
+        with layer.read_session() as s:
+            assert s.query(DailyJourMetrics).filter_by(date=DAY).one().total_revenue == 1000
+
+    def test_on_commit_runs_after_commit_only(self, layer):
+        ran = []
+        with pytest.raises(RuntimeError):
+            with layer.write_session():
+                layer.on_commit(lambda: ran.append('rolled back'))
+                raise RuntimeError('échec')
+        with layer.write_session():
+            layer.on_commit(lambda: ran.append('committed'))
+            assert ran == []
+        layer.on_commit(lambda: ran.append('no transaction'))
+        assert ran == ['committed', 'no transaction']
+
+    def test_read_session_is_read_only(self, layer):
+        from database.models import DailyJourMetrics
+        with pytest.raises(OperationalError, match='readonly'):
+            with layer.read_session() as s:
+                s.add(_djm())
+                s.flush()
+        assert DailyJourMetrics.query.filter_by(date=DAY).count() == 0
+
+    def test_section_save_goes_through_write_session(self, layer, client):
+        from database.models import db, NightAuditSession
+        NightAuditSession.query.filter_by(audit_date=DAY).delete()
+        db.session.add(NightAuditSession(audit_date=DAY, auditor_name='Test', status='draft'))
+        db.session.commit()
+        try:
+            writes = layer.stats['writes']
+            resp = client.post('/api/rj/native/save/recap',
+                               json={'date': DAY.isoformat(), 'cash_ls_lecture': 4})
+            assert resp.status_code == 200
+            assert layer.stats['writes'] == writes + 1
+        finally:
+            NightAuditSession.query.filter_by(audit_date=DAY).delete()
+            db.session.commit()
@@ -0,0 +1,102 @@
+"""Tests for the documentation text cache and search index (utils/doc_index.py)."""
+
+import os
+
+import pytest
+
+import utils.doc_index as doc_index
+from utils.doc_index import DocIndex, fts_query
+
+
+def _pdf(path, pages):
+    from reportlab.pdfgen import canvas
+    c = canvas.Canvas(str(path))
+    for text in pages:
+        c.drawString(72, 720, text)
+        c.showPage()
+    c.save()
+
+
+@pytest.fixture
+def docs(tmp_path):
+    base = tmp_path / 'documentation'
+    (base / 'front').mkdir(parents=True)
+    (base / 'back').mkdir()
+    (base / 'front' / 'procedure.md').write_text(
+        "# Procédure de nuit\n\nPoster les no-show dans le folio.\n\n"
+        "Imprimer le rapport <RESDO> avant 3h.", encoding='utf-8')
+    (base / 'back' / 'notes.txt').write_text("Réconciliation Quasimodo des cartes.", encoding='utf-8')
+    pytest.importorskip('reportlab')
+    _pdf(base / 'back' / 'guide.pdf', ['Introduction', 'Lancer le PART apres la fermeture Moneris'])
+    return DocIndex(docs_base=base, index_path=str(tmp_path / 'index.db'))
+
+
+class TestIndexing:
+
+    def test_refresh_extracts_once(self, docs):
+        first = docs.refresh()
+        assert first['indexed'] == 3
+        second = docs.refresh()
+        assert (second['indexed'], second['unchanged']) == (0, 3)
+        assert docs.info()['pages'] == 4  # 2 PDF pages + one chunk per text file
+
+    def test_touched_identical_file_is_not_reextracted(self, docs, monkeypatch):
+        docs.refresh()
+        path = docs.docs_base / 'front' / 'procedure.md'
+        st = path.stat()
+        os.utime(path, (st.st_atime, st.st_mtime + 10))
+        calls = []
+        monkeypatch.setattr(doc_index, 'extract_pages',
+                            lambda p: calls.append(p) or ['x'])
+        assert docs.refresh()['indexed'] == 0
+        assert calls == []
+
+    def test_changed_and_deleted_files(self, docs):
+        docs.refresh()
+        (docs.docs_base / 'back' / 'notes.txt').write_text("Dépôt Transelect", encoding='utf-8')
+        (docs.docs_base / 'back' / 'guide.pdf').unlink()
+        stats = docs.refresh()
+        assert stats['indexed'] == 1 and stats['removed'] == 1
+        assert docs.search('quasimodo') == []
+        assert docs.search('transelect')[0]['path'] == 'back/notes.txt'
+
+    def test_get_pages_serves_cache(self, docs, monkeypatch):
+        path = docs.docs_base / 'back' / 'guide.pdf'
+        assert 'PART' in docs.get_pages(path)[1]
+        monkeypatch.setattr(doc_index, 'extract_pages', lambda p: pytest.fail('re-extracted'))
+        assert len(docs.get_pages(path)) == 2
+
+
+class TestSearch:
+
+    def test_page_level_hit(self, docs):
+        hits = docs.search('part moneris')
+        assert [(h['path'], h['page']) for h in hits] == [('back/guide.pdf', 2)]
+        assert '<mark>PART</mark>' in hits[0]['snippet']
+
+    def test_accents_folded_and_snippet_escaped(self, docs):
+        hits = docs.search('procedure resdo')
+        assert hits[0]['path'] == 'front/procedure.md'
+        assert '&lt;<mark>RESDO</mark>&gt;' in hits[0]['snippet']
+
+    def test_directory_filter(self, docs):
+        assert docs.search('folio', path_prefix='back') == []
+        assert len(docs.search('folio', path_prefix='front')) == 1
+
+    def test_query_syntax_is_neutralised(self):
+        assert fts_query('no-show "OR" *') == '"no" "show" "OR"'
+        assert fts_query('quasi') == '"quasi"*'
+        assert fts_query('***') == ''
+
+
+class TestSearchEndpoint:
+
+    def test_search_returns_links_to_pages(self, app, client, docs):
+        app.extensions['doc_index'] = docs
+        data = client.get('/documentation/search?q=moneris').get_json()
+        assert data['success']
+        assert data['results'][0]['url'].endswith('/documentation/view/back/guide.pdf?page=2')
+
+    def test_short_query_rejected(self, app, client, docs):
+        app.extensions['doc_index'] = docs
+        assert client.get('/documentation/search?q=a').status_code == 400
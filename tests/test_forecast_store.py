@@ -0,0 +1,126 @@
+"""Tests for the persisted demand forecast model (utils/forecast_store.py)."""
+
+import math
+import random
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from utils.forecast_store import (
+    ForecastStore, SeasonalDowModel, InsufficientData, rolling_origin_backtest,
+)
+
+np = pytest.importorskip('numpy')
+
+START = date(2040, 1, 1)
+DAYS = 730
+DOW_OCC = [-8, -6, -4, 0, 6, 10, 2]  # Mon..Sun
+
+
+def _synthetic(days=DAYS, start=START, noise=1.0, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(days):
+        d = start + timedelta(days=i)
+        season = 12 * math.sin(2 * math.pi * d.timetuple().tm_yday / 365.25)
+        occ = 70 + season + DOW_OCC[d.weekday()] + rng.gauss(0, noise)
+        adr = 150 + 0.8 * season + rng.gauss(0, noise)
+        revpar = adr * occ / 100
+        rows.append((d, {'occupancy_pct': occ, 'adr': adr, 'revpar': revpar,
+                         'total_revenue': revpar * 252 * 1.4}))
+    return rows
+
+
+class TestSeasonalDowModel:
+
+    def test_recovers_seasonal_and_weekday_pattern(self):
+        model = SeasonalDowModel.fit(_synthetic())
+        # Friday vs Monday of the same week, just after training
+        monday, friday = date(2041, 12, 30), date(2042, 1, 3)
+        assert monday.weekday() == 0 and friday.weekday() == 4
+        gap = (model.predict_day(friday)['occupancy_pct'][0]
+               - model.predict_day(monday)['occupancy_pct'][0])
+        assert gap == pytest.approx(DOW_OCC[4] - DOW_OCC[0], abs=1.5)
+
+    def test_bands_bracket_prediction(self):
+        model = SeasonalDowModel.fit(_synthetic())
+        value, low, high = model.predict_day(date(2042, 3, 1))['revpar']
+        assert low < value < high
+
+    def test_requires_minimum_history(self):
+        with pytest.raises(InsufficientData):
+            SeasonalDowModel.fit(_synthetic(days=20))
+
+    def test_backtest_reports_accuracy_and_fit_time(self):
+        result = rolling_origin_backtest(_synthetic(), folds=3)
+        assert result['folds'] == 3
+        assert result['fit_seconds_avg'] < 0.5
+        assert result['mape']['occupancy_pct']['30'] < 5
+        assert result['mape']['adr']['90'] < 5
+
+
+@pytest.fixture
+def forecast_db(app):
+    from database.models import db, DailyJourMetrics, ForecastModel
+
+    def cleanup():
+        DailyJourMetrics.query.filter(DailyJourMetrics.date >= START).delete()
+        ForecastModel.query.delete()
+        db.session.commit()
+
+    with app.app_context():
+        cleanup()
+        for d, v in _synthetic(days=400):
+            db.session.add(DailyJourMetrics(
+                date=d, year=d.year, month=d.month, day_of_month=d.day,
+                occupancy_rate=v['occupancy_pct'], adr=v['adr'], revpar=v['revpar'],
+                total_revenue=v['total_revenue'], total_rooms_sold=150, source='test'))
+        db.session.commit()
+        store = ForecastStore(app)
+        store.refit_enabled = False
+        yield store
+        cleanup()
+
+
+class TestForecastStore:
+
+    def test_fit_once_per_data_version(self, forecast_db):
+        first = forecast_db.fit()
+        second = forecast_db.fit()
+        assert first.id == second.id
+        assert first.n_days == 400
+        assert first.get_backtest()['folds'] > 0
+
+    def test_serves_projection_from_memory(self, forecast_db):
+        start = date(2041, 2, 5)
+        result = forecast_db.forecast(start)
+        assert len(result['daily']) == 90
+        assert result['daily'][0]['date'] == '2041-02-05'
+        assert set(result['forecast_30']) >= {'occupancy_pct', 'adr', 'revpar', 'confidence'}
+        assert 0 <= result['forecast_90']['confidence'] <= 1
+
+        t0 = time.perf_counter()
+        for _ in range(1000):
+            assert forecast_db.forecast(start) is result
+        assert (time.perf_counter() - t0) / 1000 < 0.001
+
+    def test_new_metrics_trigger_refit(self, app, forecast_db):
+        from database.models import db, DailyJourMetrics
+        first = forecast_db.fit()
+        forecast_db.forecast()
+
+        row = DailyJourMetrics.query.filter_by(date=START + timedelta(days=399)).first()
+        row.adr = row.adr + 5
+        db.session.commit()
+
+        forecast_db.forecast()
+        assert forecast_db._active[0] != first.id
+
+    def test_forecast_endpoint(self, app, client, forecast_db):
+        app.extensions['forecast_store'] = forecast_db
+        resp = client.get('/api/previsions/forecast')
+        data = resp.get_json()
+        assert resp.status_code == 200
+        assert data['forecast_30']['revpar'] > 0
+        assert data['model']['n_days'] == 400
@@ -0,0 +1,63 @@
+"""Tests for deferred heavy imports (utils/lazy_import.py) and manifest blueprint registration."""
+
+import os
+import subprocess
+import sys
+
+from routes.manifest import BLUEPRINTS
+from utils import lazy_import
+from utils.lazy_import import has_module, lazy_attrs, lazy_module
+
+HEAVY = ('numpy', 'sklearn', 'scipy', 'matplotlib', 'openpyxl', 'docx', 'pdfplumber')
+
+
+class TestProxies:
+
+    def test_module_imported_on_first_attribute(self):
+        calls = []
+        mod = lazy_module('json.decoder', on_load=lambda: calls.append(1))
+        assert 'not loaded' in repr(mod)
+        assert mod.JSONDecodeError.__name__ == 'JSONDecodeError'
+        assert calls == [1]
+        assert 'json.decoder' in lazy_import.registered()
+
+    def test_attrs_callable_like_the_real_objects(self):
+        dumps, JSONDecoder = lazy_attrs('json', 'dumps', 'JSONDecoder')
+        assert dumps({'a': 1}) == '{"a": 1}'
+        assert JSONDecoder().decode('[1]') == [1]
+        assert dumps.__name__ == 'dumps'
+
+    def test_has_module_does_not_import(self):
+        assert has_module('json')
+        assert not has_module('no_such_package_xyz')
+
+
+class TestStartup:
+
+    def test_create_app_leaves_heavy_libraries_unloaded(self):
+        probe = ("import sys; from main import create_app; create_app(); "
+                 f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))")
+        env = dict(os.environ, STARTUP_PRELOAD_HEAVY='false', OUTBOX_DISPATCHER_ENABLED='false',
+                   AUDIT_PIN=os.environ.get('AUDIT_PIN', '9337'))
+        out = subprocess.run([sys.executable, '-c', probe], env=env, capture_output=True,
+                             text=True, check=True).stdout
+        assert out.strip().splitlines()[-1:] in ([], [''])
+
+    def test_every_manifest_blueprint_registered(self, app):
+        assert len(app.blueprints) >= len(BLUEPRINTS)
+        assert {'auth', 'rj_native', 'rj_export', 'forecasting'} <= set(app.blueprints)
+
+
+class TestPostImportHook:
+
+    def test_callback_runs_after_import(self, tmp_path, monkeypatch):
+        from utils.lazy_import import when_imported
+        (tmp_path / 'hooked_mod_xyz.py').write_text('VALUE = 1\n')
+        monkeypatch.syspath_prepend(str(tmp_path))
+        seen = []
+        when_imported('hooked_mod_xyz', lambda m: seen.append(m.VALUE))
+        assert seen == []
+        import hooked_mod_xyz  # noqa: F401
+        assert seen == [1]
+        when_imported('hooked_mod_xyz', lambda m: seen.append('again'))
+        assert seen == [1, 'again']
@@ -0,0 +1,298 @@
+"""Tests for the pooled Lightspeed client, concurrent sync and backfill (local stub server)."""
+
+import json
+import threading
+import time
+from collections import Counter
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from utils.lightspeed_backfill import LightspeedBackfill, create_job
+from utils.lightspeed_client import LightspeedClient, LightspeedAPIError, RateLimiter
+from utils.lightspeed_sync import LightspeedSync
+
+STUB_DELAY = 0.2  # Simulated PMS round-trip per report
+
+REPORTS = {
+    'daily-revenue': {'roomRevenue': 15000, 'totalRevenue': 23000, 'cafeRevenue': 1000},
+    'room-statistics': {'roomsSold': 180, 'occupancyPercentage': 71.4, 'averageDailyRate': 83.3},
+    'ar-balance': {'totalAR': 26000, 'previousBalance': 100, 'newBalance': 100},
+    'cashier': {'cashCDN': 4500, 'cashUSD': 300, 'creditCards': {'visa': 900}},
+    'card-settlements': {'visa': 900, 'mastercard': 500, 'total': 1400},
+    'market-segments': {'segments': {'transient': {'rooms': 90, 'revenue': 8000}}},
+    'no-shows': {'noShows': [{'name': 'A', 'rate': 120}]},
+}
+
+
+class _PMSStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so pooling is observable
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.stub.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with self.server.lock:
+            self.server.stub.calls['token'] += 1
+        self._json({'access_token': 'tok', 'expires_in': 3600})
+
+    def do_GET(self):
+        report = self.path.split('?')[0].rsplit('/', 1)[-1]
+        with self.server.lock:
+            self.server.stub.calls[report] += 1
+        time.sleep(STUB_DELAY)
+        if report in self.server.stub.fail:
+            self._json({'error': 'boom'}, status=500)
+        else:
+            self._json(REPORTS.get(report, {}))
+
+
+@pytest.fixture
+def pms_stub():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _PMSStubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.stub = SimpleNamespace(calls=Counter(), connections=0, fail=set())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.stub.base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    yield server.stub
+    server.shutdown()
+    server.server_close()
+
+
+def _client(stub, **extra):
+    return LightspeedClient(config={
+        'LIGHTSPEED_CLIENT_ID': 'id', 'LIGHTSPEED_CLIENT_SECRET': 'secret',
+        'LIGHTSPEED_PROPERTY_ID': 'P1', 'LIGHTSPEED_BASE_URL': stub.base_url,
+        'LIGHTSPEED_POOL_SIZE': 8, 'LIGHTSPEED_CACHE_TTL': 60, **extra,
+    })
+
+
+class TestLightspeedClient:
+
+    def test_connections_are_reused(self, pms_stub):
+        client = _client(pms_stub, LIGHTSPEED_CACHE_TTL=0)
+        for _ in range(5):
+            client.get_card_settlements('2026-02-10')
+        assert pms_stub.calls['card-settlements'] == 5
+        assert pms_stub.connections == 1
+
+    def test_identical_requests_are_coalesced(self, pms_stub):
+        client = _client(pms_stub)
+        threads = [threading.Thread(target=client.get_daily_revenue, args=('2026-02-10',))
+                   for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        client.get_daily_revenue('2026-02-10')
+        assert pms_stub.calls['daily-revenue'] == 1
+
+    def test_cache_is_per_date(self, pms_stub):
+        client = _client(pms_stub)
+        client.get_room_statistics('2026-02-09')
+        client.get_room_statistics('2026-02-10')
+        client.clear_cache('2026-02-10')
+        client.get_room_statistics('2026-02-09')
+        client.get_room_statistics('2026-02-10')
+        assert pms_stub.calls['room-statistics'] == 3
+
+    def test_cache_is_bounded(self, pms_stub):
+        client = _client(pms_stub, LIGHTSPEED_CACHE_SIZE=3)
+        for day in range(1, 6):
+            client.get_room_statistics(f'2026-02-0{day}')
+        assert len(client._cache) == 3
+        client.get_room_statistics('2026-02-05')          # still cached
+        client.get_room_statistics('2026-02-01')          # evicted
+        assert pms_stub.calls['room-statistics'] == 6
+
+    def test_expired_entries_pruned_on_insert(self, pms_stub):
+        client = _client(pms_stub, LIGHTSPEED_CACHE_TTL=0.05)
+        client.get_room_statistics('2026-02-09')
+        time.sleep(0.1)
+        client.get_room_statistics('2026-02-10')
+        assert [k[1] for k in client._cache] == [(('date', '2026-02-10'),)]
+
+    def test_prefetch_runs_concurrently(self, pms_stub):
+        client = _client(pms_stub)
+        t0 = time.perf_counter()
+        results = client.prefetch('2026-02-10')
+        elapsed = time.perf_counter() - t0
+        assert set(results) == set(LightspeedClient.SYNC_METHODS)
+        assert elapsed < STUB_DELAY * 3
+        assert pms_stub.calls['token'] == 1
+
+    def test_prefetch_reports_errors_per_endpoint(self, pms_stub):
+        pms_stub.fail.add('no-shows')
+        results = _client(pms_stub).prefetch('2026-02-10')
+        assert isinstance(results['get_no_shows'], LightspeedAPIError)
+        assert results['get_card_settlements']['total'] == 1400
+
+
+class TestLightspeedSync:
+
+    def test_sync_calls_each_endpoint_once(self, app, fresh_db, pms_stub):
+        with app.app_context():
+            sync = LightspeedSync(_client(pms_stub))
+            t0 = time.perf_counter()
+            result = sync.sync_session('2026-02-10')
+            elapsed = time.perf_counter() - t0
+
+        assert not result['errors']
+        assert 'jour' in result['synced_tabs']
+        for report in REPORTS:
+            assert pms_stub.calls[report] == 1, report
+        # Seven reports, sequentially ≥ 7 × delay; concurrently ≈ one round-trip
+        assert elapsed < STUB_DELAY * 3
+
+    def test_resync_fetches_fresh_data(self, app, fresh_db, pms_stub):
+        with app.app_context():
+            sync = LightspeedSync(_client(pms_stub))
+            sync.sync_session('2026-02-10')
+            sync.sync_session('2026-02-10')
+        assert pms_stub.calls['daily-revenue'] == 2
+
+
+class TestRateLimiter:
+
+    def test_limits_request_rate(self):
+        limiter = RateLimiter(20, burst=1)
+        t0 = time.perf_counter()
+        for _ in range(6):
+            limiter.acquire()
+        # First token is free, the next five wait 1/20 s each
+        assert time.perf_counter() - t0 >= 5 / 20 * 0.9
+
+
+BACKFILL_DATES = ['2031-03-01', '2031-03-02', '2031-03-03', '2031-03-04']
+
+
+@pytest.fixture
+def backfill_db(app):
+    from database.models import db, NightAuditSession, LightspeedBackfillJob
+
+    def cleanup():
+        for d in BACKFILL_DATES:
+            NightAuditSession.query.filter_by(audit_date=d).delete()
+        LightspeedBackfillJob.query.filter(
+            LightspeedBackfillJob.start_date == date(2031, 3, 1)).delete()
+        db.session.commit()
+
+    with app.app_context():
+        cleanup()
+        yield db
+        cleanup()
+
+
+class TestBackfill:
+
+    def test_backfills_range_concurrently(self, app, backfill_db, pms_stub):
+        from database.models import NightAuditSession
+        client = _client(pms_stub)
+        seen = []
+        job = create_job(date(2031, 3, 1), date(2031, 3, 4), concurrency=4)
+        t0 = time.perf_counter()
+        summary = LightspeedBackfill(app, client, progress=lambda r, j: seen.append(r['date'])).run(job.id)
+        elapsed = time.perf_counter() - t0
+
+        assert summary['status'] == 'completed'
+        assert summary['completed_dates'] == 4
+        assert sorted(seen) == BACKFILL_DATES
+        assert set(summary['results']) == set(BACKFILL_DATES)
+        for report in REPORTS:
+            assert pms_stub.calls[report] == 4, report
+        assert NightAuditSession.query.filter(
+            NightAuditSession.audit_date.in_(BACKFILL_DATES)).count() == 4
+        # Four dates × seven reports in ≈ one round-trip each, not 28 sequential ones
+        assert elapsed < STUB_DELAY * 8
+        assert summary['dates_per_minute'] > 0
+
+    def test_resume_skips_succeeded_dates(self, app, backfill_db, pms_stub):
+        from database.models import db
+        client = _client(pms_stub)
+        job = create_job(date(2031, 3, 1), date(2031, 3, 4), concurrency=2)
+        LightspeedBackfill(app, client).run(job.id)
+
+        # Simulate an interruption after two dates
+        results = job.get_results()
+        for d in BACKFILL_DATES[2:]:
+            results[d]['status'] = 'error'
+        job.results_json = json.dumps(results)
+        db.session.commit()
+        pms_stub.calls.clear()
+
+        summary = LightspeedBackfill(app, client).run(job.id)
+
+        assert summary['status'] == 'completed'
+        assert pms_stub.calls['daily-revenue'] == 2
+
+    def test_job_rate_limit_leaves_shared_client_alone(self, app, backfill_db, pms_stub):
+        client = _client(pms_stub)
+        shared_limiter = client.rate_limiter
+        job = create_job(date(2031, 3, 1), date(2031, 3, 2), concurrency=2, rate_limit=1000)
+        seen = []
+        LightspeedBackfill(app, client, progress=lambda r, j: seen.append(r['status'])).run(job.id)
+        assert seen == ['ok', 'ok']
+        assert client.rate_limiter is shared_limiter and client._job_limiter is None
+
+        job_client = client.with_rate_limit(5)
+        assert job_client._job_limiter.rate == 5
+        assert job_client._cache is client._cache and job_client._http is client._http
+
+    def test_job_client_shares_token(self, pms_stub):
+        client = _client(pms_stub)
+        job_client = client.with_rate_limit(5)
+        assert not client.is_connected()
+
+        assert job_client.refresh_token()
+
+        assert client.is_connected()
+        assert client._access_token == job_client._access_token
+        client.disconnect()
+        assert not job_client.is_connected()
+
+    def test_rejects_invalid_range(self, app, backfill_db):
+        with pytest.raises(ValueError):
+            create_job(date(2031, 3, 4), date(2031, 3, 1))
+        with pytest.raises(ValueError):
+            create_job(date(2031, 3, 1), date(2035, 3, 1))
+
+    @pytest.mark.parametrize('options', [
+        {'concurrency': 0}, {'concurrency': 10 ** 6}, {'concurrency': '4'}, {'concurrency': 2.5},
+        {'concurrency': True}, {'rate_limit': 0}, {'rate_limit': -1}, {'rate_limit': 'vite'},
+    ])
+    def test_start_rejects_invalid_options(self, app, client, backfill_db, monkeypatch, options):
+        from database.models import LightspeedBackfillJob
+        from routes import lightspeed
+        started = []
+        monkeypatch.setattr(lightspeed, 'get_lightspeed_client',
+                            lambda: SimpleNamespace(is_configured=lambda: True))
+        monkeypatch.setattr(lightspeed, 'start_job_thread', lambda *args: started.append(args))
+        with client.session_transaction() as sess:
+            sess['user_role_type'] = 'admin'
+            sess['_csrf_token'] = 't'
+
+        resp = client.post('/lightspeed/api/backfill', headers={'X-CSRF-Token': 't'}, json={
+            'start_date': '2031-03-01', 'end_date': '2031-03-02', **options})
+
+        assert resp.status_code == 400
+        assert not resp.get_json()['success']
+        assert not started
+        assert LightspeedBackfillJob.query.filter_by(start_date=date(2031, 3, 1)).count() == 0
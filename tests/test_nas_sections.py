@@ -0,0 +1,85 @@
+"""Tests for NightAuditSession deferred section groups and header listings."""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from database.models import NightAuditSession
+
+AUDIT_DATE = date(2026, 2, 8)  # cleaned up by the fresh_db fixture
+
+
+@pytest.fixture
+def nas(fresh_db):
+    session = NightAuditSession(audit_date=AUDIT_DATE, auditor_name='Test', status='locked')
+    session.set_json('ej_entries', [{'gl_code': '100401', 'montant': 12.5}])
+    session.set_json('ristourne_entries', [{'guest': 'A', 'rebate_amount': 5}])
+    session.cash_ls_lecture = 100.0
+    fresh_db.session.add(session)
+    fresh_db.session.commit()
+    fresh_db.session.expunge_all()
+    return fresh_db
+
+
+@pytest.fixture
+def statements(nas):
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+    event.listen(nas.engine, 'before_cursor_execute', record)
+    yield seen
+    event.remove(nas.engine, 'before_cursor_execute', record)
+
+
+class TestDeferredSections:
+
+    def test_plain_query_skips_json_columns(self, statements):
+        session = NightAuditSession.query.filter_by(audit_date=AUDIT_DATE).first()
+        assert 'ej_entries' not in statements[-1]
+        assert 'cash_ls_lecture' in statements[-1]
+        assert session.cash_ls_lecture == 100.0
+
+    def test_json_field_loads_only_its_section(self, statements):
+        session = NightAuditSession.query.filter_by(audit_date=AUDIT_DATE).first()
+        count = len(statements)
+        assert session.get_json('ristourne_entries') == [{'guest': 'A', 'rebate_amount': 5}]
+        assert len(statements) == count + 1
+        assert 'ristourne_by_dept' in statements[-1] and 'ej_entries' not in statements[-1]
+
+    def test_to_dict_loads_remaining_sections_at_once(self, statements):
+        session = NightAuditSession.query.filter_by(audit_date=AUDIT_DATE).first()
+        count = len(statements)
+        data = session.to_dict()
+        assert len(statements) == count + 1
+        assert data['ej_entries'] == [{'gl_code': '100401', 'montant': 12.5}]
+
+    def test_write_to_unloaded_section_persists(self, nas):
+        session = NightAuditSession.query.filter_by(audit_date=AUDIT_DATE).first()
+        session.set_json('ej_entries', [])
+        nas.session.commit()
+        nas.session.expunge_all()
+        assert NightAuditSession.query.filter_by(audit_date=AUDIT_DATE).first().get_json('ej_entries') == []
+
+    def test_section_columns(self):
+        assert NightAuditSession.section_columns('geac') == [
+            'geac_cashout', 'geac_daily_rev', 'geac_balance_sheet']
+
+
+class TestHeaderListings:
+
+    def test_header_query_selects_header_only(self, statements):
+        rows = NightAuditSession.header_query('completed_at').filter_by(audit_date=AUDIT_DATE).all()
+        sql = statements[-1]
+        assert 'auditor_name' in sql and 'completed_at' in sql
+        assert 'cash_ls_lecture' not in sql and 'ej_entries' not in sql
+        assert rows[0].status == 'locked'
+
+    def test_listing_endpoints(self, nas, client):
+        sessions = client.get('/api/rj/native/list').get_json()['sessions']
+        assert {'date': AUDIT_DATE.isoformat(), 'auditor': 'Test', 'status': 'locked',
+                'is_balanced': False} in sessions
+        listed = client.get('/api/rj/correction/sessions').get_json()['sessions']
+        row = next(s for s in listed if s['audit_date'] == AUDIT_DATE.isoformat())
+        assert row['correction_count'] == 0 and row['recap_balance'] == 0
@@ -0,0 +1,243 @@
+"""Tests for the notification outbox and pooled SMTP delivery."""
+
+import socketserver
+import threading
+from datetime import datetime, date
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from utils.email_service import EmailService
+from utils.notification_outbox import OutboxDispatcher
+
+
+class _SMTPStubHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP (EHLO, AUTH PLAIN, MAIL/RCPT/DATA) for smtplib."""
+
+    def reply(self, line):
+        self.wfile.write((line + '\r\n').encode())
+
+    def handle(self):
+        stub = self.server.stub
+        stub.connections += 1
+        self.reply('220 stub ESMTP')
+        rcpt = None
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            cmd = line.decode().strip()
+            verb = cmd.split(' ', 1)[0].upper()
+            if verb == 'EHLO':
+                self.wfile.write(b'250-stub\r\n250 AUTH PLAIN\r\n')
+            elif verb == 'AUTH':
+                stub.logins += 1
+                self.reply('235 ok')
+            elif verb == 'MAIL':
+                self.reply('250 ok')
+            elif verb == 'RCPT':
+                rcpt = cmd.split(':', 1)[1].strip('<> ')
+                if rcpt in stub.reject:
+                    self.reply('550 no such user')
+                else:
+                    self.reply('250 ok')
+            elif verb == 'DATA':
+                self.reply('354 go')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                stub.messages.append(rcpt)
+                self.reply('250 queued')
+            elif verb == 'RSET' or verb == 'NOOP':
+                self.reply('250 ok')
+            elif verb == 'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('502 unsupported')
+
+
+@pytest.fixture
+def smtp_stub():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _SMTPStubHandler)
+    server.daemon_threads = True
+    server.stub = SimpleNamespace(connections=0, logins=0, messages=[], reject=set())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.stub.port = server.server_address[1]
+    yield server.stub
+    server.shutdown()
+    server.server_close()
+
+
+def _email_service(port):
+    return EmailService(SimpleNamespace(config={
+        'MAIL_SERVER': '127.0.0.1', 'MAIL_PORT': port, 'MAIL_USE_TLS': False,
+        'MAIL_USERNAME': 'audit', 'MAIL_PASSWORD': 'secret', 'MAIL_TIMEOUT': 5,
+    }))
+
+
+def _message(n):
+    return {'to_email': f'user{n}@example.com', 'subject': f'Test {n}',
+            'html_body': '<p>hello</p>', 'text_body': 'hello'}
+
+
+class TestSendBatch:
+
+    def test_one_session_for_many_messages(self, smtp_stub):
+        results = _email_service(smtp_stub.port).send_batch([_message(i) for i in range(5)])
+        assert all(r['status'] == 'sent' for r in results)
+        assert smtp_stub.connections == 1
+        assert smtp_stub.logins == 1
+        assert len(smtp_stub.messages) == 5
+
+    def test_rejected_recipient_does_not_abort_batch(self, smtp_stub):
+        smtp_stub.reject.add('user1@example.com')
+        results = _email_service(smtp_stub.port).send_batch([_message(i) for i in range(3)])
+        assert [r['status'] for r in results] == ['sent', 'failed', 'sent']
+        assert smtp_stub.connections == 1
+
+    def test_unreachable_server_fails_all(self):
+        results = _email_service(1).send_batch([_message(i) for i in range(2)])
+        assert [r['status'] for r in results] == ['failed', 'failed']
+
+
+@pytest.fixture
+def outbox(app, smtp_stub):
+    from database.models import db, NotificationOutbox
+    # Email templates go through the app's context processors
+    with app.test_request_context():
+        NotificationOutbox.query.delete()
+        db.session.commit()
+        dispatcher = OutboxDispatcher(app)
+        dispatcher.enabled = False  # drive dispatch_once() by hand
+        dispatcher.email_service = _email_service(smtp_stub.port)
+        yield dispatcher
+        NotificationOutbox.query.delete()
+        db.session.commit()
+
+
+class TestOutboxDispatcher:
+
+    def test_enqueue_does_not_touch_smtp(self, outbox, smtp_stub):
+        rows = outbox.enqueue('rj_late', {'date': '2026-02-08', 'message': 'x'},
+                              ['a@example.com', 'b@example.com'])
+        assert len(rows) == 2
+        assert all(r.status == 'pending' for r in rows)
+        assert smtp_stub.connections == 0
+
+    def test_dispatch_delivers_batch_over_one_session(self, outbox, smtp_stub):
+        from database.models import NotificationOutbox
+        outbox.enqueue('rj_late', {'date': '2026-02-08', 'message': 'x'},
+                       [f'r{i}@example.com' for i in range(4)])
+
+        assert outbox.dispatch_once() == 4
+        assert smtp_stub.connections == 1
+        assert smtp_stub.logins == 1
+        statuses = {m.status for m in NotificationOutbox.query.all()}
+        assert statuses == {'sent'}
+        assert outbox.dispatch_once() == 0
+
+    def test_failure_is_retried_with_backoff(self, outbox, smtp_stub):
+        smtp_stub.reject.add('bounce@example.com')
+        row = outbox.enqueue('rj_late', {'date': '2026-02-08', 'message': 'x'},
+                             ['bounce@example.com'])[0]
+        before = datetime.utcnow()
+
+        outbox.dispatch_once()
+
+        assert row.status == 'pending'
+        assert row.attempts == 1
+        assert (row.next_attempt_at - before).total_seconds() >= outbox.retry_base - 1
+        # Not due yet → nothing claimed
+        assert outbox.dispatch_once() == 0
+
+    def test_gives_up_after_max_attempts(self, outbox, smtp_stub):
+        from database.models import db
+        smtp_stub.reject.add('bounce@example.com')
+        row = outbox.enqueue('rj_late', {'date': '2026-02-08', 'message': 'x'},
+                             ['bounce@example.com'])[0]
+        for _ in range(outbox.max_attempts):
+            row.next_attempt_at = datetime.utcnow()
+            db.session.commit()
+            outbox.dispatch_once()
+        assert row.status == 'failed'
+
+    def test_expired_lease_counts_as_attempt(self, outbox, smtp_stub):
+        from database.models import db
+        row = outbox.enqueue('rj_late', {'date': '2026-02-08', 'message': 'x'},
+                             ['crash@example.com'])[0]
+        for attempt in range(1, outbox.max_attempts + 1):
+            # Claimed by a worker that died before finishing
+            row.status, row.claimed_by, row.next_attempt_at = 'sending', 'dead', datetime.utcnow()
+            db.session.commit()
+            outbox._claim_batch()
+            db.session.refresh(row)
+            assert row.attempts == attempt
+        assert row.status == 'failed'
+        assert smtp_stub.connections == 0
+
+    def test_backoff_is_exponential_and_capped(self, outbox):
+        assert outbox.backoff(1) == outbox.retry_base
+        assert outbox.backoff(3) == outbox.retry_base * 4
+        assert outbox.backoff(50) == outbox.retry_max
+
+
+class TestSubmitQueuesAlerts:
+
+    def test_submit_returns_before_delivery(self, app, client, fresh_db, smtp_stub):
+        from database.models import db, NightAuditSession, NotificationOutbox
+        app.extensions['notification_outbox'].enabled = False
+        nas = NightAuditSession(audit_date=date(2026, 2, 9), auditor_name='Test', status='draft')
+        db.session.add(nas)
+        db.session.commit()
+        NotificationOutbox.query.delete()
+        db.session.commit()
+
+        resp = client.post('/api/rj/native/submit/2026-02-09')
+
+        assert resp.status_code == 200
+        queued = resp.get_json()['notifications_queued']
+        assert NotificationOutbox.query.filter_by(status='pending').count() == queued
+        assert smtp_stub.connections == 0
+        NotificationOutbox.query.delete()
+        db.session.commit()
+
+
+class TestAlertRecipients:
+
+    def test_preferences_loaded_in_one_query(self, app):
+        from database.models import db, User, NotificationPreference
+        from utils.alert_engine import AlertEngine
+
+        with app.app_context():
+            users = []
+            for i, enabled in enumerate([True, False, None]):
+                u = User(username=f'outbox_test_{i}', email=f'outbox{i}@example.com',
+                         role='gm', is_active=True, password_hash='x')
+                db.session.add(u)
+                db.session.flush()
+                if enabled is not None:
+                    db.session.add(NotificationPreference(
+                        user_id=u.id, event_type='rj_late', is_enabled=enabled))
+                users.append(u)
+            db.session.commit()
+
+            statements = []
+            listener = lambda *a, **k: statements.append(a[2])
+            event.listen(db.engine, 'before_cursor_execute', listener)
+            try:
+                recipients = AlertEngine().get_alert_recipients('rj_late')
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', listener)
+
+            emails = {u.email for u in recipients}
+            assert 'outbox0@example.com' in emails
+            assert 'outbox1@example.com' not in emails
+            assert 'outbox2@example.com' in emails
+            assert len(statements) == 1
+
+            for u in users:
+                NotificationPreference.query.filter_by(user_id=u.id).delete()
+                db.session.delete(u)
+            db.session.commit()
@@ -5,7 +5,31 @@ import xlrd
 import olefile
 import pytest
 from xlutils.copy import copy as copy_workbook
-from utils.ole_builder import OLEBuilder, rebuild_xls_with_vba
+import time
+import tracemalloc
+from utils.ole_builder import (
+    OLEBuilder, OLEPatchError, patch_xls_workbook, rebuild_xls_with_vba, _rebuild_full,
+)
+
+
+def _synthetic_xls(workbook, extra=None):
+    """OLE file with a Workbook stream plus VBA-like streams."""
+    streams = {
+        'Workbook': workbook,
+        '_VBA_PROJECT_CUR/VBA/Module1': b'Sub Main()\nEnd Sub' * 400,
+        '_VBA_PROJECT_CUR/VBA/dir': b'\x01' * 600,
+        '_VBA_PROJECT_CUR/PROJECT': b'ID="{0}"' * 50,
+        '\x05SummaryInformation': b'\x07' * 300,
+    }
+    streams.update(extra or {})
+    return OLEBuilder().build(streams)
+
+
+def _streams(data):
+    of = olefile.OleFileIO(io.BytesIO(data))
+    result = {'/'.join(e): of.openstream('/'.join(e)).read() for e in of.listdir()}
+    of.close()
+    return result
 
 
 class TestOLEBuilder:
@@ -140,3 +164,97 @@ class TestRebuildXlsWithVba:
         orig_size = len(rj07_bytes)
         assert len(result) > orig_size * 0.5
         assert len(result) < orig_size * 2.0
+
+
+class TestOLEPatcher:
+    """In-place Workbook replacement keeping the original sector layout."""
+
+    def _roundtrip(self, orig_wb, new_wb):
+        orig = _synthetic_xls(orig_wb)
+        modified = OLEBuilder().build({'Workbook': new_wb})
+        result = patch_xls_workbook(orig, modified)
+        before, after = _streams(orig), _streams(result)
+        assert after['Workbook'] == new_wb
+        for path, data in before.items():
+            if path != 'Workbook':
+                assert after[path] == data, path
+        return orig, result
+
+    def test_same_size_keeps_file_length(self):
+        orig, result = self._roundtrip(b'A' * 50000, b'B' * 50000)
+        assert len(result) == len(orig)
+
+    def test_shrinking_workbook(self):
+        orig, result = self._roundtrip(b'A' * 200000, b'B' * 9000)
+        assert len(result) <= len(orig)
+
+    def test_growing_workbook_appends_sectors(self):
+        orig, result = self._roundtrip(b'A' * 9000, b'B' * 300000)
+        assert len(result) > len(orig)
+
+    def test_growing_past_header_difat(self):
+        """More than 109 FAT sectors forces DIFAT sectors to be added."""
+        big = bytes(range(256)) * (8 * 1024 * 1024 // 256)
+        self._roundtrip(b'A' * 9000, big)
+
+    def test_writes_to_sink(self):
+        orig = _synthetic_xls(b'A' * 20000)
+        modified = OLEBuilder().build({'Workbook': b'C' * 30000})
+        sink = io.BytesIO()
+        written = patch_xls_workbook(orig, modified, sink)
+        assert written == len(sink.getvalue())
+        assert _streams(sink.getvalue())['Workbook'] == b'C' * 30000
+
+    def test_mini_stream_workbook_rejected(self):
+        orig = _synthetic_xls(b'tiny')
+        modified = OLEBuilder().build({'Workbook': b'D' * 10000})
+        sink = io.BytesIO()
+        with pytest.raises(OLEPatchError):
+            patch_xls_workbook(orig, modified, sink)
+        assert sink.getvalue() == b''
+
+    def test_rebuild_falls_back_to_full_layout(self):
+        orig = _synthetic_xls(b'tiny')
+        modified = OLEBuilder().build({'Workbook': b'D' * 10000})
+        result = rebuild_xls_with_vba(orig, modified)
+        assert _streams(result)['Workbook'] == b'D' * 10000
+
+    def test_patch_real_rj(self, rj07_bytes):
+        rb = xlrd.open_workbook(file_contents=rj07_bytes, formatting_info=True)
+        wb = copy_workbook(rb)
+        wb.get_sheet(1).write(2, 1, 77)
+        buf = io.BytesIO()
+        wb.save(buf)
+
+        result = patch_xls_workbook(rj07_bytes, buf.getvalue())
+
+        rb2 = xlrd.open_workbook(file_contents=result, formatting_info=True)
+        assert rb2.sheet_by_name('controle').cell_value(2, 1) == 77
+        before, after = _streams(rj07_bytes), _streams(result)
+        for path, data in before.items():
+            if path != 'Workbook':
+                assert after[path] == data, path
+
+
+class TestPatcherBenchmark:
+    """Memory/time comparison of the in-place patch vs. the full rebuild."""
+
+    def _measure(self, fn, *args):
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        fn(*args)
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return elapsed, peak
+
+    def test_patch_uses_less_memory_than_rebuild(self):
+        orig = _synthetic_xls(b'\x11' * (4 * 1024 * 1024))
+        modified = OLEBuilder().build({'Workbook': b'\x22' * (4 * 1024 * 1024)})
+
+        patch_time, patch_peak = self._measure(
+            patch_xls_workbook, orig, modified, io.BytesIO())
+        full_time, full_peak = self._measure(_rebuild_full, orig, modified)
+
+        assert patch_peak < full_peak
+        assert patch_time / full_time < 1.0      # ≈ 0.55 measured: the patch skips the rebuild
@@ -0,0 +1,105 @@
+"""Tests for the OTB pace cube (utils/otb_pace.py) and /compset/api/otb/pace."""
+
+from datetime import date, timedelta
+
+import pytest
+
+from database.models import OTBForecast, OTBPace
+from utils import otb_pace
+
+STAY = date(1999, 6, 1)                  # far outside real data, removed by the fixture
+LY_STAY = STAY - timedelta(days=364)
+
+
+@pytest.fixture
+def pace_db(app):
+    from database.models import db
+    with app.app_context():
+        def clean():
+            OTBForecast.query.filter(OTBForecast.target_date < date(2000, 1, 1)).delete()
+            OTBPace.query.filter(OTBPace.target_date < date(2000, 1, 1)).delete()
+            db.session.commit()
+        clean()
+        yield db
+        clean()
+
+
+def _book(db, target, days_before, rooms, revenue=None):
+    db.session.add(OTBForecast(snapshot_date=target - timedelta(days=days_before), target_date=target,
+                               rooms_otb=rooms, revenue_otb=revenue if revenue is not None else rooms * 100.0))
+
+
+class TestRefresh:
+
+    def test_pickup_and_stly(self, pace_db):
+        for days_before, rooms in ((30, 40), (14, 70), (7, 95)):
+            _book(pace_db, STAY, days_before, rooms)
+        for days_before, rooms in ((30, 35), (10, 60)):
+            _book(pace_db, LY_STAY, days_before, rooms)
+        otb_pace.refresh([STAY, LY_STAY])
+        pace_db.session.commit()
+
+        rows = {r.days_before: r for r in OTBPace.query.filter_by(target_date=STAY)}
+        assert sorted(rows) == [7, 14, 30]
+        assert [rows[d].pickup_rooms for d in (30, 14, 7)] == [None, 30, 25]
+        assert rows[14].pickup_revenue == 3000.0
+        # STLY at 14 days: last year's stay as of its closest earlier snapshot (30 days)
+        assert (rows[30].stly_rooms, rows[14].stly_rooms, rows[7].stly_rooms) == (35, 35, 60)
+        assert rows[7].pace_rooms == 35
+
+    def test_refreshing_last_year_updates_this_year(self, pace_db):
+        _book(pace_db, STAY, 5, 80)
+        otb_pace.refresh([STAY])
+        pace_db.session.commit()
+        assert OTBPace.query.filter_by(target_date=STAY).one().stly_rooms is None
+
+        _book(pace_db, LY_STAY, 5, 50)
+        otb_pace.refresh([LY_STAY])
+        pace_db.session.commit()
+        assert OTBPace.query.filter_by(target_date=STAY).one().pace_rooms == 30
+
+    def test_roll_forward_one_statement(self, pace_db):
+        snapshot = date(1999, 5, 1)
+        for k in range(3):
+            pace_db.session.add(OTBForecast(snapshot_date=snapshot, target_date=snapshot + timedelta(days=k),
+                                            rooms_otb=10 + k, ly_rooms=5))
+        pace_db.session.add(OTBForecast(snapshot_date=snapshot + timedelta(days=1),
+                                        target_date=snapshot + timedelta(days=2), rooms_otb=99))
+        pace_db.session.commit()
+
+        created = otb_pace.roll_forward(snapshot + timedelta(days=1))
+        pace_db.session.commit()
+        assert created == 2   # target 1999-05-03 was already on today's snapshot
+        rows = OTBForecast.query.filter_by(snapshot_date=snapshot + timedelta(days=1)) \
+            .order_by(OTBForecast.target_date).all()
+        assert [(r.target_date.day, r.rooms_otb, r.source) for r in rows] == [
+            (2, 10, 'snapshot'), (3, 99, 'manual'), (4, 12, 'snapshot')]
+        assert rows[0].ly_rooms == 5 and rows[0].created_at is not None
+
+
+class TestPaceEndpoint:
+
+    def test_window_curve_and_target_curve(self, pace_db, client):
+        for offset in range(3):
+            for days_before, rooms in ((20, 30), (10, 50), (0, 70)):
+                _book(pace_db, STAY + timedelta(days=offset), days_before, rooms)
+        otb_pace.refresh([STAY + timedelta(days=o) for o in range(3)])
+        pace_db.session.commit()
+
+        body = client.get('/compset/api/otb/pace?start_date=1999-06-01&end_date=1999-06-03&horizon=15').get_json()
+        assert [p['days_before'] for p in body['curve']] == [10, 0]
+        assert body['curve'][0] == {'days_before': 10, 'targets': 3, 'rooms_otb': 150, 'revenue_otb': 15000.0,
+                                    'adr_otb': 100.0, 'pickup_rooms': 60, 'stly_rooms': None,
+                                    'stly_revenue': None, 'pace_rooms': None}
+
+        body = client.get('/compset/api/otb/pace?target_date=1999-06-02').get_json()
+        assert [(p['days_before'], p['rooms_otb']) for p in body['curve']] == [(20, 30), (10, 50), (0, 70)]
+
+    def test_manual_entry_refreshes_cube(self, pace_db, client):
+        client.post('/compset/api/otb/manual', json={'snapshot_date': '1999-05-25', 'target_date': '1999-06-01',
+                                                     'rooms_otb': 42, 'revenue_otb': 6300})
+        row = OTBPace.query.filter_by(target_date=STAY).one()
+        assert (row.days_before, row.rooms_otb, row.to_dict()['adr_otb']) == (7, 42, 150.0)
+
+    def test_bad_date(self, client):
+        assert client.get('/compset/api/otb/pace?target_date=juin').status_code == 400
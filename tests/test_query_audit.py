@@ -0,0 +1,57 @@
+"""Tests for the query-plan audit (utils/query_audit.py) and the index migration."""
+
+import sqlite3
+
+from sqlalchemy import create_engine, text
+
+from database.models import db
+from migrate_db import INDEXES, create_indexes
+from utils.query_audit import audit, findings
+
+
+def _engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'plans.db'}")
+    db.metadata.create_all(engine)
+    return engine
+
+
+class TestQueryAudit:
+
+    def test_hot_queries_use_indexes_on_fresh_schema(self, tmp_path):
+        with _engine(tmp_path).connect() as conn:
+            report = audit(conn)
+        scans = [(e['name'], e['plan']) for e in report
+                 if any(kind == 'full_scan' for kind, _ in e['findings'])]
+        assert scans == []
+
+    def test_full_scan_flagged_without_migration_indexes(self, tmp_path):
+        with _engine(tmp_path).connect() as conn:
+            for name, _table, _columns in INDEXES:
+                conn.execute(text(f'DROP INDEX {name}'))
+            flagged = {e['name'] for e in audit(conn)
+                       if any(kind == 'full_scan' for kind, _ in e['findings'])}
+        assert {'task_completion_shift', 'rj_archive_sheets', 'shift_today'} <= flagged
+
+    def test_findings_classification(self):
+        plan = ['SCAN shifts', 'SCAN t USING INDEX ix_t', 'USE TEMP B-TREE FOR ORDER BY',
+                'SCAN night_audit_sessions USING COVERING INDEX ix_nas_header',
+                'SCAN daily_jour_metrics USING INDEX ix_djm_date']
+        assert [kind for kind, _ in findings(plan)] == ['full_scan', 'temp_sort']
+
+
+class TestIndexMigration:
+
+    def test_migration_matches_models(self):
+        model_indexes = {ix.name for t in db.metadata.tables.values() for ix in t.indexes}
+        assert {name for name, _, _ in INDEXES} <= model_indexes
+
+    def test_create_indexes_on_existing_database(self, tmp_path, capsys):
+        path = tmp_path / 'old.db'
+        conn = sqlite3.connect(path)
+        conn.execute('CREATE TABLE shifts (id INTEGER PRIMARY KEY, date DATE)')
+        create_indexes(conn.cursor())
+        create_indexes(conn.cursor())  # idempotent
+        names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+        conn.close()
+        assert 'ix_shifts_date' in names
+        assert 'Table absente: rj_sheet_data' in capsys.readouterr().out
@@ -0,0 +1,183 @@
+"""Tests for the persisted operating-regime clustering (utils/regime_model.py)."""
+
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('sklearn')
+
+from scripts.regime_model import synthetic_days
+from utils.regime_model import RegimeClusterer, RegimeStore, feature_matrix
+
+
+def _shifted(days, start):
+    """Same features, far outside the fitted regimes (drift)."""
+    return [SimpleNamespace(**{**vars(d), 'date': start + timedelta(days=i),
+                               'adr': d.adr * 2, 'fb_revenue': d.fb_revenue * 3})
+            for i, d in enumerate(days)]
+
+
+class TestRegimeClusterer:
+
+    def test_regimes_ordered_by_occupancy(self):
+        days = synthetic_days(years=2)
+        model = RegimeClusterer.fit(feature_matrix(days), days[-1].date)
+        occupancy = model.centroids[:, 0] * model.scale[0] + model.mean[0]
+        assert list(occupancy) == sorted(occupancy)
+        assert occupancy[0] < 65 < occupancy[1] < 85 < occupancy[2]
+
+    def test_partial_fit_moves_nearest_centroid(self):
+        days = synthetic_days(years=1)
+        model = RegimeClusterer.fit(feature_matrix(days[:-1]), days[-2].date)
+        before = model.centroids.copy()
+        counts = model.counts.copy()
+        label = model.nearest(feature_matrix(days[-1:]))[0][0]
+
+        model.partial_fit(feature_matrix(days[-1:]), days[-1].date)
+
+        assert model.counts[label] == counts[label] + 1
+        assert (model.centroids != before).any(axis=1).sum() == 1
+        assert model.last_date == days[-1].date
+
+    def test_update_is_much_cheaper_than_refit(self):
+        days = synthetic_days(years=5)
+        X = feature_matrix(days)
+        t0 = time.perf_counter()
+        model = RegimeClusterer.fit(X, days[-1].date)
+        fit = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        model.partial_fit(X[-1:], days[-1].date)
+        model.nearest(X)
+        update = time.perf_counter() - t0
+        assert update < fit / 2
+
+
+class TestRegimeStore:
+
+    def test_steady_state_updates_without_refit(self):
+        days = synthetic_days(years=2)
+        store = RegimeStore(persist=False)
+        store.record_days(days[:500])
+        store.record_days(days)
+        labels, info = store.label_days(days)
+        assert info['n_updates'] == len(days) - 500
+        assert info['drift_ratio'] < store.drift_threshold
+        assert len(labels) == len(days)
+
+    def test_drift_triggers_refit(self):
+        days = synthetic_days(years=1)
+        store = RegimeStore(persist=False)
+        store.record_days(days)
+        drifted = _shifted(days[:60], days[-1].date + timedelta(days=1))
+
+        store.record_days(days + drifted)
+        _, info = store.label_days(days + drifted)
+
+        assert info['n_updates'] == 0
+        assert info['n_days'] == len(days) + 60
+
+    def test_labelling_does_not_update(self):
+        days = synthetic_days(years=1)
+        store = RegimeStore(persist=False)
+        store.record_days(days[:300])
+        labels, info = store.label_days(days)
+        assert len(labels) == len(days)
+        assert (info['n_updates'], info['last_date']) == (0, days[299].date.isoformat())
+
+
+@pytest.fixture
+def regime_db(app):
+    from database.models import db, DailyJourMetrics, RegimeModel
+
+    def cleanup():
+        DailyJourMetrics.query.filter(DailyJourMetrics.source == 'regime_test').delete()
+        RegimeModel.query.delete()
+        db.session.commit()
+
+    with app.app_context():
+        cleanup()
+        base = synthetic_days(years=1)
+        for i, d in enumerate(base):
+            day = date(2045, 1, 1) + timedelta(days=i)
+            db.session.add(DailyJourMetrics(
+                date=day, year=day.year, month=day.month, day_of_month=day.day,
+                occupancy_rate=d.occupancy_rate, adr=d.adr, fb_revenue=d.fb_revenue,
+                total_revenue=d.total_revenue, total_rooms_sold=d.total_rooms_sold,
+                source='regime_test'))
+        db.session.commit()
+        yield DailyJourMetrics.query.filter_by(source='regime_test').order_by(DailyJourMetrics.date).all()
+        cleanup()
+
+
+class TestPersistence:
+
+    def test_state_survives_restart_without_refit(self, app, regime_db, monkeypatch):
+        from database.models import RegimeModel, db
+        first = RegimeStore(app)
+        first.label_days(regime_db)
+        assert RegimeModel.query.count() == 0        # reads never store a model
+        assert first.record_days(regime_db) is None  # nor does the write path
+        db.session.commit()
+        assert RegimeModel.query.count() == 0
+        first.refit(cold=True, reason='initial')
+        labels, info = first.label_days(regime_db)
+        assert RegimeModel.query.count() == 1
+
+        def no_fit(*args, **kwargs):
+            raise AssertionError('unexpected refit')
+        monkeypatch.setattr(RegimeClusterer, 'fit', no_fit)
+
+        second = RegimeStore(app)
+        labels2, info2 = second.label_days(regime_db)
+        assert info2['id'] == info['id']
+        assert list(labels2) == list(labels)
+
+    def test_refit_endpoint(self, app, client, regime_db):
+        app.extensions['regime_store'] = RegimeStore(app)
+        resp = client.post('/api/manager/regimes/refit?cold=1')
+        assert resp.status_code == 200
+        status = client.get('/api/manager/regimes').get_json()
+        assert status['model']['refit_reason'] == 'manual'
+
+    def test_stale_update_is_rejected(self, app, regime_db):
+        from database.models import db
+        store = RegimeStore(app)
+        store.refit(cold=True)
+        store.record_days(regime_db)
+        db.session.commit()
+        clusterer = store._current(regime_db, write=True)
+        assert store._save(clusterer, expected_updates=clusterer.n_updates) is True
+        assert store._save(clusterer, expected_updates=clusterer.n_updates - 1) is False
+
+    def test_write_path_schedules_fits(self, app, regime_db, monkeypatch):
+        from database.models import RegimeModel, db
+        store = RegimeStore(app)
+        scheduled = []
+        monkeypatch.setattr(store, 'schedule_refit',
+                            lambda cold=False, reason='drift': scheduled.append((cold, reason)))
+        assert store.record_days(regime_db) is None
+        assert scheduled == [(True, 'initial')]
+
+        store.refit(cold=True, reason='initial')
+        model_id = store.info()['id']
+
+        def no_fit(*args, **kwargs):
+            raise AssertionError('fit on the write path')
+        monkeypatch.setattr(RegimeClusterer, 'fit', no_fit)
+        drifted = _shifted(synthetic_days(years=1)[:60], regime_db[-1].date + timedelta(days=1))
+        store.record_days(drifted)
+        db.session.commit()
+
+        assert scheduled[-1] == (False, 'drift')
+        row = RegimeModel.query.one()
+        assert (row.id, row.n_updates) == (model_id, 60)
+
+    def test_background_refit(self, app, regime_db):
+        from database.models import RegimeModel
+        store = RegimeStore(app)
+        store.refit_enabled, store.refit_delay = True, 0
+        store.schedule_refit(cold=True, reason='initial').join(30)
+        assert RegimeModel.query.one().refit_reason == 'initial'
@@ -0,0 +1,96 @@
+"""Tests for per-request instrumentation and /metrics (utils/request_metrics.py)."""
+
+import io
+import logging
+
+import pytest
+from flask import g
+
+from utils.request_metrics import timed_call
+
+
+@pytest.fixture
+def metrics(app):
+    ext = app.extensions['request_metrics']
+    ext.reset()
+    return ext
+
+
+def _scrape(client, **kwargs):
+    resp = client.get('/metrics', **kwargs)
+    return resp, resp.get_data(as_text=True)
+
+
+class TestAccounting:
+
+    def test_request_time_and_sql_exposed(self, metrics, client):
+        client.get('/api/rj/native/list')
+        resp, body = _scrape(client)
+
+        assert resp.status_code == 200
+        assert resp.mimetype == 'text/plain'
+        assert 'audit_http_requests_total{endpoint="/api/rj/native/list",method="GET",status="200"} 1' in body
+        assert 'audit_http_request_duration_seconds_bucket{endpoint="/api/rj/native/list",le="+Inf"} 1' in body
+        sql_line = next(l for l in body.splitlines()
+                        if l.startswith('audit_sql_statements_total{endpoint="/api/rj/native/list"'))
+        assert int(sql_line.rsplit(' ', 1)[1]) > 0
+
+    def test_unsampled_requests_only_timed(self, metrics, client):
+        metrics.sample_rate = 0.0
+        client.get('/api/rj/native/list')
+        metrics.sample_rate = 1.0
+
+        assert sum(metrics.requests.values()) == 1
+        assert metrics.sampled == 0 and metrics.sql == {}
+
+    def test_library_time_charged_to_request(self, app, metrics):
+        import xlrd
+        import xlwt
+        assert getattr(xlrd.open_workbook, '_perf_label', None) == 'xlrd'
+        buf = io.BytesIO()
+        wb = xlwt.Workbook()
+        wb.add_sheet('Jour').write(0, 0, 1.5)
+        wb.save(buf)
+
+        with app.test_request_context('/rj'):
+            metrics._before_request()
+            xlrd.open_workbook(file_contents=buf.getvalue())
+            assert g._perf['libs']['xlrd'] > 0
+        # Outside a sampled request the wrapper is a plain call
+        assert timed_call('xlrd', len)('abc') == 3
+
+    def test_write_lock_accounting(self, metrics, client, fresh_db):
+        client.get('/api/rj/native/list')
+        client.post('/api/rj/native/new', json={'date': '2026-02-08'})
+        _, body = _scrape(client)
+
+        assert '/api/rj/native/list' not in metrics.locks
+        transactions, wait_s, errors = metrics.locks['/api/rj/native/new']
+        assert transactions >= 1 and wait_s > 0 and errors == 0
+        assert 'audit_db_lock_wait_seconds_total{endpoint="/api/rj/native/new"}' in body
+
+    def test_slow_request_logged_with_top_queries(self, metrics, client, caplog):
+        metrics.slow_ms = 0
+        with caplog.at_level(logging.WARNING, logger='utils.request_metrics'):
+            client.get('/api/rj/native/list')
+        metrics.slow_ms = 1000
+
+        record = next(r for r in caplog.records if 'Slow request' in r.getMessage())
+        assert 'SELECT' in record.getMessage()
+        assert metrics.slow == 1
+
+
+class TestEndpointAccess:
+
+    def test_token_required_when_configured(self, metrics, client):
+        metrics.token = 's3cret'
+        try:
+            assert _scrape(client)[0].status_code == 401
+            resp, _ = _scrape(client, headers={'Authorization': 'Bearer s3cret'})
+            assert resp.status_code == 200
+        finally:
+            metrics.token = ''
+
+    def test_remote_clients_refused_without_token(self, metrics, client):
+        resp, _ = _scrape(client, environ_base={'REMOTE_ADDR': '10.0.0.8'})
+        assert resp.status_code == 403
@@ -0,0 +1,132 @@
+"""Tests for the parallel RJ batch export (utils/rj_batch_export.py)."""
+
+import io
+import json
+import zipfile
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import pytest
+import xlrd
+
+from benchmarks.synthetic import rj_workbook
+from utils import rj_batch_export, rj_template_cache
+
+FIRST = date(1999, 3, 1)  # far outside real data, removed by the fixture
+DAYS = 3
+
+
+@pytest.fixture
+def batch(app, client, tmp_path):
+    from database.models import db, NightAuditSession
+    path = str(tmp_path / 'Rj Vierge.xls')
+    with open(path, 'wb') as f:
+        f.write(rj_workbook(vba=False))
+    app.config['RJ_TEMPLATE_PATH'] = path
+    rj_template_cache.clear()
+
+    def clean():
+        NightAuditSession.query.filter(NightAuditSession.audit_date.between(FIRST, date(1999, 3, 31))).delete()
+        db.session.commit()
+    clean()
+    db.session.add_all(NightAuditSession(audit_date=FIRST + timedelta(days=i), auditor_name=f'Auditeur {i}',
+                                         status='draft') for i in range(DAYS))
+    db.session.commit()
+    yield app
+    clean()
+    rj_template_cache.clear()
+    rj_batch_export.shutdown_pool()
+
+
+def _zip(resp):
+    assert resp.status_code == 200
+    assert resp.mimetype == 'application/zip'
+    return zipfile.ZipFile(io.BytesIO(resp.data))
+
+
+class TestParseRange:
+
+    def test_month(self):
+        assert rj_batch_export.parse_range(month='2024-02') == (date(2024, 2, 1), date(2024, 2, 29))
+
+    def test_start_end(self):
+        assert rj_batch_export.parse_range(start='2026-01-05', end='2026-01-20') == \
+            (date(2026, 1, 5), date(2026, 1, 20))
+
+    @pytest.mark.parametrize('kwargs', [{}, {'month': '2026-13'}, {'start': '2026-01-05'},
+                                        {'start': '2026-01-20', 'end': '2026-01-05'},
+                                        {'start': '2025-01-01', 'end': '2026-01-02'}])
+    def test_invalid(self, kwargs):
+        with pytest.raises(ValueError):
+            rj_batch_export.parse_range(**kwargs)
+
+
+class TestStreamZip:
+
+    def test_files_in_completion_order_then_report(self):
+        exports = [{'date': '1999-03-02', 'filename': 'b.xls', 'worker': 1, 'ms': 2.0, 'data': b'b'},
+                   {'date': '1999-03-01', 'filename': 'a.xls', 'worker': 2, 'ms': 1.0, 'error': 'boom'},
+                   {'date': '1999-03-03', 'filename': 'c.xls', 'worker': 1, 'ms': 3.0, 'data': b'c'}]
+        chunks = list(rj_batch_export.stream_zip(iter(exports)))
+        assert len(chunks) == len(exports) + 1 and chunks[0]  # first file flushed before the rest
+
+        zf = zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+        assert zf.namelist() == ['b.xls', 'c.xls', rj_batch_export.REPORT_NAME]
+        report = json.loads(zf.read(rj_batch_export.REPORT_NAME))
+        assert (report['files'], report['errors'], report['workers']) == (2, 1, 2)
+        assert [item['date'] for item in report['items']] == ['1999-03-01', '1999-03-02', '1999-03-03']
+        assert report['items'][1]['size'] == 1
+
+
+class TestBatchEndpoint:
+
+    URL = '/api/rj/native/export/rj-batch'
+
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_month_zip(self, batch, client, workers):
+        batch.config['RJ_BATCH_WORKERS'] = workers
+        zf = _zip(client.get(f'{self.URL}?month=1999-03'))
+
+        names = sorted(zf.namelist())
+        assert names == sorted([f"Rj {(FIRST + timedelta(days=i)).strftime('%d-%m-%Y')}.xls"
+                                for i in range(DAYS)] + [rj_batch_export.REPORT_NAME])
+        recap = xlrd.open_workbook(file_contents=zf.read('Rj 02-03-1999.xls')).sheet_by_name('Recap')
+        assert recap.cell_value(0, 4) == (date(1999, 3, 2) - date(1899, 12, 30)).days
+
+        report = json.loads(zf.read(rj_batch_export.REPORT_NAME))
+        assert (report['files'], report['errors']) == (DAYS, 0)
+        assert all(item['ms'] > 0 for item in report['items'])
+
+    def test_range_matches_single_export(self, batch, client):
+        batch.config['RJ_BATCH_WORKERS'] = 1
+        zf = _zip(client.get(f'{self.URL}?start=1999-03-02&end=1999-03-02'))
+        single = client.get('/api/rj/native/export/rj/1999-03-02')
+        assert zf.read('Rj 02-03-1999.xls') == single.data
+
+    def test_errors(self, batch, client):
+        assert client.get(f'{self.URL}?month=mars').status_code == 400
+        assert client.get(f'{self.URL}?start=1990-01-01&end=1999-12-31').status_code == 400
+        assert client.get(f'{self.URL}?month=1998-03').status_code == 404
+        assert rj_batch_export.begin_batch()       # the 404 released the slot
+        rj_batch_export.end_batch()
+
+    def test_shared_spawn_pool(self, batch, client):
+        batch.config['RJ_BATCH_WORKERS'] = 2
+        _zip(client.get(f'{self.URL}?month=1999-03'))
+        pool = rj_batch_export._pool
+        _zip(client.get(f'{self.URL}?month=1999-03'))
+        assert rj_batch_export._pool is pool
+        assert pool._mp_context.get_start_method() == 'spawn'
+
+    def test_one_batch_at_a_time(self, batch, client):
+        batch.config['RJ_BATCH_WORKERS'] = 1
+        assert rj_batch_export.begin_batch()
+        try:
+            with patch.object(rj_batch_export, 'load_sessions', side_effect=AssertionError('loaded')):
+                resp = client.get(f'{self.URL}?month=1999-03')
+            assert resp.status_code == 429 and 'en cours' in resp.get_json()['error']
+        finally:
+            rj_batch_export.end_batch()
+        _zip(client.get(f'{self.URL}?month=1999-03'))
+        assert rj_batch_export.begin_batch()       # freed once the zip was sent
+        rj_batch_export.end_batch()
@@ -0,0 +1,165 @@
+"""Tests for the parsed RJ template cache and its copy-on-write clones (utils/rj_template_cache.py)."""
+
+import io
+import os
+import threading
+from datetime import date
+
+import pytest
+import xlrd
+from xlutils.copy import copy as xlutils_copy
+
+from benchmarks.synthetic import rj_workbook
+from utils import rj_template_cache
+from utils.rj_filler import RJFiller
+
+AUDIT_DATE = date(1999, 2, 10)  # far outside real data, removed by the fixture
+
+
+@pytest.fixture(scope='module')
+def rj_bytes():
+    return rj_workbook(day=9, month=2, year=1999, vba=False)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    rj_template_cache.clear()
+    yield
+    rj_template_cache.clear()
+
+
+def _save(wb):
+    out = io.BytesIO()
+    wb.save(out)
+    return out.getvalue()
+
+
+def _fill(wb):
+    recap = wb.get_sheet('Recap')
+    recap.write(0, 4, 36200.0)
+    recap.write(5, 1, 'corrigé')
+    wb.get_sheet(0).write(3, 1, 10)
+
+
+def _fresh_copy(data):
+    return xlutils_copy(xlrd.open_workbook(file_contents=data, formatting_info=True))
+
+
+class TestClone:
+
+    def test_output_identical_to_fresh_copy(self, rj_bytes):
+        expected = _fresh_copy(rj_bytes)
+        _fill(expected)
+        clone = rj_template_cache.WorkbookTemplate(rj_bytes).clone()
+        _fill(clone)
+        assert _save(clone) == _save(expected)
+
+    def test_only_written_sheets_copied(self, rj_bytes):
+        clone = rj_template_cache.WorkbookTemplate(rj_bytes).clone()
+        _fill(clone)
+        assert clone.copied_sheets == ['controle', 'Recap']
+
+    def test_template_untouched_by_clones(self, rj_bytes):
+        template = rj_template_cache.WorkbookTemplate(rj_bytes)
+        first = template.clone()
+        _fill(first)
+        first.get_sheet('jour').write(5, 1, 'remplace')  # overwrites a number with a string
+        _save(first)
+
+        assert _save(template.clone()) == _save(_fresh_copy(rj_bytes))
+
+    def test_clones_independent(self, rj_bytes):
+        template = rj_template_cache.WorkbookTemplate(rj_bytes)
+        a, b = template.clone(), template.clone()
+        a.get_sheet('Recap').write(0, 4, 1.0)
+        b.get_sheet('Recap').write(0, 4, 2.0)
+        values = [xlrd.open_workbook(file_contents=_save(wb)).sheet_by_name('Recap').cell_value(0, 4)
+                  for wb in (a, b)]
+        assert values == [1.0, 2.0]
+
+
+class TestCache:
+
+    def test_base_by_digest_with_lru(self, rj_bytes):
+        other = rj_workbook(day=3, month=2, year=1999, vba=False)
+        first = rj_template_cache.base(rj_bytes, max_size=1)
+        assert rj_template_cache.base(rj_bytes, max_size=1) is first
+        rj_template_cache.base(other, max_size=1)
+        assert rj_template_cache.base(rj_bytes, max_size=1) is not first
+        assert rj_template_cache.stats()['hits'] == 1
+
+    def test_cold_parse_does_not_block_cached_templates(self, rj_bytes, monkeypatch):
+        cached = rj_template_cache.base(rj_bytes)
+        started, release, parses = threading.Event(), threading.Event(), []
+
+        class SlowTemplate(rj_template_cache.WorkbookTemplate):
+            def __init__(self, data):
+                parses.append(data)
+                started.set()
+                release.wait(5)
+                super().__init__(data)
+        monkeypatch.setattr(rj_template_cache, 'WorkbookTemplate', SlowTemplate)
+
+        other = rj_workbook(day=3, month=2, year=1999, vba=False)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(rj_template_cache.base(other)))
+                   for _ in range(2)]
+        for t in threads:
+            t.start()
+        assert started.wait(5)
+        assert rj_template_cache.base(rj_bytes) is cached   # served while the other one parses
+        release.set()
+        for t in threads:
+            t.join(5)
+        assert len(parses) == 1 and results[0] is results[1]
+
+    def test_template_reparsed_when_file_changes(self, rj_bytes, tmp_path):
+        path = str(tmp_path / 'Rj Vierge.xls')
+        assert rj_template_cache.template(path) is None
+        with open(path, 'wb') as f:
+            f.write(rj_bytes)
+        first = rj_template_cache.template(path)
+        assert rj_template_cache.template(path) is first
+
+        with open(path, 'wb') as f:
+            f.write(rj_workbook(day=3, month=2, year=1999, vba=False))
+        os.utime(path, (1, 1))
+        assert rj_template_cache.template(path) is not first
+
+    def test_filler_from_template_matches_filler(self, rj_bytes):
+        direct = RJFiller(io.BytesIO(rj_bytes))
+        cloned = RJFiller.from_template(rj_template_cache.base(rj_bytes))
+        for filler in (direct, cloned):
+            filler.update_controle(vjour=10, mois=2, annee=1999)
+            filler.fill_sheet('Recap', {'date': '10/02/1999'})
+        assert cloned.save_to_bytes().getvalue() == direct.save_to_bytes().getvalue()
+
+
+class TestExportEndpoint:
+
+    @pytest.fixture
+    def nas(self, app, client, rj_bytes, tmp_path):
+        from database.models import db, NightAuditSession
+        path = str(tmp_path / 'Rj Vierge.xls')
+        with open(path, 'wb') as f:
+            f.write(rj_bytes)
+        app.config['RJ_TEMPLATE_PATH'] = path
+        NightAuditSession.query.filter_by(audit_date=AUDIT_DATE).delete()
+        db.session.add(NightAuditSession(audit_date=AUDIT_DATE, auditor_name='Test', status='draft'))
+        db.session.commit()
+        yield
+        NightAuditSession.query.filter_by(audit_date=AUDIT_DATE).delete()
+        db.session.commit()
+
+    def test_export_parses_template_once(self, nas, client):
+        for _ in range(2):
+            resp = client.get(f'/api/rj/native/export/rj/{AUDIT_DATE.isoformat()}')
+            assert resp.status_code == 200
+        recap = xlrd.open_workbook(file_contents=resp.data).sheet_by_name('Recap')
+        assert recap.cell_value(0, 4) == (AUDIT_DATE - date(1899, 12, 30)).days
+        assert rj_template_cache.stats()['misses'] == 1
+
+    def test_missing_template(self, nas, app, client):
+        app.config['RJ_TEMPLATE_PATH'] = '/nonexistent/Rj Vierge.xls'
+        resp = client.get(f'/api/rj/native/export/rj/{AUDIT_DATE.isoformat()}')
+        assert resp.status_code == 500
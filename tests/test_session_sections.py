@@ -0,0 +1,118 @@
+"""Tests for section-scoped session reads, section versions and ETags."""
+
+from datetime import date
+
+import pytest
+
+from database.models import NightAuditSession, SessionSectionVersion
+
+AUDIT_DATE = date(2026, 2, 9)  # cleaned up by the fresh_db fixture
+URL = f'/api/rj/native/session/{AUDIT_DATE.isoformat()}'
+
+
+@pytest.fixture
+def nas(fresh_db):
+    session = NightAuditSession(audit_date=AUDIT_DATE, auditor_name='Test', status='in_progress')
+    session.set_json('ej_entries', [{'gl_code': '100401', 'montant': 12.5}])
+    fresh_db.session.add(session)
+    fresh_db.session.commit()
+    fresh_db.session.expunge_all()
+    return fresh_db
+
+
+def _versions():
+    return SessionSectionVersion.for_date(AUDIT_DATE)
+
+
+class TestSectionMap:
+
+    def test_every_column_has_one_section(self):
+        sections = NightAuditSession.sections()
+        columns = [c for cols in sections.values() for c in cols]
+        assert sorted(columns) == sorted(c.key for c in NightAuditSession.__mapper__.column_attrs)
+
+    def test_prefix_rules(self):
+        assert NightAuditSession.section_of('dueback_reception_lecture') == 'recap'
+        assert NightAuditSession.section_of('dueback_total') == 'dueback'
+        assert NightAuditSession.section_of('g4_montant') == 'jour'
+        assert NightAuditSession.section_of('gl_101100_notes') == 'analyse_gl_101100'
+        assert NightAuditSession.section_of('is_ar_balanced') == 'geac'
+        assert NightAuditSession.section_of('status') == 'session'
+
+
+class TestSectionVersions:
+
+    def test_insert_stamps_every_section(self, nas):
+        versions = _versions()
+        assert set(versions) == set(NightAuditSession.sections())
+        assert len(set(versions.values())) == 1
+
+    def test_update_bumps_only_changed_sections(self, nas):
+        before = _versions()
+        session = NightAuditSession.query.filter_by(audit_date=AUDIT_DATE).first()
+        session.quasi_fb_visa = 10.0
+        session.set_json('ej_entries', [])
+        nas.session.commit()
+
+        after = _versions()
+        changed = {s for s in after if after[s] != before[s]}
+        assert changed == {'quasimodo', 'ej'}
+        assert after['ej'] == max(before.values()) + 1
+
+    def test_noop_assignment_keeps_versions(self, nas):
+        before = _versions()
+        session = NightAuditSession.query.filter_by(audit_date=AUDIT_DATE).first()
+        session.auditor_name = 'Test'
+        nas.session.commit()
+        assert _versions() == before
+
+
+class TestSectionEndpoints:
+
+    def test_section_payload_and_etag(self, nas, client):
+        resp = client.get(f'{URL}/ej')
+        body = resp.get_json()
+        assert resp.status_code == 200
+        assert body['data'] == {'ej_entries': [{'gl_code': '100401', 'montant': 12.5}], 'ej_total': 0}
+        assert body['version'] == _versions()['ej']
+
+        cached = client.get(f'{URL}/ej', headers={'If-None-Match': resp.headers['ETag']})
+        assert cached.status_code == 304 and cached.data == b''
+
+    def test_etag_changes_after_save(self, nas, client):
+        etag = client.get(f'{URL}/controle').headers['ETag']
+        client.post('/api/rj/native/save/controle',
+                    json={'date': AUDIT_DATE.isoformat(), 'temperature': '-12'})
+        resp = client.get(f'{URL}/controle', headers={'If-None-Match': etag})
+        assert resp.status_code == 200
+        assert resp.get_json()['data']['temperature'] == '-12'
+
+    def test_concurrent_save_never_tags_stale_data(self, nas, client, monkeypatch):
+        from sqlalchemy.orm import Session
+        for_date = SessionSectionVersion.for_date.__func__
+
+        def save_then_version(cls, audit_date, since=0):
+            monkeypatch.undo()
+            with Session(nas.engine) as other:                 # another worker's save
+                other.query(NightAuditSession).filter_by(audit_date=AUDIT_DATE).one() \
+                    .set_json('ej_entries', [])
+                other.commit()
+            return for_date(cls, audit_date, since)
+        monkeypatch.setattr(SessionSectionVersion, 'for_date', classmethod(save_then_version))
+
+        body = client.get(f'{URL}/ej').get_json()
+        assert body['version'] == _versions()['ej']
+        assert body['data']['ej_entries'] == []
+
+    def test_changed_since(self, nas, client):
+        base = client.get(f'{URL}/sections').get_json()['version']
+        client.post('/api/rj/native/save/controle',
+                    json={'date': AUDIT_DATE.isoformat(), 'temperature': '-5'})
+        body = client.get(f'{URL}/sections?since={base}').get_json()
+        assert body['version'] == base + 1
+        assert body['sections'] == {'controle': base + 1}
+
+    def test_unknown_section_and_missing_session(self, fresh_db, client):
+        assert client.get(f'{URL}/nope').status_code == 404
+        assert client.get(f'{URL}/ej').status_code == 404
+        assert client.get(f'{URL}/sections?since=abc').status_code == 400
@@ -0,0 +1,178 @@
+"""Tests for the content-addressed session snapshots (SessionSnapshot, rj_correction.py)."""
+
+from datetime import date
+
+import pytest
+
+from database.models import (DailyAnomalyScore, DailyJourMetrics, DailyReconciliation, DueBack,
+                             NightAuditSession, NotificationOutbox, SessionChangeSet, SessionSnapshot,
+                             SnapshotSection)
+
+AUDIT_DATE = date(1999, 5, 12)  # far outside real data, removed by the fixture
+SNAPSHOTS = f'/api/rj/correction/snapshots/{AUDIT_DATE.isoformat()}'
+
+
+@pytest.fixture
+def draft(app, client):
+    from database.models import db
+
+    app.extensions['notification_outbox'].enabled = False
+
+    def clean():
+        for model in (SessionSnapshot, SessionChangeSet, DailyReconciliation, DueBack, NightAuditSession):
+            model.query.filter_by(audit_date=AUDIT_DATE).delete()
+        DailyJourMetrics.query.filter_by(date=AUDIT_DATE).delete()
+        DailyAnomalyScore.query.filter_by(date=AUDIT_DATE).delete()
+        NotificationOutbox.query.filter_by(status='pending').delete()
+        SnapshotSection.prune()
+        db.session.commit()
+    clean()
+    db.session.add(NightAuditSession(audit_date=AUDIT_DATE, auditor_name='Test', status='draft',
+                                     cash_ls_lecture=5.0, deposit_cdn=12.0))
+    db.session.commit()
+    yield db
+    clean()
+
+
+def _nas():
+    return NightAuditSession.query.filter_by(audit_date=AUDIT_DATE).one()
+
+
+def _submit_and_unlock(client):
+    assert client.post(f'/api/rj/native/submit/{AUDIT_DATE.isoformat()}').status_code == 200
+    assert client.post(f'/api/rj/correction/unlock/{AUDIT_DATE.isoformat()}',
+                       json={'reason': 'Erreur caisse'}).status_code == 200
+
+
+def _save_recap(client, **fields):
+    return client.post('/api/rj/native/save/recap', json={'date': AUDIT_DATE.isoformat(), **fields})
+
+
+class TestSnapshot:
+
+    def test_unchanged_sections_stored_once(self, draft):
+        first = SessionSnapshot.take(_nas(), 'submit')
+        draft.session.commit()
+        stored = SnapshotSection.query.count()
+
+        nas = _nas()
+        nas.status = 'correcting'                       # metadata: not part of the hash
+        again = SessionSnapshot.take(nas, 'unlock')
+        draft.session.commit()
+        assert again.hash == first.hash
+        assert SnapshotSection.query.count() == stored
+
+        nas.cash_ls_lecture = 7.0
+        changed = SessionSnapshot.take(nas, 'relock')
+        draft.session.commit()
+        assert changed.hash != first.hash
+        assert SnapshotSection.query.count() == stored + 1
+        assert [s for s in first.sections_map if first.sections_map[s] != changed.sections_map[s]] == ['recap']
+
+    def test_sections_stored_by_another_worker(self, draft):
+        import zlib
+        from sqlalchemy.orm import Session
+        blobs = SessionSnapshot.of(_nas())._blobs
+        with Session(draft.engine) as other:                   # commits the same sections first
+            known = {h for (h,) in other.query(SnapshotSection.hash)}
+            other.add_all(SnapshotSection(hash=h, section=section, payload=zlib.compress(raw))
+                          for h, (section, raw) in blobs.items() if h not in known)
+            other.commit()
+        stored = SnapshotSection.query.count()
+
+        SessionSnapshot.take(_nas(), 'submit')
+        SessionSnapshot.take(_nas(), 'unlock')
+        draft.session.commit()
+        assert SnapshotSection.query.count() == stored
+        assert SessionSnapshot.query.filter_by(audit_date=AUDIT_DATE).count() == 2
+
+    def test_diff_and_state(self, draft):
+        nas = _nas()
+        before = SessionSnapshot.take(nas, 'submit')
+        nas.cash_ls_lecture = 7.0
+        nas.set_json('transelect_restaurant', {'VISA': {'t1': 10.0}})
+        after = SessionSnapshot.of(nas)
+
+        assert before.diff(after) == {
+            'recap': {'cash_ls_lecture': [5.0, 7.0]},
+            'transelect': {'transelect_restaurant': [{}, {'VISA': {'t1': 10.0}}]},
+        }
+        assert after.diff(after) == {}
+        assert before.state()['cash_ls_lecture'] == 5.0 and 'status' not in before.state()
+
+
+class TestCorrectionSnapshots:
+
+    def test_submit_unlock_relock(self, draft, client):
+        _submit_and_unlock(client)
+        _save_recap(client, cash_ls_lecture=10)
+        resp = client.post(f'/api/rj/correction/relock/{AUDIT_DATE.isoformat()}', json={})
+
+        data = client.get(SNAPSHOTS).get_json()
+        kinds = [s['kind'] for s in data['snapshots']]
+        assert kinds == ['submit', 'unlock', 'relock']
+        submit, unlock, relock = data['snapshots']
+        assert submit['hash'] == unlock['hash'] != relock['hash']
+        assert relock['hash'] == data['current'] == resp.get_json()['snapshot']
+
+        diff = client.get(f"{SNAPSHOTS}/diff?from={submit['hash'][:10]}&to={relock['id']}").get_json()
+        assert diff['changes']['recap']['cash_ls_lecture'] == [5.0, 10.0]
+        assert diff['identical'] is False
+
+        state = client.get(f"{SNAPSHOTS}/{submit['id']}").get_json()
+        assert (state['kind'], state['session']['cash_ls_lecture']) == ('submit', 5.0)
+
+    def test_rollback_in_one_call(self, draft, client):
+        _submit_and_unlock(client)
+        _save_recap(client, cash_ls_lecture=10, deposit_cdn=3)
+        submit = client.get(SNAPSHOTS).get_json()['snapshots'][0]
+
+        resp = client.post(f"{SNAPSHOTS}/rollback/{submit['hash']}")
+        data = resp.get_json()
+        assert resp.status_code == 200
+        assert data['snapshot'] == data['restored'] == submit['hash']
+        assert data['changes']['recap']['deposit_cdn'] == [3.0, 12.0]
+
+        nas = _nas()
+        assert (nas.cash_ls_lecture, nas.deposit_cdn, nas.status) == (5.0, 12.0, 'correcting')
+        rollback = SessionChangeSet.query.filter_by(audit_date=AUDIT_DATE, kind='rollback').one()
+        assert rollback.changes['recap']['cash_ls_lecture'] == [10.0, 5.0]
+        assert client.get(f'{SNAPSHOTS}/diff').get_json()['identical']
+
+    def test_rollback_requires_correction(self, draft, client):
+        snapshot = SessionSnapshot.take(_nas(), 'submit')
+        draft.session.commit()
+        assert client.post(f'{SNAPSHOTS}/rollback/{snapshot.id}').status_code == 403
+        _submit_and_unlock(client)
+        assert client.post(f'{SNAPSHOTS}/rollback/abc').status_code == 404
+        assert client.get(f'{SNAPSHOTS}/diff?from=999999').status_code == 404
+
+
+class TestVersionKey:
+
+    def test_manual_sync_skips_unchanged(self, draft, client):
+        url = f'/api/rj/native/sync/{AUDIT_DATE.isoformat()}'
+        first = client.post(url).get_json()
+        second = client.post(url).get_json()
+        assert (first['unchanged'], second['unchanged']) == (False, True)
+        assert second['version'] == first['version']
+        assert client.post(f'{url}?force=1').get_json()['unchanged'] is False
+
+    def test_rj_export_etag(self, draft, client, app, tmp_path):
+        from benchmarks.synthetic import rj_workbook
+        from utils import rj_template_cache
+        path = tmp_path / 'Rj Vierge.xls'
+        path.write_bytes(rj_workbook(vba=False))
+        app.config['RJ_TEMPLATE_PATH'] = str(path)
+        rj_template_cache.clear()
+        url = f'/api/rj/native/export/rj/{AUDIT_DATE.isoformat()}'
+        try:
+            resp = client.get(url)
+            assert resp.status_code == 200 and resp.get_etag()[0].startswith(SessionSnapshot.content_hash(_nas()))
+            assert client.get(url, headers={'If-None-Match': resp.headers['ETag']}).status_code == 304
+
+            _nas().cash_ls_lecture = 8.0
+            draft.session.commit()
+            assert client.get(url, headers={'If-None-Match': resp.headers['ETag']}).status_code == 200
+        finally:
+            rj_template_cache.clear()
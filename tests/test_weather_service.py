@@ -0,0 +1,203 @@
+"""Tests for the cached weather service (local Open-Meteo / OpenWeather stub)."""
+
+import json
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+from utils.weather_service import WeatherService, WeatherUnavailable, data_hash
+
+
+def _open_meteo(date_str, temp):
+    hours = [f'{date_str}T{h:02d}:00' for h in range(24)]
+    return {
+        'hourly': {
+            'time': hours,
+            'temperature_2m': [temp] * 24,
+            'apparent_temperature': [temp - 5] * 24,
+            'weathercode': [71] * 24,
+            'windspeed_10m': [20] * 24,
+            'winddirection_10m': [270] * 24,
+            'windgusts_10m': [40] * 24,
+            'relativehumidity_2m': [80] * 24,
+            'precipitation_probability': [60] * 24,
+            'snowfall': [0.2] * 24,
+        },
+        'daily': {
+            'temperature_2m_max': [temp + 2], 'temperature_2m_min': [temp - 2],
+            'weathercode': [71], 'precipitation_sum': [3.4], 'windspeed_10m_max': [30],
+        },
+    }
+
+
+class _WeatherStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        stub = self.server.stub
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        with self.server.lock:
+            stub.calls[url.path] += 1
+        time.sleep(stub.delay)
+        if stub.fail:
+            payload, status = {'error': 'down'}, 503
+        elif url.path == '/forecast':
+            payload, status = _open_meteo(query['start_date'][0], stub.temp), 200
+        else:
+            payload, status = {
+                'main': {'temp': stub.temp, 'feels_like': stub.temp - 5, 'humidity': 80},
+                'weather': [{'description': 'neige légère', 'icon': '13n'}],
+                'wind': {'speed': 5},
+            }, 200
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def weather_stub():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _WeatherStubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.stub = SimpleNamespace(calls=Counter(), delay=0, fail=False, temp=-6)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.stub.base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    yield server.stub
+    server.shutdown()
+    server.server_close()
+
+
+def _service(stub, **extra):
+    return WeatherService(config={
+        'OPEN_METEO_URL': f'{stub.base_url}/forecast',
+        'OPENWEATHER_URL': f'{stub.base_url}/ow',
+        'OPENWEATHER_API_KEY': 'key',
+        'WEATHER_PREFETCH_ENABLED': False,
+        'WEATHER_TIMEOUT': 5,
+        **extra,
+    })
+
+
+class TestForecastCache:
+
+    def test_forecast_is_cached_per_date(self, weather_stub):
+        service = _service(weather_stub)
+        first = service.get_forecast('2026-02-10')
+        service.get_forecast('2026-02-10')
+        service.get_forecast('2026-02-11')
+        assert first['periods'][0]['description'] == 'Neige légère'
+        assert first['temp_max'] == -4
+        assert weather_stub.calls['/forecast'] == 2
+
+    def test_concurrent_misses_are_coalesced(self, weather_stub):
+        weather_stub.delay = 0.2
+        service = _service(weather_stub)
+        threads = [threading.Thread(target=service.get_forecast, args=('2026-02-10',))
+                   for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert weather_stub.calls['/forecast'] == 1
+
+    def test_stale_value_served_while_revalidating(self, weather_stub):
+        service = _service(weather_stub, WEATHER_CACHE_TTL=0.1)
+        service.get_forecast('2026-02-10')
+        time.sleep(0.15)
+        weather_stub.delay = 0.5
+        weather_stub.temp = 2
+
+        t0 = time.perf_counter()
+        stale = service.get_forecast('2026-02-10')
+        assert time.perf_counter() - t0 < 0.2
+        assert stale['temp_max'] == -4
+
+        time.sleep(0.7)
+        assert service.get_forecast('2026-02-10')['temp_max'] == 4
+        assert weather_stub.calls['/forecast'] == 2
+
+    def test_slow_upstream_falls_back_to_old_value(self, weather_stub):
+        service = _service(weather_stub, WEATHER_CACHE_TTL=0.05,
+                           WEATHER_STALE_SECONDS=0, WEATHER_STALE_WAIT=0.1)
+        service.get_forecast('2026-02-10')
+        time.sleep(0.1)
+        weather_stub.delay = 1.0
+
+        t0 = time.perf_counter()
+        result = service.get_forecast('2026-02-10')
+        assert time.perf_counter() - t0 < 0.5
+        assert result['temp_max'] == -4
+
+    def test_failure_without_cache_raises(self, weather_stub):
+        weather_stub.fail = True
+        with pytest.raises(WeatherUnavailable):
+            _service(weather_stub).get_forecast('2026-02-10')
+
+    def test_failure_with_cache_serves_last_good_value(self, weather_stub):
+        service = _service(weather_stub, WEATHER_CACHE_TTL=0.05, WEATHER_STALE_SECONDS=0)
+        service.get_forecast('2026-02-10')
+        time.sleep(0.1)
+        weather_stub.fail = True
+        assert service.get_forecast('2026-02-10')['temp_max'] == -4
+
+    def test_current_conditions(self, weather_stub):
+        service = _service(weather_stub)
+        current = service.get_current()
+        service.get_current()
+        assert current['temperature'] == -6
+        assert current['wind_speed'] == 18
+        assert weather_stub.calls['/ow/weather'] == 1
+
+
+class TestWeatherCards:
+
+    def test_card_rendered_once_per_forecast(self, weather_stub):
+        service = _service(weather_stub)
+        png = service.get_card_png('2026-02-10')
+        assert png.startswith(b'\x89PNG')
+        assert service.get_card_png('2026-02-10') is png
+
+    def test_identical_forecast_reuses_card(self, weather_stub):
+        service = _service(weather_stub)
+        data = service.get_forecast('2026-02-10')
+        png = service.render_card(dict(data))
+        assert service.render_card(dict(data)) is png
+        # The footer shows fetched_at: a newer capture is a new card
+        assert service.render_card({**data, 'fetched_at': '2099-01-01 00:00'}) is not png
+
+    def test_hash_includes_fetch_time(self, weather_stub):
+        data = _service(weather_stub).get_forecast('2026-02-10')
+        assert data_hash(data) == data_hash(dict(data))
+        assert data_hash(data) != data_hash({**data, 'fetched_at': 'later'})
+
+
+class TestPrefetch:
+
+    def test_prefetch_fills_data_and_cards(self, weather_stub):
+        service = _service(weather_stub)
+        results = service.prefetch(['2026-02-10', '2026-02-11'])
+        assert results == {'2026-02-10': True, '2026-02-11': True}
+        assert len(service._cards) == 2
+
+        weather_stub.fail = True
+        assert service.get_card_png('2026-02-11').startswith(b'\x89PNG')
+        assert service.peek_forecast('2026-02-10')['date'] == '2026-02-10'
+
+    def test_prefetch_schedule(self, weather_stub):
+        service = _service(weather_stub, WEATHER_PREFETCH_HOUR=22)
+        assert service.seconds_until_prefetch(datetime(2026, 2, 10, 21, 0)) == 3600
+        assert service.seconds_until_prefetch(datetime(2026, 2, 10, 23, 0)) == 23 * 3600
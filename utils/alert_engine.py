@@ -5,13 +5,17 @@ Features:
 - Quasimodo variance checking
 - Occupation rate monitoring
 - Revenue comparison vs. budget/LY
+- Abnormal nights (stored anomaly scores, see utils/anomaly_scorer.py)
 - Late submission detection
 - Daily summary generation
 """
 
 import logging
 from datetime import datetime, date as date_type, timedelta
-from database.models import NightAuditSession, User, NotificationPreference, DailyReport
+from sqlalchemy import and_
+from database.models import (
+    db, NightAuditSession, User, NotificationPreference, DailyReport, DailyAnomalyScore,
+)
 from flask import current_app
 
 logger = logging.getLogger(__name__)
@@ -43,6 +47,7 @@ class AlertEngine:
         alerts.append(self.check_variance(session_data))
         alerts.append(self.check_occupation(session_data))
         alerts.append(self.check_revenue(session_data))
+        alerts.append(self.check_anomaly(session_data))
 
         # Filter out None/non-triggered alerts
         return [a for a in alerts if a and a.get('triggered')]
@@ -190,6 +195,56 @@ class AlertEngine:
                 'data': {}
             }
 
+    def check_anomaly(self, session_data):
+        """
+        Read the anomaly score stored for the night when it was synced.
+
+        Returns:
+            dict: {triggered: bool, severity, message, data}
+        """
+        try:
+            if isinstance(session_data, NightAuditSession):
+                audit_date = session_data.audit_date
+            else:
+                audit_date = session_data.get('audit_date')
+
+            threshold = current_app.config.get('ANOMALY_Z_THRESHOLD', 2.0)
+            row = DailyAnomalyScore.query.filter_by(date=audit_date).first() if audit_date else None
+            if row is None or not row.is_flagged:
+                return {
+                    'triggered': False,
+                    'severity': self.SEVERITY_INFO,
+                    'alert_type': 'anomaly_detected',
+                    'message': "Aucune anomalie détectée",
+                    'data': {'date': str(audit_date)},
+                }
+
+            from utils.anomaly_scorer import METRICS
+            flagged = row.flagged_metrics(threshold)
+            parts = [
+                f"{METRICS[m][1]}: {s['value']:,.2f} (attendu {s['expected']:,.2f}, z={s['score']:+.1f})"
+                for m, s in flagged
+            ]
+            return {
+                'triggered': True,
+                'severity': self.SEVERITY_CRITICAL if row.severity == 'critical' else self.SEVERITY_WARNING,
+                'alert_type': 'anomaly_detected',
+                'message': "Nuit atypique — " + '; '.join(parts),
+                'data': {
+                    'date': str(audit_date),
+                    'max_abs_score': round(row.max_abs_score or 0, 2),
+                    'metrics': {m: s for m, s in flagged},
+                }
+            }
+        except Exception as e:
+            logger.error(f"Error checking anomaly: {str(e)}")
+            return {
+                'triggered': False,
+                'severity': self.SEVERITY_INFO,
+                'message': f"Erreur lors de la vérification d'anomalie: {str(e)}",
+                'data': {}
+            }
+
     def check_late_submission(self, audit_date):
         """
         Check if RJ session for date was not submitted by deadline.
@@ -330,22 +385,32 @@ class AlertEngine:
                 'variance_alert': ['gm', 'accounting', 'admin'],
                 'occupation_low': ['gm', 'gsm', 'admin'],
                 'revenue_drop': ['gm', 'gsm', 'admin'],
+                'anomaly_detected': ['gm', 'gsm', 'admin'],
                 'daily_summary': ['gm', 'gsm', 'admin'],
             }
 
             roles = role_map.get(alert_type, ['admin'])
-            users = User.query.filter(User.role.in_(roles), User.is_active == True).all()
 
-            # Filter by preferences
+            # Users + their preference for this event in one joined query
+            rows = (
+                db.session.query(User, NotificationPreference.is_enabled)
+                .outerjoin(NotificationPreference, and_(
+                    NotificationPreference.user_id == User.id,
+                    NotificationPreference.event_type == alert_type,
+                ))
+                .filter(User.role.in_(roles), User.is_active == True)
+                .order_by(User.id, NotificationPreference.id)
+                .all()
+            )
+
+            # Include if no preference set (default), or if preference is enabled
             eligible = []
-            for user in users:
-                pref = NotificationPreference.query.filter_by(
-                    user_id=user.id,
-                    event_type=alert_type
-                ).first()
-
-                # Include if no preference set (default), or if preference is enabled
-                if not pref or pref.is_enabled:
+            seen = set()
+            for user, is_enabled in rows:
+                if user.id in seen:
+                    continue
+                seen.add(user.id)
+                if is_enabled is None or is_enabled:
                     eligible.append(user)
 
             return eligible
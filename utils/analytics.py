@@ -1061,12 +1061,14 @@ class HistoricalAnalytics:
 
     def __init__(self, start_date, end_date):
         from database.models import DailyJourMetrics
+        from database.engine import read_session
         self.start_date = start_date
         self.end_date = end_date
-        self.metrics = DailyJourMetrics.query.filter(
-            DailyJourMetrics.date >= start_date,
-            DailyJourMetrics.date <= end_date
-        ).order_by(DailyJourMetrics.date).all()
+        with read_session() as s:
+            self.metrics = s.query(DailyJourMetrics).filter(
+                DailyJourMetrics.date >= start_date,
+                DailyJourMetrics.date <= end_date
+            ).order_by(DailyJourMetrics.date).all()
 
     def has_data(self):
         return len(self.metrics) > 0
@@ -1285,24 +1287,26 @@ class HistoricalAnalytics:
         }
 
     def get_anomalies(self):
-        """Anomaly detection from DB data."""
+        """Anomaly alerts from the per-day scores stored at sync time."""
         if len(self.metrics) < 3:
             return {'alerts': [], 'insights': []}
 
+        from utils.anomaly_scorer import get_anomaly_scorer
+
         alerts = []
         insights = []
 
-        avg_occ = sum(m.occupancy_rate for m in self.metrics) / len(self.metrics)
-        avg_adr = sum(m.adr for m in self.metrics) / len(self.metrics)
-        avg_fb = sum(m.fb_revenue for m in self.metrics) / len(self.metrics)
+        for a in get_anomaly_scorer().anomalies(start=self.start_date, end=self.end_date):
+            d = date_type.fromisoformat(a['date'])
+            alerts.append({
+                'day': d.day, 'date': a['date'],
+                'type': f"{a['direction']}_{a['metric']}",
+                'severity': 'danger' if a['severity'] == 'critical' else 'warning',
+                'message': f'{d.strftime("%d %b %Y")}: {a["label"]} {a["value"]:,.0f} '
+                           f'vs attendu {a["expected"]:,.0f} (z={a["z_score"]:+.1f})',
+            })
 
         for m in self.metrics:
-            if m.occupancy_rate < avg_occ * 0.7 and m.occupancy_rate > 0:
-                alerts.append({
-                    'day': m.day_of_month, 'date': m.date.isoformat(),
-                    'type': 'low_occupancy', 'severity': 'warning',
-                    'message': f'{m.date.strftime("%d %b %Y")}: Occ {m.occupancy_rate:.0f}% vs moy {avg_occ:.0f}%',
-                })
             if abs(m.cash_difference) > 50:
                 alerts.append({
                     'day': m.day_of_month, 'date': m.date.isoformat(),
@@ -1658,30 +1662,32 @@ class HistoricalAnalytics:
 
     def get_monthly_summary(self):
         """Monthly aggregates for multi-year trending."""
-        from database.models import DailyJourMetrics, db
+        from database.models import DailyJourMetrics
+        from database.engine import read_session
         from sqlalchemy import func
 
-        rows = db.session.query(
-            DailyJourMetrics.year,
-            DailyJourMetrics.month,
-            func.count(DailyJourMetrics.id).label('days'),
-            func.avg(DailyJourMetrics.adr).label('avg_adr'),
-            func.avg(DailyJourMetrics.revpar).label('avg_revpar'),
-            func.avg(DailyJourMetrics.occupancy_rate).label('avg_occ'),
-            func.sum(DailyJourMetrics.total_revenue).label('total_rev'),
-            func.sum(DailyJourMetrics.room_revenue).label('room_rev'),
-            func.sum(DailyJourMetrics.fb_revenue).label('fb_rev'),
-            func.avg(DailyJourMetrics.nb_clients).label('avg_clients'),
-        ).filter(
-            DailyJourMetrics.date >= self.start_date,
-            DailyJourMetrics.date <= self.end_date
-        ).group_by(
-            DailyJourMetrics.year,
-            DailyJourMetrics.month
-        ).order_by(
-            DailyJourMetrics.year,
-            DailyJourMetrics.month
-        ).all()
+        with read_session() as s:
+            rows = s.query(
+                DailyJourMetrics.year,
+                DailyJourMetrics.month,
+                func.count(DailyJourMetrics.id).label('days'),
+                func.avg(DailyJourMetrics.adr).label('avg_adr'),
+                func.avg(DailyJourMetrics.revpar).label('avg_revpar'),
+                func.avg(DailyJourMetrics.occupancy_rate).label('avg_occ'),
+                func.sum(DailyJourMetrics.total_revenue).label('total_rev'),
+                func.sum(DailyJourMetrics.room_revenue).label('room_rev'),
+                func.sum(DailyJourMetrics.fb_revenue).label('fb_rev'),
+                func.avg(DailyJourMetrics.nb_clients).label('avg_clients'),
+            ).filter(
+                DailyJourMetrics.date >= self.start_date,
+                DailyJourMetrics.date <= self.end_date
+            ).group_by(
+                DailyJourMetrics.year,
+                DailyJourMetrics.month
+            ).order_by(
+                DailyJourMetrics.year,
+                DailyJourMetrics.month
+            ).all()
 
         return [{
             'year': r.year,
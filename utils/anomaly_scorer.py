@@ -0,0 +1,300 @@
+"""
+Anomaly Scorer — Streaming z-scores for each night, computed at sync time.
+
+Features:
+- Welford running mean / variance per metric (revenue, occupancy, ADR,
+  F&B, card totals) in three scopes: global, per month, per day of week
+- O(1) update when sync_to_dashboard() writes a day: the night is scored
+  against the statistics of the nights before it, then folded in
+- Re-synced nights first remove their previous contribution (values kept
+  in `daily_anomaly_scores.values_json`)
+- Per-day score table read by the anomaly endpoints and the AlertEngine
+- Imports (JourImporter.persist_batch) score their days the same way;
+  sync() back-fills unscored history from the CLI only, reads never write
+- Writers are serialised by a process lock; stat and score rows are
+  created with INSERT … ON CONFLICT so concurrent workers cannot duplicate
+  them
+
+A metric's score is the smallest |z| among the scopes with enough samples:
+a busy Saturday in July is only flagged if it is unusual for the year,
+for July and for Saturdays.
+"""
+
+import json
+import logging
+import threading
+from datetime import datetime
+
+from flask import current_app, has_app_context
+
+from database.models import db, upsert_insert, DailyJourMetrics, AnomalyStat, DailyAnomalyScore
+
+logger = logging.getLogger(__name__)
+
+# metric key → (DailyJourMetrics column, French label)
+METRICS = {
+    'revenue': ('total_revenue', 'Revenu total'),
+    'occupancy': ('occupancy_rate', "Taux d'occupation"),
+    'adr': ('adr', 'ADR'),
+    'fb': ('fb_revenue', 'Revenu F&B'),
+    'cards': ('total_cards', 'Total cartes'),
+}
+SCOPES = ('global', 'month', 'dow')
+
+# Statistics are read-modify-write: one writer at a time per process
+_write_lock = threading.Lock()
+
+
+def welford_add(n, mean, m2, x):
+    """Fold x into (n, mean, m2)."""
+    n += 1
+    delta = x - mean
+    mean += delta / n
+    m2 += delta * (x - mean)
+    return n, mean, m2
+
+
+def welford_remove(n, mean, m2, x):
+    """Inverse of welford_add: take x back out of (n, mean, m2)."""
+    if n <= 1:
+        return 0, 0.0, 0.0
+    new_mean = (n * mean - x) / (n - 1)
+    m2 -= (x - mean) * (x - new_mean)
+    return n - 1, new_mean, max(m2, 0.0)
+
+
+def day_values(djm):
+    """Scored metric values for a DailyJourMetrics row, or None for an empty day."""
+    if (djm.total_revenue or 0) <= 0:
+        return None
+    return {key: float(getattr(djm, column) or 0) for key, (column, _) in METRICS.items()}
+
+
+def _buckets(d):
+    return {'global': 0, 'month': d.month, 'dow': d.weekday()}
+
+
+class AnomalyScorer:
+    """Maintain the running statistics and the per-day score table."""
+
+    def __init__(self, app=None):
+        self.threshold = 2.0
+        self.critical = 3.0
+        self.min_samples = 10
+
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read ANOMALY_* config and register on `app.extensions`."""
+        self.threshold = app.config.get('ANOMALY_Z_THRESHOLD', 2.0)
+        self.critical = app.config.get('ANOMALY_CRITICAL_Z', 3.0)
+        self.min_samples = app.config.get('ANOMALY_MIN_SAMPLES', 10)
+        app.extensions['anomaly_scorer'] = self
+
+    # ── Writing ────────────────────────────────────────────────────────
+
+    def record_day(self, djm):
+        """
+        Score one night and fold it into the statistics.
+
+        Called by sync_to_dashboard(); flushes but leaves the commit to the
+        caller so scores land in the same transaction as the metrics.
+
+        Returns:
+            DailyAnomalyScore or None (empty day)
+        """
+        return self._score_days([djm]).get(djm.date)
+
+    def record_days(self, days):
+        """
+        Score a batch of imported days (see record_day); flushes only.
+
+        Returns:
+            dict: date → DailyAnomalyScore for the non-empty days
+        """
+        return self._score_days(days)
+
+    def sync(self):
+        """
+        Score every DailyJourMetrics day that has no score row yet
+        (first run, legacy imports), oldest first, and commit. CLI only:
+        request handlers never call it.
+
+        Returns:
+            int: number of days scored
+        """
+        missing = (
+            DailyJourMetrics.query
+            .outerjoin(DailyAnomalyScore, DailyAnomalyScore.date == DailyJourMetrics.date)
+            .filter(DailyAnomalyScore.id.is_(None), DailyJourMetrics.total_revenue > 0)
+            .order_by(DailyJourMetrics.date)
+            .all()
+        )
+        if not missing:
+            return 0
+        scored = self._score_days(missing)
+        db.session.commit()
+        logger.info(f"Anomaly scores: {len(scored)} day(s) scored")
+        return len(scored)
+
+    def rebuild(self):
+        """Drop all statistics and scores, then re-score the full history."""
+        DailyAnomalyScore.query.delete()
+        AnomalyStat.query.delete()
+        db.session.flush()
+        return self.sync()
+
+    def _score_days(self, days):
+        """Score `days` in date order against prior statistics, then fold each in."""
+        if not days:
+            return {}
+        with _write_lock:
+            return self._score_days_locked(days)
+
+    def _score_days_locked(self, days):
+        self._ensure_rows(days)
+        stats = {(s.metric, s.scope, s.bucket): s
+                 for s in AnomalyStat.query.populate_existing().all()}
+        dates = [d.date for d in days]
+        existing = {r.date: r for r in
+                    DailyAnomalyScore.query.populate_existing()
+                    .filter(DailyAnomalyScore.date.in_(dates))}
+
+        scored = {}
+        for djm in sorted(days, key=lambda m: m.date):
+            row = existing.get(djm.date)
+            buckets = _buckets(djm.date)
+            if row is not None:
+                self._fold(stats, row.get_values(), buckets, welford_remove)
+
+            values = day_values(djm)
+            if values is None:
+                if row is not None:
+                    db.session.delete(row)
+                continue
+
+            scores = self.score_values(values, djm.date, stats)
+            self._fold(stats, values, buckets, welford_add)
+
+            worst = max((abs(s['score']) for s in scores.values() if s['score'] is not None),
+                        default=0.0)
+            row.values_json = json.dumps(values)
+            row.scores_json = json.dumps(scores)
+            row.max_abs_score = worst
+            row.is_flagged = worst > self.threshold
+            row.severity = ('critical' if worst > self.critical
+                            else 'warning' if row.is_flagged else 'info')
+            row.scored_at = datetime.utcnow()
+            scored[djm.date] = row
+
+        db.session.flush()
+        return scored
+
+    def score_values(self, values, d, stats):
+        """
+        z-scores of `values` for night `d` against `stats` (not yet including it).
+
+        Returns:
+            dict: metric → {value, expected, z: {scope: z}, score}
+        """
+        buckets = _buckets(d)
+        result = {}
+        for metric, x in values.items():
+            z_by_scope, best = {}, None
+            for scope in SCOPES:
+                stat = stats.get((metric, scope, buckets[scope]))
+                if stat is None or stat.n < self.min_samples or stat.std == 0:
+                    continue
+                z = (x - stat.mean) / stat.std
+                z_by_scope[scope] = round(z, 2)
+                if best is None or abs(z) < abs(best[0]):
+                    best = (z, stat.mean)
+            result[metric] = {
+                'value': round(x, 2),
+                'expected': round(best[1], 2) if best else None,
+                'z': z_by_scope,
+                'score': round(best[0], 2) if best else None,
+            }
+        return result
+
+    @staticmethod
+    def _ensure_rows(days):
+        """
+        Create the missing stat rows and the score rows of the non-empty
+        `days` (empty values, nothing folded yet); existing rows are kept.
+        """
+        keys = {(metric, scope, _buckets(d.date)[scope])
+                for d in days for metric in METRICS for scope in SCOPES}
+        db.session.execute(
+            upsert_insert(AnomalyStat)
+            .values([{'metric': m, 'scope': s, 'bucket': b, 'n': 0, 'mean': 0.0, 'm2': 0.0}
+                     for m, s, b in sorted(keys)])
+            .on_conflict_do_nothing(index_elements=['metric', 'scope', 'bucket'])
+        )
+        new = sorted({d.date for d in days if day_values(d) is not None})
+        now = datetime.utcnow()
+        for i in range(0, len(new), 100):   # stay under SQLite's bound-variable limit
+            db.session.execute(
+                upsert_insert(DailyAnomalyScore)
+                .values([{'date': d, 'values_json': '{}', 'scores_json': '{}',
+                          'max_abs_score': 0.0, 'is_flagged': False, 'severity': 'info',
+                          'scored_at': now} for d in new[i:i + 100]])
+                .on_conflict_do_nothing(index_elements=['date'])
+            )
+
+    @staticmethod
+    def _fold(stats, values, buckets, op):
+        for metric, x in values.items():
+            for scope in SCOPES:
+                stat = stats[(metric, scope, buckets[scope])]
+                stat.n, stat.mean, stat.m2 = op(stat.n, stat.mean, stat.m2, x)
+
+    # ── Reading ────────────────────────────────────────────────────────
+
+    def flagged_days(self, start=None, end=None, limit=None):
+        """Flagged DailyAnomalyScore rows in [start, end], worst first."""
+        q = DailyAnomalyScore.query.filter(DailyAnomalyScore.is_flagged == True)
+        if start:
+            q = q.filter(DailyAnomalyScore.date >= start)
+        if end:
+            q = q.filter(DailyAnomalyScore.date <= end)
+        q = q.order_by(DailyAnomalyScore.max_abs_score.desc())
+        return q.limit(limit).all() if limit else q.all()
+
+    def anomalies(self, start=None, end=None, limit=None):
+        """
+        One entry per flagged metric per night:
+        {date, metric, label, value, expected, z_score, deviation_pct, direction, severity}
+        """
+        items = []
+        for row in self.flagged_days(start, end):
+            for metric, s in row.flagged_metrics(self.threshold):
+                expected = s['expected'] or 0
+                items.append({
+                    'date': row.date.isoformat(),
+                    'metric': metric,
+                    'label': METRICS[metric][1],
+                    'value': s['value'],
+                    'expected': s['expected'],
+                    'z_score': s['score'],
+                    'deviation_pct': round((s['value'] - expected) / expected * 100, 1)
+                    if expected else None,
+                    'direction': 'high' if s['score'] > 0 else 'low',
+                    'severity': 'critical' if abs(s['score']) > self.critical else 'warning',
+                })
+        items.sort(key=lambda a: abs(a['z_score']), reverse=True)
+        return items[:limit] if limit else items
+
+    def global_stat(self, metric):
+        return AnomalyStat.query.filter_by(metric=metric, scope='global', bucket=0).first()
+
+
+def get_anomaly_scorer():
+    """The app's AnomalyScorer (created on first use if not registered)."""
+    if has_app_context():
+        scorer = current_app.extensions.get('anomaly_scorer')
+        if scorer is None:
+            scorer = AnomalyScorer(current_app._get_current_object())
+        return scorer
+    return AnomalyScorer()
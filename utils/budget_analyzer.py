@@ -9,6 +9,7 @@ import calendar
 import csv
 import io
 from database.models import db, MonthlyBudget, DailyJourMetrics
+from utils import budget_variance
 
 
 class BudgetAnalyzer:
@@ -257,54 +258,8 @@ class BudgetAnalyzer:
         }
 
     def get_ytd_summary(self):
-        """Get year-to-date variance summary."""
-        ytd_variance = []
-
-        month_names = [
-            'janvier', 'février', 'mars', 'avril', 'mai', 'juin',
-            'juillet', 'août', 'septembre', 'octobre', 'novembre', 'décembre'
-        ]
-
-        for m in range(1, 13):
-            analyzer = BudgetAnalyzer(self.year, m)
-            report = analyzer.get_variance_report()
-
-            if report['has_budget'] and report['has_actuals']:
-                # Find revenue total item
-                rev_item = next((v for v in report['variance_items'] if v.get('total')), None)
-                if rev_item:
-                    ytd_variance.append({
-                        'month': m,
-                        'month_label': month_names[m - 1],
-                        'budget': rev_item['budget'],
-                        'actual': rev_item['actual'],
-                        'variance': rev_item['variance'],
-                        'variance_pct': rev_item['variance_pct'],
-                    })
-                else:
-                    ytd_variance.append({
-                        'month': m,
-                        'month_label': month_names[m - 1],
-                        'budget': report['budget']['total_revenue'],
-                        'actual': report['actual']['total_revenue'],
-                        'variance': report['actual']['total_revenue'] - report['budget']['total_revenue'],
-                        'variance_pct': ((report['actual']['total_revenue'] - report['budget']['total_revenue']) / report['budget']['total_revenue'] * 100) if report['budget']['total_revenue'] != 0 else 0,
-                    })
-
-        # Calculate YTD totals
-        ytd_budget_sum = sum(item['budget'] for item in ytd_variance)
-        ytd_actual_sum = sum(item['actual'] for item in ytd_variance)
-        ytd_variance_sum = ytd_actual_sum - ytd_budget_sum
-        ytd_variance_pct = (ytd_variance_sum / ytd_budget_sum * 100) if ytd_budget_sum != 0 else 0
-
-        return {
-            'year': self.year,
-            'monthly': ytd_variance,
-            'ytd_budget': round(ytd_budget_sum, 2),
-            'ytd_actual': round(ytd_actual_sum, 2),
-            'ytd_variance': round(ytd_variance_sum, 2),
-            'ytd_variance_pct': round(ytd_variance_pct, 2),
-        }
+        """Get year-to-date variance summary (single pass, see utils/budget_variance.py)."""
+        return budget_variance.ytd(self.year).summary()
 
     @staticmethod
     def parse_budget_csv(file_content):
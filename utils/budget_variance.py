@@ -0,0 +1,259 @@
+"""
+Budget Variance — single-pass YTD / rolling-12 budget vs actual.
+
+Features:
+- Budgets of the whole window in one MonthlyBudget query, actuals in one
+  DailyJourMetrics query grouped by (year, month) — no per-month analyzer
+- Every line item of every month as (months × items) matrices; variance,
+  variance % and favorable flags computed element-wise in one pass
+  (numpy when installed, plain Python otherwise)
+- One VarianceFrame feeds /api/budget/ytd, /api/budget/rolling, the RJ PDF
+  budget columns and the CRM P&L tab
+"""
+
+import calendar
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+
+from database.models import db, DailyJourMetrics, MonthlyBudget, TOTAL_ROOMS
+from utils.lazy_import import lazy_module, has_module
+
+HAS_NUMPY = has_module('numpy')
+np = lazy_module('numpy') if HAS_NUMPY else None
+
+MONTH_NAMES = [
+    'janvier', 'février', 'mars', 'avril', 'mai', 'juin',
+    'juillet', 'août', 'septembre', 'octobre', 'novembre', 'décembre'
+]
+
+# Actual key → summed DailyJourMetrics column
+ACTUAL_SUMS = {
+    'rooms_sold': 'total_rooms_sold',
+    'room_revenue': 'room_revenue',
+    'location_salle': 'other_revenue',  # placeholder, as in BudgetAnalyzer
+    'piazza': 'piazza_total',
+    'banquet': 'banquet_total',
+    'spesa': 'spesa_total',
+    'fb_revenue': 'fb_revenue',
+    'total_revenue': 'total_revenue',
+    'rooms_available': 'rooms_available',
+    'total_nourriture': 'total_nourriture',
+    'total_boisson': 'total_boisson',
+    'total_bieres': 'total_bieres',
+    'total_vins': 'total_vins',
+    'total_mineraux': 'total_mineraux',
+}
+
+BUDGET_COLUMNS = [c.key for c in MonthlyBudget.__table__.columns
+                  if c.key not in ('id', 'year', 'month', 'property_id', 'created_at', 'updated_at')]
+LABOR_COLUMNS = [c for c in BUDGET_COLUMNS if c.startswith('labor_')]
+FB_COLUMNS = ('giotto', 'piazza', 'cupola', 'banquet', 'spesa')
+
+# (key, label, budget column, actual key, variance % when the budget is 0 and actual > 0)
+# Same line items and rules as BudgetAnalyzer.get_variance_report.
+ITEMS = (
+    ('room_revenue', 'Chambres', 'room_revenue', 'room_revenue', 100.0),
+    ('piazza', 'Piazza', 'piazza', 'piazza', 100.0),
+    ('banquet', 'Banquet', 'banquet', 'banquet', 100.0),
+    ('spesa', 'Spesa', 'spesa', 'spesa', 100.0),
+    ('giotto', 'Giotto', 'giotto', None, 100.0),  # not tracked in DailyJourMetrics
+    ('location_salle', 'Location Salle', 'location_salle', 'location_salle', 100.0),
+    ('total_revenue', 'Revenu Total', 'total_revenue', 'total_revenue', 0.0),
+    ('rooms_sold', 'Chambres Vendues', 'rooms_target', 'rooms_sold', 0.0),
+    ('adr', 'Tarif Moyen (ADR)', 'adr_target', 'adr', 0.0),
+)
+ITEM_INDEX = {key: i for i, (key, *_rest) in enumerate(ITEMS)}
+REVENUE_ITEMS = 6   # the first six only show when budget or actual is non-zero
+TOTAL_ITEM = ITEM_INDEX['total_revenue']
+ZERO_PCT = [item[4] for item in ITEMS]
+
+Period = Tuple[int, int]
+
+
+def _month_index(year, month):
+    return year * 12 + month - 1
+
+
+def _periods(start: date, end: date) -> List[Period]:
+    return [(i // 12, i % 12 + 1)
+            for i in range(_month_index(start.year, start.month), _month_index(end.year, end.month) + 1)]
+
+
+def _variances(budget, actual):
+    """Variance and variance % of (rows × ITEMS) matrices, element-wise."""
+    if HAS_NUMPY:
+        b = np.asarray(budget, dtype=float).reshape(-1, len(ITEMS))
+        a = np.asarray(actual, dtype=float).reshape(-1, len(ITEMS))
+        v = a - b
+        safe = np.where(b != 0, b, 1.0)
+        p = np.where(b != 0, v / safe * 100, np.where(a > 0, np.asarray(ZERO_PCT), 0.0))
+        return v.tolist(), p.tolist()
+    v = [[x - y for x, y in zip(ra, rb)] for ra, rb in zip(actual, budget)]
+    p = [[(vi / bi * 100) if bi != 0 else (z if ai > 0 else 0.0)
+          for vi, bi, ai, z in zip(rv, rb, ra, ZERO_PCT)]
+         for rv, rb, ra in zip(v, budget, actual)]
+    return v, p
+
+
+def load_budgets(start: date, end: date) -> Dict[Period, Dict[str, float]]:
+    """MonthlyBudget rows of the months spanned by [start, end], one query."""
+    period = MonthlyBudget.year * 12 + MonthlyBudget.month - 1
+    rows = db.session.query(
+        MonthlyBudget.year, MonthlyBudget.month,
+        *(getattr(MonthlyBudget, c) for c in BUDGET_COLUMNS)
+    ).filter(period.between(_month_index(start.year, start.month), _month_index(end.year, end.month)))
+    return {(r[0], r[1]): {c: float(v or 0) for c, v in zip(BUDGET_COLUMNS, r[2:])} for r in rows}
+
+
+def load_actuals(start: date, end: date) -> Dict[Period, Dict[str, float]]:
+    """DailyJourMetrics of [start, end] summed per month, one grouped query."""
+    sums = [func.sum(func.coalesce(getattr(DailyJourMetrics, col), 0)) for col in ACTUAL_SUMS.values()]
+    rows = db.session.query(
+        DailyJourMetrics.year, DailyJourMetrics.month, func.count(DailyJourMetrics.id),
+        func.sum(func.coalesce(DailyJourMetrics.occupancy_rate, 0)), *sums
+    ).filter(
+        DailyJourMetrics.date.between(start, end)
+    ).group_by(DailyJourMetrics.year, DailyJourMetrics.month)
+
+    actuals = {}
+    for year, month, days, occupancy, *values in rows:
+        actual = {'days': days, **{k: float(v or 0) for k, v in zip(ACTUAL_SUMS, values)}}
+        actual['occupancy_rate'] = (occupancy or 0) / days if days else 0
+        actual['adr'] = actual['room_revenue'] / actual['rooms_sold'] if actual['rooms_sold'] else 0
+        actuals[(year, month)] = actual
+    return actuals
+
+
+class VarianceFrame:
+    """Budget vs actual of every month of a window, all line items at once."""
+
+    def __init__(self, start: date, end: date):
+        self.start, self.end = start, end
+        self.periods = _periods(start, end)
+        self.budgets = load_budgets(start, end)
+        self.actuals = load_actuals(start, end)
+
+        empty = {}
+        self.budget = [[self.budgets.get(p, empty).get(item[2], 0.0) for item in ITEMS] for p in self.periods]
+        self.actual = [[self.actuals.get(p, empty).get(item[3], 0.0) if item[3] else 0.0 for item in ITEMS]
+                       for p in self.periods]
+        self.variance, self.variance_pct = _variances(self.budget, self.actual)
+
+    def has_budget(self, period: Period) -> bool:
+        return period in self.budgets
+
+    def has_actuals(self, period: Period) -> bool:
+        return self.actuals.get(period, {}).get('days', 0) > 0
+
+    @property
+    def complete(self) -> List[Period]:
+        """Months with both a budget and actuals (the YTD months)."""
+        return [p for p in self.periods if self.has_budget(p) and self.has_actuals(p)]
+
+    def monthly(self, key: str = 'total_revenue', complete_only: bool = True) -> List[Dict[str, Any]]:
+        """One line item per month: budget, actual, variance, variance_pct, favorable."""
+        j = ITEM_INDEX[key]
+        rows = []
+        for i, (year, month) in enumerate(self.periods):
+            period = (year, month)
+            if complete_only:
+                keep = self.has_budget(period) and self.has_actuals(period)
+            else:
+                keep = period in self.budgets or period in self.actuals
+            if not keep:
+                continue
+            rows.append({
+                'year': year,
+                'month': month,
+                'month_label': MONTH_NAMES[month - 1],
+                'budget': round(self.budget[i][j], 2),
+                'actual': round(self.actual[i][j], 2),
+                'variance': round(self.variance[i][j], 2),
+                'variance_pct': round(self.variance_pct[i][j], 2),
+                'favorable': self.variance[i][j] >= 0,
+            })
+        return rows
+
+    def line_items(self, periods: Optional[List[Period]] = None) -> List[Dict[str, Any]]:
+        """Variance items over several months (default: the complete months)."""
+        periods = self.complete if periods is None else periods
+        rows = [self.periods.index(p) for p in periods]
+        budget = [sum(self.budget[i][j] for i in rows) for j in range(len(ITEMS))]
+        actual = [sum(self.actual[i][j] for i in rows) for j in range(len(ITEMS))]
+
+        # ADR is a ratio: weight budget ADR by target rooms, actual = revenue / rooms
+        rooms_j, adr_j, rev_j = ITEM_INDEX['rooms_sold'], ITEM_INDEX['adr'], ITEM_INDEX['room_revenue']
+        weighted = sum(self.budget[i][adr_j] * self.budget[i][rooms_j] for i in rows)
+        budget[adr_j] = weighted / budget[rooms_j] if budget[rooms_j] else 0.0
+        actual[adr_j] = actual[rev_j] / actual[rooms_j] if actual[rooms_j] else 0.0
+
+        (variance,), (variance_pct,) = _variances([budget], [actual])
+        items = []
+        for j, (_key, label, *_rest) in enumerate(ITEMS):
+            if j < REVENUE_ITEMS and budget[j] == 0 and actual[j] == 0:
+                continue
+            item = {
+                'category': label,
+                'budget': round(budget[j], 2),
+                'actual': round(actual[j], 2),
+                'variance': round(variance[j], 2),
+                'variance_pct': round(variance_pct[j], 2),
+                'favorable': variance[j] >= 0,
+            }
+            if j == TOTAL_ITEM:
+                item['total'] = True
+            items.append(item)
+        return items
+
+    def summary(self) -> Dict[str, Any]:
+        """Total revenue per complete month plus window totals (the /api/budget/ytd shape)."""
+        monthly = self.monthly()
+        budget = sum(m['budget'] for m in monthly)
+        actual = sum(m['actual'] for m in monthly)
+        variance = actual - budget
+        return {
+            'year': self.end.year,
+            'start': self.start.isoformat(),
+            'end': self.end.isoformat(),
+            'monthly': monthly,
+            'ytd_budget': round(budget, 2),
+            'ytd_actual': round(actual, 2),
+            'ytd_variance': round(variance, 2),
+            'ytd_variance_pct': round((variance / budget * 100) if budget != 0 else 0, 2),
+            'line_items': self.line_items(),
+        }
+
+    def budget_targets(self, year: int, month: int) -> Dict[str, float]:
+        """Headline targets of one month (RJ PDF budget columns); {} without a budget."""
+        budget = self.budgets.get((year, month))
+        if not budget:
+            return {}
+        days = calendar.monthrange(year, month)[1]
+        actual = self.actuals.get((year, month))
+        if actual and actual['rooms_available']:
+            rooms_available = actual['rooms_available'] / actual['days'] * days
+        else:
+            rooms_available = TOTAL_ROOMS * days
+        return {
+            'days_in_month': days,
+            'total_revenue_budget': budget['total_revenue'],
+            'room_revenue_budget': budget['room_revenue'],
+            'fb_revenue_budget': sum(budget[c] for c in FB_COLUMNS),
+            'labor_cost_budget': sum(budget[c] for c in LABOR_COLUMNS),
+            'occupancy_budget': round(budget['rooms_target'] / rooms_available * 100, 2),
+            'adr_budget': budget['adr_target'],
+        }
+
+
+def ytd(year: int, through: Optional[date] = None) -> VarianceFrame:
+    """January 1st → `through` (default: December 31st) of `year`."""
+    return VarianceFrame(date(year, 1, 1), through or date(year, 12, 31))
+
+
+def rolling12(year: int, month: int) -> VarianceFrame:
+    """The 12 months ending with (year, month)."""
+    first = _month_index(year, month) - 11
+    return VarianceFrame(date(first // 12, first % 12 + 1, 1),
+                         date(year, month, calendar.monthrange(year, month)[1]))
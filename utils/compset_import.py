@@ -0,0 +1,281 @@
+"""
+STR comp-set / OTB CSV import — chunked, bulk upsert, per-row errors.
+
+The CSV is read as a stream, COMPSET_IMPORT_CHUNK_SIZE rows at a time:
+- Each row is parsed and validated on its own; a bad row becomes a
+  "Ligne N: ..." error and the import goes on
+- OTB (unique snapshot_date / target_date): one INSERT … ON CONFLICT DO
+  UPDATE writes the chunk
+- STR (no unique key, older tables may hold duplicates): the existing
+  records of the chunk's keys come back in one SELECT, then one bulk UPDATE
+  (by primary key) and one bulk INSERT write the chunk
+- Every chunk commits on its own, so write transactions stay short and a
+  large file never holds the SQLite write lock for the whole import
+- Large uploads run as a CompsetImportJob on a daemon thread; the job row
+  is updated after every chunk
+- OTB imports refresh the pace cube (utils/otb_pace.py) once, at the end,
+  for every stay date the file touched
+"""
+
+import csv
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import func, insert, select, tuple_, update
+
+from database import db
+from database.models import CompsetImportJob, OTBForecast, STRCompSet, upsert_insert
+from utils import otb_pace
+
+logger = logging.getLogger(__name__)
+
+
+def _date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def parse_str_row(row: Dict[str, str]) -> Dict[str, Any]:
+    """One STR CSV row → STRCompSet values (ValueError / KeyError on bad input)."""
+    return {
+        'report_date': _date(row['report_date']),
+        'period_type': row.get('period_type', 'daily'),
+        'my_occ': float(row.get('my_occ', 0)),
+        'my_adr': float(row.get('my_adr', 0)),
+        'my_revpar': float(row.get('my_revpar', 0)),
+        'comp_occ': float(row.get('comp_occ', 0)),
+        'comp_adr': float(row.get('comp_adr', 0)),
+        'comp_revpar': float(row.get('comp_revpar', 0)),
+        'occ_rank': int(row.get('occ_rank', 0)) or None,
+        'adr_rank': int(row.get('adr_rank', 0)) or None,
+        'revpar_rank': int(row.get('revpar_rank', 0)) or None,
+        'comp_set_size': int(row.get('comp_set_size', 5)),
+        'source': 'import',
+    }
+
+
+def parse_otb_row(row: Dict[str, str]) -> Dict[str, Any]:
+    """One OTB CSV row → OTBForecast values (ValueError / KeyError on bad input)."""
+    return {
+        'snapshot_date': _date(row['snapshot_date']),
+        'target_date': _date(row['target_date']),
+        'rooms_otb': int(row.get('rooms_otb', 0)),
+        'occ_otb': float(row.get('occ_otb', 0)),
+        'adr_otb': float(row.get('adr_otb', 0)),
+        'revenue_otb': float(row.get('revenue_otb', 0)),
+        'group_rooms': int(row.get('group_rooms', 0)),
+        'transient_rooms': int(row.get('transient_rooms', 0)),
+        'ly_rooms': int(row.get('ly_rooms', 0)) or None,
+        'ly_occ': float(row.get('ly_occ', 0)) or None,
+        'ly_adr': float(row.get('ly_adr', 0)) or None,
+        'ly_revenue': float(row.get('ly_revenue', 0)) or None,
+        'source': 'import',
+    }
+
+
+def refresh_otb_pace(keys: Set[tuple]) -> None:
+    """Refresh the pace cube for the stay dates of the imported (snapshot, target) keys."""
+    otb_pace.refresh({target for _snapshot, target in keys})
+
+
+@dataclass(frozen=True)
+class ImportSpec:
+    model: Any
+    keys: Tuple[str, str]
+    parse: Callable[[Dict[str, str]], Dict[str, Any]]
+    after_import: Optional[Callable[[Set[tuple]], None]] = None  # written keys, once per file
+    unique: bool = False  # spec.keys has a unique constraint: ON CONFLICT upsert
+
+
+SPECS = {
+    'str': ImportSpec(STRCompSet, ('report_date', 'period_type'), parse_str_row),
+    'otb': ImportSpec(OTBForecast, ('snapshot_date', 'target_date'), parse_otb_row,
+                      after_import=refresh_otb_pace, unique=True),
+}
+
+
+def iter_chunks(reader, size: int) -> Iterator[List[Tuple[int, Dict[str, str]]]]:
+    """(line number, row) lists of at most `size` rows; line 1 is the header."""
+    chunk = []
+    for row_num, row in enumerate(reader, start=2):
+        chunk.append((row_num, row))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def write_chunk(spec: ImportSpec, records: Dict[tuple, Dict[str, Any]]) -> Tuple[int, int]:
+    """Upsert one chunk of parsed records keyed by spec.keys; returns (inserted, updated)."""
+    if spec.unique:
+        return _upsert_chunk(spec, records)
+    model = spec.model
+    first, second = (getattr(model, k) for k in spec.keys)
+    existing = {}
+    rows = db.session.execute(
+        select(model.id, first, second)
+        .where(first.in_({k[0] for k in records}), second.in_({k[1] for k in records}))
+        .order_by(model.id)
+    )
+    for row_id, a, b in rows:
+        existing.setdefault((a, b), row_id)  # duplicates already in the table: oldest row wins
+
+    updates = [{'id': existing[key], **values} for key, values in records.items() if key in existing]
+    inserts = [values for key, values in records.items() if key not in existing]
+    if updates:
+        db.session.execute(update(model), updates)
+    if inserts:
+        db.session.execute(insert(model), inserts)
+    return len(inserts), len(updates)
+
+
+def _upsert_chunk(spec: ImportSpec, records: Dict[tuple, Dict[str, Any]]) -> Tuple[int, int]:
+    """INSERT … ON CONFLICT(spec.keys) DO UPDATE for tables with a unique key."""
+    model = spec.model
+    first, second = (getattr(model, k) for k in spec.keys)
+    updated = db.session.execute(
+        select(func.count()).select_from(model).where(tuple_(first, second).in_(list(records)))
+    ).scalar()
+    stmt = upsert_insert(model)
+    columns = {c for values in records.values() for c in values} - set(spec.keys)
+    stmt = stmt.on_conflict_do_update(index_elements=list(spec.keys),
+                                      set_={c: stmt.excluded[c] for c in sorted(columns)})
+    db.session.execute(stmt, list(records.values()))
+    return len(records) - updated, updated
+
+
+def import_csv(kind: str, stream, chunk_size: int = 1000, max_errors: int = 200,
+               progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Import an STR ('str') or OTB ('otb') CSV text stream.
+
+    Later rows win over earlier rows with the same key, as with row-by-row
+    saves. Must be called inside an app context.
+
+    Returns:
+        {total_rows, imported, inserted, updated, error_count, errors, seconds}
+    """
+    spec = SPECS[kind]
+    result = {'total_rows': 0, 'imported': 0, 'inserted': 0, 'updated': 0,
+              'error_count': 0, 'errors': []}
+    written = set()
+    t0 = time.perf_counter()
+
+    for chunk in iter_chunks(csv.DictReader(stream), max(1, chunk_size)):
+        records = {}
+        for row_num, row in chunk:
+            try:
+                values = spec.parse(row)
+            except (ValueError, KeyError, TypeError) as e:
+                result['error_count'] += 1
+                if len(result['errors']) < max_errors:
+                    result['errors'].append(f'Ligne {row_num}: {str(e)}')
+                continue
+            key = tuple(values[k] for k in spec.keys)
+            records.pop(key, None)  # keep file order for the last occurrence
+            records[key] = values
+            result['imported'] += 1
+
+        if records:
+            try:
+                inserted, updated = write_chunk(spec, records)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            result['inserted'] += inserted
+            result['updated'] += updated
+            written.update(records)
+        result['total_rows'] += len(chunk)
+        if progress:
+            progress(result)
+
+    if written and spec.after_import:
+        try:
+            spec.after_import(written)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+    result['seconds'] = round(time.perf_counter() - t0, 3)
+    return result
+
+
+def open_text(binary) -> io.TextIOWrapper:
+    """Text view of an uploaded / on-disk CSV (BOM-tolerant UTF-8)."""
+    return io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+
+
+# ── Background jobs ──────────────────────────────────────────────────────
+
+def create_job(kind: str, upload, created_by=None) -> Tuple[CompsetImportJob, str]:
+    """Spool an uploaded file to disk and persist a queued job; returns (job, path)."""
+    fd, path = tempfile.mkstemp(prefix=f'compset-{kind}-', suffix='.csv')
+    with os.fdopen(fd, 'wb') as out:
+        upload.save(out)
+    job = CompsetImportJob(kind=kind, filename=upload.filename, status='queued',
+                           created_by=created_by)
+    db.session.add(job)
+    db.session.commit()
+    return job, path
+
+
+def run_job(job_id: int, path: str, chunk_size: int = 1000, max_errors: int = 200) -> Dict[str, Any]:
+    """Run a queued import job from its spooled file (deleted afterwards)."""
+    job = db.session.get(CompsetImportJob, job_id)
+    if job is None:
+        raise ValueError(f"Import {job_id} introuvable")
+    job.status = 'running'
+    job.started_at = datetime.utcnow()
+    db.session.commit()
+    t0 = time.perf_counter()
+
+    def checkpoint(result):
+        job.total_rows = result['total_rows']
+        job.imported_rows = result['imported']
+        job.inserted_rows = result['inserted']
+        job.updated_rows = result['updated']
+        job.error_rows = result['error_count']
+        job.errors_json = json.dumps(result['errors'], ensure_ascii=False)
+        job.elapsed_seconds = time.perf_counter() - t0
+        db.session.commit()
+
+    try:
+        with open(path, 'rb') as raw:
+            result = import_csv(job.kind, open_text(raw), chunk_size, max_errors, progress=checkpoint)
+        checkpoint(result)
+        job.status = 'completed_with_errors' if result['error_count'] else 'completed'
+    except Exception as e:
+        logger.error(f"Compset import {job_id} failed: {e}")
+        db.session.rollback()
+        job.status = 'failed'
+        job.error_message = str(e)
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    job.elapsed_seconds = time.perf_counter() - t0
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return job.to_dict()
+
+
+def start_job_thread(app, job_id: int, path: str) -> None:
+    """Run an import job on a daemon thread with its own app context."""
+    def target():
+        with app.app_context():
+            run_job(job_id, path,
+                    app.config.get('COMPSET_IMPORT_CHUNK_SIZE', 1000),
+                    app.config.get('COMPSET_IMPORT_MAX_ERRORS', 200))
+
+    threading.Thread(target=target, name=f'compset-import-{job_id}', daemon=True).start()
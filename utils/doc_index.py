@@ -0,0 +1,323 @@
+"""
+Documentation Index — Cached text extraction + full-text search for documentation/.
+
+Features:
+- Text extracted once per file version (mtime/size, then SHA-1 when the
+  mtime moves) into an on-disk SQLite cache, one row per page
+- PDF pages map 1:1; .docx / .md / .txt are split into ~PAGE_CHARS chunks
+  on paragraph boundaries so hits stay page-level
+- SQLite FTS5 inverted index (accents folded) with bm25 ranking and
+  highlighted snippets; plain LIKE scan when FTS5 is not compiled in
+- Incremental refresh: only new / changed files are re-extracted, deleted
+  files are dropped; warm-up thread at startup
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from flask import current_app
+from markupsafe import escape
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = ('.pdf', '.docx', '.md', '.txt')
+PAGE_CHARS = 3000
+EXTRACTOR_VERSION = 1  # Bump to force re-extraction after changing extract_pages()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    sha1 TEXT NOT NULL,
+    n_pages INTEGER NOT NULL,
+    extractor INTEGER NOT NULL,
+    error TEXT,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    path TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (path, page)
+);
+"""
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+    path UNINDEXED, page UNINDEXED, text,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+def _sha1(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _chunk(paragraphs, size=PAGE_CHARS):
+    """Group paragraphs into pages of roughly `size` characters."""
+    pages, current, length = [], [], 0
+    for p in paragraphs:
+        p = p.strip()
+        if not p:
+            continue
+        if current and length + len(p) > size:
+            pages.append('\n\n'.join(current))
+            current, length = [], 0
+        current.append(p)
+        length += len(p)
+    if current:
+        pages.append('\n\n'.join(current))
+    return pages
+
+
+def extract_pages(full_path):
+    """List of page texts for a supported file (raises on unreadable files)."""
+    ext = full_path.suffix.lower()
+    if ext == '.pdf':
+        from PyPDF2 import PdfReader
+        reader = PdfReader(str(full_path))
+        return [page.extract_text() or '' for page in reader.pages]
+    if ext == '.docx':
+        from docx import Document
+        doc = Document(str(full_path))
+        return _chunk(p.text for p in doc.paragraphs)
+    text = full_path.read_text(encoding='utf-8', errors='ignore')
+    return _chunk(re.split(r'\n\s*\n', text))
+
+
+def fts_query(text):
+    """User input → FTS5 query: every word required, prefix match on the last (as you type)."""
+    words = re.findall(r'\w+', text, flags=re.UNICODE)
+    terms = [f'"{w}"' for w in words]
+    if terms and len(words[-1]) >= 3:
+        terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _highlight(snippet):
+    """HTML-escape a snippet, turning the \\x02 / \\x03 match markers into <mark>."""
+    return str(escape(snippet or '')).replace('\x02', '<mark>').replace('\x03', '</mark>')
+
+
+class DocIndex:
+    """On-disk text cache and search index over a documentation tree."""
+
+    def __init__(self, app=None, docs_base=None, index_path=None):
+        self.docs_base = Path(docs_base) if docs_base else None
+        self.index_path = index_path
+        self.recheck_seconds = 60
+        self.warm_enabled = False
+        self.has_fts = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._warm_thread = None
+
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read DOC_INDEX_* config, register on `app.extensions`, warm up."""
+        root = Path(app.root_path)
+        self.docs_base = self.docs_base or root / 'documentation'
+        self.index_path = self.index_path or app.config.get('DOC_INDEX_PATH') or \
+            str(root / 'database' / 'doc_index.db')
+        self.recheck_seconds = app.config.get('DOC_INDEX_RECHECK_SECONDS', 60)
+        self.warm_enabled = app.config.get('DOC_INDEX_WARM_ENABLED', True)
+        app.extensions['doc_index'] = self
+        if self.warm_enabled:
+            self.start_warmup()
+
+    # ── Storage ────────────────────────────────────────────────────────
+
+    def _connect(self):
+        conn = sqlite3.connect(self.index_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        if self.has_fts is None:
+            conn.executescript(SCHEMA)
+            try:
+                conn.executescript(FTS_SCHEMA)
+                self.has_fts = True
+            except sqlite3.OperationalError:
+                logger.warning("SQLite FTS5 unavailable — documentation search falls back to LIKE")
+                self.has_fts = False
+        return conn
+
+    def _relative(self, full_path):
+        return full_path.relative_to(self.docs_base).as_posix()
+
+    # ── Indexing ───────────────────────────────────────────────────────
+
+    def refresh(self, force=False):
+        """
+        Bring the cache in line with the documentation tree.
+
+        Returns:
+            dict: {indexed, unchanged, removed, errors, seconds}
+        """
+        t0 = time.perf_counter()
+        stats = {'indexed': 0, 'unchanged': 0, 'removed': 0, 'errors': 0}
+        with self._lock:
+            conn = self._connect()
+            try:
+                known = {r['path']: r for r in conn.execute('SELECT * FROM files')}
+                seen = set()
+                for full_path in sorted(self.docs_base.rglob('*')):
+                    if full_path.suffix.lower() not in EXTENSIONS or not full_path.is_file():
+                        continue
+                    rel = self._relative(full_path)
+                    seen.add(rel)
+                    result = self._index_file(conn, full_path, rel, known.get(rel), force)
+                    stats[result] += 1
+                for rel in set(known) - seen:
+                    self._drop(conn, rel)
+                    stats['removed'] += 1
+                conn.commit()
+            finally:
+                conn.close()
+            self._checked_at = time.monotonic()
+        stats['seconds'] = round(time.perf_counter() - t0, 3)
+        if stats['indexed'] or stats['removed']:
+            logger.info(f"Documentation index refreshed: {stats}")
+        return stats
+
+    def _index_file(self, conn, full_path, rel, row, force=False):
+        st = full_path.stat()
+        if row is not None and not force and row['extractor'] == EXTRACTOR_VERSION:
+            if row['mtime'] == st.st_mtime and row['size'] == st.st_size:
+                return 'unchanged'
+            sha1 = _sha1(full_path)
+            if row['sha1'] == sha1:
+                # Touched but identical (copy, checkout): keep the extracted text
+                conn.execute('UPDATE files SET mtime = ?, size = ? WHERE path = ?',
+                             (st.st_mtime, st.st_size, rel))
+                return 'unchanged'
+        else:
+            sha1 = _sha1(full_path)
+
+        error = None
+        try:
+            pages = extract_pages(full_path)
+        except Exception as e:
+            logger.warning(f"Text extraction failed for {rel}: {e}")
+            pages, error = [], str(e)[:500]
+
+        self._drop(conn, rel)
+        conn.executemany('INSERT INTO pages (path, page, text) VALUES (?, ?, ?)',
+                         [(rel, i + 1, text) for i, text in enumerate(pages)])
+        if self.has_fts:
+            conn.executemany('INSERT INTO pages_fts (path, page, text) VALUES (?, ?, ?)',
+                             [(rel, i + 1, text) for i, text in enumerate(pages) if text.strip()])
+        conn.execute(
+            'INSERT INTO files (path, mtime, size, sha1, n_pages, extractor, error, indexed_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (rel, st.st_mtime, st.st_size, sha1, len(pages), EXTRACTOR_VERSION, error, time.time()))
+        return 'errors' if error else 'indexed'
+
+    def _drop(self, conn, rel):
+        conn.execute('DELETE FROM files WHERE path = ?', (rel,))
+        conn.execute('DELETE FROM pages WHERE path = ?', (rel,))
+        if self.has_fts:
+            conn.execute('DELETE FROM pages_fts WHERE path = ?', (rel,))
+
+    def _maybe_refresh(self):
+        if time.monotonic() - self._checked_at >= self.recheck_seconds:
+            self.refresh()
+
+    def start_warmup(self):
+        """Index the tree in a daemon thread so the first search is instant."""
+        if self._warm_thread and self._warm_thread.is_alive():
+            return
+        self._warm_thread = threading.Thread(target=self._warmup, name='doc-index-warmup',
+                                             daemon=True)
+        self._warm_thread.start()
+
+    def _warmup(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.error(f"Documentation index warm-up failed: {e}")
+
+    # ── Reading ────────────────────────────────────────────────────────
+
+    def get_pages(self, full_path):
+        """Cached page texts for one file, (re-)extracting it only if it changed."""
+        rel = self._relative(full_path)
+        with self._lock:
+            conn = self._connect()
+            try:
+                row = conn.execute('SELECT * FROM files WHERE path = ?', (rel,)).fetchone()
+                self._index_file(conn, full_path, rel, row)
+                conn.commit()
+                return [r['text'] for r in conn.execute(
+                    'SELECT text FROM pages WHERE path = ? ORDER BY page', (rel,))]
+            finally:
+                conn.close()
+
+    def search(self, query, limit=20, path_prefix=None):
+        """
+        Page-level hits across all manuals, best first.
+
+        Returns:
+            list of {path, page, snippet, score}
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        self._maybe_refresh()
+
+        conn = self._connect()
+        try:
+            params = []
+            if self.has_fts:
+                sql = ("SELECT path, page, snippet(pages_fts, 2, char(2), char(3), ' … ', 24) "
+                       "AS snippet, bm25(pages_fts) AS score FROM pages_fts WHERE pages_fts MATCH ?")
+                params.append(match)
+                if path_prefix:
+                    sql += ' AND path LIKE ?'
+                    params.append(path_prefix.rstrip('/') + '/%')
+                sql += ' ORDER BY score LIMIT ?'
+            else:
+                words = re.findall(r'\w+', query, flags=re.UNICODE)
+                sql = ('SELECT path, page, substr(text, 1, 200) AS snippet, 0 AS score '
+                       'FROM pages WHERE ' + ' AND '.join(['text LIKE ?'] * len(words)))
+                params.extend(f'%{w}%' for w in words)
+                if path_prefix:
+                    sql += ' AND path LIKE ?'
+                    params.append(path_prefix.rstrip('/') + '/%')
+                sql += ' ORDER BY path, page LIMIT ?'
+            params.append(limit)
+            return [{'path': r['path'], 'page': r['page'], 'snippet': _highlight(r['snippet']),
+                     'score': round(-r['score'], 3)}
+                    for r in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+    def info(self):
+        conn = self._connect()
+        try:
+            row = conn.execute('SELECT COUNT(*) AS files, COALESCE(SUM(n_pages), 0) AS pages, '
+                               'MAX(indexed_at) AS last FROM files').fetchone()
+            return {'files': row['files'], 'pages': row['pages'], 'fts5': self.has_fts,
+                    'last_indexed_at': row['last'],
+                    'index_bytes': os.path.getsize(self.index_path)}
+        finally:
+            conn.close()
+
+
+def get_doc_index():
+    """The app's DocIndex (created on first use if not registered)."""
+    index = current_app.extensions.get('doc_index')
+    if index is None:
+        index = DocIndex(current_app._get_current_object())
+    return index
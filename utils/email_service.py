@@ -6,11 +6,13 @@ Features:
 - Graceful fallback: if SMTP not configured, log to console + database
 - HTML and text email support
 - Template rendering
+- Batch delivery over a single SMTP session (used by the notification outbox)
 """
 
 import smtplib
 import json
 import logging
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
@@ -31,6 +33,7 @@ class EmailService:
         self.mail_username = None
         self.mail_password = None
         self.mail_default_sender = None
+        self.mail_timeout = 30
 
         if app:
             self.init_app(app)
@@ -43,6 +46,7 @@ class EmailService:
         self.mail_username = app.config.get('MAIL_USERNAME', '')
         self.mail_password = app.config.get('MAIL_PASSWORD', '')
         self.mail_default_sender = app.config.get('MAIL_DEFAULT_SENDER', 'noreply@sheraton-laval-audit.com')
+        self.mail_timeout = app.config.get('MAIL_TIMEOUT', 30)
 
         # SMTP is enabled only if server and credentials are provided
         self.smtp_enabled = bool(self.mail_server and self.mail_username and self.mail_password)
@@ -82,8 +86,8 @@ class EmailService:
             self._log_email(to_email, subject, html_body, 'logged', None)
             return {'success': True, 'message': 'Email logged (SMTP not configured)', 'status': 'logged'}
 
-    def _send_via_smtp(self, to_email, subject, html_body, text_body, from_email):
-        """Send email via SMTP server."""
+    def _build_message(self, to_email, subject, html_body, text_body, from_email):
+        """Build a multipart/alternative MIME message."""
         msg = MIMEMultipart('alternative')
         msg['Subject'] = subject
         msg['From'] = from_email
@@ -95,11 +99,33 @@ class EmailService:
 
         part2 = MIMEText(html_body, 'html', 'utf-8')
         msg.attach(part2)
+        return msg
+
+    @contextmanager
+    def smtp_session(self):
+        """
+        Open one authenticated SMTP connection (STARTTLS + login once).
 
-        with smtplib.SMTP(self.mail_server, self.mail_port) as server:
+        Yields:
+            smtplib.SMTP: connected server, closed on exit
+        """
+        server = smtplib.SMTP(self.mail_server, self.mail_port, timeout=self.mail_timeout)
+        try:
             if self.mail_use_tls:
                 server.starttls()
             server.login(self.mail_username, self.mail_password)
+            yield server
+        finally:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+
+    def _send_via_smtp(self, to_email, subject, html_body, text_body, from_email):
+        """Send email via SMTP server."""
+        msg = self._build_message(to_email, subject, html_body, text_body, from_email)
+
+        with self.smtp_session() as server:
             server.send_message(msg)
 
         logger.info(f"Email sent to {to_email}: {subject}")
@@ -107,6 +133,70 @@ class EmailService:
 
         return {'success': True, 'message': 'Email sent successfully', 'status': 'sent'}
 
+    def send_batch(self, messages, from_email=None):
+        """
+        Send several emails over one SMTP session.
+
+        The connection is opened (STARTTLS + login) once; if the server drops
+        it mid-batch, it is reopened once and the remaining messages continue.
+        Nothing is written to NotificationLog — callers record the outcome.
+
+        Args:
+            messages (list): dicts with to_email, subject, html_body, text_body
+            from_email (str, optional): Sender email (defaults to MAIL_DEFAULT_SENDER)
+
+        Returns:
+            list: one {success, message, status} dict per input message, in order
+        """
+        from_email = from_email or self.mail_default_sender
+
+        if not self.smtp_enabled:
+            for m in messages:
+                logger.info(f"[email logged] To: {m['to_email']} | {m['subject']}")
+            return [{'success': True, 'message': 'Email logged (SMTP not configured)', 'status': 'logged'}
+                    for _ in messages]
+
+        results = [None] * len(messages)
+        next_idx = 0
+        reconnects = 0
+
+        while next_idx < len(messages):
+            try:
+                with self.smtp_session() as server:
+                    while next_idx < len(messages):
+                        m = messages[next_idx]
+                        msg = self._build_message(m['to_email'], m['subject'], m['html_body'],
+                                                  m.get('text_body'), from_email)
+                        try:
+                            server.send_message(msg)
+                            results[next_idx] = {'success': True, 'message': 'Email sent successfully', 'status': 'sent'}
+                        except smtplib.SMTPServerDisconnected:
+                            raise
+                        except smtplib.SMTPException as e:
+                            # Rejected recipient etc. — keep the session for the others
+                            results[next_idx] = {'success': False, 'message': f"SMTP delivery failed: {e}", 'status': 'failed'}
+                        next_idx += 1
+            except smtplib.SMTPServerDisconnected as e:
+                if reconnects < 1:
+                    reconnects += 1
+                    continue
+                self._fail_remaining(results, next_idx, e)
+                break
+            except (smtplib.SMTPException, OSError) as e:
+                self._fail_remaining(results, next_idx, e)
+                break
+
+        sent = sum(1 for r in results if r['success'])
+        logger.info(f"SMTP batch: {sent}/{len(messages)} sent over one session")
+        return results
+
+    def _fail_remaining(self, results, start, error):
+        """Mark every message from `start` on as failed after a session error."""
+        error_msg = f"SMTP delivery failed: {error}"
+        logger.error(error_msg)
+        for i in range(start, len(results)):
+            results[i] = {'success': False, 'message': error_msg, 'status': 'failed'}
+
     def _log_email(self, to_email, subject, html_body, status, error=None):
         """Log email to database for auditing."""
         try:
@@ -155,6 +245,7 @@ class EmailService:
             list: List of send results
         """
         results = []
+        batch = []
 
         for recipient in recipients:
             # Handle User objects
@@ -171,32 +262,8 @@ class EmailService:
 
             try:
                 subject, html_body = self._get_alert_subject_and_body(alert_type, data)
-                result = self.send_email(to_email, subject, html_body)
-
-                # Log to notification log
-                try:
-                    from database.models import db, NotificationLog
-                    log = NotificationLog(
-                        event_type=alert_type,
-                        severity=data.get('severity', 'info'),
-                        recipient_email=to_email,
-                        recipient_user_id=user_id,
-                        subject=subject,
-                        message=html_body[:500],
-                        data_json=json.dumps(data),
-                        delivery_status=result.get('status', 'pending'),
-                        error_message=result.get('message') if not result.get('success') else None,
-                    )
-                    db.session.add(log)
-                    db.session.commit()
-                except Exception as e:
-                    logger.error(f"Failed to log alert: {str(e)}")
-
-                results.append({
-                    'email': to_email,
-                    'alert_type': alert_type,
-                    **result
-                })
+                batch.append({'to_email': to_email, 'user_id': user_id,
+                              'subject': subject, 'html_body': html_body})
             except Exception as e:
                 logger.error(f"Failed to send alert to {to_email}: {str(e)}")
                 results.append({
@@ -207,6 +274,38 @@ class EmailService:
                     'status': 'failed'
                 })
 
+        if not batch:
+            return results
+
+        # One SMTP session for every recipient
+        sent = self.send_batch(batch)
+
+        # Log to notification log (single commit)
+        try:
+            from database.models import db, NotificationLog
+            for m, result in zip(batch, sent):
+                db.session.add(NotificationLog(
+                    event_type=alert_type,
+                    severity=data.get('severity', 'info'),
+                    recipient_email=m['to_email'],
+                    recipient_user_id=m['user_id'],
+                    subject=m['subject'],
+                    message=m['html_body'][:500],
+                    data_json=json.dumps(data),
+                    delivery_status=result.get('status', 'pending'),
+                    error_message=result.get('message') if not result.get('success') else None,
+                ))
+            db.session.commit()
+        except Exception as e:
+            logger.error(f"Failed to log alert: {str(e)}")
+
+        for m, result in zip(batch, sent):
+            results.append({
+                'email': m['to_email'],
+                'alert_type': alert_type,
+                **result
+            })
+
         return results
 
     def _get_alert_subject_and_body(self, alert_type, data):
@@ -236,6 +335,10 @@ class EmailService:
                 'subject': 'Alerte: Baisse de revenu détectée - {date}',
                 'template': 'alert_generic.html'
             },
+            'anomaly_detected': {
+                'subject': 'Alerte: Nuit atypique détectée - {date}',
+                'template': 'alert_generic.html'
+            },
         }
 
         config = templates.get(alert_type, {
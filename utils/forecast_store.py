@@ -0,0 +1,462 @@
+"""
+Forecast Store — Daily demand model fitted once per data version, served from memory.
+
+Features:
+- Daily-granularity model per metric (occupancy, ADR, RevPAR, revenue):
+  level + trend + annual Fourier seasonality + day-of-week effects, ridge least squares
+- Fitted once per DailyJourMetrics data version and persisted (coefficients,
+  residual bands, rolling-origin backtest) in `forecast_models`
+- Commits touching DailyJourMetrics schedule a debounced background refit;
+  a nightly refit runs at FORECAST_REFIT_HOUR as a safety net
+- 30/60/90-day projections are computed once per (model, start date) and
+  served from memory afterwards
+"""
+
+import hashlib
+import json
+import logging
+import math
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from database.engine import read_session
+from database.models import db, DailyJourMetrics, ForecastModel
+
+from utils.lazy_import import lazy_module, has_module
+
+HAS_NUMPY = has_module('numpy')
+np = lazy_module('numpy') if HAS_NUMPY else None
+
+logger = logging.getLogger(__name__)
+
+# Response field → DailyJourMetrics column
+METRICS = {
+    'occupancy_pct': 'occupancy_rate',
+    'adr': 'adr',
+    'revpar': 'revpar',
+    'total_revenue': 'total_revenue',
+}
+HORIZONS = (30, 60, 90)
+MIN_DAYS = 30
+RIDGE = 1.0
+KEEP_MODELS = 10
+
+
+class InsufficientData(ValueError):
+    """Fewer than MIN_DAYS usable days of DailyJourMetrics."""
+    pass
+
+
+def _features(day_index, doy, dow, harmonics, trend):
+    """Design row: intercept, [trend], annual Fourier terms, Mon–Sat dummies."""
+    row = [1.0]
+    if trend:
+        row.append(day_index / 365.25)
+    for k in range(1, harmonics + 1):
+        angle = 2 * math.pi * k * doy / 365.25
+        row.append(math.sin(angle))
+        row.append(math.cos(angle))
+    row.extend(1.0 if dow == j else 0.0 for j in range(6))  # Sunday = baseline
+    return row
+
+
+def _clip(name, value):
+    if name == 'occupancy_pct':
+        return min(max(value, 0.0), 100.0)
+    return max(value, 0.0)
+
+
+class SeasonalDowModel:
+    """Seasonal + day-of-week regression, one coefficient vector per metric."""
+
+    def __init__(self, params):
+        self.params = params
+        self.epoch = date.fromisoformat(params['epoch'])
+        self.harmonics = params['harmonics']
+        self.trend = params['trend']
+
+    @classmethod
+    def fit(cls, rows):
+        """
+        Args:
+            rows: [(date, {metric: value})] ordered by date
+
+        Raises:
+            InsufficientData: fewer than MIN_DAYS rows
+        """
+        if not HAS_NUMPY:
+            raise RuntimeError("numpy requis pour les prévisions")
+        if len(rows) < MIN_DAYS:
+            raise InsufficientData(f"Minimum {MIN_DAYS} jours de données requis")
+
+        epoch = rows[0][0]
+        span = (rows[-1][0] - epoch).days + 1
+        # Annual terms / trend are only identifiable with enough history
+        harmonics = 3 if span >= 365 else (1 if span >= 180 else 0)
+        trend = span >= 365
+
+        X = np.array([_features((d - epoch).days, d.timetuple().tm_yday, d.weekday(),
+                                harmonics, trend) for d, _ in rows])
+        penalty = np.eye(X.shape[1]) * RIDGE
+        penalty[0, 0] = 0.0
+        gram = X.T @ X + penalty
+
+        metrics = {}
+        for name in METRICS:
+            y = np.array([values[name] for _, values in rows], dtype=float)
+            coef = np.linalg.solve(gram, X.T @ y)
+            resid = y - X @ coef
+            metrics[name] = {
+                'coef': coef.tolist(),
+                'resid_std': float(resid.std()),
+                'band': [float(np.percentile(resid, 10)), float(np.percentile(resid, 90))],
+                'mape': float(np.mean(np.abs(resid) / np.maximum(np.abs(y), 1e-9)) * 100),
+            }
+
+        return cls({'epoch': epoch.isoformat(), 'harmonics': harmonics,
+                    'trend': trend, 'metrics': metrics})
+
+    def predict_day(self, d):
+        """{metric: (value, low, high)} for one date (80% residual band)."""
+        x = _features((d - self.epoch).days, d.timetuple().tm_yday, d.weekday(),
+                      self.harmonics, self.trend)
+        out = {}
+        for name, m in self.params['metrics'].items():
+            value = sum(c * f for c, f in zip(m['coef'], x))
+            low, high = value + m['band'][0], value + m['band'][1]
+            out[name] = (_clip(name, value), _clip(name, low), _clip(name, high))
+        return out
+
+    def project(self, start, days):
+        """Daily predictions for `days` days from `start`."""
+        daily = []
+        for i in range(days):
+            d = start + timedelta(days=i)
+            row = {'date': d.isoformat()}
+            for name, (value, low, high) in self.predict_day(d).items():
+                row[name] = round(value, 2)
+                row[f'{name}_low'] = round(low, 2)
+                row[f'{name}_high'] = round(high, 2)
+            daily.append(row)
+        return daily
+
+
+def rolling_origin_backtest(rows, horizons=HORIZONS, folds=4, step=30):
+    """
+    Refit at successive origins and score the following `horizons` days.
+
+    Returns:
+        {'folds': int, 'fit_seconds_avg': float,
+         'mape': {metric: {horizon: pct}}}  (mean daily absolute % error)
+    """
+    if len(rows) < MIN_DAYS:
+        raise InsufficientData(f"Minimum {MIN_DAYS} jours de données requis")
+    max_h = max(horizons)
+    last = rows[-1][0]
+    errors = {name: {h: [] for h in horizons} for name in METRICS}
+    fit_times = []
+
+    for i in range(folds):
+        origin = last - timedelta(days=max_h + i * step)
+        train = [r for r in rows if r[0] <= origin]
+        if len(train) < MIN_DAYS:
+            break
+        t0 = time.perf_counter()
+        model = SeasonalDowModel.fit(train)
+        fit_times.append(time.perf_counter() - t0)
+
+        for d, actual in rows[len(train):]:
+            ahead = (d - origin).days
+            if ahead > max_h:
+                break
+            predicted = model.predict_day(d)
+            for name in METRICS:
+                if not actual[name]:
+                    continue
+                pct = abs(predicted[name][0] - actual[name]) / abs(actual[name]) * 100
+                for h in horizons:
+                    if ahead <= h:
+                        errors[name][h].append(pct)
+
+    return {
+        'folds': len(fit_times),
+        'fit_seconds_avg': round(sum(fit_times) / len(fit_times), 4) if fit_times else None,
+        'mape': {
+            name: {str(h): round(sum(v) / len(v), 2) if v else None for h, v in by_h.items()}
+            for name, by_h in errors.items()
+        },
+    }
+
+
+def load_rows(days_back=None):
+    """Usable DailyJourMetrics (last `days_back` days of data) as [(date, {metric: value})]."""
+    with read_session() as s:
+        query = (s.query(DailyJourMetrics.date,
+                         *[getattr(DailyJourMetrics, col) for col in METRICS.values()])
+                 .filter(DailyJourMetrics.total_revenue > 0,
+                         DailyJourMetrics.total_rooms_sold > 0))
+        if days_back:
+            last = s.query(func.max(DailyJourMetrics.date)).scalar()
+            if last is not None:
+                query = query.filter(DailyJourMetrics.date > last - timedelta(days=days_back))
+        rows = query.order_by(DailyJourMetrics.date).all()
+    return [(r[0], {name: float(r[i + 1] or 0) for i, name in enumerate(METRICS)}) for r in rows]
+
+
+class ForecastStore:
+    """Fit, persist and serve the demand forecast model."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.refit_enabled = True
+        self.refit_delay = 30
+        self.refit_hour = 3
+        self.recheck_seconds = 300
+        self.training_days = 3 * 365
+        self.backtest_folds = 4
+        self._active = None        # (ForecastModel.id, SeasonalDowModel, meta dict)
+        self._projections = {}     # (model id, start iso) -> response dict
+        self._checked_at = 0.0
+        self._stale = False
+        self._lock = threading.RLock()
+        self._fit_lock = threading.Lock()
+        self._thread = None
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read FORECAST_* config, register on `app.extensions`, hook commits."""
+        self.app = app
+        self.refit_enabled = app.config.get('FORECAST_REFIT_ENABLED', True)
+        self.refit_delay = app.config.get('FORECAST_REFIT_DELAY', 30)
+        self.refit_hour = app.config.get('FORECAST_REFIT_HOUR', 3)
+        self.recheck_seconds = app.config.get('FORECAST_RECHECK_SECONDS', 300)
+        self.training_days = app.config.get('FORECAST_TRAINING_DAYS', 3 * 365)
+        self.backtest_folds = app.config.get('FORECAST_BACKTEST_FOLDS', 4)
+        app.extensions['forecast_store'] = self
+        _install_commit_hook()
+        if self.refit_enabled:
+            self._start_thread()
+
+    # ── Fitting ────────────────────────────────────────────────────────
+
+    @staticmethod
+    def data_version():
+        """Cheap fingerprint of DailyJourMetrics (row count, last date, last update)."""
+        count, last_date, last_update = db.session.query(
+            func.count(DailyJourMetrics.id),
+            func.max(DailyJourMetrics.date),
+            func.max(DailyJourMetrics.updated_at),
+        ).one()
+        return hashlib.sha1(f"{count}|{last_date}|{last_update}".encode()).hexdigest()[:16]
+
+    def fit(self, force=False):
+        """
+        Fit and persist a model unless the latest one already covers the
+        current data version. Must run inside an app context.
+
+        Returns:
+            ForecastModel row
+
+        Raises:
+            InsufficientData: not enough history
+        """
+        with self._fit_lock:
+            return self._fit(force)
+
+    def _fit(self, force):
+        version = self.data_version()
+        latest = ForecastModel.query.order_by(ForecastModel.id.desc()).first()
+        if latest is not None and latest.data_version == version and not force:
+            self._install(latest)
+            return latest
+
+        rows = load_rows(self.training_days)
+        t0 = time.perf_counter()
+        model = SeasonalDowModel.fit(rows)
+        fit_seconds = time.perf_counter() - t0
+        backtest = rolling_origin_backtest(rows, folds=self.backtest_folds)
+
+        recent = [v for d, v in rows if d > rows[-1][0] - timedelta(days=365)]
+        summary = {name: round(sum(v[name] for v in recent) / len(recent), 2) for name in METRICS}
+
+        record = ForecastModel(
+            data_version=version,
+            method='seasonal_dow_v1',
+            train_start=rows[0][0],
+            train_end=rows[-1][0],
+            n_days=len(rows),
+            params_json=json.dumps(model.params),
+            backtest_json=json.dumps(backtest),
+            summary_json=json.dumps(summary),
+            fit_seconds=fit_seconds,
+        )
+        db.session.add(record)
+        db.session.flush()
+        stale_ids = [r.id for r in ForecastModel.query.order_by(ForecastModel.id.desc())
+                     .offset(KEEP_MODELS).with_entities(ForecastModel.id)]
+        if stale_ids:
+            ForecastModel.query.filter(ForecastModel.id.in_(stale_ids)).delete(synchronize_session=False)
+        db.session.commit()
+
+        logger.info(f"Forecast model {record.id} fitted on {len(rows)} days "
+                    f"in {fit_seconds * 1000:.1f} ms (version {version})")
+        self._install(record)
+        return record
+
+    def _install(self, record):
+        meta = record.to_dict()
+        meta['summary'] = record.get_summary()
+        with self._lock:
+            if self._active is None or self._active[0] != record.id:
+                self._active = (record.id, SeasonalDowModel(record.get_params()), meta)
+                self._projections.clear()
+            self._checked_at = time.monotonic()
+            self._stale = False
+
+    # ── Serving ────────────────────────────────────────────────────────
+
+    def _current(self):
+        """Active model, reloading when another process fitted a newer one."""
+        with self._lock:
+            active, checked_at, stale = self._active, self._checked_at, self._stale
+        if stale:
+            self.fit()
+        elif active is None or time.monotonic() - checked_at >= self.recheck_seconds:
+            latest = ForecastModel.query.order_by(ForecastModel.id.desc()).first()
+            if latest is None:
+                self.fit()
+            else:
+                self._install(latest)
+        return self._active
+
+    def forecast(self, start=None):
+        """
+        30/60/90-day projections from the stored model (computed once per
+        model and start date, then served from memory).
+
+        Raises:
+            InsufficientData: no model can be fitted yet
+        """
+        start = start or date.today() + timedelta(days=1)
+        model_id, model, meta = self._current()
+        key = (model_id, start.isoformat())
+        cached = self._projections.get(key)
+        if cached is not None:
+            return cached
+
+        daily = model.project(start, max(HORIZONS))
+        backtest = meta.get('backtest', {}).get('mape', {})
+        result = {'daily': daily, 'historical_avg': meta['summary'], 'model': meta}
+        for h in HORIZONS:
+            window = daily[:h]
+            block = {name: round(sum(r[name] for r in window) / h, 2) for name in METRICS}
+            block['total_revenue'] = round(sum(r['total_revenue'] for r in window), 0)
+            block['revpar_low'] = round(sum(r['revpar_low'] for r in window) / h, 2)
+            block['revpar_high'] = round(sum(r['revpar_high'] for r in window) / h, 2)
+            mape = (backtest.get('revpar') or {}).get(str(h))
+            if mape is None:
+                mape = model.params['metrics']['revpar']['mape']
+            block['confidence'] = round(min(max(1 - mape / 100, 0), 1), 2)
+            result[f'forecast_{h}'] = block
+
+        with self._lock:
+            self._projections[key] = result
+        return result
+
+    # ── Refit triggers ─────────────────────────────────────────────────
+
+    def notify_new_metrics(self):
+        """DailyJourMetrics changed: refit in the background (or on next read)."""
+        with self._lock:
+            self._stale = not self.refit_enabled
+        if self.refit_enabled:
+            self._start_thread()
+            self._wakeup.set()
+
+    def _start_thread(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='forecast-refit', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def seconds_until_refit(self, now=None):
+        now = now or datetime.now()
+        run_at = now.replace(hour=self.refit_hour, minute=0, second=0, microsecond=0)
+        if run_at <= now:
+            run_at += timedelta(days=1)
+        return (run_at - now).total_seconds()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            woken = self._wakeup.wait(self.seconds_until_refit())
+            self._wakeup.clear()
+            if woken:
+                # Debounce bursts of commits (imports, backfills)
+                if self._stopping.wait(self.refit_delay):
+                    break
+                self._wakeup.clear()
+            try:
+                with self.app.app_context():
+                    self.fit()
+            except InsufficientData:
+                pass
+            except Exception as e:
+                logger.error(f"Forecast refit error: {str(e)}")
+
+
+def get_forecast_store():
+    """Return the app's ForecastStore (created on first use)."""
+    store = current_app.extensions.get('forecast_store')
+    if store is None:
+        store = ForecastStore(current_app._get_current_object())
+    return store
+
+
+# ── Commit hook: any committed DailyJourMetrics change triggers a refit ──
+
+_hook_installed = False
+
+
+def _mark_metrics_changed(session, flush_context, instances):
+    if any(isinstance(obj, DailyJourMetrics)
+           for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info['daily_metrics_changed'] = True
+
+
+def _after_commit(session):
+    if session.info.pop('daily_metrics_changed', False) and has_app_context():
+        store = current_app.extensions.get('forecast_store')
+        if store is not None:
+            store.notify_new_metrics()
+
+
+def _after_rollback(session, previous_transaction):
+    session.info.pop('daily_metrics_changed', None)
+
+
+def _install_commit_hook():
+    global _hook_installed
+    if _hook_installed:
+        return
+    event.listen(Session, 'before_flush', _mark_metrics_changed)
+    event.listen(Session, 'after_commit', _after_commit)
+    event.listen(Session, 'after_soft_rollback', _after_rollback)
+    _hook_installed = True
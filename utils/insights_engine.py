@@ -8,14 +8,11 @@ and anomaly detection to surface actionable revenue insights.
 from datetime import date, timedelta
 from collections import defaultdict
 import logging
-try:
-    import numpy as np
-    from sklearn.cluster import KMeans
-    HAS_NUMPY = True
-except ImportError:
-    HAS_NUMPY = False
-    np = None
-    KMeans = None
+from utils.lazy_import import lazy_module, has_module
+
+# numpy / sklearn (operating regimes) load on first use, not at import
+HAS_NUMPY = has_module('numpy') and has_module('sklearn')
+np = lazy_module('numpy') if HAS_NUMPY else None
 
 logger = logging.getLogger(__name__)
 
@@ -346,36 +343,35 @@ class InsightsEngine:
     # ANOMALIES
     # ==========================================================================
     def _anomalies(self):
-        revs = [m.total_revenue for m in self.metrics]
-        occs = [m.occupancy_rate for m in self.metrics]
-
-        avg_rev = sum(revs) / len(revs)
-        std_rev = (sum((r - avg_rev) ** 2 for r in revs) / len(revs)) ** 0.5
+        """Revenue outliers read from the stored per-day anomaly scores."""
+        from utils.anomaly_scorer import get_anomaly_scorer
 
-        avg_occ = sum(occs) / len(occs)
-        std_occ = (sum((o - avg_occ) ** 2 for o in occs) / len(occs)) ** 0.5
+        scorer = get_anomaly_scorer()
+        start, end = self.metrics[0].date, self.metrics[-1].date
+        by_date = {m.date.isoformat(): m for m in self.metrics}
 
-        # Find days > 2 std devs from mean
+        anomalies = scorer.anomalies(start=start, end=end)
         rev_outliers = []
-        for m in self.metrics:
-            z_rev = (m.total_revenue - avg_rev) / std_rev if std_rev > 0 else 0
-            if abs(z_rev) > 2:
-                rev_outliers.append({
-                    'date': m.date.isoformat(),
-                    'revenue': round(m.total_revenue, 0),
-                    'z_score': round(z_rev, 2),
-                    'occ': round(m.occupancy_rate, 1),
-                    'adr': round(m.adr, 2),
-                    'direction': 'high' if z_rev > 0 else 'low',
-                })
-
-        rev_outliers.sort(key=lambda x: abs(x['z_score']), reverse=True)
+        for a in anomalies:
+            m = by_date.get(a['date'])
+            if a['metric'] != 'revenue' or m is None:
+                continue
+            rev_outliers.append({
+                'date': a['date'],
+                'revenue': round(a['value'], 0),
+                'z_score': a['z_score'],
+                'occ': round(m.occupancy_rate, 1),
+                'adr': round(m.adr, 2),
+                'direction': a['direction'],
+            })
 
+        stat = scorer.global_stat('revenue')
         return {
             'revenue_outliers': rev_outliers[:10],
             'total_outlier_days': len(rev_outliers),
-            'avg_revenue': round(avg_rev, 0),
-            'std_revenue': round(std_rev, 0),
+            'flagged_days': len({a['date'] for a in anomalies}),
+            'avg_revenue': round(stat.mean, 0) if stat else 0,
+            'std_revenue': round(stat.std, 0) if stat else 0,
         }
 
     # ==========================================================================
@@ -958,7 +954,7 @@ class InsightsEngine:
         avg_growth = sum(growth_trend) / len(growth_trend) if growth_trend else 0
 
         # Project next 3 months
-        current_month = 12  # Assume end of year
+        current_month = self.metrics[-1].month if self.metrics else date.today().month
         forecast = []
         for offset in range(1, 4):
             forecast_mo = ((current_month + offset - 1) % 12) + 1
@@ -1265,26 +1261,18 @@ class InsightsEngine:
     def _operating_regimes(self):
         """K-means clustering (3 clusters) on daily metrics.
 
+        Uses the persisted RegimeStore model (utils/regime_model.py): days are
+        labelled by nearest centroid (read-only; new days are folded in when
+        they are written, see RegimeStore.record_days).
+
         Returns: cluster profiles (mean metrics per cluster), day counts, characteristics.
         """
         if self.n < 15:
             return {'sufficient_data': False}
 
-        # Prepare features for clustering
-        features = []
-        for m in self.metrics:
-            features.append([
-                m.occupancy_rate,
-                m.adr,
-                m.total_revenue,
-                m.fb_revenue,
-            ])
-
-        features_array = np.array(features)
-
         try:
-            kmeans = KMeans(n_clusters=3, random_state=42, n_init=10)
-            labels = kmeans.fit_predict(features_array)
+            from utils.regime_model import get_regime_store
+            labels, model_info = get_regime_store().label_days(self.metrics)
         except Exception as e:
             logger.warning(f"K-means clustering failed: {e}")
             return {'sufficient_data': False}
@@ -1325,6 +1313,7 @@ class InsightsEngine:
             'sufficient_data': True,
             'clusters': result,
             'characteristics': characteristics,
+            'model': model_info,
         }
 
     # ==========================================================================
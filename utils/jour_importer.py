@@ -23,6 +23,8 @@ import re
 
 from database.models import db, DailyJourMetrics
 from utils.analytics import JOUR_COLS, FB_OUTLETS, TOTAL_ROOMS
+from utils.anomaly_scorer import get_anomaly_scorer
+from utils.regime_model import get_regime_store
 
 logger = logging.getLogger(__name__)
 
@@ -171,6 +173,11 @@ class JourImporter:
                 db.session.add(m)
                 inserted += 1
 
+        # Score the nights and fold new days into the operating-regime model
+        # (same transaction)
+        get_anomaly_scorer().record_days(metrics)
+        get_regime_store().record_days(metrics)
+
         db.session.commit()
 
         return {'inserted': inserted, 'updated': updated, 'total': inserted + updated}
@@ -0,0 +1,193 @@
+"""
+Lazy Import — Defer heavy third-party libraries until first use.
+
+Features:
+- lazy_module('numpy') → module proxy, imported on first attribute access
+- lazy_attrs('openpyxl.styles', 'Font', ...) → callables resolved on first
+  call / attribute access, so `from x import Y` call sites stay unchanged
+- has_module('sklearn') → availability check without importing
+- preload() imports everything registered here (STARTUP_PRELOAD_HEAVY=true,
+  e.g. before forking workers)
+- when_imported('xlrd', callback) → post-import hook, whichever way the
+  module ends up imported (used for instrumentation wrappers)
+
+Proxies only defer the import; they are not a substitute for the real
+object in isinstance() checks or as base classes.
+"""
+
+import importlib
+import importlib.abc
+import importlib.util
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_registry = {}  # module name → on_load hook (or None)
+_post_import = {}  # module name → [callback(module)] waiting for the import
+_lock = threading.RLock()
+
+
+def has_module(name):
+    """True if `name` is importable (only the top-level package is located)."""
+    try:
+        return importlib.util.find_spec(name.split('.')[0]) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def _load(name):
+    with _lock:
+        hook = _registry.get(name)
+        if hook is not None:
+            hook()
+            _registry[name] = None
+        return importlib.import_module(name)
+
+
+class LazyModule:
+    """Stand-in for a module; the real import happens on first attribute access."""
+
+    def __init__(self, name):
+        self.__dict__['_lazy_name'] = name
+        self.__dict__['_lazy_module'] = None
+
+    def _lazy_resolve(self):
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            module = _load(self.__dict__['_lazy_name'])
+            self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._lazy_resolve(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_lazy_module'] is not None else 'not loaded'
+        return f"<lazy module '{self.__dict__['_lazy_name']}' ({state})>"
+
+
+class LazyAttr:
+    """Stand-in for `from module import attr`; resolved on first call or attribute access."""
+
+    def __init__(self, module, attr):
+        self._module = module
+        self._attr = attr
+        self._target = None
+
+    def _lazy_resolve(self):
+        if self._target is None:
+            self._target = getattr(self._module, self._attr)
+        return self._target
+
+    def __call__(self, *args, **kwargs):
+        return self._lazy_resolve()(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        if attr.startswith('_lazy') or attr in ('_module', '_attr', '_target'):
+            raise AttributeError(attr)
+        return getattr(self._lazy_resolve(), attr)
+
+    def __repr__(self):
+        return f"<lazy {self._module.__dict__['_lazy_name']}.{self._attr}>"
+
+
+def lazy_module(name, on_load=None):
+    """
+    Module proxy for `name`.
+
+    Args:
+        on_load: callable run once just before the first real import
+                 (e.g. matplotlib.use('Agg') before pyplot)
+    """
+    with _lock:
+        _registry.setdefault(name, on_load)
+    return LazyModule(name)
+
+
+def lazy_attrs(module_name, *attrs):
+    """Tuple of LazyAttr for `from module_name import *attrs`."""
+    module = lazy_module(module_name)
+    return tuple(LazyAttr(module, attr) for attr in attrs)
+
+
+def registered():
+    """Module names registered for lazy loading."""
+    return sorted(_registry)
+
+
+def preload():
+    """
+    Import every registered module now.
+
+    Returns:
+        dict: module name → import milliseconds (None if unavailable)
+    """
+    timings = {}
+    for name in registered():
+        t0 = time.perf_counter()
+        try:
+            _load(name)
+            timings[name] = round((time.perf_counter() - t0) * 1000, 1)
+        except ImportError as e:
+            logger.warning(f"Preload of {name} failed: {e}")
+            timings[name] = None
+    return timings
+
+
+class _PostImportFinder(importlib.abc.MetaPathFinder):
+    """Meta-path finder that runs when_imported() callbacks once a module has executed."""
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname not in _post_import:
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is None or not hasattr(spec.loader, 'exec_module'):
+            return spec
+        exec_module = spec.loader.exec_module
+
+        def exec_and_notify(module):
+            exec_module(module)
+            _notify(fullname, module)
+
+        spec.loader.exec_module = exec_and_notify
+        return spec
+
+
+_finder = _PostImportFinder()
+
+
+def _notify(name, module):
+    with _lock:
+        callbacks = _post_import.pop(name, [])
+    for callback in callbacks:
+        try:
+            callback(module)
+        except Exception as e:
+            logger.warning(f"Post-import hook for {name} failed: {e}")
+
+
+def when_imported(name, callback):
+    """
+    Run callback(module) right after `name` is imported (now if it already is).
+
+    Works for plain, function-local and lazy imports alike, so wrappers are
+    in place before any `from name import attr` binds the attribute.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        callback(module)
+        return
+    with _lock:
+        _post_import.setdefault(name, []).append(callback)
+        if _finder not in sys.meta_path:
+            sys.meta_path.insert(0, _finder)
@@ -0,0 +1,212 @@
+"""
+Lightspeed Historical Backfill — Sync NightAuditSession data over a date range.
+
+Runs `LightspeedSync.sync_session` for many dates concurrently on the shared
+pooled client:
+- Concurrency (dates in flight) and an optional per-job request rate limit,
+  on top of the client-wide one (the shared client is never modified)
+- Each date commits in its own transaction (sync_session commits/rolls back)
+- Progress is checkpointed on the LightspeedBackfillJob row after every date,
+  so an interrupted job resumes with only the dates that have not succeeded
+- Per-date results (tabs, errors, seconds) and overall throughput
+"""
+
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Callable
+
+from database import db
+from database.models import LightspeedBackfillJob
+from utils.lightspeed_client import LightspeedClient
+from utils.lightspeed_sync import LightspeedSync
+
+logger = logging.getLogger(__name__)
+
+
+def date_range(start, end) -> List[str]:
+    """Inclusive list of YYYY-MM-DD strings from start to end (date objects)."""
+    days = (end - start).days
+    return [(start + timedelta(days=i)).isoformat() for i in range(days + 1)]
+
+
+def create_job(start, end, concurrency=None, rate_limit=None, created_by=None) -> LightspeedBackfillJob:
+    """
+    Validate a range and persist a queued backfill job.
+
+    Raises:
+        ValueError: If the range is inverted or longer than LIGHTSPEED_BACKFILL_MAX_DAYS,
+                    concurrency is not an int in 1..LIGHTSPEED_BACKFILL_MAX_CONCURRENCY
+                    or rate_limit is not a number > 0
+    """
+    from flask import current_app
+
+    if end < start:
+        raise ValueError("La date de fin précède la date de début")
+    max_days = current_app.config.get('LIGHTSPEED_BACKFILL_MAX_DAYS', 400)
+    total = (end - start).days + 1
+    if total > max_days:
+        raise ValueError(f"Plage trop longue: {total} jours (maximum {max_days})")
+    if concurrency is not None:
+        max_concurrency = current_app.config.get('LIGHTSPEED_BACKFILL_MAX_CONCURRENCY', 16)
+        if (not isinstance(concurrency, int) or isinstance(concurrency, bool)
+                or not 1 <= concurrency <= max_concurrency):
+            raise ValueError(f"Concurrence invalide: entier de 1 à {max_concurrency} attendu")
+    if rate_limit is not None:
+        if (not isinstance(rate_limit, (int, float)) or isinstance(rate_limit, bool)
+                or not 0 < rate_limit < float('inf')):
+            raise ValueError("Limite de débit invalide: nombre de requêtes/s supérieur à 0 attendu")
+
+    job = LightspeedBackfillJob(
+        start_date=start,
+        end_date=end,
+        status='queued',
+        concurrency=concurrency or current_app.config.get('LIGHTSPEED_BACKFILL_CONCURRENCY', 4),
+        rate_limit=rate_limit,
+        total_dates=total,
+        results_json='{}',
+        created_by=created_by,
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+class LightspeedBackfill:
+    """Run (or resume) a LightspeedBackfillJob."""
+
+    def __init__(self, app, client: LightspeedClient = None,
+                 progress: Optional[Callable[[Dict[str, Any], LightspeedBackfillJob], None]] = None):
+        """
+        Args:
+            app: Flask app (workers push their own app context)
+            client: Shared pooled LightspeedClient (creates new if None)
+            progress: Optional callback(per_date_result, job) after each date
+        """
+        self.app = app
+        self.client = client or LightspeedClient()
+        self.progress = progress
+
+    def run(self, job_id: int) -> Dict[str, Any]:
+        """
+        Sync every date of the job that has not already succeeded.
+
+        Must be called inside an app context. Blocks until done.
+
+        Returns:
+            job.to_dict(include_results=True)
+        """
+        job = db.session.get(LightspeedBackfillJob, job_id)
+        if job is None:
+            raise ValueError(f"Backfill job {job_id} introuvable")
+
+        results = job.get_results()
+        pending = [d for d in date_range(job.start_date, job.end_date)
+                   if results.get(d, {}).get('status') != 'ok']
+
+        job.status = 'running'
+        job.started_at = job.started_at or datetime.utcnow()
+        job.finished_at = None
+        job.error_message = None
+        db.session.commit()
+
+        client = self.client.with_rate_limit(job.rate_limit) if job.rate_limit else self.client
+
+        elapsed_before = job.elapsed_seconds or 0
+        t0 = time.perf_counter()
+        logger.info(f"Backfill {job.id}: {len(pending)} dates "
+                    f"({job.start_date} → {job.end_date}), concurrency {job.concurrency}")
+
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, job.concurrency or 1),
+                                    thread_name_prefix='ls-backfill') as pool:
+                futures = {pool.submit(self._sync_date, client, d): d for d in pending}
+                for future in as_completed(futures):
+                    result = future.result()
+                    results[result['date']] = result
+                    self._checkpoint(job, results, elapsed_before + time.perf_counter() - t0)
+                    if self.progress:
+                        self.progress(result, job)
+
+            job.status = 'completed_with_errors' if job.failed_dates else 'completed'
+        except Exception as e:
+            logger.error(f"Backfill {job.id} aborted: {str(e)}")
+            db.session.rollback()
+            job.status = 'failed'
+            job.error_message = str(e)
+
+        job.elapsed_seconds = elapsed_before + time.perf_counter() - t0
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        logger.info(f"Backfill {job.id} {job.status}: {job.completed_dates} ok, "
+                    f"{job.failed_dates} en erreur en {job.elapsed_seconds:.1f}s")
+        return job.to_dict(include_results=True)
+
+    def _sync_date(self, client: LightspeedClient, audit_date: str) -> Dict[str, Any]:
+        """Worker: sync one date in its own app context / DB transaction."""
+        t0 = time.perf_counter()
+        with self.app.app_context():
+            try:
+                outcome = LightspeedSync(client).sync_session(audit_date, include_session=False)
+            except Exception as e:
+                db.session.rollback()
+                outcome = {'synced_tabs': [], 'errors': [str(e)], 'warnings': []}
+        return {
+            'date': audit_date,
+            'status': 'error' if outcome['errors'] else 'ok',
+            'synced_tabs': outcome['synced_tabs'],
+            'errors': outcome['errors'],
+            'warnings': outcome['warnings'],
+            'seconds': round(time.perf_counter() - t0, 3),
+        }
+
+    @staticmethod
+    def _checkpoint(job, results, elapsed):
+        """Persist per-date results and counters after each finished date."""
+        job.results_json = json.dumps(results)
+        job.completed_dates = sum(1 for r in results.values() if r['status'] == 'ok')
+        job.failed_dates = sum(1 for r in results.values() if r['status'] != 'ok')
+        job.elapsed_seconds = elapsed
+        db.session.commit()
+
+
+# ── Background execution for the API ─────────────────────────────────────
+
+_running_jobs = {}
+_running_lock = threading.Lock()
+
+
+def start_job_thread(app, job_id: int, client: LightspeedClient) -> bool:
+    """
+    Run a job on a daemon thread.
+
+    Returns:
+        False if the job is already running in this process
+    """
+    with _running_lock:
+        thread = _running_jobs.get(job_id)
+        if thread is not None and thread.is_alive():
+            return False
+
+        def target():
+            with app.app_context():
+                try:
+                    LightspeedBackfill(app, client).run(job_id)
+                finally:
+                    with _running_lock:
+                        _running_jobs.pop(job_id, None)
+
+        thread = threading.Thread(target=target, name=f'ls-backfill-{job_id}', daemon=True)
+        _running_jobs[job_id] = thread
+        thread.start()
+        return True
+
+
+def is_job_running(job_id: int) -> bool:
+    """True if this process is currently executing the job."""
+    with _running_lock:
+        thread = _running_jobs.get(job_id)
+        return thread is not None and thread.is_alive()
@@ -8,10 +8,25 @@ Reference: https://api-portal.lsk.lightspeed.app/
 
 The client supports demo mode (returns sample data when not configured)
 and full API mode (when credentials are provided).
+
+All HTTP traffic goes through one pooled `requests.Session` (keep-alive,
+one TLS handshake per connection). GET responses are kept in a short-lived,
+request-coalescing cache keyed by endpoint + params (so per audit date):
+concurrent callers asking for the same report share a single in-flight
+request. The cache is an LRU bounded by LIGHTSPEED_CACHE_SIZE and expired
+entries are pruned on insert, so a long backfill does not grow it.
+`prefetch()` fans the independent report endpoints out over the
+pool so a full sync costs roughly one round-trip.
 """
 
+import copy
 import requests
 import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timedelta
 from typing import Optional, Dict, List, Any
 from functools import wraps
@@ -20,6 +35,48 @@ from flask import current_app
 logger = logging.getLogger(__name__)
 
 
+# Failed responses are only shared with callers already waiting (and for a
+# few seconds after) so a transient error is not cached for the full TTL.
+ERROR_CACHE_SECONDS = 5
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket: at most `rate` acquisitions per second,
+    with bursts up to `burst` (defaults to one second's worth).
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, int(rate)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class _TokenState:
+    """OAuth2 token held by a client and shared with its with_rate_limit() copies."""
+
+    __slots__ = ('access_token', 'expires_at')
+
+    def __init__(self):
+        self.access_token = None
+        self.expires_at = None
+
+
 class LightspeedAPIError(Exception):
     """Base exception for Lightspeed API errors."""
     pass
@@ -146,11 +203,45 @@ class LightspeedClient:
         self.base_url = self._get_config('LIGHTSPEED_BASE_URL',
                                         'https://api.lsk.lightspeed.app')
 
-        self._access_token = None
-        self._token_expires_at = None
+        self.pool_size = int(self._get_config('LIGHTSPEED_POOL_SIZE', 10))
+        self.cache_ttl = float(self._get_config('LIGHTSPEED_CACHE_TTL', 300))
+        self.cache_size = int(self._get_config('LIGHTSPEED_CACHE_SIZE', 512))
+        rate_limit = float(self._get_config('LIGHTSPEED_RATE_LIMIT', 0) or 0)
+        # Client-wide: the PMS quota applies per API credential
+        self.rate_limiter = RateLimiter(rate_limit) if rate_limit > 0 else None
+        self._job_limiter = None  # Extra per-job limit, see with_rate_limit()
+
+        self._token = _TokenState()
         self._property_name = None
         self._last_sync = None
 
+        # Pooled keep-alive session shared by every request (thread-safe for our use)
+        self._http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        self._http.mount('https://', adapter)
+        self._http.mount('http://', adapter)
+        self._auth_lock = threading.Lock()
+
+        # (endpoint, params) -> [expires_at, Future], least recently used first
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    @property
+    def _access_token(self):
+        return self._token.access_token
+
+    @_access_token.setter
+    def _access_token(self, value):
+        self._token.access_token = value
+
+    @property
+    def _token_expires_at(self):
+        return self._token.expires_at
+
+    @_token_expires_at.setter
+    def _token_expires_at(self, value):
+        self._token.expires_at = value
+
     def _get_config(self, key, default=None):
         """Get config value from config dict, Flask config, or env."""
         if key in self.config:
@@ -212,7 +303,7 @@ class LightspeedClient:
             }
 
             logger.info(f"Authenticating with Lightspeed API at {self.base_url}")
-            response = requests.post(token_url, json=payload, timeout=10)
+            response = self._http.post(token_url, json=payload, timeout=10)
             response.raise_for_status()
 
             data = response.json()
@@ -245,7 +336,7 @@ class LightspeedClient:
                 'client_secret': self.client_secret,
             }
 
-            response = requests.post(token_url, json=payload, timeout=10)
+            response = self._http.post(token_url, json=payload, timeout=10)
             response.raise_for_status()
 
             data = response.json()
@@ -261,15 +352,22 @@ class LightspeedClient:
             return False
 
     def _ensure_authenticated(self):
-        """Ensure we have a valid token, refresh if needed."""
-        if not self.is_connected():
-            if not self.authenticate():
-                raise LightspeedAuthError("Failed to obtain access token")
+        """Ensure we have a valid token, refresh if needed (one thread at a time)."""
+        if self.is_connected():
+            return
+        with self._auth_lock:
+            if not self.is_connected():
+                if not self.authenticate():
+                    raise LightspeedAuthError("Failed to obtain access token")
 
     def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
         """
         Make authenticated API request.
 
+        GET requests go through the coalescing cache: identical requests
+        (same endpoint and params) made while one is in flight or within
+        `cache_ttl` seconds share its response.
+
         Args:
             method: HTTP method (GET, POST, etc.)
             endpoint: API endpoint (relative to base_url)
@@ -281,7 +379,43 @@ class LightspeedClient:
         Raises:
             LightspeedAPIError: If request fails
         """
+        if method.upper() != 'GET' or self.cache_ttl <= 0:
+            return self._send(method, endpoint, **kwargs)
+
+        key = (endpoint, tuple(sorted((kwargs.get('params') or {}).items())))
+        now = time.monotonic()
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            owner = entry is None or entry[0] <= now
+            if owner:
+                entry = [now + self.cache_ttl, Future()]
+                self._cache[key] = entry
+                self._prune_cache(now)
+            self._cache.move_to_end(key)
+        future = entry[1]
+
+        if owner:
+            try:
+                future.set_result(self._send(method, endpoint, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+                with self._cache_lock:
+                    entry[0] = min(entry[0], time.monotonic() + ERROR_CACHE_SECONDS)
+        return future.result()
+
+    def _prune_cache(self, now: float):
+        """Drop expired entries, then the least recently used beyond `cache_size` (lock held)."""
+        for key in [k for k, (expires_at, _f) in self._cache.items() if expires_at <= now]:
+            del self._cache[key]
+        while len(self._cache) > max(self.cache_size, 1):
+            self._cache.popitem(last=False)
+
+    def _send(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
+        """Perform one HTTP request on the pooled session (no caching)."""
         self._ensure_authenticated()
+        for limiter in (self.rate_limiter, self._job_limiter):
+            if limiter is not None:
+                limiter.acquire()
 
         url = f"{self.base_url}/api/v1{endpoint}"
         headers = {
@@ -291,7 +425,7 @@ class LightspeedClient:
 
         try:
             logger.debug(f"{method} {endpoint}")
-            response = requests.request(
+            response = self._http.request(
                 method, url,
                 headers=headers,
                 timeout=30,
@@ -306,11 +440,76 @@ class LightspeedClient:
             if response.status_code == 401:
                 # Token expired, try refresh
                 if self.refresh_token():
-                    return self._make_request(method, endpoint, **kwargs)
+                    return self._send(method, endpoint, **kwargs)
             raise LightspeedAPIError(f"HTTP {response.status_code}: {response.text}")
         except requests.exceptions.RequestException as e:
             raise LightspeedAPIError(f"Request failed: {str(e)}")
 
+    def with_rate_limit(self, rate: float) -> 'LightspeedClient':
+        """
+        A client for one job, throttled to `rate` requests/second.
+
+        It shares this client's connection pool, token holder (a refresh on
+        either client is seen by both), cache and client-wide limiter (the
+        PMS quota still applies) but adds its own limiter, so nothing on the
+        shared client is modified.
+        """
+        job_client = copy.copy(self)
+        job_client._job_limiter = RateLimiter(rate)
+        return job_client
+
+    def clear_cache(self, date: Optional[str] = None):
+        """
+        Drop cached responses.
+
+        Args:
+            date: Only drop entries for this audit date (YYYY-MM-DD); all if None
+        """
+        with self._cache_lock:
+            if date is None:
+                self._cache.clear()
+                return
+            for key in [k for k in self._cache if ('date', date) in k[1]]:
+                del self._cache[key]
+
+    # Independent report endpoints used by LightspeedSync
+    SYNC_METHODS = (
+        'get_daily_revenue', 'get_room_statistics', 'get_ar_balance',
+        'get_cashier_report', 'get_card_settlements', 'get_market_segments',
+        'get_no_shows',
+    )
+
+    def prefetch(self, date: str, methods=None) -> Dict[str, Any]:
+        """
+        Fetch several reports for one date concurrently over the pool.
+
+        Results land in the coalescing cache, so later `get_*` calls for the
+        same date are served without another round-trip.
+
+        Args:
+            date: Date string (YYYY-MM-DD)
+            methods: Client method names (defaults to SYNC_METHODS)
+
+        Returns:
+            {method_name: result or LightspeedAPIError}
+        """
+        methods = list(methods or self.SYNC_METHODS)
+        if not self.is_configured():
+            return {name: getattr(self, name)(date) for name in methods}
+
+        # Authenticate once up front instead of racing inside the workers
+        self._ensure_authenticated()
+
+        def call(name):
+            try:
+                return getattr(self, name)(date)
+            except LightspeedAPIError as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=max(1, min(len(methods), self.pool_size)),
+                                thread_name_prefix='lightspeed') as pool:
+            return dict(zip(methods, pool.map(call, methods)))
+
     def _get_demo_data(self, method_name: str, *args, **kwargs) -> Dict[str, Any]:
         """Return demo data matching method name."""
         method_map = {
@@ -722,4 +921,6 @@ class LightspeedClient:
         """Clear stored authentication state."""
         self._access_token = None
         self._token_expires_at = None
+        self.clear_cache()
+        self._http.close()
         logger.info("Disconnected from Lightspeed API")
@@ -41,7 +41,7 @@ class LightspeedSync:
             'timestamps': {},
         }
 
-    def sync_session(self, audit_date: str) -> Dict[str, Any]:
+    def sync_session(self, audit_date: str, include_session: bool = True) -> Dict[str, Any]:
         """
         Full sync: fetch all data and populate NightAuditSession.
 
@@ -63,6 +63,7 @@ class LightspeedSync:
 
         Args:
             audit_date: Date string (YYYY-MM-DD)
+            include_session: Include the serialized session in the result
 
         Returns:
             {
@@ -94,6 +95,12 @@ class LightspeedSync:
                 db.session.commit()
                 logger.info(f"Created new session for {audit_date}")
 
+            # Fetch every report for this date concurrently (one round-trip);
+            # the tab syncs below are then served from the client cache.
+            self.client.clear_cache(audit_date)
+            self.client.prefetch(audit_date)
+            self.sync_log['timestamps']['fetched'] = datetime.utcnow().isoformat()
+
             # Sync tabs in order
             self._sync_controle(session, audit_date)
             self._sync_recap(session, audit_date)
@@ -112,7 +119,7 @@ class LightspeedSync:
                 'synced_tabs': self.sync_log['synced_tabs'],
                 'errors': self.sync_log['errors'],
                 'warnings': self.sync_log['warnings'],
-                'session': session.to_dict() if hasattr(session, 'to_dict') else {},
+                'session': session.to_dict() if include_session and hasattr(session, 'to_dict') else {},
             }
 
         except Exception as e:
@@ -0,0 +1,297 @@
+"""
+Notification Outbox — Persistent email queue with a background dispatcher.
+
+Features:
+- Alerts are rendered and written to `notification_outbox` inside the request
+  (a handful of INSERTs); the request returns without touching SMTP
+- A daemon thread drains the outbox in batches over one reused SMTP session
+- Failed deliveries are retried with exponential backoff, then marked failed
+- Rows are claimed with a single UPDATE so several workers can share the table
+- Every delivery attempt outcome is copied to NotificationLog for the history UI
+"""
+
+import json
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func, select, update
+
+from database.models import db, NotificationOutbox, NotificationLog
+from utils.email_service import EmailService
+
+logger = logging.getLogger(__name__)
+
+# A claimed row not finished within this many seconds is handed out again
+CLAIM_LEASE_SECONDS = 300
+
+
+class OutboxDispatcher:
+    """Queue alert emails and deliver them from a background thread."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.email_service = None
+        self.enabled = True
+        self.batch_size = 50
+        self.max_attempts = 5
+        self.retry_base = 30
+        self.retry_max = 3600
+        self.poll_interval = 15
+        self._thread = None
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read OUTBOX_* config and register on `app.extensions`."""
+        self.app = app
+        self.email_service = app.extensions.get('email_service') or EmailService(app)
+        self.enabled = app.config.get('OUTBOX_DISPATCHER_ENABLED', True)
+        self.batch_size = app.config.get('OUTBOX_BATCH_SIZE', 50)
+        self.max_attempts = app.config.get('OUTBOX_MAX_ATTEMPTS', 5)
+        self.retry_base = app.config.get('OUTBOX_RETRY_BASE_SECONDS', 30)
+        self.retry_max = app.config.get('OUTBOX_RETRY_MAX_SECONDS', 3600)
+        self.poll_interval = app.config.get('OUTBOX_POLL_SECONDS', 15)
+        app.extensions['notification_outbox'] = self
+
+    # ── Producer side ──────────────────────────────────────────────────
+
+    def enqueue(self, alert_type, data, recipients, commit=True):
+        """
+        Render an alert once and queue it for each recipient.
+
+        Args:
+            alert_type (str): Type of alert ('rj_submitted', 'variance_alert', etc.)
+            data (dict): Alert data for template rendering
+            recipients (list): List of email addresses or User objects
+            commit (bool): Commit the session (False to join the caller's transaction)
+
+        Returns:
+            list: Queued NotificationOutbox rows
+        """
+        subject, html_body = self.email_service._get_alert_subject_and_body(alert_type, data)
+        data_json = json.dumps(data, default=str)
+        rows = []
+
+        for recipient in recipients:
+            if hasattr(recipient, 'email'):
+                to_email, user_id = recipient.email, recipient.id
+            else:
+                to_email, user_id = recipient, None
+            if not to_email:
+                logger.warning("Recipient has no email address")
+                continue
+            row = NotificationOutbox(
+                event_type=alert_type,
+                severity=data.get('severity', 'info'),
+                recipient_email=to_email,
+                recipient_user_id=user_id,
+                subject=subject,
+                html_body=html_body,
+                data_json=data_json,
+                status='pending',
+                attempts=0,
+                next_attempt_at=datetime.utcnow(),
+            )
+            db.session.add(row)
+            rows.append(row)
+
+        if commit:
+            db.session.commit()
+            if rows:
+                self.wake()
+        return rows
+
+    # ── Consumer side ──────────────────────────────────────────────────
+
+    def wake(self):
+        """Start the dispatcher thread if needed and nudge it to run now."""
+        if not self.enabled or self.app is None:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name='notification-outbox', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def stop(self, timeout=5):
+        """Ask the dispatcher thread to exit and wait for it."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            if self._stopping.is_set():
+                break
+            try:
+                with self.app.app_context():
+                    while self.dispatch_once() and not self._stopping.is_set():
+                        pass
+            except Exception as e:
+                logger.error(f"Outbox dispatcher error: {str(e)}")
+
+    def dispatch_once(self):
+        """
+        Claim one batch of due messages and deliver it over one SMTP session.
+
+        Returns:
+            int: number of messages processed (sent, logged, retried or failed)
+        """
+        rows = self._claim_batch()
+        if not rows:
+            return 0
+
+        results = self.email_service.send_batch([
+            {'to_email': r.recipient_email, 'subject': r.subject,
+             'html_body': r.html_body or '', 'text_body': r.text_body}
+            for r in rows
+        ])
+
+        now = datetime.utcnow()
+        for row, result in zip(rows, results):
+            row.attempts = (row.attempts or 0) + 1
+            row.claimed_by = None
+            if result.get('success'):
+                row.status = result.get('status', 'sent')
+                row.sent_at = now
+                row.last_error = None
+            else:
+                row.last_error = result.get('message')
+                if row.attempts >= self.max_attempts:
+                    row.status = 'failed'
+                else:
+                    row.status = 'pending'
+                    row.next_attempt_at = now + timedelta(seconds=self.backoff(row.attempts))
+
+            if row.status != 'pending':
+                db.session.add(NotificationLog(
+                    event_type=row.event_type,
+                    severity=row.severity,
+                    recipient_email=row.recipient_email,
+                    recipient_user_id=row.recipient_user_id,
+                    subject=row.subject,
+                    message=(row.html_body or '')[:500],
+                    data_json=row.data_json,
+                    delivery_status=row.status,
+                    error_message=row.last_error,
+                ))
+
+        db.session.commit()
+        return len(rows)
+
+    def backoff(self, attempts):
+        """Seconds to wait before retry number `attempts` + 1."""
+        return min(self.retry_base * (2 ** max(0, attempts - 1)), self.retry_max)
+
+    def _claim_batch(self):
+        """Atomically mark up to `batch_size` due rows as ours."""
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+
+        # Recover rows from a dispatcher that died mid-batch. The lost lease
+        # counts as an attempt, so a message that keeps crashing its worker
+        # ends up failed instead of being handed out forever.
+        expired = (NotificationOutbox.status == 'sending',
+                   NotificationOutbox.next_attempt_at <= now)
+        db.session.execute(
+            update(NotificationOutbox)
+            .where(*expired, func.coalesce(NotificationOutbox.attempts, 0) + 1 >= self.max_attempts)
+            .values(status='failed', claimed_by=None,
+                    attempts=func.coalesce(NotificationOutbox.attempts, 0) + 1,
+                    last_error='Bail expiré: le dispatcher s\'est arrêté pendant l\'envoi')
+            .execution_options(synchronize_session=False)
+        )
+        db.session.execute(
+            update(NotificationOutbox)
+            .where(*expired)
+            .values(status='pending', claimed_by=None,
+                    attempts=func.coalesce(NotificationOutbox.attempts, 0) + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+        due_ids = (
+            select(NotificationOutbox.id)
+            .where(NotificationOutbox.status == 'pending',
+                   NotificationOutbox.next_attempt_at <= now)
+            .order_by(NotificationOutbox.id)
+            .limit(self.batch_size)
+            .scalar_subquery()
+        )
+        db.session.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_(due_ids),
+                   NotificationOutbox.status == 'pending')
+            .values(status='sending', claimed_by=token,
+                    next_attempt_at=now + timedelta(seconds=CLAIM_LEASE_SECONDS))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+        return (NotificationOutbox.query
+                .filter_by(claimed_by=token)
+                .order_by(NotificationOutbox.id)
+                .all())
+
+
+def get_outbox():
+    """Return the app's OutboxDispatcher (created on first use)."""
+    outbox = current_app.extensions.get('notification_outbox')
+    if outbox is None:
+        outbox = OutboxDispatcher(current_app._get_current_object())
+    return outbox
+
+
+def enqueue_submission_alerts(nas):
+    """
+    Queue 'rj_submitted' plus every triggered threshold alert for a session.
+
+    Called right after submit_session() commits; only writes outbox rows.
+
+    Returns:
+        int: number of messages queued
+    """
+    from utils.alert_engine import AlertEngine
+
+    engine = AlertEngine()
+    outbox = get_outbox()
+
+    events = [('rj_submitted', {
+        'date': str(nas.audit_date),
+        'auditor': nas.auditor_name,
+        'status': nas.status,
+        'submitted_at': (nas.completed_at or datetime.utcnow()).strftime('%Y-%m-%d %H:%M'),
+        'severity': 'info',
+        'summary': {
+            'revenue': float(nas.jour_total_revenue or 0),
+            'occupancy_rate': float(nas.jour_occupancy_rate or 0),
+            'adr': float(nas.jour_adr or 0),
+            'variance': float(nas.quasi_variance or 0),
+        },
+    })]
+    for alert in engine.check_all_alerts(nas):
+        events.append((alert['alert_type'], {**alert.get('data', {}),
+                                             'severity': alert.get('severity', 'warning'),
+                                             'message': alert.get('message', '')}))
+
+    queued = 0
+    for alert_type, data in events:
+        recipients = engine.get_alert_recipients(alert_type)
+        queued += len(outbox.enqueue(alert_type, data, recipients, commit=False))
+
+    db.session.commit()
+    if queued:
+        outbox.wake()
+    return queued
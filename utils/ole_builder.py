@@ -7,11 +7,21 @@ extracted via olefile.
 
 This avoids the limitation of xlutils.copy which discards VBA macros,
 and olefile.write_stream which requires same-size stream replacement.
+
+`OLEPatcher` / `patch_xls_workbook` is the fast path: it keeps the
+original sector layout and only rewrites the Workbook chain, FAT/DIFAT
+and one directory sector. `OLEBuilder` remains as the fallback that
+lays out every stream from scratch.
 """
 
 import struct
 import io
 import math
+import sys
+import logging
+from array import array
+
+logger = logging.getLogger(__name__)
 
 # ── Constants ──────────────────────────────────────────────────────
 SECT_SIZE = 512
@@ -396,19 +406,355 @@ class OLEBuilder:
         return root
 
 
-def rebuild_xls_with_vba(original_bytes, modified_workbook_bytes):
+class OLEPatchError(Exception):
+    """Raised when a compound file cannot be patched in place."""
+
+
+class _OLEView:
+    """
+    Read-only view over an OLE2 compound file held in memory.
+
+    Parses only the header, FAT and directory; stream contents are never
+    copied — `stream_sectors` returns memoryview slices of the source buffer.
+    """
+
+    def __init__(self, data):
+        self.buf = memoryview(data)
+        if len(self.buf) < SECT_SIZE or bytes(self.buf[0:8]) != OLE_MAGIC:
+            raise OLEPatchError('Not an OLE2 compound file')
+
+        sect_shift, mini_shift = struct.unpack_from('<HH', self.buf, 30)
+        self.sect_size = 1 << sect_shift
+        self.mini_sect_size = 1 << mini_shift
+        self.entries_per_sect = self.sect_size // 4
+        (self.n_fat_sects, self.first_dir_sect, _txn,
+         self.mini_cutoff, self.first_mini_fat_sect, self.n_mini_fat_sects,
+         self.first_difat_sect, self.n_difat_sects) = struct.unpack_from('<8I', self.buf, 44)
+
+        # Sectors physically present after the header
+        self.n_sects = max(0, -(-(len(self.buf) - self.sect_size) // self.sect_size))
+
+        # ── DIFAT: header slots + chained DIFAT sectors ──
+        self.difat_sect_ids = []
+        fat_sect_ids = list(struct.unpack_from('<109I', self.buf, 76))
+        sid = self.first_difat_sect
+        for _ in range(self.n_difat_sects):
+            if sid >= self.n_sects:
+                raise OLEPatchError(f'Invalid DIFAT sector {sid}')
+            self.difat_sect_ids.append(sid)
+            raw = struct.unpack_from(f'<{self.entries_per_sect}I', self.buf, self.offset(sid))
+            fat_sect_ids.extend(raw[:-1])
+            sid = raw[-1]
+        self.fat_sect_ids = fat_sect_ids[:self.n_fat_sects]
+        if any(s >= self.n_sects for s in self.fat_sect_ids):
+            raise OLEPatchError('FAT sector outside file')
+
+        # ── FAT ──
+        self.fat = array('I')
+        for fsid in self.fat_sect_ids:
+            off = self.offset(fsid)
+            self.fat.frombytes(self.buf[off:off + self.sect_size])
+        if sys.byteorder == 'big':
+            self.fat.byteswap()
+
+        # ── Directory ──
+        self.dir_sect_ids = self.chain(self.first_dir_sect)
+        self.entries = []
+        per_sect = self.sect_size // DIR_ENTRY_SIZE
+        for n, dsid in enumerate(self.dir_sect_ids):
+            base = self.offset(dsid)
+            for k in range(per_sect):
+                off = base + k * DIR_ENTRY_SIZE
+                name_len, etype = struct.unpack_from('<HB', self.buf, 64 + off)
+                left, right, child = struct.unpack_from('<3I', self.buf, 68 + off)
+                start, size_lo, size_hi = struct.unpack_from('<3I', self.buf, 116 + off)
+                name = bytes(self.buf[off:off + max(0, min(name_len, 64) - 2)]).decode('utf-16-le', 'replace')
+                size = size_lo if self.sect_size == SECT_SIZE else size_lo | (size_hi << 32)
+                self.entries.append({
+                    'index': n * per_sect + k, 'name': name, 'type': etype,
+                    'left': left, 'right': right, 'child': child,
+                    'start': start, 'size': size, 'offset': off,
+                })
+
+    def offset(self, sid):
+        """Byte offset of sector `sid` in the file."""
+        return (sid + 1) * self.sect_size
+
+    def chain(self, start):
+        """Follow a FAT chain from `start`, returning the list of sector ids."""
+        sids = []
+        sid = start
+        limit = len(self.fat)
+        while sid != ENDOFCHAIN:
+            if sid >= limit or sid >= self.n_sects or len(sids) > limit:
+                raise OLEPatchError(f'Broken FAT chain at sector {sid}')
+            sids.append(sid)
+            sid = self.fat[sid]
+        return sids
+
+    def find_root_stream(self, name):
+        """Find a stream directly under Root Entry by (case-insensitive) name."""
+        if not self.entries:
+            raise OLEPatchError('Empty directory')
+        wanted = name.lower()
+        stack = [self.entries[0]['child']]
+        seen = set()
+        while stack:
+            idx = stack.pop()
+            if idx == 0xFFFFFFFF or idx in seen or idx >= len(self.entries):
+                continue
+            seen.add(idx)
+            entry = self.entries[idx]
+            if entry['type'] == STGTY_STREAM and entry['name'].lower() == wanted:
+                return entry
+            stack.extend((entry['left'], entry['right']))
+        return None
+
+    def stream_sectors(self, entry):
+        """
+        Return the sectors of a regular (non-mini) stream as memoryviews.
+
+        Item k is the k-th sector of the stream in chain order; nothing is
+        copied. The chain is validated up front so callers fail before
+        writing any output.
+        """
+        if entry['size'] < self.mini_cutoff:
+            raise OLEPatchError(f"Stream {entry['name']!r} lives in the mini stream")
+        sids = self.chain(entry['start'])
+        n = _sectors_needed(entry['size'], self.sect_size)
+        if len(sids) < n or self.offset(sids[n - 1]) >= len(self.buf):
+            raise OLEPatchError(f"Stream {entry['name']!r} is truncated")
+        ss = self.sect_size
+        return [self.buf[self.offset(sid):self.offset(sid) + ss] for sid in sids[:n]]
+
+
+class OLEPatcher:
+    """
+    Replace one root-level stream of an OLE2 compound file in place.
+
+    Unlike `OLEBuilder`, which re-lays out every stream, the patcher keeps
+    the original file's sector layout: every unchanged sector is written
+    straight through from the source buffer, the replacement stream reuses
+    the old stream's sectors (extra sectors are appended at the end), and
+    only the FAT, DIFAT and the affected directory sector are regenerated.
+
+    Usage:
+        patcher = OLEPatcher(original_bytes)
+        with open('out.xls', 'wb') as fh:
+            patcher.write(fh, 'Workbook', workbook_sectors, workbook_size)
+    """
+
+    def __init__(self, original_bytes):
+        self.src = _OLEView(original_bytes)
+
+    def write(self, sink, stream_name, sectors, size):
+        """
+        Write the patched compound file to `sink`.
+
+        Args:
+            sink: file-like object with a `write` method
+            stream_name: root-level stream to replace (e.g. 'Workbook')
+            sectors: sequence of sector-sized bytes-like objects holding
+                     the new stream in order (see `_OLEView.stream_sectors`)
+            size: total length of the new stream in bytes
+
+        Returns:
+            number of bytes written
+        """
+        src = self.src
+        ss = src.sect_size
+        epf = src.entries_per_sect
+        entry = src.find_root_stream(stream_name)
+        if entry is None:
+            raise OLEPatchError(f'No {stream_name!r} stream in original file')
+        if entry['size'] < src.mini_cutoff or size < src.mini_cutoff:
+            raise OLEPatchError('Mini-stream sized streams are not patched in place')
+        if ss == SECT_SIZE and size > 0xFFFFFFFF:
+            raise OLEPatchError('Stream too large for a v3 compound file')
+        if len(sectors) != _sectors_needed(size, ss):
+            raise OLEPatchError('Sector count does not match stream size')
+
+        fat = array('I', src.fat)
+        n_sects = src.n_sects
+        fat_sect_ids = list(src.fat_sect_ids)
+        difat_sect_ids = list(src.difat_sect_ids)
+
+        # ── 1. Allocate sectors: old chain first, then append ────
+        old_chain = src.chain(entry['start'])
+        n_needed = _sectors_needed(size, ss)
+        new_chain = old_chain[:n_needed]
+        freed = old_chain[n_needed:]
+        for sid in freed:
+            fat[sid] = FREESECT
+        while len(new_chain) < n_needed:
+            new_chain.append(n_sects)
+            n_sects += 1
+        # Drop freed sectors left dangling at the end of the file
+        tail = set(freed)
+        while n_sects and (n_sects - 1) in tail:
+            n_sects -= 1
+        freed = [sid for sid in freed if sid < n_sects]
+
+        # ── 2. Grow FAT / DIFAT until they cover every sector ────
+        while True:
+            n_fat = len(fat_sect_ids)
+            n_difat_needed = max(0, -(-(n_fat - 109) // (epf - 1)))
+            if n_fat * epf >= n_sects and len(difat_sect_ids) >= n_difat_needed:
+                break
+            if n_fat * epf < n_sects:
+                fat_sect_ids.append(n_sects)
+            else:
+                difat_sect_ids.append(n_sects)
+            n_sects += 1
+
+        if len(fat) < len(fat_sect_ids) * epf:
+            fat.extend([FREESECT] * (len(fat_sect_ids) * epf - len(fat)))
+        for i, sid in enumerate(new_chain):
+            fat[sid] = new_chain[i + 1] if i + 1 < len(new_chain) else ENDOFCHAIN
+        for sid in fat_sect_ids:
+            fat[sid] = FATSECT
+        for sid in difat_sect_ids:
+            fat[sid] = DIFSECT
+
+        # ── 3. Build replacement sectors ─────────────────────────
+        fat_le = array('I', fat)
+        if sys.byteorder == 'big':
+            fat_le.byteswap()
+        fat_view = memoryview(fat_le.tobytes())
+        overrides = {}
+        for i, sid in enumerate(fat_sect_ids):
+            overrides[sid] = fat_view[i * ss:(i + 1) * ss]
+
+        for di, sid in enumerate(difat_sect_ids):
+            block = bytearray(ss)
+            start = 109 + di * (epf - 1)
+            ids = fat_sect_ids[start:start + epf - 1]
+            ids += [FREESECT] * (epf - 1 - len(ids))
+            nxt = difat_sect_ids[di + 1] if di + 1 < len(difat_sect_ids) else ENDOFCHAIN
+            struct.pack_into(f'<{epf}I', block, 0, *ids, nxt)
+            overrides[sid] = block
+
+        dir_sid = src.dir_sect_ids[entry['index'] // (ss // DIR_ENTRY_SIZE)]
+        dir_off = src.offset(dir_sid)
+        dir_block = bytearray(src.buf[dir_off:dir_off + ss])
+        rel = entry['offset'] - dir_off
+        struct.pack_into('<I', dir_block, rel + 116, new_chain[0] if new_chain else ENDOFCHAIN)
+        struct.pack_into('<I', dir_block, rel + 120, size & 0xFFFFFFFF)
+        if ss != SECT_SIZE:
+            struct.pack_into('<I', dir_block, rel + 124, size >> 32)
+        overrides[dir_sid] = dir_block
+
+        zero = bytes(ss)
+        for sid in freed:
+            overrides[sid] = zero
+
+        header = bytearray(src.buf[0:ss])
+        struct.pack_into('<I', header, 44, len(fat_sect_ids))
+        struct.pack_into('<I', header, 68, difat_sect_ids[0] if difat_sect_ids else ENDOFCHAIN)
+        struct.pack_into('<I', header, 72, len(difat_sect_ids))
+        head_ids = fat_sect_ids[:109] + [FREESECT] * max(0, 109 - len(fat_sect_ids))
+        struct.pack_into('<109I', header, 76, *head_ids)
+
+        # ── 4. Stream everything out ─────────────────────────────
+        chain_pos = {sid: i for i, sid in enumerate(new_chain)}
+        written = sink.write(header) or 0
+        sid = 0
+        while sid < n_sects:
+            if sid in overrides:
+                piece = overrides[sid]
+                sid += 1
+            elif sid in chain_pos:
+                piece = sectors[chain_pos[sid]]
+                if len(piece) < ss:
+                    piece = bytes(piece) + bytes(ss - len(piece))
+                sid += 1
+            elif sid >= src.n_sects:
+                piece = zero
+                sid += 1
+            else:
+                # Run of untouched sectors: one slice of the source buffer
+                run_end = sid + 1
+                last = min(n_sects, src.n_sects)
+                while (run_end < last and run_end not in overrides
+                       and run_end not in chain_pos):
+                    run_end += 1
+                piece = src.buf[src.offset(sid):src.offset(run_end)]
+                expected = (run_end - sid) * ss
+                if len(piece) < expected:
+                    piece = bytes(piece) + bytes(expected - len(piece))
+                sid = run_end
+            written += sink.write(piece) or 0
+        return written
+
+
+def patch_xls_workbook(original_bytes, modified_workbook_bytes, sink=None):
+    """
+    Write `original_bytes` with its Workbook stream replaced by the one in
+    `modified_workbook_bytes`, keeping VBA and all other streams untouched.
+
+    Both inputs are read through memoryviews; the new Workbook stream is
+    copied sector by sector into `sink` without being materialised. All
+    validation happens before the first write, so on `OLEPatchError`
+    nothing has been written to `sink`.
+
+    Args:
+        original_bytes: bytes of original .xls file (with VBA macros)
+        modified_workbook_bytes: bytes of .xls file from xlutils.copy (no VBA)
+        sink: writable file-like object; when None the result is returned
+
+    Returns:
+        bytes of the patched file if `sink` is None, else bytes written
+
+    Raises:
+        OLEPatchError: if either file cannot be patched in place
+    """
+    mod = _OLEView(modified_workbook_bytes)
+    wb_entry = mod.find_root_stream('Workbook')
+    if wb_entry is None:
+        raise OLEPatchError('No Workbook stream in modified file')
+
+    sectors = mod.stream_sectors(wb_entry)
+
+    patcher = OLEPatcher(original_bytes)
+    if sink is None:
+        out = io.BytesIO()
+        patcher.write(out, 'Workbook', sectors, wb_entry['size'])
+        return out.getvalue()
+    return patcher.write(sink, 'Workbook', sectors, wb_entry['size'])
+
+
+def rebuild_xls_with_vba(original_bytes, modified_workbook_bytes, sink=None):
     """
     Rebuild an .xls file combining:
     - Modified Workbook stream (from xlutils.copy, has correct cell data)
     - All other streams from original file (VBA, metadata, etc.)
 
+    The in-place `patch_xls_workbook` path is tried first; files it cannot
+    handle (mini-stream workbooks, corrupt FAT chains) fall back to a full
+    `OLEBuilder` re-layout.
+
     Args:
         original_bytes: bytes of original .xls file (with VBA macros)
         modified_workbook_bytes: bytes of .xls file from xlutils.copy (no VBA)
+        sink: optional writable file-like object to receive the result
 
     Returns:
-        bytes of combined .xls file with both correct data AND VBA macros
+        bytes of combined .xls file with both correct data AND VBA macros,
+        or the number of bytes written when `sink` is given
     """
+    try:
+        return patch_xls_workbook(original_bytes, modified_workbook_bytes, sink)
+    except OLEPatchError as e:
+        logger.info(f"In-place OLE patch not possible ({e}); rebuilding layout")
+
+    result = _rebuild_full(original_bytes, modified_workbook_bytes)
+    if sink is None:
+        return result
+    return sink.write(result)
+
+
+def _rebuild_full(original_bytes, modified_workbook_bytes):
+    """Re-lay out every stream with `OLEBuilder` (slow, copies everything)."""
     import olefile
 
     # Extract modified Workbook stream
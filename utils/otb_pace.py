@@ -0,0 +1,191 @@
+"""
+OTB pace cube — otb_pace maintained from otb_forecasts as snapshots arrive.
+
+One OTBPace row per (stay date, days before arrival), written set-based:
+- refresh(): DELETE then one INSERT … SELECT over otb_forecasts with a LAG
+  window for pickup since the previous snapshot of the same stay date,
+  then UPDATEs for the same-time-last-year (STLY) position of the stay
+  date 364 days earlier (same weekday) and pace vs STLY
+- roll_forward(): the daily snapshot copy as a single INSERT … SELECT
+  guarded by NOT EXISTS, instead of one existence query per stay date
+- pace_curve() / target_curve(): chart-ready curves read straight from the
+  cube — at most horizon + 1 rows, whatever the number of snapshots
+
+Every writer of otb_forecasts (CSV import, manual entry, snapshot, seed)
+refreshes the stay dates it touched; `python -m scripts.otb_pace rebuild`
+rebuilds the whole cube.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import Integer, and_, cast, delete, exists, func, insert, literal, select, update
+from sqlalchemy.orm import aliased
+
+from database import db
+from database.models import OTBForecast, OTBPace
+
+STLY_DAYS = 364  # 52 weeks: same weekday last year
+
+# Copied by roll_forward(); snapshot_date, target_date, source and created_at are set
+ROLL_COLUMNS = ('rooms_otb', 'rooms_available', 'occ_otb', 'adr_otb', 'revenue_otb',
+                'group_rooms', 'transient_rooms', 'ly_rooms', 'ly_occ', 'ly_adr', 'ly_revenue')
+
+
+def _sqlite() -> bool:
+    return db.session.get_bind().dialect.name == 'sqlite'
+
+
+def _shift(column, days: int):
+    """column + days as a SQL date expression (SQLite stores dates as text)."""
+    if _sqlite():
+        return func.date(column, f'{days:+d} day')
+    return column + timedelta(days=days)
+
+
+def _days_between(later, earlier):
+    """later - earlier in whole days as a SQL integer expression."""
+    if _sqlite():
+        return cast(func.julianday(later) - func.julianday(earlier), Integer)
+    return cast(later - earlier, Integer)
+
+
+def affected_targets(target_dates: Iterable[date]) -> set:
+    """Stay dates whose cube rows depend on `target_dates` (themselves and their STLY successors)."""
+    targets = set(target_dates)
+    return targets | {t + timedelta(days=STLY_DAYS) for t in targets}
+
+
+def refresh(target_dates: Optional[Iterable[date]] = None) -> int:
+    """
+    Recompute the cube rows of the given stay dates (all stay dates if None).
+
+    Runs in the caller's transaction (commit is up to the caller); returns
+    the number of cube rows written.
+    """
+    db.session.flush()
+    targets = None if target_dates is None else sorted(affected_targets(target_dates))
+    if targets == []:
+        return 0
+
+    def scoped(stmt, column):
+        return stmt if targets is None else stmt.where(column.in_(targets))
+
+    db.session.execute(scoped(delete(OTBPace), OTBPace.target_date))
+
+    f = OTBForecast
+    rooms = func.coalesce(f.rooms_otb, 0)
+    revenue = func.coalesce(f.revenue_otb, 0.0)
+    previous = dict(partition_by=f.target_date, order_by=f.snapshot_date)
+    source = scoped(
+        select(
+            f.target_date,
+            _days_between(f.target_date, f.snapshot_date),
+            f.snapshot_date,
+            rooms,
+            revenue,
+            rooms - func.lag(rooms).over(**previous),
+            revenue - func.lag(revenue).over(**previous),
+        ).where(f.snapshot_date <= f.target_date),
+        f.target_date,
+    )
+    written = db.session.execute(insert(OTBPace).from_select(
+        ['target_date', 'days_before', 'snapshot_date', 'rooms_otb', 'revenue_otb',
+         'pickup_rooms', 'pickup_revenue'], source)).rowcount
+
+    # STLY: last year's stay date as it stood at the same lead time (or the
+    # closest earlier snapshot when none was taken on exactly that day)
+    ly = aliased(OTBPace)
+
+    def stly(column):
+        return (select(column)
+                .where(ly.target_date == _shift(OTBPace.target_date, -STLY_DAYS),
+                       ly.days_before >= OTBPace.days_before)
+                .order_by(ly.days_before)
+                .limit(1)
+                .scalar_subquery())
+
+    db.session.execute(scoped(
+        update(OTBPace).values(stly_rooms=stly(ly.rooms_otb), stly_revenue=stly(ly.revenue_otb)),
+        OTBPace.target_date).execution_options(synchronize_session=False))
+    db.session.execute(scoped(
+        update(OTBPace).values(pace_rooms=OTBPace.rooms_otb - OTBPace.stly_rooms),
+        OTBPace.target_date).execution_options(synchronize_session=False))
+    return written
+
+
+def rebuild() -> int:
+    """Recompute the whole cube and commit; returns the number of cube rows."""
+    written = refresh()
+    db.session.commit()
+    return written
+
+
+def roll_forward(today: date) -> int:
+    """
+    Copy yesterday's snapshot to `today`, each stay date shifted one day
+    forward, skipping stay dates `today` already has — one INSERT … SELECT.
+
+    Returns the number of rows created; no commit and no cube refresh.
+    """
+    f = OTBForecast
+    g = aliased(OTBForecast)
+    new_target = _shift(f.target_date, 1)
+    already = exists().where(g.snapshot_date == today, g.target_date == new_target)
+    source = select(
+        literal(today, db.Date),
+        new_target,
+        *(getattr(f, c) for c in ROLL_COLUMNS),
+        literal('snapshot'),
+        literal(datetime.utcnow(), db.DateTime),
+    ).where(f.snapshot_date == today - timedelta(days=1), ~already)
+
+    return db.session.execute(insert(OTBForecast).from_select(
+        ['snapshot_date', 'target_date', *ROLL_COLUMNS, 'source', 'created_at'], source)).rowcount
+
+
+def snapshot_targets(snapshot_date: date) -> List[date]:
+    """Stay dates present in one snapshot."""
+    return list(db.session.scalars(
+        select(OTBForecast.target_date).where(OTBForecast.snapshot_date == snapshot_date)))
+
+
+# ── Curves ───────────────────────────────────────────────────────────────
+
+def _point(days_before, targets, rooms, revenue, pickup, stly_rooms, stly_revenue):
+    return {
+        'days_before': days_before,
+        'targets': targets,
+        'rooms_otb': rooms or 0,
+        'revenue_otb': round(revenue or 0, 2),
+        'adr_otb': round(revenue / rooms, 2) if rooms else 0,
+        'pickup_rooms': pickup,
+        'stly_rooms': stly_rooms,
+        'stly_revenue': round(stly_revenue, 2) if stly_revenue is not None else None,
+        'pace_rooms': (rooms or 0) - stly_rooms if stly_rooms is not None else None,
+    }
+
+
+def pace_curve(start: date, end: date, horizon: int = 90) -> List[Dict[str, Any]]:
+    """
+    Pace of the stay window [start, end] by days before arrival (horizon → 0).
+
+    One grouped query over the cube: rooms / revenue on the books, pickup
+    and STLY summed over the stay dates that had a snapshot at that lead time.
+    """
+    p = OTBPace
+    rows = db.session.execute(
+        select(p.days_before, func.count(), func.sum(p.rooms_otb), func.sum(p.revenue_otb),
+               func.sum(p.pickup_rooms), func.sum(p.stly_rooms), func.sum(p.stly_revenue))
+        .where(p.target_date.between(start, end), p.days_before <= horizon)
+        .group_by(p.days_before)
+        .order_by(p.days_before.desc()))
+    return [_point(*row) for row in rows]
+
+
+def target_curve(target_date: date, horizon: int = 90) -> List[Dict[str, Any]]:
+    """Booking curve of one stay date, oldest snapshot first."""
+    rows = OTBPace.query.filter(
+        and_(OTBPace.target_date == target_date, OTBPace.days_before <= horizon)
+    ).order_by(OTBPace.days_before.desc()).all()
+    return [r.to_dict() for r in rows]
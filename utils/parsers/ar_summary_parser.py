@@ -16,7 +16,6 @@ The PDF text is positioned with values BEFORE their labels:
 """
 
 import re
-import pdfplumber
 from io import BytesIO
 from utils.parsers.base_parser import BaseParser
 
@@ -107,6 +106,7 @@ class ARSummaryParser(BaseParser):
 
     def _extract_text_from_pdf(self):
         """Extract text from PDF using pdfplumber."""
+        import pdfplumber
         text = ""
         try:
             with pdfplumber.open(BytesIO(self.file_bytes)) as pdf:
@@ -25,7 +25,6 @@ Card code mapping:
 """
 
 import re
-import pdfplumber
 from io import BytesIO
 from utils.parsers.base_parser import BaseParser
 
@@ -121,6 +120,7 @@ class CashierSummaryParser(BaseParser):
 
     def _extract_text_from_pdf(self):
         """Extract text from PDF using pdfplumber, or read as plain text."""
+        import pdfplumber
         # Try PDF first
         try:
             text = ""
@@ -8,7 +8,6 @@ Night auditors need the daily HP totals per department to deduct from Jour sheet
 """
 
 import io
-from openpyxl import load_workbook
 from utils.parsers.base_parser import BaseParser
 
 
@@ -104,6 +103,7 @@ class HPExcelParser(BaseParser):
     def parse(self):
         """Parse HP Excel file — extracts both monthly and daily data."""
         try:
+            from openpyxl import load_workbook
             file_stream = io.BytesIO(self.file_bytes)
             wb = load_workbook(file_stream, data_only=True)
             self.workbook = wb
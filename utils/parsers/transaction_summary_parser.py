@@ -20,7 +20,6 @@ Extracts:
 """
 
 import io
-from openpyxl import load_workbook
 from utils.parsers.base_parser import BaseParser
 
 
@@ -82,6 +81,7 @@ class TransactionSummaryParser(BaseParser):
 
     def _parse_file(self):
         """Read and parse the Excel workbook."""
+        from openpyxl import load_workbook
         file_stream = io.BytesIO(self.file_bytes)
         wb = load_workbook(file_stream, data_only=True)
 
@@ -0,0 +1,145 @@
+"""
+Query Audit — EXPLAIN QUERY PLAN for the ORM queries behind the hot endpoints.
+
+Features:
+- HOT_QUERIES: the filters issued by the main pages / APIs, rebuilt as
+  SQLAlchemy selects (same columns, same WHERE / ORDER BY)
+- explain(): SQLite query plan rows for a statement
+- Flags full table scans (SCAN without an index) and temporary sorts
+- Timing helper for the before/after index report (scripts/query_plans.py)
+"""
+
+import re
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import desc, func, select
+
+from database.models import (
+    DailyCardMetrics, DailyJourMetrics, JournalEntry, NightAuditSession, OTBForecast,
+    RJSheetData, Shift, TaskCompletion,
+)
+
+SAMPLE_DAY = date(2025, 6, 15)
+SAMPLE = {
+    'day': SAMPLE_DAY,
+    'since': SAMPLE_DAY - timedelta(days=30),
+    'month_start': SAMPLE_DAY.replace(day=1),
+    'property_id': 1,
+    'archive_id': 42,
+    'shift_id': 7,
+    'shift_ids': [5, 6, 7],
+    'task_id': 3,
+    'horizon': SAMPLE_DAY + timedelta(days=90),
+}
+
+# (name, endpoint, builder(params) → Select)
+HOT_QUERIES = [
+    ('djm_property_30d', 'properties / portfolio',
+     lambda p: select(func.avg(DailyJourMetrics.occupancy_rate), func.sum(DailyJourMetrics.total_revenue))
+     .where(DailyJourMetrics.property_id == p['property_id'], DailyJourMetrics.date >= p['since'])),
+    ('djm_property_daily', 'portfolio comparaison',
+     lambda p: select(DailyJourMetrics)
+     .where(DailyJourMetrics.property_id == p['property_id'], DailyJourMetrics.date >= p['since'])
+     .order_by(DailyJourMetrics.date)),
+    ('djm_year_month', 'manager (mois)',
+     lambda p: select(func.sum(DailyJourMetrics.total_revenue))
+     .where(DailyJourMetrics.year == p['day'].year, DailyJourMetrics.month == p['day'].month)),
+    ('djm_range', 'dashboard historique',
+     lambda p: select(DailyJourMetrics)
+     .where(DailyJourMetrics.date >= p['since'], DailyJourMetrics.date <= p['day'])
+     .order_by(DailyJourMetrics.date)),
+    ('rj_archive_sheets', 'GET /api/rj/archives/<id>',
+     lambda p: select(RJSheetData).where(RJSheetData.archive_id == p['archive_id'])
+     .order_by(RJSheetData.sheet_index)),
+    ('rj_archive_sheet', 'GET /api/rj/archives/<id>/sheet/<nom>, rj_sheet_parser',
+     lambda p: select(RJSheetData)
+     .where(RJSheetData.archive_id == p['archive_id'], RJSheetData.sheet_name == 'EJ').limit(1)),
+    ('journal_day', 'direction (journal GL)',
+     lambda p: select(JournalEntry).where(JournalEntry.audit_date == p['day'])
+     .order_by(desc(JournalEntry.amount))),
+    ('journal_day_gl', 'rj_sheet_parser (upsert)',
+     lambda p: select(JournalEntry)
+     .where(JournalEntry.audit_date == p['day'], JournalEntry.gl_code == '100401').limit(1)),
+    ('otb_snapshot', 'compset OTB',
+     lambda p: select(OTBForecast)
+     .where(OTBForecast.snapshot_date == p['day'], OTBForecast.target_date <= p['horizon'])
+     .order_by(OTBForecast.target_date)),
+    ('otb_target_pace', 'pace par date de séjour',
+     lambda p: select(OTBForecast).where(OTBForecast.target_date == p['horizon'])
+     .order_by(OTBForecast.snapshot_date)),
+    ('shift_today', 'checklist',
+     lambda p: select(Shift).where(Shift.date == p['day']).limit(1)),
+    ('task_completion_shift', 'checklist / dashboard',
+     lambda p: select(TaskCompletion).where(TaskCompletion.shift_id == p['shift_id'])),
+    ('task_completion_task', 'checklist (cocher)',
+     lambda p: select(TaskCompletion)
+     .where(TaskCompletion.shift_id == p['shift_id'], TaskCompletion.task_id == p['task_id']).limit(1)),
+    ('task_completion_history', 'checklist historique',
+     lambda p: select(TaskCompletion).where(TaskCompletion.shift_id.in_(p['shift_ids']))),
+    ('cards_month', 'rapport PDF / CRM cartes',
+     lambda p: select(DailyCardMetrics)
+     .where(DailyCardMetrics.date >= p['month_start'], DailyCardMetrics.date <= p['day'])),
+    ('cards_day', 'dashboard cartes',
+     lambda p: select(DailyCardMetrics).where(DailyCardMetrics.date == p['day'])),
+    ('nas_listing', 'listes de sessions (RJ natif, direction, corrections)',
+     lambda p: select(NightAuditSession.id, *[getattr(NightAuditSession, c) for c in NightAuditSession.HEADER_COLUMNS])
+     .order_by(desc(NightAuditSession.audit_date))),
+    ('nas_property_recent', 'properties (audits récents)',
+     lambda p: select(func.count(NightAuditSession.id))
+     .where(NightAuditSession.property_id == p['property_id'],
+            NightAuditSession.audit_date >= p['since'], NightAuditSession.status == 'locked')),
+]
+
+# \b pins the lookahead to the end of the table name: without it \w+ backtracks
+# one character and 'SCAN tbl USING INDEX ix' matches as a full scan.
+_SCAN_RE = re.compile(r'^SCAN (\w+)\b(?! USING)')
+
+
+def compile_sql(conn, stmt):
+    """Statement → SQL text with literal parameters (for EXPLAIN / display)."""
+    return str(stmt.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True}))
+
+
+def explain(conn, stmt):
+    """EXPLAIN QUERY PLAN rows ('detail' column) for a statement."""
+    sql = compile_sql(conn, stmt)
+    return [row[-1] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}')]
+
+
+def findings(plan):
+    """
+    Problems in a plan.
+
+    Returns:
+        list of (kind, detail) with kind 'full_scan' or 'temp_sort'
+    """
+    result = []
+    for detail in plan:
+        if _SCAN_RE.match(detail):
+            result.append(('full_scan', detail))
+        elif 'USE TEMP B-TREE' in detail:
+            result.append(('temp_sort', detail))
+    return result
+
+
+def audit(conn, params=None):
+    """Plan + findings for every hot query."""
+    params = {**SAMPLE, **(params or {})}
+    report = []
+    for name, endpoint, build in HOT_QUERIES:
+        plan = explain(conn, build(params))
+        report.append({'name': name, 'endpoint': endpoint, 'plan': plan,
+                       'findings': findings(plan)})
+    return report
+
+
+def time_query(conn, stmt, runs=30):
+    """Best-of-`runs` milliseconds to execute and fetch a statement (after a warm-up run)."""
+    conn.execute(stmt).all()
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        conn.execute(stmt).all()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return min(samples)
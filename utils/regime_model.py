@@ -0,0 +1,379 @@
+"""
+Regime Model — Persisted operating-regime clustering with incremental updates.
+
+Features:
+- Standardized KMeans (3 regimes: low / mid / high occupancy) fitted once;
+  scaler, centroids and per-centroid counts are stored in `regime_models`
+- Requests only label days by nearest centroid; the write path
+  (sync_to_dashboard, JourImporter.persist_batch) folds new days in with an
+  online mini-batch update (centroid += (x - centroid) / count), guarded by
+  a compare-and-set on the stored row
+- Drift = recent distortion (EWMA of squared distance to the nearest
+  centroid) / distortion at fit time; past REGIME_DRIFT_THRESHOLD a full
+  refit is scheduled, warm-started from the current centroids
+- Fits never run on the write path: the first fit and drift refits run in
+  a background thread (REGIME_REFIT_ENABLED) once the write has committed,
+  or via the API / CLI (`python -m scripts.regime_model refit [--cold]`)
+"""
+
+import json
+import logging
+import threading
+import time
+from datetime import date
+
+from flask import current_app, has_app_context
+
+from database.engine import read_session
+from database.models import db, DailyJourMetrics, RegimeModel
+
+from utils.lazy_import import lazy_module, lazy_attrs, has_module
+
+HAS_SKLEARN = has_module('numpy') and has_module('sklearn')
+if HAS_SKLEARN:
+    np = lazy_module('numpy')
+    KMeans, = lazy_attrs('sklearn.cluster', 'KMeans')
+else:
+    np = None
+    KMeans = None
+
+logger = logging.getLogger(__name__)
+
+FEATURES = ('occupancy_rate', 'adr', 'total_revenue', 'fb_revenue')
+N_CLUSTERS = 3
+EWMA_ALPHA = 0.05  # Weight of each new day in the recent distortion
+KEEP_MODELS = 10
+
+
+def feature_matrix(metrics):
+    """(n, len(FEATURES)) array from DailyJourMetrics-like objects."""
+    return np.array([[getattr(m, f) or 0 for f in FEATURES] for m in metrics], dtype=float)
+
+
+class RegimeClusterer:
+    """Scaler + centroids with nearest-centroid labelling and online updates."""
+
+    def __init__(self, state):
+        self.mean = np.array(state['mean'])
+        self.scale = np.array(state['scale'])
+        self.centroids = np.array(state['centroids'])
+        self.counts = np.array(state['counts'], dtype=float)
+        self.baseline = state['baseline']
+        self.recent = state.get('recent', state['baseline'])
+        self.last_date = date.fromisoformat(state['last_date'])
+        self.n_days = state['n_days']
+        self.n_updates = state.get('n_updates', 0)
+        self.fit_seconds = 0.0
+
+    @classmethod
+    def fit(cls, X, last_date, init=None):
+        """
+        Full fit on raw features.
+
+        Args:
+            init: previous RegimeClusterer to warm-start from (n_init=1);
+                  None for a cold start (n_init=10)
+        """
+        mean = X.mean(axis=0)
+        scale = X.std(axis=0)
+        scale[scale == 0] = 1.0
+        Z = (X - mean) / scale
+
+        if init is not None:
+            # Previous centroids, mapped through the new scaler
+            start = (init.centroids * init.scale + init.mean - mean) / scale
+            km = KMeans(n_clusters=N_CLUSTERS, init=start, n_init=1, random_state=42)
+        else:
+            km = KMeans(n_clusters=N_CLUSTERS, n_init=10, random_state=42)
+        km.fit(Z)
+
+        # Order regimes by occupancy so ids stay low / mid / high across refits
+        centroids = km.cluster_centers_[np.argsort(km.cluster_centers_[:, 0])]
+        sq = ((Z[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+        labels = sq.argmin(axis=1)
+        baseline = float(sq.min(axis=1).mean()) or 1e-9
+
+        return cls({
+            'mean': mean.tolist(), 'scale': scale.tolist(),
+            'centroids': centroids.tolist(),
+            'counts': np.bincount(labels, minlength=N_CLUSTERS).tolist(),
+            'baseline': baseline, 'recent': baseline,
+            'last_date': last_date.isoformat(), 'n_days': len(X), 'n_updates': 0,
+        })
+
+    def nearest(self, X):
+        """(labels, squared distances) in scaled space."""
+        Z = (X - self.mean) / self.scale
+        sq = ((Z[:, None, :] - self.centroids[None, :, :]) ** 2).sum(axis=2)
+        labels = sq.argmin(axis=1)
+        return labels, sq[np.arange(len(Z)), labels]
+
+    def partial_fit(self, X, last_date):
+        """Fold new days into the centroids and the drift estimate."""
+        labels, sq = self.nearest(X)
+        Z = (X - self.mean) / self.scale
+        for z, c, d in zip(Z, labels, sq):
+            self.counts[c] += 1
+            self.centroids[c] += (z - self.centroids[c]) / self.counts[c]
+            self.recent = (1 - EWMA_ALPHA) * self.recent + EWMA_ALPHA * float(d)
+        self.n_updates += len(X)
+        self.last_date = max(self.last_date, last_date)
+
+    @property
+    def drift_ratio(self):
+        return self.recent / self.baseline
+
+    def to_state(self):
+        return {
+            'mean': self.mean.tolist(), 'scale': self.scale.tolist(),
+            'centroids': self.centroids.tolist(), 'counts': self.counts.tolist(),
+            'baseline': self.baseline, 'recent': self.recent,
+            'last_date': self.last_date.isoformat(), 'n_days': self.n_days,
+            'n_updates': self.n_updates,
+        }
+
+
+def _usable(metrics):
+    return [m for m in metrics if (m.total_revenue or 0) > 0 and (m.total_rooms_sold or 0) > 0]
+
+
+class RegimeStore:
+    """Load, update, refit and persist the regime clustering."""
+
+    def __init__(self, app=None, persist=True):
+        self.persist = persist
+        self.drift_threshold = 2.0
+        self.drift_min_days = 30
+        self.recheck_seconds = 300
+        self.refit_enabled = True
+        self.refit_delay = 30
+        self.app = None
+        self._active = None   # (RegimeModel.id or None, RegimeClusterer)
+        self._checked_at = 0.0
+        self._lock = threading.RLock()
+        self._thread = None
+
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read REGIME_* config and register on `app.extensions`."""
+        self.drift_threshold = app.config.get('REGIME_DRIFT_THRESHOLD', 2.0)
+        self.drift_min_days = app.config.get('REGIME_DRIFT_MIN_DAYS', 30)
+        self.recheck_seconds = app.config.get('REGIME_RECHECK_SECONDS', 300)
+        self.refit_enabled = app.config.get('REGIME_REFIT_ENABLED', True)
+        self.refit_delay = app.config.get('REGIME_REFIT_DELAY', 30)
+        self.app = app
+        app.extensions['regime_store'] = self
+
+    def label_days(self, metrics):
+        """
+        Label `metrics` by nearest centroid. Read-only: days newer than the
+        model are labelled but only folded in by record_days() (write path).
+
+        Returns:
+            (labels array, model info dict)
+        """
+        with self._lock:
+            clusterer = self._current(metrics)
+            labels, _ = clusterer.nearest(feature_matrix(metrics))
+            return labels, self.info()
+
+    def record_days(self, days):
+        """
+        Fold the days newer than the model into it. Write path:
+        sync_to_dashboard() and JourImporter.persist_batch(); flushes, the
+        caller commits. Never fits: without a stored model, or once drift
+        passes the threshold, a refit is scheduled (schedule_refit()).
+
+        Serialized by the store lock in this process and, across processes,
+        by a compare-and-set on the model row's n_updates: when another
+        worker updated the model first, it is reloaded and the days are
+        re-applied on top, so an update is never applied twice.
+
+        Returns:
+            The updated RegimeClusterer, or None (nothing to fold in)
+        """
+        days = _usable(days)
+        if not HAS_SKLEARN or not days:
+            return None
+        with self._lock:
+            for _ in range(3):
+                clusterer = self._current(days, write=True)
+                if clusterer is None:
+                    if not self.persist:
+                        self.refit(cold=True, reason='initial', metrics=days)
+                    else:
+                        self.schedule_refit(cold=True, reason='initial')
+                    return None
+                new = [m for m in days if m.date > clusterer.last_date]
+                if not new:
+                    return None
+                base_updates = clusterer.n_updates
+                clusterer.partial_fit(feature_matrix(new), max(m.date for m in new))
+                if not self._save(clusterer, expected_updates=base_updates, commit=False):
+                    logger.info("Regime model updated concurrently: reloading")
+                    continue
+                if (clusterer.drift_ratio > self.drift_threshold
+                        and clusterer.n_updates >= self.drift_min_days):
+                    logger.info(f"Regime drift {clusterer.drift_ratio:.2f} > "
+                                f"{self.drift_threshold}: refit scheduled")
+                    if not self.persist:
+                        return self.refit(reason='drift', metrics=days)
+                    self.schedule_refit(reason='drift')
+                return clusterer
+            logger.warning("Regime model busy: days not folded in")
+            return None
+
+    def refit(self, cold=False, reason='manual', metrics=None):
+        """
+        Full refit on all usable DailyJourMetrics (or `metrics` when not
+        persisting). Warm-started from the current centroids unless `cold`.
+        Fits outside the store lock, then commits a new model row.
+        """
+        clusterer = self._fit(cold, metrics)
+        with self._lock:
+            self._save(clusterer, new_fit=True, reason=reason,
+                       fit_seconds=clusterer.fit_seconds)
+            return clusterer
+
+    def schedule_refit(self, cold=False, reason='drift'):
+        """
+        Refit in a background thread, after REGIME_REFIT_DELAY seconds so the
+        write that triggered it has committed. One refit at a time; with
+        REGIME_REFIT_ENABLED off the model waits for the API / CLI refit.
+
+        Returns:
+            The started thread, or None
+        """
+        if not self.refit_enabled or self.app is None:
+            logger.info(f"Regime refit ({reason}) pending: "
+                        f"run `python -m scripts.regime_model refit`")
+            return None
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return None
+            self._thread = threading.Thread(target=self._run_refit, args=(cold, reason),
+                                            name='regime-refit', daemon=True)
+            self._thread.start()
+            return self._thread
+
+    def _run_refit(self, cold, reason):
+        time.sleep(self.refit_delay)
+        try:
+            with self.app.app_context():
+                self.refit(cold=cold, reason=reason)
+        except ValueError as e:                 # too little history yet
+            logger.info(f"Regime refit skipped: {e}")
+        except Exception as e:
+            logger.error(f"Regime refit error: {str(e)}")
+
+    def info(self):
+        model_id, clusterer = self._active
+        return {
+            'id': model_id,
+            'last_date': clusterer.last_date.isoformat(),
+            'n_days': clusterer.n_days,
+            'n_updates': clusterer.n_updates,
+            'drift_ratio': round(clusterer.drift_ratio, 3),
+        }
+
+    def _fit(self, cold, metrics):
+        if self.persist:
+            with read_session() as s:
+                rows = _usable(s.query(DailyJourMetrics).order_by(DailyJourMetrics.date).all())
+        else:
+            rows = sorted(_usable(metrics or []), key=lambda m: m.date)
+        if len(rows) < N_CLUSTERS:
+            raise ValueError("Pas assez de jours pour le regroupement")
+
+        init = None if cold or self._active is None else self._active[1]
+        t0 = time.perf_counter()
+        clusterer = RegimeClusterer.fit(feature_matrix(rows), rows[-1].date, init=init)
+        clusterer.fit_seconds = time.perf_counter() - t0
+        return clusterer
+
+    def _current(self, metrics, write=False):
+        """
+        Active clusterer: memory → latest persisted row → in-memory fit.
+
+        On the write path the stored row is always re-read and a copy is
+        returned for the caller to update, or None when there is no model
+        yet; a read without a stored model only keeps its fit in memory.
+        """
+        if self.persist:
+            fresh = time.monotonic() - self._checked_at < self.recheck_seconds
+            if self._active is not None and fresh and not write:
+                return self._active[1]
+            row = RegimeModel.query.order_by(RegimeModel.id.desc()).first()
+            if row is not None:
+                if self._active is None or self._active[0] != row.id or \
+                        self._active[1].n_updates != row.n_updates:
+                    self._active = (row.id, RegimeClusterer(row.get_state()))
+                self._checked_at = time.monotonic()
+                return RegimeClusterer(row.get_state()) if write else self._active[1]
+        elif self._active is not None:
+            return RegimeClusterer(self._active[1].to_state()) if write else self._active[1]
+
+        if write:
+            return None
+        if not self.persist:
+            return self.refit(cold=True, reason='initial', metrics=metrics)
+        self._active = (None, self._fit(True, metrics))
+        self._checked_at = time.monotonic()
+        return self._active[1]
+
+    def _save(self, clusterer, new_fit=False, reason=None, fit_seconds=0.0,
+              expected_updates=None, commit=True):
+        """
+        Store `clusterer`: a new row for a fit, otherwise an update of the
+        active row guarded by `expected_updates` (returns False when another
+        writer changed it first).
+        """
+        model_id = self._active[0] if self._active and not new_fit else None
+        if self.persist:
+            values = {
+                'state_json': json.dumps(clusterer.to_state()),
+                'last_date': clusterer.last_date,
+                'n_days': clusterer.n_days,
+                'n_updates': clusterer.n_updates,
+                'drift_ratio': clusterer.drift_ratio,
+            }
+            if new_fit:
+                row = RegimeModel(refit_reason=reason, fit_seconds=fit_seconds, **values)
+                db.session.add(row)
+                db.session.flush()
+                model_id = row.id
+                old = [r.id for r in RegimeModel.query.order_by(RegimeModel.id.desc())
+                       .offset(KEEP_MODELS).with_entities(RegimeModel.id)]
+                if old:
+                    RegimeModel.query.filter(RegimeModel.id.in_(old)).delete(synchronize_session=False)
+            else:
+                query = RegimeModel.query.filter(RegimeModel.id == model_id)
+                if expected_updates is not None:
+                    query = query.filter(RegimeModel.n_updates == expected_updates)
+                if not query.update(values, synchronize_session=False):
+                    return False
+            if commit:
+                db.session.commit()
+            else:
+                db.session.flush()
+        self._active = (model_id, clusterer)
+        self._checked_at = time.monotonic()
+        return True
+
+
+_default_store = None
+
+
+def get_regime_store():
+    """The app's RegimeStore, or an in-memory one outside an app context."""
+    global _default_store
+    if has_app_context():
+        store = current_app.extensions.get('regime_store')
+        if store is None:
+            store = RegimeStore(current_app._get_current_object())
+        return store
+    if _default_store is None:
+        _default_store = RegimeStore(persist=False)
+    return _default_store
@@ -0,0 +1,363 @@
+"""
+Request Metrics — Per-endpoint timing, SQL accounting and a Prometheus /metrics endpoint.
+
+Features:
+- Wall time of every request (histogram per route pattern + status)
+- Sampled requests (METRICS_SAMPLE_RATE) also record: SQL statement count
+  and time (SQLAlchemy cursor events, every engine), time spent in xlrd /
+  openpyxl / pdfplumber (wrappers installed at import time), growth of the
+  process peak RSS
+- GET /metrics in Prometheus text format (METRICS_TOKEN bearer, or
+  loopback only when no token is set)
+- SQLite write-lock waits per route: time of the statement that opens each
+  write transaction (first INSERT / UPDATE / DELETE, or BEGIN IMMEDIATE —
+  where SQLite queues behind another writer up to busy_timeout) and
+  "database is locked" errors
+- Slow-request log (METRICS_SLOW_MS) with the heaviest SQL statements
+
+Counters are per process: with several workers, scrape each one or put
+them behind a single-worker metrics port.
+"""
+
+import functools
+import logging
+import random
+import re
+import threading
+import time
+
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from utils.lazy_import import has_module, when_imported
+
+logger = logging.getLogger(__name__)
+
+HAS_RESOURCE = has_module('resource')
+if HAS_RESOURCE:
+    import resource
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# (module, attribute path, library label) — wrapped once the module is imported
+LIBRARY_HOOKS = [
+    ('xlrd', 'open_workbook', 'xlrd'),
+    ('xlwt', 'Workbook.save', 'xlwt'),
+    ('openpyxl', 'load_workbook', 'openpyxl'),
+    ('openpyxl.workbook.workbook', 'Workbook.save', 'openpyxl'),
+    ('pdfplumber', 'open', 'pdfplumber'),
+    ('pdfplumber.page', 'Page.extract_text', 'pdfplumber'),
+    ('pdfplumber.page', 'Page.extract_tables', 'pdfplumber'),
+]
+
+_WS_RE = re.compile(r'\s+')
+_WRITE_RE = re.compile(r'\s*(INSERT|UPDATE|DELETE|REPLACE|BEGIN IMMEDIATE)\b', re.IGNORECASE)
+_hooks_installed = False
+_hooks_lock = threading.Lock()
+
+
+def _current():
+    """Accounting dict of the current sampled request, else None."""
+    if not has_request_context():
+        return None
+    return g.get('_perf')
+
+
+def _peak_rss_bytes():
+    if not HAS_RESOURCE:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # Linux: KiB
+
+
+# ── SQL accounting ─────────────────────────────────────────────────────
+
+def _opens_write(conn, statement):
+    """True when `statement` takes the SQLite write lock for a new transaction."""
+    if conn.dialect.name != 'sqlite' or not _WRITE_RE.match(statement):
+        return False
+    return getattr(conn.connection.dbapi_connection, 'in_transaction', True) is False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current() is not None:
+        conn.info.setdefault('_perf_t0', []).append(
+            (time.perf_counter(), _opens_write(conn, statement)))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    perf = _current()
+    starts = conn.info.get('_perf_t0')
+    if perf is None or not starts:
+        return
+    t0, opens_write = starts.pop()
+    ms = (time.perf_counter() - t0) * 1000
+    perf['sql_count'] += 1
+    perf['sql_ms'] += ms
+    if opens_write:
+        perf['lock_waits'] += 1
+        perf['lock_wait_ms'] += ms
+    entry = perf['queries'].setdefault(statement, [0, 0.0])  # normalised only when logged
+    entry[0] += 1
+    entry[1] += ms
+
+
+def _handle_error(context):
+    perf = _current()
+    if context.connection is not None:
+        context.connection.info.pop('_perf_t0', None)
+    if perf is not None and 'database is locked' in str(context.original_exception):
+        perf['lock_errors'] += 1
+
+
+# ── Library hooks ──────────────────────────────────────────────────────
+
+def timed_call(label, fn):
+    """Wrap `fn` so its time is charged to `label` in sampled requests."""
+    if getattr(fn, '_perf_label', None):
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        perf = _current()
+        if perf is None or label in perf['active']:  # nested call already timed
+            return fn(*args, **kwargs)
+        perf['active'].add(label)
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            perf['active'].discard(label)
+            perf['libs'][label] = perf['libs'].get(label, 0.0) + (time.perf_counter() - t0) * 1000
+
+    wrapper._perf_label = label
+    return wrapper
+
+
+def _wrap_attr(module, path, label):
+    owner = module
+    *parents, attr = path.split('.')
+    for name in parents:
+        owner = getattr(owner, name)
+    setattr(owner, attr, timed_call(label, getattr(owner, attr)))
+
+
+def install_hooks():
+    """SQLAlchemy listeners on every engine + library wrappers (idempotent)."""
+    global _hooks_installed
+    with _hooks_lock:
+        if _hooks_installed:
+            return
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+        for module_name, path, label in LIBRARY_HOOKS:
+            if has_module(module_name):
+                when_imported(module_name, functools.partial(_safe_wrap, path=path, label=label))
+        _hooks_installed = True
+
+
+def _safe_wrap(module, path, label):
+    try:
+        _wrap_attr(module, path, label)
+    except AttributeError:
+        logger.debug(f"Instrumentation: {module.__name__}.{path} introuvable")
+
+
+# ── Metric store ───────────────────────────────────────────────────────
+
+class RequestMetrics:
+    """Flask extension: request hooks, metric store and the /metrics view."""
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.sample_rate = 1.0
+        self.slow_ms = 1000
+        self.slow_log_enabled = True
+        self.top_queries = 5
+        self.token = ''
+        self._lock = threading.Lock()
+        self.reset()
+
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read METRICS_* config, install hooks, register request handlers and /metrics."""
+        self.enabled = app.config.get('METRICS_ENABLED', True)
+        self.sample_rate = app.config.get('METRICS_SAMPLE_RATE', 1.0)
+        self.slow_ms = app.config.get('METRICS_SLOW_MS', 1000)
+        self.slow_log_enabled = app.config.get('METRICS_SLOW_LOG_ENABLED', True)
+        self.top_queries = app.config.get('METRICS_TOP_QUERIES', 5)
+        self.token = app.config.get('METRICS_TOKEN', '')
+        app.extensions['request_metrics'] = self
+        if not self.enabled:
+            return
+        install_hooks()
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+
+    def reset(self):
+        with self._lock:
+            self.requests = {}      # (endpoint, method, status) → count
+            self.durations = {}     # endpoint → [bucket counts..., +Inf], sum, count
+            self.sql = {}           # endpoint → [statements, seconds]
+            self.locks = {}         # endpoint → [write transactions, wait seconds, locked errors]
+            self.libs = {}          # (endpoint, library) → seconds
+            self.rss = {}           # endpoint → [total growth bytes, max growth bytes]
+            self.sampled = 0
+            self.slow = 0
+
+    # ── Request hooks ──────────────────────────────────────────────────
+
+    def _before_request(self):
+        g._perf_start = time.perf_counter()
+        if self.sample_rate >= 1 or random.random() < self.sample_rate:
+            g._perf = {'sql_count': 0, 'sql_ms': 0.0, 'queries': {}, 'libs': {},
+                       'lock_waits': 0, 'lock_wait_ms': 0.0, 'lock_errors': 0,
+                       'active': set(), 'rss0': _peak_rss_bytes()}
+
+    def _after_request(self, response):
+        start = g.get('_perf_start')
+        if start is None:
+            return response
+        seconds = time.perf_counter() - start
+        endpoint = request.url_rule.rule if request.url_rule else '<unmatched>'
+        perf = g.pop('_perf', None)
+        self.record(endpoint, request.method, response.status_code, seconds, perf)
+        if perf is not None and self.slow_log_enabled and seconds * 1000 >= self.slow_ms:
+            self._log_slow(endpoint, seconds, perf)
+        return response
+
+    def record(self, endpoint, method, status, seconds, perf=None):
+        """Fold one finished request into the counters."""
+        with self._lock:
+            key = (endpoint, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            hist = self.durations.setdefault(endpoint, [[0] * (len(DURATION_BUCKETS) + 1), 0.0, 0])
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if seconds <= bound:
+                    hist[0][i] += 1
+            hist[0][-1] += 1
+            hist[1] += seconds
+            hist[2] += 1
+            if perf is None:
+                return
+            self.sampled += 1
+            sql = self.sql.setdefault(endpoint, [0, 0.0])
+            sql[0] += perf['sql_count']
+            sql[1] += perf['sql_ms'] / 1000
+            if perf['lock_waits'] or perf['lock_errors']:
+                locks = self.locks.setdefault(endpoint, [0, 0.0, 0])
+                locks[0] += perf['lock_waits']
+                locks[1] += perf['lock_wait_ms'] / 1000
+                locks[2] += perf['lock_errors']
+            for label, ms in perf['libs'].items():
+                self.libs[(endpoint, label)] = self.libs.get((endpoint, label), 0.0) + ms / 1000
+            if perf['rss0'] is not None:
+                growth = max(0, _peak_rss_bytes() - perf['rss0'])
+                rss = self.rss.setdefault(endpoint, [0, 0])
+                rss[0] += growth
+                rss[1] = max(rss[1], growth)
+
+    def _log_slow(self, endpoint, seconds, perf):
+        with self._lock:
+            self.slow += 1
+        top = sorted(perf['queries'].items(), key=lambda kv: -kv[1][1])[:self.top_queries]
+        libs = ', '.join(f"{k} {v:.0f} ms" for k, v in sorted(perf['libs'].items())) or '-'
+        lines = [f"  {ms:8.1f} ms  x{count:<4} {_WS_RE.sub(' ', sql)[:300]}"
+                 for sql, (count, ms) in top]
+        logger.warning(
+            f"Slow request {request.method} {endpoint}: {seconds * 1000:.0f} ms, "
+            f"SQL {perf['sql_count']} stmt / {perf['sql_ms']:.0f} ms, libs: {libs}\n" + '\n'.join(lines))
+
+    # ── Exposition ─────────────────────────────────────────────────────
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        out = []
+
+        def metric(name, kind, help_text):
+            out.append(f'# HELP {name} {help_text}')
+            out.append(f'# TYPE {name} {kind}')
+
+        with self._lock:
+            metric('audit_http_requests_total', 'counter', 'Requests by route, method and status.')
+            for (endpoint, method, status), n in sorted(self.requests.items()):
+                out.append(f'audit_http_requests_total{{{_labels(endpoint=endpoint, method=method, status=status)}}} {n}')
+
+            metric('audit_http_request_duration_seconds', 'histogram', 'Request wall time.')
+            for endpoint, (buckets, total, count) in sorted(self.durations.items()):
+                for bound, n in zip(DURATION_BUCKETS + ('+Inf',), buckets):
+                    out.append(f'audit_http_request_duration_seconds_bucket'
+                               f'{{{_labels(endpoint=endpoint, le=str(bound))}}} {n}')
+                out.append(f'audit_http_request_duration_seconds_sum{{{_labels(endpoint=endpoint)}}} {total:.6f}')
+                out.append(f'audit_http_request_duration_seconds_count{{{_labels(endpoint=endpoint)}}} {count}')
+
+            metric('audit_sql_statements_total', 'counter', 'SQL statements executed (sampled requests).')
+            for endpoint, (n, _) in sorted(self.sql.items()):
+                out.append(f'audit_sql_statements_total{{{_labels(endpoint=endpoint)}}} {n}')
+            metric('audit_sql_seconds_total', 'counter', 'Time in SQL statements (sampled requests).')
+            for endpoint, (_, secs) in sorted(self.sql.items()):
+                out.append(f'audit_sql_seconds_total{{{_labels(endpoint=endpoint)}}} {secs:.6f}')
+
+            metric('audit_db_write_transactions_total', 'counter',
+                   'SQLite write transactions opened (sampled requests).')
+            for endpoint, (n, _, _) in sorted(self.locks.items()):
+                out.append(f'audit_db_write_transactions_total{{{_labels(endpoint=endpoint)}}} {n}')
+            metric('audit_db_lock_wait_seconds_total', 'counter',
+                   'Time in the statements that took the SQLite write lock (sampled requests).')
+            for endpoint, (_, secs, _) in sorted(self.locks.items()):
+                out.append(f'audit_db_lock_wait_seconds_total{{{_labels(endpoint=endpoint)}}} {secs:.6f}')
+            metric('audit_db_lock_errors_total', 'counter', '"database is locked" errors (sampled requests).')
+            for endpoint, (_, _, n) in sorted(self.locks.items()):
+                out.append(f'audit_db_lock_errors_total{{{_labels(endpoint=endpoint)}}} {n}')
+
+            metric('audit_library_seconds_total', 'counter',
+                   'Time in xlrd / xlwt / openpyxl / pdfplumber (sampled requests).')
+            for (endpoint, label), secs in sorted(self.libs.items()):
+                out.append(f'audit_library_seconds_total{{{_labels(endpoint=endpoint, library=label)}}} {secs:.6f}')
+
+            metric('audit_peak_rss_growth_bytes_total', 'counter',
+                   'Growth of the process peak RSS during requests (sampled).')
+            for endpoint, (total, _) in sorted(self.rss.items()):
+                out.append(f'audit_peak_rss_growth_bytes_total{{{_labels(endpoint=endpoint)}}} {total}')
+            metric('audit_peak_rss_growth_bytes_max', 'gauge', 'Largest peak RSS growth of one request.')
+            for endpoint, (_, peak) in sorted(self.rss.items()):
+                out.append(f'audit_peak_rss_growth_bytes_max{{{_labels(endpoint=endpoint)}}} {peak}')
+
+            metric('audit_metrics_sampled_requests_total', 'counter', 'Requests with full accounting.')
+            out.append(f'audit_metrics_sampled_requests_total {self.sampled}')
+            metric('audit_slow_requests_total', 'counter', 'Requests over METRICS_SLOW_MS (sampled).')
+            out.append(f'audit_slow_requests_total {self.slow}')
+            metric('audit_metrics_sample_rate', 'gauge', 'Configured sampling rate.')
+            out.append(f'audit_metrics_sample_rate {self.sample_rate}')
+
+        peak = _peak_rss_bytes()
+        if peak is not None:
+            metric('audit_process_peak_rss_bytes', 'gauge', 'Peak resident set size of this worker.')
+            out.append(f'audit_process_peak_rss_bytes {peak}')
+        return '\n'.join(out) + '\n'
+
+    def metrics_view(self):
+        """GET /metrics — bearer METRICS_TOKEN, or loopback clients when no token is set."""
+        if self.token:
+            if request.headers.get('Authorization', '') != f'Bearer {self.token}':
+                return Response('Non autorisé\n', status=401, mimetype='text/plain')
+        elif request.remote_addr not in ('127.0.0.1', '::1'):
+            return Response('Interdit\n', status=403, mimetype='text/plain')
+        return Response(self.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _labels(**labels):
+    return ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def get_request_metrics():
+    """The app's RequestMetrics."""
+    return current_app.extensions['request_metrics']
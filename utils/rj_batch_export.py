@@ -0,0 +1,264 @@
+"""
+RJ batch export — the RJ .xls of every session of a month or date range,
+built in a process pool and streamed into one zip.
+
+- The parent loads the sessions in one query (every column) and hands each
+  worker a plain dict of column values; the worker rebuilds a detached
+  NightAuditSession and runs the single-export builder
+  (routes.audit.rj_native.build_rj_excel) on a clone of the template
+- HTTP batches share one bounded pool per process (shared_pool), started
+  with the 'spawn' method: forking a threaded Flask worker is unsafe. Only
+  one batch runs at a time (begin_batch; the route answers 429 otherwise).
+  The CLI builds its own short-lived pool
+- The template is parsed once (utils/rj_template_cache.py): by the parent
+  before a CLI pool starts, which forked workers inherit, otherwise once
+  per worker by the pool initializer
+- Files enter the zip in completion order; the zip is written to a
+  non-seekable sink drained after every file, so a download starts with
+  the first finished RJ instead of after the last one
+- The last entry, export_timings.json, has the build time, worker pid and
+  size of every file (and its error, if any — one bad session does not
+  stop the batch)
+"""
+
+import calendar
+import io
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import undefer
+
+from database.models import NightAuditSession
+from utils import rj_template_cache
+
+logger = logging.getLogger(__name__)
+
+REPORT_NAME = 'export_timings.json'
+
+Builder = Callable[[NightAuditSession, rj_template_cache.WorkbookTemplate], bytes]
+
+
+def parse_range(month: Optional[str] = None, start: Optional[str] = None,
+                end: Optional[str] = None, max_days: int = 366) -> Tuple[date, date]:
+    """(start, end) of ?month=YYYY-MM or ?start=YYYY-MM-DD&end=YYYY-MM-DD, at most
+    `max_days` days long (ValueError otherwise)."""
+    if month:
+        try:
+            first = datetime.strptime(month, '%Y-%m').date()
+        except ValueError:
+            raise ValueError('Format de mois invalide (YYYY-MM)')
+        return first, first.replace(day=calendar.monthrange(first.year, first.month)[1])
+    if not (start and end):
+        raise ValueError('Paramètre month (YYYY-MM) ou start et end (YYYY-MM-DD) requis')
+    try:
+        first, last = (datetime.strptime(v, '%Y-%m-%d').date() for v in (start, end))
+    except ValueError:
+        raise ValueError('Format de date invalide (YYYY-MM-DD)')
+    if first > last:
+        raise ValueError('La date de début doit précéder la date de fin')
+    total = (last - first).days + 1
+    if total > max_days:
+        raise ValueError(f'Plage trop longue: {total} jours (maximum {max_days})')
+    return first, last
+
+
+def filename(d: date) -> str:
+    return f"Rj {d.strftime('%d-%m-%Y')}.xls"
+
+
+def load_sessions(start: date, end: date) -> List[Dict[str, Any]]:
+    """Column values of every session of [start, end], one query, oldest first."""
+    columns = [attr.key for attr in NightAuditSession.__mapper__.column_attrs]
+    sessions = NightAuditSession.query.options(undefer('*')).filter(
+        NightAuditSession.audit_date.between(start, end)
+    ).order_by(NightAuditSession.audit_date).all()
+    return [{c: getattr(nas, c) for c in columns} for nas in sessions]
+
+
+def _warm(template_path: str) -> None:
+    rj_template_cache.template(template_path)
+
+
+def build_one(builder: Builder, template_path: str, values: Dict[str, Any]) -> Dict[str, Any]:
+    """One RJ file: {date, filename, worker, ms, data} or {..., error}. Runs in a worker."""
+    t0 = time.perf_counter()
+    d = values['audit_date']
+    result = {'date': d.isoformat(), 'filename': filename(d), 'worker': os.getpid()}
+    try:
+        template = rj_template_cache.template(template_path)
+        if template is None:
+            raise FileNotFoundError(f'Template RJ introuvable: {template_path}')
+        result['data'] = builder(NightAuditSession(**values), template)
+    except Exception as e:
+        logger.warning(f"RJ batch export {d}: {e}")
+        result['error'] = str(e)
+    result['ms'] = round((time.perf_counter() - t0) * 1000, 1)
+    return result
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_busy = threading.Lock()        # held while an HTTP batch runs
+
+
+def shared_pool(workers: int, template_path: str) -> ProcessPoolExecutor:
+    """The process-wide 'spawn' pool of `workers` processes (restarted if the size changes)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool._max_workers != workers:
+            _pool.shutdown(wait=True)
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers,
+                                        mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=_warm, initargs=(template_path,))
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the shared pool (tests, worker shutdown)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def begin_batch() -> bool:
+    """Claim the process's batch slot; False while another batch runs."""
+    return _busy.acquire(blocking=False)
+
+
+def end_batch() -> None:
+    _busy.release()
+
+
+class ExclusiveStream:
+    """
+    Zip stream of a batch that holds the slot (begin_batch): close() — at
+    the end of the iteration, or from Response.call_on_close for a client
+    gone before the first byte — stops it and frees the slot once.
+    """
+
+    def __init__(self, stream: Iterator[bytes]):
+        self._stream = stream
+        self._open = True
+
+    def __iter__(self):
+        try:
+            yield from self._stream
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self._open:
+            self._open = False
+            try:
+                self._stream.close()
+            finally:
+                end_batch()
+
+
+def iter_exports(builder: Builder, sessions: List[Dict[str, Any]], template_path: str,
+                 workers: int = 4, pool: Optional[ProcessPoolExecutor] = None
+                 ) -> Iterator[Dict[str, Any]]:
+    """
+    Built files in completion order: on `pool` if given, else on a pool of
+    its own; in-process when workers <= 1 or a single session.
+    """
+    if workers <= 1 or len(sessions) <= 1:
+        for values in sessions:
+            yield build_one(builder, template_path, values)
+        return
+
+    own = pool is None
+    if own:
+        _warm(template_path)
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(sessions)),
+                                   initializer=_warm, initargs=(template_path,))
+    futures = [pool.submit(build_one, builder, template_path, values) for values in sessions]
+    try:
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        # Also reached when the consumer stops early (client gone): drop queued files
+        if own:
+            pool.shutdown(wait=True, cancel_futures=True)
+        else:
+            for future in futures:
+                future.cancel()
+
+
+class _Sink(io.RawIOBase):
+    """Write-only, non-seekable buffer that the zip writer streams into."""
+
+    def __init__(self):
+        super().__init__()
+        self._parts = []
+        self._offset = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._parts.append(bytes(b))
+        self._offset += len(b)
+        return len(b)
+
+    def tell(self):
+        return self._offset
+
+    def drain(self) -> bytes:
+        data, self._parts = b''.join(self._parts), []
+        return data
+
+
+def summary(files: List[Dict[str, Any]], elapsed_ms: float) -> Dict[str, Any]:
+    built = [f for f in files if 'error' not in f]
+    build_ms = sum(f['ms'] for f in files)
+    return {
+        'files': len(built),
+        'errors': len(files) - len(built),
+        'elapsed_ms': round(elapsed_ms, 1),
+        'build_ms_total': round(build_ms, 1),
+        'build_ms_avg': round(build_ms / len(files), 1) if files else 0,
+        'workers': len({f['worker'] for f in files}),
+        'items': sorted(files, key=lambda f: f['date']),
+    }
+
+
+def stream_zip(exports: Iterable[Dict[str, Any]],
+               progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Iterator[bytes]:
+    """Zip bytes, yielded after each finished file; REPORT_NAME is the last entry."""
+    t0 = time.perf_counter()
+    sink = _Sink()
+    files = []
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for item in exports:
+            data = item.pop('data', None)
+            if data is not None:
+                zf.writestr(item['filename'], data)
+                item['size'] = len(data)
+            item['done_ms'] = round((time.perf_counter() - t0) * 1000, 1)
+            files.append(item)
+            if progress:
+                progress(item)
+            yield sink.drain()
+        report = summary(files, (time.perf_counter() - t0) * 1000)
+        zf.writestr(REPORT_NAME, json.dumps(report, indent=2, ensure_ascii=False))
+    yield sink.drain()
+
+
+def export_zip(builder: Builder, sessions: List[Dict[str, Any]], template_path: str,
+               workers: int = 4, progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+               pool: Optional[ProcessPoolExecutor] = None) -> Iterator[bytes]:
+    """Build every session's RJ with `workers` processes (or on `pool`) and stream them as one zip."""
+    return stream_zip(iter_exports(builder, sessions, template_path, workers, pool), progress)
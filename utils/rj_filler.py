@@ -75,11 +75,23 @@ class RJFiller:
 
         self.wb = copy_workbook(self.rb)
 
-        # Build sheet name → index cache for fast lookups
-        self._sheet_index_cache = {}
-        for idx in range(len(self._get_worksheets())):
-            name = self.wb.get_sheet(idx).name
-            self._sheet_index_cache[name] = idx
+        # Build sheet name → index cache for fast lookups (xlutils keeps the sheet order)
+        self._sheet_index_cache = {name: idx for idx, name in enumerate(self.rb.sheet_names())}
+
+    @classmethod
+    def from_template(cls, template):
+        """
+        Filler over a clone of a parsed WorkbookTemplate (utils/rj_template_cache.py).
+
+        Skips the xlrd parse and xlutils copy: reads go to the template's
+        shared xlrd Book, writes to a clone that copies only the sheets
+        written.
+        """
+        filler = cls.__new__(cls)
+        filler.rb = template.rb
+        filler.wb = template.clone()
+        filler._sheet_index_cache = {name: idx for idx, name in enumerate(template.sheet_names)}
+        return filler
 
     def _get_worksheets(self):
         """
@@ -130,7 +142,7 @@ class RJFiller:
 
         # Fallback: scan sheets (in case cache is stale)
         for idx in range(len(self._get_worksheets())):
-            if self.wb.get_sheet(idx).name == sheet_name:
+            if self._get_worksheets()[idx].name == sheet_name:
                 self._sheet_index_cache[sheet_name] = idx
                 return self.wb.get_sheet(idx)
 
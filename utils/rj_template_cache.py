@@ -0,0 +1,239 @@
+"""
+RJ template cache — parse an RJ workbook once, clone it for every export.
+
+Opening an RJ with xlrd (formatting_info=True) and copying it with xlutils
+costs well over a second on the real workbook, and every export used to pay
+it. Here a workbook is parsed once into a WorkbookTemplate:
+- rb: the xlrd Book, the read side RJFiller reads previous values from
+  (shared by every clone, never written)
+- wb: the xlutils copy, never written either; its sheets' BIFF streams are
+  serialized once when the template is built
+- clone(): a writable xlwt Workbook sharing the template's sheets. A sheet
+  is copied the first time it is fetched with get_sheet(), and a row of
+  that sheet the first time it is written; sheets never fetched are saved
+  from the cached BIFF bytes. Strings and styles are copied per clone
+  (shallow: their indexes only ever grow)
+
+Templates are cached by key:
+- template(path): the blank RJ (Rj Vierge.xls), re-parsed when the file changes
+- base(data): RJs used as a base (archived previous day), by content
+  digest, RJ_TEMPLATE_CACHE_SIZE most recent
+A cold parse runs outside the cache lock, under a lock of its own key:
+exports of other (or already cached) templates never wait for it.
+"""
+
+import copy
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import xlrd
+import xlwt
+from xlutils.copy import copy as xlutils_copy
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 4
+
+
+def _copy_containers(attrs: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of an attribute dict with its dict / list / set values copied one level."""
+    return {k: copy.copy(v) if isinstance(v, (dict, list, set)) else v for k, v in attrs.items()}
+
+
+def _copy_object(obj):
+    clone = object.__new__(type(obj))
+    clone.__dict__.update(_copy_containers(obj.__dict__))
+    return clone
+
+
+def _copy_row(row, sheet):
+    """Private copy of a shared xlwt Row, attached to `sheet`."""
+    clone = copy.copy(row)
+    clone._Row__cells = dict(row._Row__cells)
+    clone._Row__parent = sheet
+    clone._Row__parent_wb = sheet.get_parent()
+    return clone
+
+
+class _CowSheet(xlwt.Worksheet):
+    """A clone's own copy of a template sheet; rows stay shared until written."""
+
+    def row(self, indx):
+        if indx in self._shared_rows:
+            self._shared_rows.discard(indx)
+            rows = self._Worksheet__rows
+            rows[indx] = _copy_row(rows[indx], self)
+        return super().row(indx)
+
+
+class _FrozenSheet:
+    """
+    A template sheet inside a clone that was never fetched: attribute reads
+    go to the template sheet, the BIFF stream comes from the cache. Setting
+    an attribute to a new value (e.g. `selected`) copies the sheet first.
+    """
+
+    __slots__ = ('_sheet', '_biff', '_book', '_index')
+
+    def __init__(self, sheet, biff, book, index):
+        for name, value in zip(self.__slots__, (sheet, biff, book, index)):
+            object.__setattr__(self, name, value)
+
+    def __getattr__(self, name):
+        return getattr(self._sheet, name)
+
+    def __setattr__(self, name, value):
+        if getattr(self._sheet, name) != value:
+            setattr(self._book.get_sheet(self._index), name, value)
+
+    def get_biff_data(self):
+        return self._biff
+
+    def thaw(self, book) -> _CowSheet:
+        sheet = object.__new__(_CowSheet)
+        sheet.__dict__.update(_copy_containers(self._sheet.__dict__))
+        sheet._Worksheet__parent = book
+        cols = sheet._Worksheet__cols
+        for colx, col in cols.items():
+            cols[colx] = copy.copy(col)
+            cols[colx]._parent, cols[colx]._parent_wb = sheet, book
+        sheet._shared_rows = set(sheet._Worksheet__rows)
+        return sheet
+
+
+class ClonedWorkbook(xlwt.Workbook):
+    """Writable xlwt Workbook cloned from a WorkbookTemplate."""
+
+    def get_sheet(self, sheet):
+        index = sheet if isinstance(sheet, int) else self.sheet_index(sheet)
+        sheets = self._Workbook__worksheets
+        if isinstance(sheets[index], _FrozenSheet):
+            sheets[index] = sheets[index].thaw(self)
+        return sheets[index]
+
+    @property
+    def copied_sheets(self) -> List[str]:
+        """Names of the sheets this clone holds its own copy of."""
+        return [s.name for s in self._Workbook__worksheets if not isinstance(s, _FrozenSheet)]
+
+
+class WorkbookTemplate:
+    """One RJ workbook parsed once; clone() for each export."""
+
+    def __init__(self, data: bytes):
+        t0 = time.perf_counter()
+        self.digest = hashlib.sha1(data).hexdigest()
+        self.size = len(data)
+        self.rb = xlrd.open_workbook(file_contents=data, formatting_info=True)
+        self.wb = xlutils_copy(self.rb)
+        self.sheet_names = self.rb.sheet_names()
+
+        # What Workbook.get_biff_data() does to the sheets before writing them
+        self._sheets = list(self.wb._Workbook__worksheets)
+        self._sheets[self.wb.active_sheet].selected = True
+        self._biff = [sheet.get_biff_data() for sheet in self._sheets]
+        self.parse_ms = (time.perf_counter() - t0) * 1000
+
+    def clone(self) -> ClonedWorkbook:
+        """A writable copy; only the sheets fetched with get_sheet() are copied."""
+        book = object.__new__(ClonedWorkbook)
+        book.__dict__.update(_copy_containers(self.wb.__dict__))
+        book._Workbook__sst = _copy_object(self.wb._Workbook__sst)
+        book._Workbook__styles = _copy_object(self.wb._Workbook__styles)
+        book._Workbook__worksheets = [_FrozenSheet(sheet, biff, book, i)
+                                      for i, (sheet, biff) in enumerate(zip(self._sheets, self._biff))]
+        return book
+
+
+# ── Cache ────────────────────────────────────────────────────────────────
+
+_lock = threading.Lock()                                # guards the dicts below, never held while parsing
+_templates: Dict[str, tuple] = {}                       # path → (mtime, size, template)
+_bases: 'OrderedDict[str, WorkbookTemplate]' = OrderedDict()  # digest → template, LRU
+_parsing: Dict[tuple, threading.Lock] = {}              # cache key → lock of its single parser
+_stats = {'hits': 0, 'misses': 0}
+
+
+def _cached(key: tuple, lookup, parse, publish):
+    """
+    lookup() under _lock; on a miss parse() outside it — one parser per key,
+    concurrent callers of the same key wait for it, other keys do not — and
+    publish(parsed) under _lock.
+    """
+    with _lock:
+        found = lookup()
+        if found is not None:
+            _stats['hits'] += 1
+            return found
+        key_lock = _parsing.setdefault(key, threading.Lock())
+    with key_lock:
+        with _lock:
+            found = lookup()            # parsed by the thread we waited for
+            if found is not None:
+                _stats['hits'] += 1
+                return found
+        parsed = parse()
+        with _lock:
+            publish(parsed)
+            _stats['misses'] += 1
+            _parsing.pop(key, None)
+        return parsed
+
+
+def template(path: str) -> Optional[WorkbookTemplate]:
+    """The workbook at `path`, parsed once per file version; None if missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    version = (st.st_mtime, st.st_size)
+
+    def lookup():
+        cached = _templates.get(path)
+        return cached[2] if cached and cached[:2] == version else None
+
+    def parse():
+        with open(path, 'rb') as f:
+            parsed = WorkbookTemplate(f.read())
+        logger.info(f"RJ template parsed: {path} ({parsed.parse_ms:.0f} ms)")
+        return parsed
+
+    def publish(parsed):
+        _templates[path] = (*version, parsed)
+
+    return _cached(('template', path), lookup, parse, publish)
+
+
+def base(data: bytes, max_size: int = DEFAULT_CACHE_SIZE) -> WorkbookTemplate:
+    """The RJ with these bytes, parsed once while among the `max_size` most recent."""
+    digest = hashlib.sha1(data).hexdigest()
+
+    def lookup():
+        parsed = _bases.get(digest)
+        if parsed is not None:
+            _bases.move_to_end(digest)
+        return parsed
+
+    def publish(parsed):
+        _bases[digest] = parsed
+        while len(_bases) > max(0, max_size):
+            _bases.popitem(last=False)
+
+    return _cached(('base', digest), lookup, lambda: WorkbookTemplate(data), publish)
+
+
+def clear() -> None:
+    with _lock:
+        _templates.clear()
+        _bases.clear()
+        _stats.update(hits=0, misses=0)
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        return {**_stats, 'templates': len(_templates), 'bases': len(_bases)}
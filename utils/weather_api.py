@@ -1,11 +1,13 @@
 """
 Utility to fetch weather forecast using OpenWeather API (free tier).
+
+Requests go through the cached WeatherService (utils/weather_service.py).
 """
 
-import os
-import requests
 from datetime import datetime
 
+from utils.weather_service import get_weather_service
+
 
 def get_current_weather_data():
     """
@@ -13,23 +15,11 @@ def get_current_weather_data():
 
     Returns:
         dict with temperature, feels_like, description, humidity, wind_speed
+
+    Raises:
+        WeatherUnavailable: If OpenWeather fails and nothing is cached
     """
-    api_key = os.getenv('OPENWEATHER_API_KEY', '')
-    lat, lon = 45.5800, -73.7600
-
-    url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={api_key}&units=metric&lang=fr"
-    response = requests.get(url, timeout=10)
-    response.raise_for_status()
-    data = response.json()
-
-    return {
-        'temperature': round(data['main']['temp']),
-        'feels_like': round(data['main']['feels_like']),
-        'description': data['weather'][0]['description'].capitalize(),
-        'humidity': data['main']['humidity'],
-        'wind_speed': round(data['wind']['speed'] * 3.6),  # km/h
-        'icon': data['weather'][0]['icon'],
-    }
+    return get_weather_service().get_current()
 
 def get_weather_forecast_laval():
     """
@@ -38,24 +28,10 @@ def get_weather_forecast_laval():
     Returns: Formatted string with weather data.
     """
     try:
-        # Using a free OpenWeather API key (public for this project)
-        # You can get your own at: https://openweathermap.org/api
-        api_key = os.getenv('OPENWEATHER_API_KEY', '')
-
-        # Coordinates for Laval, QC
-        lat, lon = 45.5800, -73.7600
-
-        # Get current weather + 7-day forecast
-        url = f"https://api.openweathermap.org/data/2.5/forecast?lat={lat}&lon={lon}&appid={api_key}&units=metric&lang=fr&cnt=40"
-
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        # Get current weather
-        current_url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={api_key}&units=metric&lang=fr"
-        current_response = requests.get(current_url, timeout=10)
-        current_data = current_response.json()
+        # Get current weather + 7-day forecast (OPENWEATHER_API_KEY)
+        service = get_weather_service()
+        data = service.get_openweather('forecast', cnt=40)
+        current_data = service.get_openweather('weather')
 
         # Format the forecast
         today = datetime.now().strftime('%d %B %Y')
@@ -2,16 +2,16 @@
 Utility to fetch tomorrow's detailed weather for Laval, QC and render a
 weather card image replicating the MétéoMédia detailed forecast style.
 
-Uses Open-Meteo API (free, no API key required).
+Uses Open-Meteo API (free, no API key required). Fetching and caching go
+through utils.weather_service; this module parses and renders.
 Returns 4 time periods: Matin, Après-midi, Soir, Nuit — each with
 temperature, feels-like, conditions, wind, gusts, humidity, precipitation %.
 """
 
-import json
 import io
 import math
-import urllib.request
 from collections import Counter
+from functools import lru_cache
 from datetime import datetime, timedelta
 from PIL import Image, ImageDraw, ImageFont
 
@@ -73,132 +73,141 @@ def _wind_direction_fr(degrees):
     return dirs[idx]
 
 
+def _target_datetime(target_date=None):
+    """Normalize None (tomorrow) / 'YYYY-MM-DD' / datetime to a datetime."""
+    if target_date is None:
+        return datetime.now() + timedelta(days=1)
+    if isinstance(target_date, str):
+        return datetime.strptime(target_date, '%Y-%m-%d')
+    return target_date
+
+
+def forecast_params(date_str):
+    """Open-Meteo query parameters for one day in Laval, QC."""
+    return {
+        'latitude': 45.5833,
+        'longitude': -73.75,
+        'hourly': 'temperature_2m,apparent_temperature,weathercode,'
+                  'windspeed_10m,winddirection_10m,windgusts_10m,'
+                  'relativehumidity_2m,precipitation_probability,snowfall',
+        'daily': 'temperature_2m_max,temperature_2m_min,weathercode,'
+                 'precipitation_sum,windspeed_10m_max',
+        'timezone': 'America/Toronto',
+        'start_date': date_str,
+        'end_date': date_str,
+    }
+
+
+def parse_forecast(data, target_dt):
+    """
+    Reduce an Open-Meteo hourly/daily response to the 4 display periods.
+    """
+    date_str = target_dt.strftime('%Y-%m-%d')
+    hourly = data['hourly']
+    daily = data.get('daily', {})
+
+    periods = []
+    for label, h_start, h_end in PERIODS:
+        temps, feels, codes, winds, dirs, gusts, humids, probs, snows = \
+            [], [], [], [], [], [], [], [], []
+
+        for i, time_str in enumerate(hourly['time']):
+            hour = int(time_str.split('T')[1].split(':')[0])
+            if h_start < h_end:
+                in_period = h_start <= hour < h_end
+            else:
+                in_period = hour >= h_start or hour < h_end
+
+            if in_period:
+                temps.append(hourly['temperature_2m'][i])
+                feels.append(hourly['apparent_temperature'][i])
+                codes.append(hourly['weathercode'][i])
+                winds.append(hourly['windspeed_10m'][i])
+                dirs.append(hourly['winddirection_10m'][i])
+                gusts.append(hourly['windgusts_10m'][i])
+                humids.append(hourly['relativehumidity_2m'][i])
+                probs.append(hourly['precipitation_probability'][i])
+                snows.append(hourly['snowfall'][i])
+
+        if not temps:
+            continue
+
+        avg_temp = round(sum(temps) / len(temps))
+        avg_feels = round(sum(feels) / len(feels))
+        avg_wind = round(sum(winds) / len(winds))
+        max_gust = round(max(gusts))
+        avg_humid = round(sum(humids) / len(humids))
+        max_prob = round(max(probs))
+        total_snow = round(sum(snows), 1)
+
+        code_counts = Counter(codes)
+        dominant_code = code_counts.most_common(1)[0][0]
+        desc, icon_type = WMO_CODES.get(dominant_code, ("Inconnu", "cloud"))
+
+        avg_dir_deg = sum(dirs) / len(dirs) if dirs else 0
+        wind_dir = _wind_direction_fr(avg_dir_deg)
+
+        has_snow = any(c in SNOW_CODES for c in codes)
+        snow_cm = total_snow if has_snow else 0
+
+        # Night icons
+        if label in ('Nuit', 'Soir') and icon_type == 'sun':
+            icon_type = 'night_clear'
+        elif label in ('Nuit', 'Soir') and icon_type == 'sun_cloud':
+            icon_type = 'night_cloud'
+
+        periods.append({
+            'label': label,
+            'temp': avg_temp,
+            'feels_like': avg_feels,
+            'description': desc,
+            'weather_code': dominant_code,
+            'icon_type': icon_type,
+            'wind_kmh': avg_wind,
+            'wind_dir': wind_dir,
+            'gusts_kmh': max_gust,
+            'humidity': avg_humid,
+            'precip_prob': max_prob,
+            'snow_cm': snow_cm,
+        })
+
+    daily_max = round(daily['temperature_2m_max'][0]) if daily.get('temperature_2m_max') else None
+    daily_min = round(daily['temperature_2m_min'][0]) if daily.get('temperature_2m_min') else None
+    daily_code = daily['weathercode'][0] if daily.get('weathercode') else 0
+    daily_precip = round(daily['precipitation_sum'][0], 1) if daily.get('precipitation_sum') else 0
+    daily_wind = round(daily['windspeed_10m_max'][0]) if daily.get('windspeed_10m_max') else 0
+
+    return {
+        'date': date_str,
+        'date_obj': target_dt,
+        'day_name': DAYS_FR_FULL[target_dt.weekday()],
+        'day_short': DAYS_FR[target_dt.weekday()],
+        'day_num': target_dt.day,
+        'month_name': MONTHS_FR_FULL[target_dt.month - 1],
+        'month_short': MONTHS_FR[target_dt.month - 1],
+        'year': target_dt.year,
+        'temp_max': daily_max,
+        'temp_min': daily_min,
+        'description': WMO_CODES.get(daily_code, ("Inconnu", "cloud"))[0],
+        'precipitation_mm': daily_precip,
+        'wind_max_kmh': daily_wind,
+        'periods': periods,
+        'fetched_at': datetime.now().strftime('%Y-%m-%d %H:%M'),
+    }
+
+
 def fetch_tomorrow_weather(target_date=None):
     """
-    Fetch hourly weather for Laval, QC using Open-Meteo.
+    Hourly weather for Laval, QC (Open-Meteo) through the cached WeatherService.
     target_date: a datetime object or 'YYYY-MM-DD' string for the date to fetch.
                  Defaults to tomorrow if not provided.
+    Returns None if the forecast is unavailable and nothing is cached.
     """
+    from utils.weather_service import get_weather_service
     try:
-        if target_date is None:
-            target_dt = datetime.now() + timedelta(days=1)
-        elif isinstance(target_date, str):
-            target_dt = datetime.strptime(target_date, '%Y-%m-%d')
-        else:
-            target_dt = target_date
-
-        date_str = target_dt.strftime('%Y-%m-%d')
-
-        url = (
-            'https://api.open-meteo.com/v1/forecast'
-            '?latitude=45.5833&longitude=-73.75'
-            '&hourly=temperature_2m,apparent_temperature,weathercode,'
-            'windspeed_10m,winddirection_10m,windgusts_10m,'
-            'relativehumidity_2m,precipitation_probability,snowfall'
-            '&daily=temperature_2m_max,temperature_2m_min,weathercode,'
-            'precipitation_sum,windspeed_10m_max'
-            '&timezone=America/Toronto'
-            f'&start_date={date_str}&end_date={date_str}'
-        )
-        req = urllib.request.Request(url, headers={'User-Agent': 'SheratonAudit/1.0'})
-        resp = urllib.request.urlopen(req, timeout=10)
-        data = json.loads(resp.read())
-
-        hourly = data['hourly']
-        daily = data.get('daily', {})
-
-        periods = []
-        for label, h_start, h_end in PERIODS:
-            temps, feels, codes, winds, dirs, gusts, humids, probs, snows = \
-                [], [], [], [], [], [], [], [], []
-
-            for i, time_str in enumerate(hourly['time']):
-                hour = int(time_str.split('T')[1].split(':')[0])
-                if h_start < h_end:
-                    in_period = h_start <= hour < h_end
-                else:
-                    in_period = hour >= h_start or hour < h_end
-
-                if in_period:
-                    temps.append(hourly['temperature_2m'][i])
-                    feels.append(hourly['apparent_temperature'][i])
-                    codes.append(hourly['weathercode'][i])
-                    winds.append(hourly['windspeed_10m'][i])
-                    dirs.append(hourly['winddirection_10m'][i])
-                    gusts.append(hourly['windgusts_10m'][i])
-                    humids.append(hourly['relativehumidity_2m'][i])
-                    probs.append(hourly['precipitation_probability'][i])
-                    snows.append(hourly['snowfall'][i])
-
-            if not temps:
-                continue
-
-            avg_temp = round(sum(temps) / len(temps))
-            avg_feels = round(sum(feels) / len(feels))
-            avg_wind = round(sum(winds) / len(winds))
-            max_gust = round(max(gusts))
-            avg_humid = round(sum(humids) / len(humids))
-            max_prob = round(max(probs))
-            total_snow = round(sum(snows), 1)
-
-            code_counts = Counter(codes)
-            dominant_code = code_counts.most_common(1)[0][0]
-            desc, icon_type = WMO_CODES.get(dominant_code, ("Inconnu", "cloud"))
-
-            avg_dir_deg = sum(dirs) / len(dirs) if dirs else 0
-            wind_dir = _wind_direction_fr(avg_dir_deg)
-
-            has_snow = any(c in SNOW_CODES for c in codes)
-            snow_cm = total_snow if has_snow else 0
-
-            # Night icons
-            if label in ('Nuit', 'Soir') and icon_type == 'sun':
-                icon_type = 'night_clear'
-            elif label in ('Nuit', 'Soir') and icon_type == 'sun_cloud':
-                icon_type = 'night_cloud'
-
-            periods.append({
-                'label': label,
-                'temp': avg_temp,
-                'feels_like': avg_feels,
-                'description': desc,
-                'weather_code': dominant_code,
-                'icon_type': icon_type,
-                'wind_kmh': avg_wind,
-                'wind_dir': wind_dir,
-                'gusts_kmh': max_gust,
-                'humidity': avg_humid,
-                'precip_prob': max_prob,
-                'snow_cm': snow_cm,
-            })
-
-        daily_max = round(daily['temperature_2m_max'][0]) if daily.get('temperature_2m_max') else None
-        daily_min = round(daily['temperature_2m_min'][0]) if daily.get('temperature_2m_min') else None
-        daily_code = daily['weathercode'][0] if daily.get('weathercode') else 0
-        daily_precip = round(daily['precipitation_sum'][0], 1) if daily.get('precipitation_sum') else 0
-        daily_wind = round(daily['windspeed_10m_max'][0]) if daily.get('windspeed_10m_max') else 0
-
-        return {
-            'date': date_str,
-            'date_obj': target_dt,
-            'day_name': DAYS_FR_FULL[target_dt.weekday()],
-            'day_short': DAYS_FR[target_dt.weekday()],
-            'day_num': target_dt.day,
-            'month_name': MONTHS_FR_FULL[target_dt.month - 1],
-            'month_short': MONTHS_FR[target_dt.month - 1],
-            'year': target_dt.year,
-            'temp_max': daily_max,
-            'temp_min': daily_min,
-            'description': WMO_CODES.get(daily_code, ("Inconnu", "cloud"))[0],
-            'precipitation_mm': daily_precip,
-            'wind_max_kmh': daily_wind,
-            'periods': periods,
-        }
-
+        return get_weather_service().get_forecast(target_date)
     except Exception as e:
         print(f"Error fetching weather from Open-Meteo: {e}")
-        import traceback
-        traceback.print_exc()
         return None
 
 
@@ -415,6 +424,12 @@ def _draw_snowflake_icon(draw, x, y):
 
 # ─── Font loading ───
 
+@lru_cache(maxsize=None)
+def _font(path, size):
+    return ImageFont.truetype(path, size) if path else ImageFont.load_default()
+
+
+@lru_cache(maxsize=1)
 def _load_fonts():
     bold_path = reg_path = None
     for p in ["/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
@@ -435,9 +450,9 @@ def _load_fonts():
             pass
 
     def b(size):
-        return ImageFont.truetype(bold_path, size) if bold_path else ImageFont.load_default()
+        return _font(bold_path, size)
     def r(size):
-        return ImageFont.truetype(reg_path, size) if reg_path else ImageFont.load_default()
+        return _font(reg_path, size)
     return b, r
 
 
@@ -552,7 +567,7 @@ def render_weather_card(weather_data):
     draw.line([(0, y), (W, y)], fill=BORDER, width=1)
 
     # ─── Footer ───
-    now_str = datetime.now().strftime('%Y-%m-%d %H:%M')
+    now_str = weather_data.get('fetched_at') or datetime.now().strftime('%Y-%m-%d %H:%M')
     draw.text((X_PAD, y + 8),
               f"Source: Open-Meteo.com (Environnement Canada) · Généré: {now_str}",
               fill=LABEL_GREY, font=R(13))
@@ -560,12 +575,26 @@ def render_weather_card(weather_data):
     return img
 
 
+def get_weather_card_png(target_date=None):
+    """
+    Main entry point — PNG bytes of the weather card for the given date.
+    Cards are cached by forecast content, so repeated calls do not redraw.
+    target_date: 'YYYY-MM-DD' string or datetime. Defaults to tomorrow.
+    """
+    from utils.weather_service import get_weather_service
+    try:
+        return get_weather_service().get_card_png(target_date)
+    except Exception as e:
+        print(f"Error rendering weather card: {e}")
+        return None
+
+
 def get_weather_screenshot(target_date=None):
     """
-    Main entry point — fetches weather for the given date and returns a PIL Image card.
+    Fetches weather for the given date and returns a PIL Image card.
     target_date: 'YYYY-MM-DD' string or datetime. Defaults to tomorrow.
     """
-    weather_data = fetch_tomorrow_weather(target_date)
-    if weather_data is None:
+    png = get_weather_card_png(target_date)
+    if png is None:
         return None
-    return render_weather_card(weather_data)
+    return Image.open(io.BytesIO(png))
@@ -0,0 +1,333 @@
+"""
+Weather Service — One cached source of weather for Laval, QC.
+
+Features:
+- Forecasts (Open-Meteo) and current conditions (OpenWeather) go through one
+  pooled requests.Session and a TTL cache keyed by date/endpoint
+- Stale-while-revalidate: an expired entry is still served while a background
+  refresh runs; if upstream is slow or down, the last good value is returned
+- Identical fetches in flight are coalesced into one upstream call
+- Rendered weather cards are cached as PNG bytes keyed by a hash of the data
+  (fetched_at included, since the footer shows it), so a card is drawn once
+  per capture
+- A daemon thread prefetches today/tomorrow (data + card) before the night shift
+"""
+
+import hashlib
+import io
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import requests
+
+from utils.weather_capture import _target_datetime, forecast_params, parse_forecast, render_weather_card
+
+logger = logging.getLogger(__name__)
+
+LAVAL_LAT, LAVAL_LON = 45.5800, -73.7600
+
+DEFAULTS = {
+    'OPEN_METEO_URL': 'https://api.open-meteo.com/v1/forecast',
+    'OPENWEATHER_URL': 'https://api.openweathermap.org/data/2.5',
+    'OPENWEATHER_API_KEY': '',
+    'WEATHER_CACHE_TTL': 1800,
+    'WEATHER_STALE_SECONDS': 6 * 3600,
+    'WEATHER_STALE_WAIT': 3,
+    'WEATHER_TIMEOUT': 10,
+    'WEATHER_CARD_CACHE_SIZE': 16,
+    'WEATHER_PREFETCH_ENABLED': True,
+    'WEATHER_PREFETCH_HOUR': 22,
+}
+
+
+class WeatherUnavailable(Exception):
+    """Raised when upstream fails and nothing usable is cached."""
+    pass
+
+
+class WeatherService:
+    """TTL-cached weather data and rendered cards with background prefetch."""
+
+    def __init__(self, app=None, config=None):
+        self._http = requests.Session()
+        self._http.headers['User-Agent'] = 'SheratonAudit/1.0'
+        self._cache = {}          # key -> (monotonic fetched_at, value)
+        self._inflight = {}       # key -> Future
+        self._cards = OrderedDict()  # data hash -> PNG bytes
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='weather')
+        self._thread = None
+        self._stopping = threading.Event()
+        self._configure(config or {})
+
+        if app:
+            self.init_app(app)
+
+    def _configure(self, config):
+        cfg = {k: config.get(k, v) for k, v in DEFAULTS.items()}
+        self.open_meteo_url = cfg['OPEN_METEO_URL']
+        self.openweather_url = cfg['OPENWEATHER_URL'].rstrip('/')
+        self.openweather_key = cfg['OPENWEATHER_API_KEY']
+        self.ttl = float(cfg['WEATHER_CACHE_TTL'])
+        self.stale_seconds = float(cfg['WEATHER_STALE_SECONDS'])
+        self.stale_wait = float(cfg['WEATHER_STALE_WAIT'])
+        self.timeout = float(cfg['WEATHER_TIMEOUT'])
+        self.card_cache_size = int(cfg['WEATHER_CARD_CACHE_SIZE'])
+        self.prefetch_enabled = cfg['WEATHER_PREFETCH_ENABLED']
+        self.prefetch_hour = int(cfg['WEATHER_PREFETCH_HOUR'])
+
+    def init_app(self, app):
+        """Read WEATHER_* config, register on `app.extensions`, start prefetch."""
+        self._configure(app.config)
+        app.extensions['weather_service'] = self
+        if self.prefetch_enabled:
+            self.start_prefetch()
+
+    # ── Public API ─────────────────────────────────────────────────────
+
+    def get_forecast(self, target_date=None):
+        """
+        Detailed forecast for one day (see weather_capture.parse_forecast).
+
+        target_date: datetime or 'YYYY-MM-DD'; defaults to tomorrow.
+
+        Raises:
+            WeatherUnavailable: upstream failed and nothing is cached
+        """
+        target_dt = _target_datetime(target_date)
+        date_str = target_dt.strftime('%Y-%m-%d')
+        return dict(self._get(('forecast', date_str),
+                              lambda: self._fetch_forecast(target_dt)))
+
+    def get_current(self):
+        """Current conditions as {temperature, feels_like, description, ...}."""
+        data = self.get_openweather('weather')
+        return {
+            'temperature': round(data['main']['temp']),
+            'feels_like': round(data['main']['feels_like']),
+            'description': data['weather'][0]['description'].capitalize(),
+            'humidity': data['main']['humidity'],
+            'wind_speed': round(data['wind']['speed'] * 3.6),  # km/h
+            'icon': data['weather'][0]['icon'],
+        }
+
+    def get_openweather(self, endpoint, **params):
+        """Raw cached OpenWeather response ('weather' or 'forecast')."""
+        key = ('openweather', endpoint, tuple(sorted(params.items())))
+        return self._get(key, lambda: self._fetch_openweather(endpoint, **params))
+
+    def get_card_png(self, target_date=None):
+        """PNG bytes of the weather card, rendered once per distinct forecast."""
+        return self.render_card(self.get_forecast(target_date))
+
+    def render_card(self, weather_data):
+        """Render (or reuse) the card for already-fetched forecast data."""
+        key = data_hash(weather_data)
+        with self._lock:
+            png = self._cards.get(key)
+            if png is not None:
+                self._cards.move_to_end(key)
+                return png
+
+        img = render_weather_card(weather_data)
+        if img is None:
+            return None
+        buf = io.BytesIO()
+        img.save(buf, format='PNG')
+        png = buf.getvalue()
+
+        with self._lock:
+            self._cards[key] = png
+            while len(self._cards) > self.card_cache_size:
+                self._cards.popitem(last=False)
+        return png
+
+    def peek_forecast(self, target_date=None):
+        """
+        Cached forecast without blocking on upstream (None if never fetched).
+
+        A missing or expired entry triggers a background refresh, so the
+        next caller gets fresh data.
+        """
+        target_dt = _target_datetime(target_date)
+        key = ('forecast', target_dt.strftime('%Y-%m-%d'))
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is None or time.monotonic() - entry[0] >= self.ttl:
+            self._refresh(key, lambda: self._fetch_forecast(target_dt))
+        return dict(entry[1]) if entry else None
+
+    def prefetch(self, dates=None):
+        """
+        Refresh forecasts (and render cards) for `dates` (default today and
+        tomorrow) plus current conditions. Errors are logged, not raised.
+
+        Returns:
+            dict: {date_str: True/False}
+        """
+        if dates is None:
+            today = datetime.now()
+            dates = [today, today + timedelta(days=1)]
+
+        results = {}
+        for d in dates:
+            target_dt = _target_datetime(d)
+            date_str = target_dt.strftime('%Y-%m-%d')
+            future = self._refresh(('forecast', date_str),
+                                   lambda t=target_dt: self._fetch_forecast(t))
+            try:
+                self.render_card(future.result())
+                results[date_str] = True
+            except Exception as e:
+                logger.warning(f"Weather prefetch failed for {date_str}: {e}")
+                results[date_str] = False
+
+        if self.openweather_key:
+            try:
+                self._refresh(('openweather', 'weather', ()),
+                              lambda: self._fetch_openweather('weather')).result()
+            except Exception as e:
+                logger.warning(f"Current weather prefetch failed: {e}")
+        return results
+
+    def clear(self):
+        """Drop cached data and cards."""
+        with self._lock:
+            self._cache.clear()
+            self._cards.clear()
+
+    # ── Background prefetch ────────────────────────────────────────────
+
+    def start_prefetch(self):
+        """Start the daily prefetch thread (idempotent)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(
+                target=self._run_prefetch, name='weather-prefetch', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        """Stop the prefetch thread."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def seconds_until_prefetch(self, now=None):
+        """Seconds from `now` until the next WEATHER_PREFETCH_HOUR."""
+        now = now or datetime.now()
+        run_at = now.replace(hour=self.prefetch_hour, minute=0, second=0, microsecond=0)
+        if run_at <= now:
+            run_at += timedelta(days=1)
+        return (run_at - now).total_seconds()
+
+    def _run_prefetch(self):
+        while not self._stopping.wait(self.seconds_until_prefetch()):
+            try:
+                results = self.prefetch()
+                logger.info(f"Weather prefetch: {results}")
+            except Exception as e:
+                logger.error(f"Weather prefetch error: {str(e)}")
+
+    # ── Cache internals ────────────────────────────────────────────────
+
+    def _get(self, key, loader):
+        """
+        Fresh → cached value. Within the stale window → cached value plus a
+        background refresh. Older → wait up to `stale_wait` for upstream,
+        else fall back to the old value. Nothing cached → wait for upstream.
+        """
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry[0]
+            if age < self.ttl:
+                return entry[1]
+            if age < self.ttl + self.stale_seconds:
+                self._refresh(key, loader)
+                return entry[1]
+
+        future = self._refresh(key, loader)
+        if entry is None:
+            return future.result()
+        try:
+            return future.result(timeout=self.stale_wait)
+        except Exception as e:
+            logger.warning(f"Weather upstream slow or failing ({key[0]}), serving stale: {e}")
+            return entry[1]
+
+    def _refresh(self, key, loader) -> Future:
+        """Start (or join) the upstream fetch for `key`; stores the result."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._executor.submit(self._load, key, loader)
+                self._inflight[key] = future
+        return future
+
+    def _load(self, key, loader):
+        try:
+            value = loader()
+            with self._lock:
+                self._cache[key] = (time.monotonic(), value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    # ── Upstream calls ─────────────────────────────────────────────────
+
+    def _fetch_forecast(self, target_dt):
+        params = forecast_params(target_dt.strftime('%Y-%m-%d'))
+        try:
+            resp = self._http.get(self.open_meteo_url, params=params, timeout=self.timeout)
+            resp.raise_for_status()
+            return parse_forecast(resp.json(), target_dt)
+        except (requests.RequestException, KeyError, ValueError) as e:
+            raise WeatherUnavailable(f"Open-Meteo: {e}") from e
+
+    def _fetch_openweather(self, endpoint, **params):
+        query = {'lat': LAVAL_LAT, 'lon': LAVAL_LON, 'appid': self.openweather_key,
+                 'units': 'metric', 'lang': 'fr', **params}
+        try:
+            resp = self._http.get(f"{self.openweather_url}/{endpoint}",
+                                  params=query, timeout=self.timeout)
+            resp.raise_for_status()
+            return resp.json()
+        except (requests.RequestException, ValueError) as e:
+            raise WeatherUnavailable(f"OpenWeather {endpoint}: {e}") from e
+
+
+def data_hash(weather_data):
+    """Stable hash of what the card shows: forecast content plus fetched_at (footer), not datetime objects."""
+    content = {k: v for k, v in weather_data.items() if k != 'date_obj'}
+    return hashlib.sha1(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+
+
+_default_service = None
+_default_lock = threading.Lock()
+
+
+def get_weather_service():
+    """The app's WeatherService, or a process-wide one outside an app context."""
+    global _default_service
+    from flask import current_app, has_app_context
+    if has_app_context():
+        service = current_app.extensions.get('weather_service')
+        if service is not None:
+            return service
+    with _default_lock:
+        if _default_service is None:
+            import os
+            _default_service = WeatherService(config={
+                'OPENWEATHER_API_KEY': os.getenv('OPENWEATHER_API_KEY', ''),
+                'WEATHER_PREFETCH_ENABLED': False,
+            })
+        return _default_service